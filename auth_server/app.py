@@ -175,8 +175,8 @@ billing_client = ResilientServiceClient(
     service_name="billing_server",
     timeout=5.0,
     max_retries=2,  # Fast fail during registration - queue if fails
-    circuit_breaker_threshold=3,
-    circuit_breaker_timeout=30
+    failure_threshold=3,
+    recovery_timeout=30
 )
 
 def get_internal_headers():
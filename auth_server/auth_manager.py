@@ -10,6 +10,8 @@ import os
 from pathlib import Path
 from datetime import datetime
 
+from db_utils import get_database
+
 logger = logging.getLogger(__name__)
 
 
@@ -32,23 +34,21 @@ class AuthManager:
         """
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = get_database(self.db_path)
         self._init_db()
         logger.info(f"AuthManager initialized with database at {self.db_path}")
 
     def _get_conn(self) -> sqlite3.Connection:
         """
-        Get a database connection with row factory set.
+        Get this thread's shared database connection.
+        
+        WAL mode, busy timeout and the Row factory are applied once when the
+        connection is opened (see backend/db_utils.py), not on every call.
         
         Returns:
             sqlite3.Connection object
         """
-        conn = sqlite3.connect(str(self.db_path))
-        conn.row_factory = sqlite3.Row
-        # Enable WAL mode for better concurrency and write performance
-        # WAL (Write-Ahead Logging) allows readers and writers to coexist
-        # without lock contention
-        conn.execute("PRAGMA journal_mode=WAL;")
-        return conn
+        return self._db.connection()
 
     def _init_db(self):
         """Initialize database tables if they don't exist."""
@@ -25,6 +25,8 @@ from pathlib import Path
 from datetime import datetime, timedelta
 from enum import Enum
 
+from db_utils import get_database
+
 logger = logging.getLogger(__name__)
 
 
@@ -70,14 +72,12 @@ class PendingBillingQueue:
         """
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = get_database(self.db_path)
         self._init_db()
     
     def _get_conn(self) -> sqlite3.Connection:
-        """Get a new SQLite connection with row factory."""
-        conn = sqlite3.connect(str(self.db_path))
-        conn.row_factory = sqlite3.Row
-        conn.execute("PRAGMA journal_mode=WAL;")  # Better concurrency
-        return conn
+        """Get this thread's shared SQLite connection (Row factory, WAL)."""
+        return self._db.connection()
     
     def _init_db(self):
         """Initialize the pending billing queue table."""
@@ -3,6 +3,7 @@ import requests
 import logging
 import json
 import uuid
+import hashlib
 import sqlite3
 from pathlib import Path
 from datetime import datetime
@@ -17,7 +18,10 @@ from flask_limiter.util import get_remote_address
 from flask_wtf.csrf import CSRFProtect
 from neo4j import GraphDatabase
 from pydantic import BaseModel, ValidationError
-from service_utils import require_internal_token, get_internal_headers, ResilientServiceClient, ServiceUnavailable
+from service_utils import (
+    require_internal_token, get_internal_headers, ResilientServiceClient, ServiceUnavailable,
+    init_request_deadlines
+)
 
 # --- Local Imports ---
 # These are the new foundational services we just planned
@@ -25,8 +29,10 @@ from llm_client import GeminiClient, MultiModelCostAggregator
 from session_manager import SessionManager
 from job_manager import JobManager
 from feedback_manager import FeedbackManager
+from wiki_state import WikiStateStore, chunk_hash, diff_chunks, entity_name, find_mentions, relationship_support
 from distributed_saga import WikiGenerationSaga
 from cost_tracking import CostTracker
+from db_utils import get_database, add_query_listener, log_slow_queries
 # This is your premium report/wiki generator
 try:
     from knowledge_extraction.orchestrator import KnowledgeExtractor as KnowledgeExtractionOrchestrator
@@ -40,6 +46,20 @@ load_dotenv()
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+# --- End-to-End Request Deadlines ---
+# Every incoming request gets a time budget. ResilientServiceClient shrinks its
+# per-attempt timeouts to fit it, skips retries that cannot finish in time, and
+# forwards the remainder downstream (X-Request-Budget-Ms) so internal services
+# stop working on requests nobody is waiting for any more.
+# Uploads get no budget: the whole file is streamed to the filesystem server and
+# converted there, which can outlast any interactive budget. Job submission keeps
+# it: the request only checks the balance and enqueues, and the job itself runs
+# on a worker or job runner where no deadline applies.
+REQUEST_BUDGET_SECONDS = float(os.environ.get("REQUEST_BUDGET_SECONDS", "45"))
+REQUEST_BUDGET_EXEMPT_ENDPOINTS = {"proxy_file_upload"}
+init_request_deadlines(app, default_budget=REQUEST_BUDGET_SECONDS,
+                       exempt_endpoints=REQUEST_BUDGET_EXEMPT_ENDPOINTS)
+
 # --- Rate Limiting (HIGH priority security: protect /login and /register from brute-force) ---
 # Default: 10 requests per minute per IP. Protect /login and /register more strictly.
 limiter = Limiter(
@@ -110,11 +130,20 @@ GRAPH_SERVER_URL = os.environ.get("GRAPH_SERVER_URL", "bolt://localhost:7687")
 # Ensures graceful degradation when services are slow or temporarily unavailable
 auth_client = ResilientServiceClient(AUTH_SERVER_URL, service_name="Auth Server", max_retries=2, timeout=5)
 billing_client = ResilientServiceClient(BILLING_SERVER_URL, service_name="Billing Server", max_retries=2, timeout=5)
-chroma_client = ResilientServiceClient(CHROMA_SERVER_URL, service_name="Chroma Server", max_retries=1, timeout=30)
+# Chroma gets separate breakers per endpoint group so slow bulk reads (wiki generation)
+# can never open the breaker for latency-critical /query traffic on the same service.
+chroma_client = ResilientServiceClient(
+    CHROMA_SERVER_URL, service_name="Chroma Server", max_retries=1, timeout=30,
+    endpoint_groups={"interactive": ["/query"], "bulk": ["/export", "/collection_version", "/add_chunks", "/add"]},
+    group_settings={"interactive": {"slow_call_duration": 5}, "bulk": {"slow_call_duration": None}}
+)
 filesystem_client = ResilientServiceClient(FILESYSTEM_SERVER_URL, service_name="Filesystem Server", max_retries=2, timeout=10)
 git_client = ResilientServiceClient(GIT_SERVER_URL, service_name="Git Server", max_retries=1, timeout=10)
 external_data_client = ResilientServiceClient(EXTERNAL_DATA_SERVER_URL, service_name="External Data Server", max_retries=1, timeout=15)
 
+# Every resilient client, for circuit breaker monitoring (/admin/circuit_breakers)
+SERVICE_CLIENTS = [auth_client, billing_client, chroma_client, filesystem_client, git_client, external_data_client]
+
 
 # --- Constants ---
 # 100 Credits = 1 Cent ($0.01) | 10,000 Credits = $1.00
@@ -140,9 +169,13 @@ try:
     cost_aggregator.register_client("polish_client", polish_client)
     
     # Initialize our new foundational services
+    # All SQLite-backed managers share tuned per-thread connections (db_utils);
+    # statements slower than SQLITE_SLOW_QUERY_SECONDS are logged.
+    add_query_listener(log_slow_queries)
     session_manager = SessionManager()
     job_manager = JobManager()
     feedback_manager = FeedbackManager()
+    wiki_state = WikiStateStore()
     
     # Initialize cost tracker with dependency injection of resilient billing_client
     # This ensures all pre-auth, capture, and release calls benefit from automatic
@@ -196,11 +229,12 @@ class FailedTransactionLogger:
     def __init__(self, db_path: str = "data/failed_transactions.db"):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = get_database(self.db_path)
         self._init_db()
 
     def _get_conn(self) -> sqlite3.Connection:
-        """Helper to get a new SQLite connection."""
-        return sqlite3.connect(str(self.db_path))
+        """Helper to get this thread's shared SQLite connection (Row factory, WAL)."""
+        return self._db.connection()
 
     def _init_db(self):
         """Creates the 'failed_transactions' table if it doesn't exist."""
@@ -291,8 +325,15 @@ class JobStatusSchema(ma.Schema):
     user_id = ma.fields.Str()
     status = ma.fields.Str()
     job_type = ma.fields.Str()
+    priority = ma.fields.Str(allow_none=True)
     created_at = ma.fields.DateTime()
     result = ma.fields.Raw(allow_none=True)
+    # Only set while the job is QUEUED (1 = starts next)
+    queue_position = ma.fields.Int(allow_none=True)
+    estimated_start_at = ma.fields.DateTime(allow_none=True)
+    # Reported by resumable jobs: {step, step_index, steps_total, done, total, updated_at}
+    progress = ma.fields.Dict(allow_none=True)
+    error = ma.fields.Str(allow_none=True)
 
 class JobsListSchema(ma.Schema):
     """Schema for list of jobs."""
@@ -304,6 +345,15 @@ class CostSummarySchema(ma.Schema):
     total_cost = ma.fields.Float()
     clients = ma.fields.Raw()
 
+class CircuitBreakerStatusSchema(ma.Schema):
+    """Schema for admin circuit breaker status."""
+    services = ma.fields.List(ma.fields.Raw())
+
+class IngestionStatusSchema(ma.Schema):
+    """Schema for admin ingestion pipeline status."""
+    queue = ma.fields.Dict()
+    workers = ma.fields.List(ma.fields.Raw())
+
 class WikiGenerationRequestSchema(ma.Schema):
     """Request schema for wiki generation (empty body, admin-only)."""
     pass
@@ -313,6 +363,7 @@ class WikiGenerationResponseSchema(ma.Schema):
     message = ma.fields.Str()
     job_id = ma.fields.Str()
     status_url = ma.fields.Str()
+    deduplicated = ma.fields.Bool()
 
 class FeedbackRequestSchema(ma.Schema):
     """Request schema for POST /feedback endpoint."""
@@ -1099,8 +1150,9 @@ class JobStatus(MethodView):
         
         user_id = auth_data.get('user_id')
         
-        # 2. Get Job (now securely scoped by the JobManager)
-        job = job_manager.get_job(job_id, user_id)
+        # 2. Get Job (now securely scoped by the JobManager; admins may follow
+        #    a deduplicated job started by another admin)
+        job = job_manager.get_job(job_id, user_id, any_user=auth_data.get('role') == 'admin')
         
         if not job:
             # This now correctly returns 404 if the job doesn't exist OR if the user doesn't own it
@@ -1108,6 +1160,62 @@ class JobStatus(MethodView):
         
         return job
 
+    @blp_jobs.doc(
+        description="Cancel a background job. Queued jobs and jobs running in a worker process can be cancelled; "
+                    "jobs already running in the API's thread pool cannot.",
+        summary="Cancel a background job."
+    )
+    @blp_jobs.response(200, JobStatusSchema)
+    def delete(self, job_id):
+        """Cancel a background job."""
+        # 1. AUTHENTICATION
+        auth_data = _get_user_from_request(request)
+        if not auth_data or not auth_data.get('valid'):
+            abort(401, message="Invalid or missing token")
+        
+        user_id = auth_data.get('user_id')
+        
+        # 2. Cancel (scoped to the owner)
+        job = job_manager.get_job(job_id, user_id)
+        if not job:
+            abort(404, message="Job not found")
+        if not job_manager.cancel_job(job_id, user_id):
+            abort(409, message=f"Job cannot be cancelled in status {job['status']}")
+        
+        logger.info(f"User {user_id} cancelled job {job_id}")
+        return job_manager.get_job(job_id, user_id)
+
+
+@blp_jobs.route('/jobs/<string:job_id>/retry')
+class JobRetry(MethodView):
+    """Retry a failed background job."""
+
+    @blp_jobs.doc(
+        description="Requeue a FAILED or CANCELLED job under the same job id. Resumable jobs (wiki generation) "
+                    "continue from their last completed step. Only jobs executed by job runners "
+                    "(JOB_RUNNER_JOB_TYPES) can be retried; others return 409.",
+        summary="Retry a failed job."
+    )
+    @blp_jobs.response(202, JobStatusSchema)
+    def post(self, job_id):
+        """Retry a failed background job."""
+        # 1. AUTHENTICATION
+        auth_data = _get_user_from_request(request)
+        if not auth_data or not auth_data.get('valid'):
+            abort(401, message="Invalid or missing token")
+        
+        user_id = auth_data.get('user_id')
+        
+        # 2. Requeue (scoped to the owner)
+        job = job_manager.get_job(job_id, user_id)
+        if not job:
+            abort(404, message="Job not found")
+        if not job_manager.retry_job(job_id, user_id):
+            abort(409, message=f"Job cannot be retried in status {job['status']}")
+        
+        logger.info(f"User {user_id} retried job {job_id}")
+        return job_manager.get_job(job_id, user_id)
+
 
 @blp_jobs.route('/project/<string:project_id>/jobs')
 class ProjectJobs(MethodView):
@@ -1148,13 +1256,16 @@ def _get_graph_driver():
         logging.error(f"[GRAPH] Failed to connect to Neo4j at {GRAPH_SERVER_URL}: {e}")
         return None
 
-def _save_relationships_to_graph(project_id: str, relationships: List[Tuple[str, str, str]]) -> bool:
+def _save_relationships_to_graph(project_id: str, relationships: List[Tuple[str, str, str]],
+                                 support: Optional[Dict[Tuple[str, str, str], int]] = None) -> bool:
     """
     Save extracted relationships to Neo4j graph database.
     
     Args:
         project_id: Project identifier for scoping nodes
         relationships: List of (entity1, relationship_type, entity2) tuples
+        support: Optional number of passages supporting each relationship
+                 (stored as the relationship's `support` property)
     
     Returns:
         True if successful, False otherwise
@@ -1176,13 +1287,14 @@ def _save_relationships_to_graph(project_id: str, relationships: List[Tuple[str,
                     MERGE (n1:Entity {{name: $entity1, project_id: $project_id}})
                     MERGE (n2:Entity {{name: $entity2, project_id: $project_id}})
                     MERGE (n1)-[r:{rel_type}]->(n2)
-                    SET r.project_id = $project_id
+                    SET r.project_id = $project_id, r.support = coalesce($support, r.support)
                 """
                 session.run(
                     cypher,
                     entity1=entity1,
                     entity2=entity2,
-                    project_id=project_id
+                    project_id=project_id,
+                    support=(support or {}).get((entity1, rel_type, entity2))
                 )
                 logging.debug(f"[GRAPH] Stored: ({entity1}, {rel_type}, {entity2})")
         
@@ -1194,85 +1306,469 @@ def _save_relationships_to_graph(project_id: str, relationships: List[Tuple[str,
     finally:
         driver.close()
 
+def _delete_relationships_from_graph(project_id: str, relationships: List[Tuple[str, str, str]]) -> bool:
+    """
+    Remove relationships that are no longer supported by the knowledge base.
+    
+    Args:
+        project_id: Project identifier for scoping nodes
+        relationships: List of (entity1, relationship_type, entity2) tuples
+    
+    Returns:
+        True if successful, False otherwise
+    """
+    if not relationships:
+        return True
+    
+    driver = _get_graph_driver()
+    if not driver:
+        logging.error("[GRAPH] Could not establish Neo4j connection")
+        return False
+    
+    try:
+        with driver.session() as session:
+            for entity1, rel_type, entity2 in relationships:
+                cypher = f"""
+                    MATCH (n1:Entity {{name: $entity1, project_id: $project_id}})
+                          -[r:{rel_type}]->
+                          (n2:Entity {{name: $entity2, project_id: $project_id}})
+                    DELETE r
+                """
+                session.run(
+                    cypher,
+                    entity1=entity1,
+                    entity2=entity2,
+                    project_id=project_id
+                )
+                logging.debug(f"[GRAPH] Removed: ({entity1}, {rel_type}, {entity2})")
+        
+        logging.info(f"[GRAPH] Removed {len(relationships)} stale relationships from Neo4j")
+        return True
+    except Exception as e:
+        logging.error(f"[GRAPH] Failed to remove relationships: {e}")
+        return False
+    finally:
+        driver.close()
+
 # --- WIKI Generation Task Helper Function ---
-def _run_wiki_generation_task(project_id: str, user_id: str) -> Dict:
+
+# Checkpointed steps of a wiki job, in order (reported as JobStatus.progress)
+WIKI_STEPS = ["fetch_documents", "generate_files", "extract_relationships", "save_graph", "save_and_snapshot"]
+
+
+
+def _wiki_documents_manifest(chunks: Dict[str, str]) -> Dict[str, Any]:
     """
-    The actual heavy-lifting for the wiki job with transactional consistency.
+    Fingerprint of the fetched chunks, to detect KB changes between attempts.
+
+    Also carries the per-chunk content hashes the incremental diff and the
+    saved wiki state are based on.
+    """
+    hashes = {chunk_id: chunk_hash(text) for chunk_id, text in chunks.items()}
+    digest = hashlib.sha256()
+    for chunk_id in sorted(hashes):
+        digest.update(f"{chunk_id}:{hashes[chunk_id]}".encode('utf-8'))
+    return {"count": len(hashes), "digest": digest.hexdigest(), "chunks": hashes}
+
+
+# Records per /export page when reading whole collections
+CHROMA_EXPORT_PAGE_SIZE = int(os.environ.get("CHROMA_EXPORT_PAGE_SIZE", "500"))
+
+
+class CollectionChangedError(Exception):
+    """The collection was written to while it was being exported."""
+
+
+def _iter_collection_pages(collection_name: str, page_size: int = CHROMA_EXPORT_PAGE_SIZE,
+                           where: Optional[Dict[str, Any]] = None, include_embeddings: bool = False):
+    """
+    Iterate over a whole Chroma collection one /export page at a time.
+    
+    Only one page is held in memory, whatever the collection size.
     
+    Args:
+        collection_name: Collection to read
+        page_size: Records per request
+        where: Optional Chroma metadata filter
+        include_embeddings: Also return embeddings (large)
+    
+    Yields:
+        Dict pages with ids, documents, metadatas (and embeddings)
+    
+    Raises:
+        CollectionChangedError: If the collection changed mid-export (restart it)
+    """
+    cursor = None
+    while True:
+        resp = chroma_client.post("/export", json={
+            "collection_name": collection_name,
+            "cursor": cursor,
+            "limit": page_size,
+            "where": where,
+            "include": ["embeddings"] if include_embeddings else []
+        })
+        resp.raise_for_status()
+        page = resp.json()
+        if page.get("changed"):
+            raise CollectionChangedError(f"Collection {collection_name} changed during export")
+        yield page
+        cursor = page.get("next_cursor")
+        if not cursor:
+            return
+
+
+def _get_kb_version(project_id: str) -> str:
+    """
+    Version of a project's knowledge base (chroma_server bumps it on every write).
+
+    Used as part of the wiki job's dedupe key, so requests against the same KB
+    contents coalesce while a request after new ingestion starts a new job.
+    Falls back to "unknown" (still coalescing repeated clicks) if Chroma is down.
+    """
+    try:
+        resp = chroma_client.post(
+            "/collection_version",
+            json={"collection_name": f"project_{project_id}"}
+        )
+        if resp.status_code == 200:
+            return str(resp.json().get('version', 0))
+        logger.warning(f"Chroma server returned {resp.status_code} for the KB version of project {project_id}")
+    except Exception as e:
+        logger.warning(f"Could not get KB version for project {project_id}: {e}")
+    return "unknown"
+
+
+def _plan_wiki_files(chunks: Dict[str, str], stored_state: Dict[str, Dict], diff: Dict[str, List[str]],
+                     incremental: bool) -> Tuple[List[str], set]:
+    """
+    Decide which chunks the file generation step reads, and which existing
+    wiki files it must regenerate.
+
+    A file is touched when a chunk it was built from changed or disappeared,
+    or when an added/changed chunk mentions its entity. Its sheet is rebuilt
+    from every current chunk mentioning the entity, plus the new/changed
+    chunks (which may introduce new entities).
+
+    Returns:
+        (chunk ids to generate from, touched filenames)
+    """
+    if not incremental:
+        return sorted(chunks), set()
+
+    dirty = diff["added"] + diff["changed"]
+    known_names = {f: entity_name(f) for state in stored_state.values() for f in state["files"]}
+    touched = {f for cid in diff["changed"] + diff["removed"] for f in stored_state[cid]["files"]}
+    for files in find_mentions({cid: chunks[cid] for cid in dirty}, known_names).values():
+        touched |= files
+
+    mentioning = find_mentions(chunks, {f: known_names[f] for f in touched})
+    inputs = sorted(set(dirty) | set(mentioning))
+    return inputs, touched
+
+
+def _attribute_relationships(batch: Dict[str, str], relationships: List[Tuple[str, str, str]]) -> Dict[str, List]:
+    """
+    Assign relationships extracted from a batch of chunks to the chunks they
+    came from: those mentioning both entities, else either, else the whole batch.
+    """
+    per_chunk: Dict[str, List] = {cid: [] for cid in batch}
+    for rel in relationships:
+        mentions = find_mentions(batch, {"source": rel[0], "target": rel[2]})
+        owners = [cid for cid, found in mentions.items() if len(found) == 2] or list(mentions) or list(batch)
+        for cid in owners:
+            per_chunk[cid].append(list(rel))
+    return per_chunk
+
+
+def _run_wiki_generation_task(project_id: str, user_id: str, job_id: Optional[str] = None,
+                              full_rebuild: bool = False) -> Dict:
+    """
+    The actual heavy-lifting for the wiki job with transactional consistency.
+
     Uses the Saga Pattern to ensure consistency across microservices.
     If any step fails, all previous steps are automatically rolled back.
-    
+
     Steps:
-    1. Get all chunks from chroma_server
+    1. Get all chunks from chroma_server and diff them against the last run
     2. Call KnowledgeExtractionOrchestrator to generate wiki files
     3. Extract relationships from documents
     4. Save relationships to Neo4j graph database
     5. Save files using filesystem_server (WITH ROLLBACK)
     6. Create Git snapshot (WITH ROLLBACK)
+
+    Incremental: the content hash of every chunk, the files built from it and
+    the relationships extracted from it are stored (WikiStateStore) after a
+    successful run. The next run only regenerates the entity sheets touched by
+    added/changed/removed chunks and only extracts relationships from
+    added/changed chunks; relationships of changed/removed chunks that are no
+    longer found are removed from the graph. A project without stored state,
+    or full_rebuild=True, gets a full run.
+
+    Resumable: when run under a job_id, the output of each step is checkpointed
+    in jobs.db and progress is reported through JobStatus. A retried job (runner
+    crash, or POST /jobs/<job_id>/retry) skips the steps that already completed,
+    so a failed save no longer throws away the LLM work of steps 2-3. If the
+    knowledge base changed since the checkpointed fetch, steps 2+ are redone.
     """
     logging.info(f"[WIKI] Starting wiki generation for project {project_id}")
     collection_name = f"project_{project_id}"
 
-    # Step 1: Get all chunks from chroma_server
-    logging.info(f"[WIKI] Step 1: Fetching all documents from {collection_name}...")
-    try:
-        resp = chroma_client.post(
-            "/get_all_data",
-            json={"collection_name": collection_name}
-        )
-        resp.raise_for_status()
-        all_docs = resp.json().get('documents', [])
-        if not all_docs:
-            raise Exception("No documents found in knowledge base.")
-        logging.info(f"[WIKI] Step 1 SUCCESS: Retrieved {len(all_docs)} documents.")
-    except Exception as e:
-        logging.error(f"[WIKI] Step 1 FAILED: {e}")
-        raise Exception(f"Failed to fetch knowledge base data: {e}")
+    def progress(step: str, done: Optional[int] = None, total: Optional[int] = None):
+        if job_id:
+            job_manager.update_progress(job_id, step, WIKI_STEPS.index(step) + 1, len(WIKI_STEPS), done, total)
+
+    def checkpoint(step: str, data: Any):
+        if job_id:
+            job_manager.save_checkpoint(job_id, step, data)
+
+    def resumed(step: str) -> Optional[Any]:
+        return job_manager.load_checkpoint(job_id, step) if job_id else None
+
+    generated = resumed("generate_files")
+    extracted = resumed("extract_relationships")
+    graph_result = resumed("save_graph")
+    manifest = resumed("fetch_documents")
+    resumed_steps = [step for step, data in zip(WIKI_STEPS[1:4], (generated, extracted, graph_result))
+                     if data is not None]
+    if resumed_steps:
+        logging.info(f"[WIKI] Resuming job {job_id}: completed steps {resumed_steps}")
+
+    # State of the last successful run (the baseline of an incremental run)
+    stored_state = wiki_state.load(project_id)
+    incremental = bool(stored_state) and not full_rebuild
+
+    # Step 1: Get all chunks from chroma_server (only needed by steps 2-3)
+    chunks: Dict[str, str] = {}
+    if generated is None or extracted is None or manifest is None:
+        logging.info(f"[WIKI] Step 1: Fetching all documents from {collection_name}...")
+        progress("fetch_documents")
+        try:
+            # Page through the collection; restart if ingestion writes to it meanwhile
+            for attempt in range(3):
+                try:
+                    chunks = {}
+                    for page in _iter_collection_pages(collection_name):
+                        chunks.update(zip(page.get('ids', []), page.get('documents', [])))
+                    break
+                except CollectionChangedError:
+                    if attempt == 2:
+                        raise
+                    logging.warning(f"[WIKI] Step 1: {collection_name} changed while reading it; restarting.")
+            if not chunks:
+                raise Exception("No documents found in knowledge base.")
+            logging.info(f"[WIKI] Step 1 SUCCESS: Retrieved {len(chunks)} documents.")
+        except Exception as e:
+            logging.error(f"[WIKI] Step 1 FAILED: {e}")
+            raise Exception(f"Failed to fetch knowledge base data: {e}")
+
+        previous_manifest = manifest
+        manifest = _wiki_documents_manifest(chunks)
+        if previous_manifest and previous_manifest != manifest:
+            logging.warning(f"[WIKI] Knowledge base changed since the last attempt; discarding checkpoints of steps 2-4.")
+            job_manager.clear_checkpoints(job_id, WIKI_STEPS[1:])
+            generated = extracted = graph_result = None
+            resumed_steps = []
+        checkpoint("fetch_documents", manifest)
+        progress("fetch_documents", len(chunks), len(chunks))
+    else:
+        logging.info(f"[WIKI] Step 1 SKIPPED: steps 2-3 restored from checkpoint.")
+
+    chunk_hashes = manifest["chunks"]
+    diff = diff_chunks({cid: state["hash"] for cid, state in stored_state.items()}, chunk_hashes)
+    dirty = diff["added"] + diff["changed"] if incremental else sorted(chunk_hashes)
+    if incremental:
+        logging.info(f"[WIKI] Incremental run: {len(diff['added'])} added, {len(diff['changed'])} changed, "
+                     f"{len(diff['removed'])} removed, {len(diff['unchanged'])} unchanged chunks.")
+        if not dirty and not diff["removed"]:
+            logging.info(f"[WIKI] Wiki for project {project_id} is up to date; nothing to regenerate.")
+            if job_id:
+                job_manager.clear_checkpoints(job_id)
+            return {
+                "files_created": 0,
+                "relationships_extracted": 0,
+                "entities_processed": 0,
+                "snapshot_id": None,
+                "resumed_steps": resumed_steps,
+                "mode": "incremental",
+                "chunks_changed": {key: len(ids) for key, ids in diff.items()},
+                "message": f"Wiki for project {project_id} is already up to date"
+            }
 
     # Step 2: Call KnowledgeExtractionOrchestrator
-    logging.info(f"[WIKI] Step 2: Calling orchestrator to generate wiki files...")
-    try:
-        # Orchestrator generates markdown files from documents
-        generated_files = orchestrator.generate_wiki_files(all_docs)
-        if not generated_files:
-            raise Exception("Orchestrator returned no files.")
-        logging.info(f"[WIKI] Step 2 SUCCESS: Generated {len(generated_files)} files.")
-    except Exception as e:
-        logging.error(f"[WIKI] Step 2 FAILED: {e}")
-        raise Exception(f"Failed to generate wiki files: {e}")
+    if generated is None:
+        inputs, touched = _plan_wiki_files(chunks, stored_state, diff, incremental)
+        logging.info(f"[WIKI] Step 2: Calling orchestrator to generate wiki files "
+                     f"({len(touched)} touched sheets, {len(inputs)}/{len(chunks)} chunks)...")
+        progress("generate_files", 0, len(inputs))
+        try:
+            # Orchestrator generates markdown files from documents
+            generated_files = orchestrator.generate_wiki_files([chunks[cid] for cid in inputs]) if inputs else []
+            if not generated_files and not incremental:
+                raise Exception("Orchestrator returned no files.")
+            logging.info(f"[WIKI] Step 2 SUCCESS: Generated {len(generated_files)} files.")
+        except Exception as e:
+            logging.error(f"[WIKI] Step 2 FAILED: {e}")
+            raise Exception(f"Failed to generate wiki files: {e}")
+
+        # Keep the touched sheets and sheets of new entities; sheets of other
+        # entities were generated from a partial view and are left as they are
+        known_files = {f for state in stored_state.values() for f in state["files"]}
+        if incremental:
+            generated_files = [f for f in generated_files
+                               if f.get('filename') in touched or f.get('filename') not in known_files]
+        regenerated = {f.get('filename') for f in generated_files}
+
+        # Sheets whose entity no longer appears anywhere are dropped from the state
+        candidates = (touched if incremental else known_files) - regenerated
+        still_mentioned = set().union(*find_mentions(chunks, {f: entity_name(f) for f in candidates}).values())
+        stale_files = sorted(candidates - still_mentioned)
+
+        # Attribute files to chunks: changed/new chunks are rescanned for every
+        # sheet, unchanged chunks only for new sheets
+        current_files = (known_files | regenerated) - set(stale_files) if incremental else regenerated | still_mentioned
+        new_files = current_files - known_files if incremental else current_files
+        rescanned = find_mentions({cid: chunks[cid] for cid in dirty}, {f: entity_name(f) for f in current_files})
+        new_mentions = find_mentions({cid: chunks[cid] for cid in diff["unchanged"]},
+                                     {f: entity_name(f) for f in new_files}) if incremental else {}
+        chunk_files = {}
+        for cid in chunk_hashes:
+            if incremental and cid in stored_state and stored_state[cid]["hash"] == chunk_hashes[cid]:
+                kept = set(stored_state[cid]["files"]) - set(stale_files)
+                chunk_files[cid] = sorted(kept | new_mentions.get(cid, set()))
+            else:
+                chunk_files[cid] = sorted(rescanned.get(cid, set()))
 
-    # Step 3: Extract relationships from documents for knowledge graph
-    logging.info(f"[WIKI] Step 3: Extracting relationships from documents...")
-    relationships = []
-    try:
-        # Combine all document text for relationship extraction
-        combined_text = "\n\n".join(all_docs[:10])  # Use first 10 docs to avoid token limits
-        
-        if orchestrator:
-            relationships = orchestrator.extract_relationships(combined_text)
-            logging.info(f"[WIKI] Step 3 SUCCESS: Extracted {len(relationships)} relationships.")
-        else:
-            logging.warning(f"[WIKI] Step 3 SKIPPED: Orchestrator not available for relationship extraction.")
-    except Exception as e:
-        logging.warning(f"[WIKI] Step 3 WARNING: Relationship extraction failed: {e}. Continuing without graph data.")
+        generated = {"files": generated_files, "chunk_files": chunk_files, "stale_files": stale_files}
+        checkpoint("generate_files", generated)
+        progress("generate_files", len(inputs), len(inputs))
+    else:
+        logging.info(f"[WIKI] Step 2 RESUMED: {len(generated['files'])} files from checkpoint.")
+    generated_files = generated["files"]
+
+    # Step 3: Extract relationships from the new/changed documents for the knowledge graph
+    if extracted is None:
+        logging.info(f"[WIKI] Step 3: Extracting relationships from {len(dirty)} documents...")
+        progress("extract_relationships", 0, len(dirty))
+        chunk_relationships = {cid: state["relationships"] for cid, state in stored_state.items()
+                               if cid in chunk_hashes and state["hash"] == chunk_hashes[cid]} if incremental else {}
+        failed_chunks = []
+        try:
+            if not orchestrator:
+                raise Exception("Orchestrator not available for relationship extraction")
+            # Map-reduce over token-bounded windows (RELATIONSHIP_WINDOW_TOKENS,
+            # RELATIONSHIP_MAX_WORKERS calls at a time)
+            result = orchestrator.extract_relationships_windowed(
+                [chunks[cid] for cid in dirty],
+                on_progress=lambda done, total: progress("extract_relationships", done, total)
+            )
+            windows = result["windows"]
+        except Exception as e:
+            logging.warning(f"[WIKI] Step 3 WARNING: Relationship extraction failed: {e}. Continuing without graph data.")
+            windows = [{"indices": list(range(len(dirty))), "relationships": [], "error": str(e)}]
+        for window in windows:
+            batch = {dirty[i]: chunks[dirty[i]] for i in window["indices"]}
+            if window["error"]:
+                # Recorded as unprocessed so the next run extracts them again
+                failed_chunks.extend(batch)
+            else:
+                chunk_relationships.update(_attribute_relationships(batch, window["relationships"]))
+
+        # Support of a relationship = number of chunks it was found in
+        previous = relationship_support(state["relationships"] for state in stored_state.values())
+        current = relationship_support(chunk_relationships.values())
+        extracted = {
+            "chunk_relationships": chunk_relationships,
+            # New relationships, and existing ones whose support changed
+            "upserts": sorted([*rel, count] for rel, count in current.items() if previous.get(rel) != count),
+            # A full rebuild with failed windows can't tell what disappeared
+            "dropped": sorted(set(previous) - set(current)) if not failed_chunks or incremental else [],
+            "failed_chunks": failed_chunks,
+        }
+        logging.info(f"[WIKI] Step 3 SUCCESS: {len(current)} relationships from {len(windows)} windows "
+                     f"({len(set(current) - set(previous))} new, {len(extracted['dropped'])} no longer found, "
+                     f"{len(failed_chunks)} documents failed).")
+        checkpoint("extract_relationships", extracted)
+    else:
+        logging.info(f"[WIKI] Step 3 RESUMED: {len(extracted['upserts'])} relationship updates from checkpoint.")
+    support = {tuple(rel[:3]): rel[3] for rel in extracted["upserts"]}
+    relationships = list(support)
+    dropped_relationships = [tuple(rel) for rel in extracted["dropped"]]
 
     # Step 4: Save relationships to Neo4j graph database
-    logging.info(f"[WIKI] Step 4: Saving relationships to graph database...")
-    try:
-        if relationships:
-            graph_success = _save_relationships_to_graph(project_id, relationships)
-            if graph_success:
-                logging.info(f"[WIKI] Step 4 SUCCESS: Graph database updated with {len(relationships)} relationships.")
+    graph_updated = graph_result is not None
+    if graph_result is None:
+        logging.info(f"[WIKI] Step 4: Saving relationships to graph database...")
+        progress("save_graph", 0, len(relationships))
+        try:
+            if relationships or dropped_relationships:
+                graph_success = (_save_relationships_to_graph(project_id, relationships, support)
+                                 and _delete_relationships_from_graph(project_id, dropped_relationships))
+                if graph_success:
+                    graph_updated = True
+                    logging.info(f"[WIKI] Step 4 SUCCESS: Graph database updated with {len(relationships)} relationships "
+                                 f"({len(dropped_relationships)} removed).")
+                    checkpoint("save_graph", {"saved": len(relationships), "removed": len(dropped_relationships)})
+                    progress("save_graph", len(relationships), len(relationships))
+                else:
+                    logging.warning(f"[WIKI] Step 4 WARNING: Graph database update failed. Continuing.")
             else:
-                logging.warning(f"[WIKI] Step 4 WARNING: Graph database update failed. Continuing.")
-        else:
-            logging.info(f"[WIKI] Step 4 SKIPPED: No relationships to store.")
-    except Exception as e:
-        logging.warning(f"[WIKI] Step 4 WARNING: Graph storage failed: {e}. Continuing.")
+                graph_updated = True
+                logging.info(f"[WIKI] Step 4 SKIPPED: No relationship changes to store.")
+        except Exception as e:
+            logging.warning(f"[WIKI] Step 4 WARNING: Graph storage failed: {e}. Continuing.")
+    else:
+        logging.info(f"[WIKI] Step 4 RESUMED: {graph_result.get('saved', 0)} relationships already in the graph.")
+
+    def save_state():
+        # Chunks whose relationships couldn't be extracted are stored without a
+        # hash, so the next run treats them as changed
+        failed = set(extracted["failed_chunks"])
+        chunk_relationships = extracted["chunk_relationships"]
+        if not graph_updated:
+            # The graph still holds the previous relationships: keep those in the
+            # state and store every chunk whose relationships changed without a
+            # hash, so the next run extracts and saves them again
+            previous = {cid: state["relationships"] for cid, state in stored_state.items()}
+            failed |= {cid for cid in chunk_hashes
+                       if sorted(map(tuple, chunk_relationships.get(cid, [])))
+                       != sorted(map(tuple, previous.get(cid, [])))}
+            chunk_relationships = previous
+        state = {
+            cid: {
+                "hash": "" if cid in failed else content_hash,
+                "files": generated["chunk_files"].get(cid, []),
+                "relationships": chunk_relationships.get(cid, []),
+            }
+            for cid, content_hash in chunk_hashes.items()
+        }
+        if not graph_updated:
+            # Removed chunks stay (without files) until their relationships are
+            # actually dropped from the graph
+            state.update({cid: {"hash": "", "files": [], "relationships": rels}
+                          for cid, rels in previous.items() if cid not in chunk_hashes and rels})
+        wiki_state.replace(project_id, state, job_id=job_id)
+
+    summary = {
+        "relationships_extracted": len(relationships),
+        "entities_processed": len(generated_files),
+        "resumed_steps": resumed_steps,
+        "mode": "incremental" if incremental else "full",
+        "chunks_changed": {key: len(ids) for key, ids in diff.items()},
+        "stale_files": generated["stale_files"],
+    }
+    if not generated_files and not generated["stale_files"]:
+        # Only relationship changes: nothing to save or snapshot
+        save_state()
+        if job_id:
+            job_manager.clear_checkpoints(job_id)
+        logging.info(f"[WIKI] Wiki generation completed for project {project_id} (no files to update)")
+        return {**summary, "files_created": 0, "snapshot_id": None,
+                "message": f"No wiki files needed regenerating for project {project_id}"}
 
     # --- Steps 5-6: Use Saga Pattern for transactional consistency ---
     logging.info(f"[WIKI] Step 5-6: Starting transactional saga for file saves and git snapshot...")
-    
+    progress("save_and_snapshot", 0, len(generated_files))
+
     saga = WikiGenerationSaga(
         project_id=project_id,
         user_id=user_id,
@@ -1280,20 +1776,24 @@ def _run_wiki_generation_task(project_id: str, user_id: str) -> Dict:
         git_url=GIT_SERVER_URL,
         internal_headers=get_internal_headers()
     )
-    
+
     try:
         # Execute saga: saves files and creates snapshot
         # If any step fails, rollback happens automatically
-        result = saga.execute_with_consistency(generated_files)
-        
+        # Stale sheets are removed in the same atomic save
+        result = saga.execute_with_consistency(generated_files, stale_files=generated["stale_files"])
+
         if result["status"] == "success":
             logging.info(f"[WIKI] Steps 5-6 SUCCESS: Saga completed successfully")
             logging.info(f"[WIKI] Wiki generation completed for project {project_id}")
-            
+            progress("save_and_snapshot", result.get("files_created", 0), len(generated_files))
+            save_state()
+            if job_id:
+                job_manager.clear_checkpoints(job_id)
+
             return {
+                **summary,
                 "files_created": result.get("files_created", 0),
-                "relationships_extracted": len(relationships),
-                "entities_processed": len(generated_files),
                 "snapshot_id": result.get("snapshot_id"),
                 "message": result.get("message", f"Successfully generated wiki for project {project_id}")
             }
@@ -1302,10 +1802,11 @@ def _run_wiki_generation_task(project_id: str, user_id: str) -> Dict:
             error_msg = result.get("error", "Saga execution failed")
             logging.error(f"[WIKI] Steps 5-6 FAILED: {error_msg}")
             raise Exception(f"Wiki generation saga failed: {error_msg}")
-            
+
     except Exception as e:
         logging.error(f"[WIKI] Wiki generation saga failed with exception: {e}")
-        # The saga has already been rolled back automatically
+        # The saga has already been rolled back automatically; checkpoints of
+        # steps 1-4 are kept so a retry starts here
         raise Exception(f"Wiki generation failed and was rolled back: {e}")
 
 
@@ -1316,7 +1817,12 @@ class GenerateWiki(MethodView):
     """Start a background wiki/report generation job."""
 
     @blp_jobs.doc(
-        description="Initiates a background job to generate a comprehensive wiki report. Admin-only, requires $1.00 minimum balance.",
+        description="Initiates a background job to generate a comprehensive wiki report. Admin-only, requires $1.00 minimum balance. "
+                    "Requests for a project whose knowledge base hasn't changed while a wiki job is queued or running "
+                    "return that job (deduplicated=true) instead of starting another; pass force=true "
+                    "(query string or JSON body) to start a fresh run anyway. Runs are incremental: only the sheets "
+                    "and relationships touched by chunks added, changed or removed since the last successful run are "
+                    "regenerated; pass full=true for a full rebuild.",
         summary="Generate a comprehensive wiki report for a project."
     )
     @blp_jobs.response(202, WikiGenerationResponseSchema)
@@ -1336,28 +1842,63 @@ class GenerateWiki(MethodView):
             logger.warning(f"User {user_id} tried to start wiki job with insufficient balance ({actual_balance} Credits).")
             abort(402, message=f"Insufficient balance. This report requires a minimum balance of {WIKI_JOB_MIN_BALANCE_CREDITS} Credits.")
         
-        # 2. Create the job "receipt"
-        job_id = job_manager.create_job(
-            project_id=project_id, 
-            user_id=user_id, 
-            job_type="wiki_generation"
-        )
+        # 2. Create the job "receipt" (or join the identical job already in flight)
+        body = request.get_json(silent=True) or {}
+        force = str(request.args.get('force', body.get('force', ''))).lower() in ('1', 'true', 'yes')
+        full_rebuild = str(request.args.get('full', body.get('full', ''))).lower() in ('1', 'true', 'yes')
+        # Runner jobs are stored with their task in the same INSERT (see JobManager.create_job)
+        job_id = str(uuid.uuid4())
+        task = "app:_run_wiki_generation_task" if job_manager.uses_runner("wiki_generation") else None
+        task_args = [project_id, user_id]
+        task_kwargs = {"job_id": job_id, "full_rebuild": full_rebuild}
+        if force:
+            job_manager.create_job(
+                project_id=project_id, 
+                user_id=user_id, 
+                job_type="wiki_generation",
+                job_id=job_id,
+                task=task,
+                task_args=task_args,
+                task_kwargs=task_kwargs
+            )
+        else:
+            dedupe_key = f"{project_id}:wiki_generation:{_get_kb_version(project_id)}{':full' if full_rebuild else ''}"
+            job_id, created = job_manager.find_or_create_job(
+                project_id=project_id,
+                user_id=user_id,
+                job_type="wiki_generation",
+                dedupe_key=dedupe_key,
+                job_id=job_id,
+                task=task,
+                task_args=task_args,
+                task_kwargs=task_kwargs
+            )
+            if not created:
+                logger.info(f"[WIKI] Request by user {user_id} joined active job {job_id} for project {project_id}")
+                return {
+                    "message": "An identical wiki generation job is already in progress.",
+                    "job_id": job_id,
+                    "status_url": f"/jobs/{job_id}",
+                    "deduplicated": True
+                }
         
-        logger.info(f"[WIKI] Job {job_id} created for project {project_id} by user {user_id}")
+        logger.info(f"[WIKI] Job {job_id} created for project {project_id} by user {user_id}{' (forced)' if force else ''}")
         
-        # 3. Start the background task
-        job_manager.run_async(
-            job_id, 
-            _run_wiki_generation_task, 
-            project_id, 
-            user_id
-        )
+        # 3. Start the background task (a runner job is already queued for the runners)
+        if not task:
+            job_manager.run_async(
+                job_id, 
+                _run_wiki_generation_task, 
+                *task_args,
+                **task_kwargs
+            )
         
         # 4. Return immediately with 202 Accepted
         return {
             "message": "Wiki generation has started.",
             "job_id": job_id,
-            "status_url": f"/jobs/{job_id}"
+            "status_url": f"/jobs/{job_id}",
+            "deduplicated": False
         }
 
 
@@ -1386,6 +1927,59 @@ class AdminCosts(MethodView):
         return summary
 
 
+@blp_admin.route('/circuit_breakers')
+class AdminCircuitBreakers(MethodView):
+    """Get circuit breaker state for every internal service client."""
+
+    @blp_admin.doc(
+        description="Admin-only endpoint that returns per-endpoint-group circuit breaker state, window rates, counters and recent transitions for every internal service.",
+        summary="Get circuit breaker status."
+    )
+    @blp_admin.response(200, CircuitBreakerStatusSchema)
+    def get(self):
+        """Get circuit breaker status for all service clients."""
+        # 1. AUTHENTICATION (Must be an admin)
+        auth_data = _get_user_from_request(request)
+        if not auth_data or not auth_data['valid'] or auth_data['role'] != 'admin':
+            logging.warning(f"Failed admin circuit breaker status access attempt.")
+            abort(403, message="You do not have permission to access this resource.")
+
+        # 2. Snapshot every client's breakers
+        return {"services": [client.get_status() for client in SERVICE_CLIENTS]}
+
+
+@blp_admin.route('/ingestion')
+class AdminIngestionStatus(MethodView):
+    """Get ingestion queue depth/lag and per-worker latency metrics."""
+
+    @blp_admin.doc(
+        description="Admin-only endpoint that returns ingestion queue counts by status, the age of the oldest waiting message, and the latest metrics snapshot (queue lag, per-step latency, counters) published by each running ingestion worker.",
+        summary="Get ingestion pipeline status."
+    )
+    @blp_admin.response(200, IngestionStatusSchema)
+    def get(self):
+        """Get ingestion queue and worker metrics."""
+        # 1. AUTHENTICATION (Must be an admin)
+        auth_data = _get_user_from_request(request)
+        if not auth_data or not auth_data['valid'] or auth_data['role'] != 'admin':
+            logging.warning(f"Failed admin ingestion status access attempt.")
+            abort(403, message="You do not have permission to access this resource.")
+
+        # 2. Queue state straight from sessions.db
+        queue = session_manager.get_ingestion_stats()
+
+        # 3. Snapshots published by running workers (see ingestion_worker.IngestionMetrics)
+        workers = []
+        metrics_dir = Path(os.getenv("INGESTION_METRICS_DIR", str(session_manager.db_path.parent / "ingestion_metrics")))
+        for metrics_file in sorted(metrics_dir.glob("*.json")):
+            try:
+                workers.append(json.loads(metrics_file.read_text(encoding="utf-8")))
+            except (OSError, ValueError) as e:
+                logging.warning(f"Could not read ingestion metrics {metrics_file}: {e}")
+
+        return {"queue": queue, "workers": workers}
+
+
 # *** NOW register blueprints after ALL routes are defined ***
 api.register_blueprint(blp_chat)
 api.register_blueprint(blp_jobs)
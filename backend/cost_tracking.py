@@ -23,6 +23,8 @@ from datetime import datetime
 from pathlib import Path
 import sqlite3
 
+from db_utils import get_database
+
 if TYPE_CHECKING:
     from service_utils import ResilientServiceClient
 
@@ -83,11 +85,12 @@ class CostTracker:
         self.internal_headers = internal_headers
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = get_database(self.db_path)
         self._init_db()
     
     def _get_conn(self) -> sqlite3.Connection:
-        """Get a new SQLite connection."""
-        return sqlite3.connect(str(self.db_path))
+        """Get this thread's shared SQLite connection (Row factory, WAL)."""
+        return self._db.connection()
     
     def _init_db(self):
         """Initialize reservations tracking table."""
@@ -421,7 +424,6 @@ class CostTracker:
         """
         try:
             with self._get_conn() as conn:
-                conn.row_factory = sqlite3.Row
                 
                 if user_id:
                     cursor = conn.execute(
@@ -444,7 +446,6 @@ class CostTracker:
         """Get the full history of a reservation."""
         try:
             with self._get_conn() as conn:
-                conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     "SELECT * FROM reservations WHERE reservation_id = ?",
                     (reservation_id,)
@@ -0,0 +1,242 @@
+"""
+Shared SQLite access layer for all managers backed by a local database file.
+
+Every manager (SessionManager, JobManager, FeedbackManager, CostTracker,
+FailedTransactionLogger, BillingManager, AuthManager, PendingBillingQueue)
+used to open a brand new sqlite3 connection on every call and re-apply its
+PRAGMAs each time. This module gives them one tuned connection per thread
+instead:
+
+1. CONNECTION REUSE: One connection per (database, thread), created lazily
+   and reused for every call on that thread. Re-created after a fork.
+2. TUNED PRAGMAS: WAL journal, synchronous=NORMAL, busy_timeout and
+   mmap_size are applied once when the connection is opened.
+3. STATEMENT CACHE: sqlite3's per-connection prepared statement cache is
+   sized via `cached_statements`, so repeated queries skip re-parsing.
+4. INSTRUMENTATION: Register a query listener to receive
+   (db_path, sql, duration_seconds) for every statement. Timing is only
+   measured while at least one listener is registered.
+
+Usage (inside a manager):
+    self._db = get_database(self.db_path)
+
+    def _get_conn(self) -> sqlite3.Connection:
+        return self._db.connection()
+
+    with self._get_conn() as conn:   # commits on success, rolls back on error
+        conn.execute(...)
+
+NOTE: `with conn:` only manages the transaction, it never closes the
+connection, so the existing `with self._get_conn() as conn:` idiom keeps
+working unchanged on top of the shared connection.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import logging
+import weakref
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# Defaults (overridable per database or via environment)
+DEFAULT_BUSY_TIMEOUT_MS = int(os.environ.get("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+DEFAULT_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", str(64 * 1024 * 1024)))
+DEFAULT_CACHED_STATEMENTS = int(os.environ.get("SQLITE_CACHED_STATEMENTS", "256"))
+SLOW_QUERY_SECONDS = float(os.environ.get("SQLITE_SLOW_QUERY_SECONDS", "0.25"))
+
+QueryListener = Callable[[str, str, float], None]
+
+# --- Query Instrumentation ---
+
+_listeners: List[QueryListener] = []
+_listeners_lock = threading.Lock()
+
+
+def add_query_listener(listener: QueryListener) -> None:
+    """
+    Register a callback invoked after every statement on a shared connection.
+
+    Args:
+        listener: Callable receiving (db_path, sql, duration_seconds)
+    """
+    with _listeners_lock:
+        if listener not in _listeners:
+            _listeners.append(listener)
+
+
+def remove_query_listener(listener: QueryListener) -> None:
+    """Unregister a callback previously passed to add_query_listener()."""
+    with _listeners_lock:
+        if listener in _listeners:
+            _listeners.remove(listener)
+
+
+def log_slow_queries(db_path: str, sql: str, duration: float) -> None:
+    """Built-in listener: warn about statements slower than SLOW_QUERY_SECONDS."""
+    if duration >= SLOW_QUERY_SECONDS:
+        statement = " ".join(sql.split())[:200]
+        logger.warning(f"[SQLITE] Slow query on {db_path} ({duration * 1000:.1f}ms): {statement}")
+
+
+def _notify(db_path: str, sql: str, duration: float) -> None:
+    for listener in list(_listeners):
+        try:
+            listener(db_path, sql, duration)
+        except Exception as e:
+            logger.error(f"[SQLITE] Query listener failed: {e}")
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3.Connection that reports statement timings to query listeners."""
+
+    db_label = ""
+
+    def _timed(self, method, sql, *args):
+        if not _listeners:
+            return method(sql, *args)
+        start = time.perf_counter()
+        try:
+            return method(sql, *args)
+        finally:
+            _notify(self.db_label, sql, time.perf_counter() - start)
+
+    def execute(self, sql, *args):
+        return self._timed(super().execute, sql, *args)
+
+    def executemany(self, sql, *args):
+        return self._timed(super().executemany, sql, *args)
+
+    def executescript(self, sql):
+        return self._timed(super().executescript, sql)
+
+
+# --- Shared Database ---
+
+class SQLiteDatabase:
+    """
+    Hands out one tuned, reused connection per thread for a single database file.
+
+    sqlite3 connections must not be shared across threads, so each thread gets
+    its own. Connections are tracked so close_all() can release them on shutdown.
+    """
+
+    def __init__(self, db_path: Union[str, Path],
+                 busy_timeout_ms: int = DEFAULT_BUSY_TIMEOUT_MS,
+                 mmap_size: int = DEFAULT_MMAP_SIZE,
+                 cached_statements: int = DEFAULT_CACHED_STATEMENTS,
+                 synchronous: str = "NORMAL",
+                 row_factory=sqlite3.Row):
+        """
+        Args:
+            db_path: Path to the SQLite database file
+            busy_timeout_ms: How long a writer waits on a locked database
+            mmap_size: Bytes of the file to memory-map for reads (0 disables)
+            cached_statements: Size of the per-connection prepared statement cache
+            synchronous: PRAGMA synchronous level (NORMAL is safe under WAL)
+            row_factory: Row factory applied to every connection
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.busy_timeout_ms = busy_timeout_ms
+        self.mmap_size = mmap_size
+        self.cached_statements = cached_statements
+        self.synchronous = synchronous
+        self.row_factory = row_factory
+
+        self._local = threading.local()
+        # Weak so a connection is released when its thread exits (e.g. the
+        # per-request threads of the Flask dev server)
+        self._connections: "weakref.WeakSet[sqlite3.Connection]" = weakref.WeakSet()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            str(self.db_path),
+            timeout=self.busy_timeout_ms / 1000,
+            cached_statements=self.cached_statements,
+            factory=InstrumentedConnection,
+            # Only ever used by its owning thread; disabled so close_all() can
+            # release connections from the shutdown thread.
+            check_same_thread=False,
+        )
+        conn.db_label = str(self.db_path)
+        conn.row_factory = self.row_factory
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        if self.mmap_size:
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        """
+        Get this thread's connection, opening it on first use.
+
+        Returns:
+            sqlite3.Connection (use as `with db.connection() as conn:` for a transaction)
+        """
+        if os.getpid() != self._pid:
+            # Forked child: inherited connections belong to the parent
+            self._local = threading.local()
+            self._connections = weakref.WeakSet()
+            self._lock = threading.Lock()
+            self._pid = os.getpid()
+
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._open()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.add(conn)
+        return conn
+
+    def close_all(self) -> None:
+        """Close every connection opened through this database (shutdown/tests)."""
+        with self._lock:
+            connections, self._connections = list(self._connections), weakref.WeakSet()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"[SQLITE] Error closing connection to {self.db_path}: {e}")
+        self._local = threading.local()
+
+
+_databases: Dict[str, SQLiteDatabase] = {}
+_databases_lock = threading.Lock()
+
+
+def get_database(db_path: Union[str, Path], **options) -> SQLiteDatabase:
+    """
+    Get the shared SQLiteDatabase for a file, creating it on first use.
+
+    Managers pointing at the same file share one set of per-thread connections.
+    Options only apply when the database is first created.
+
+    Args:
+        db_path: Path to the SQLite database file
+        **options: Passed to SQLiteDatabase on first creation
+
+    Returns:
+        SQLiteDatabase instance
+    """
+    key = str(Path(db_path).resolve())
+    with _databases_lock:
+        db = _databases.get(key)
+        if db is None:
+            db = SQLiteDatabase(db_path, **options)
+            _databases[key] = db
+        return db
+
+
+def close_all_databases() -> None:
+    """Close every shared connection in this process."""
+    with _databases_lock:
+        databases = list(_databases.values())
+    for db in databases:
+        db.close_all()
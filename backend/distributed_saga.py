@@ -196,67 +196,72 @@ class WikiGenerationSaga(DistributedSaga):
         self.saved_files = []  # Track saved file paths for rollback
         self.snapshot_id = None  # Track snapshot ID for rollback
     
-    def save_wiki_files(self, files: List[dict]) -> Tuple[List[str], int]:
+    def save_wiki_files(self, files: List[dict], stale_files: List[str] = ()) -> Tuple[List[str], int]:
         """
         Save wiki files with rollback capability.
         
+        All files go to filesystem_server in one atomic /save_files call: they
+        are staged and swapped into wiki/ together, and rollback restores the
+        previous wiki/ with a single DELETE.
+        
         Args:
             files: List of file dicts with 'filename' and 'content'
+            stale_files: Filenames of sheets to remove from wiki/ in the same swap
             
         Returns:
             Tuple of (file_paths, saved_count)
         """
-        saved_file_paths = []
-        saved_count = 0
+        save_holder = {}  # To capture the save_id in closure
         
         def save_action():
-            """Execute: Save all files to filesystem."""
-            for file_data in files:
-                filename = file_data.get('filename', 'unknown.md')
-                content = file_data.get('content', '')
-                file_path = f"wiki/{filename}"
-                
-                save_payload = {
-                    "project_id": self.project_id,
-                    "file_path": file_path,
-                    "content": content
-                }
-                
-                resp = requests.post(
-                    f"{self.filesystem_url}/save_file",
-                    json=save_payload,
-                    headers={**{'X-User-ID': self.user_id}, **self.internal_headers},
-                    timeout=10
-                )
-                resp.raise_for_status()
-                
-                saved_file_paths.append(file_path)
-                logger.debug(f"Saved file: {file_path}")
+            """Execute: Save all files to filesystem in one atomic request."""
+            save_payload = {
+                "project_id": self.project_id,
+                "atomic": True,
+                "directory": "wiki",
+                "files": [
+                    {"file_path": f"wiki/{file_data.get('filename', 'unknown.md')}", "content": file_data.get('content', '')}
+                    for file_data in files
+                ],
+                "delete": [f"wiki/{filename}" for filename in stale_files]
+            }
             
+            resp = requests.post(
+                f"{self.filesystem_url}/save_files",
+                json=save_payload,
+                headers={**{'X-User-ID': self.user_id}, **self.internal_headers},
+                timeout=60
+            )
+            resp.raise_for_status()
+            
+            result = resp.json()
+            save_holder['id'] = result.get('save_id')
+            saved_file_paths = [item['file_path'] for item in result.get('saved', [])]
+            logger.debug(f"Saved {len(saved_file_paths)} wiki files (save {save_holder['id']})")
             return (saved_file_paths, len(saved_file_paths))
         
         def rollback_action():
-            """Rollback: Delete all saved files."""
-            if not saved_file_paths:
+            """Rollback: Restore the previous wiki directory."""
+            if 'id' not in save_holder:
                 return
             
-            logger.warning(f"Rolling back {len(saved_file_paths)} saved files")
-            for file_path in saved_file_paths:
-                try:
-                    resp = requests.delete(
-                        f"{self.filesystem_url}/file/{self.project_id}/{file_path.replace('wiki/', '')}",
-                        headers={**{'X-User-ID': self.user_id}, **self.internal_headers},
-                        timeout=10
-                    )
-                    if resp.status_code == 200:
-                        logger.info(f"Deleted file: {file_path}")
-                    else:
-                        logger.warning(f"Failed to delete file {file_path}: {resp.status_code}")
-                except Exception as e:
-                    logger.error(f"Error deleting file {file_path}: {e}")
+            save_id = save_holder['id']
+            logger.warning(f"Rolling back wiki save {save_id} ({len(files)} files)")
+            try:
+                resp = requests.delete(
+                    f"{self.filesystem_url}/save_files/{self.project_id}/{save_id}",
+                    headers={**{'X-User-ID': self.user_id}, **self.internal_headers},
+                    timeout=30
+                )
+                if resp.status_code == 200:
+                    logger.info(f"Rolled back wiki save: {save_id}")
+                else:
+                    logger.warning(f"Failed to roll back wiki save {save_id}: {resp.status_code}")
+            except Exception as e:
+                logger.error(f"Error rolling back wiki save {save_id}: {e}")
         
         return self.execute_step(
-            name=f"Save {len(files)} wiki files to filesystem",
+            name=f"Save {len(files)} wiki files to filesystem ({len(stale_files)} removed)",
             action=save_action,
             rollback=rollback_action
         )
@@ -319,7 +324,7 @@ class WikiGenerationSaga(DistributedSaga):
             rollback=snapshot_rollback
         )
     
-    def execute_with_consistency(self, files: List[dict]) -> dict:
+    def execute_with_consistency(self, files: List[dict], stale_files: List[str] = ()) -> dict:
         """
         Execute full wiki generation saga with transactional consistency.
         
@@ -327,13 +332,14 @@ class WikiGenerationSaga(DistributedSaga):
         
         Args:
             files: List of generated wiki files
+            stale_files: Filenames of wiki files to remove
             
         Returns:
             Result dict with files created, snapshot ID, etc.
         """
         try:
             # Step 1: Save files
-            file_paths, saved_count = self.save_wiki_files(files)
+            file_paths, saved_count = self.save_wiki_files(files, stale_files)
             
             # Step 2: Create git snapshot
             snapshot_id = self.create_git_snapshot(
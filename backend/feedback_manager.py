@@ -9,6 +9,8 @@ from pathlib import Path
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 
+from db_utils import get_database
+
 
 class FeedbackManager:
     """Manages user feedback for chat messages in a SQLite database."""
@@ -16,11 +18,12 @@ class FeedbackManager:
     def __init__(self, db_path: str = "data/feedback.db"):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = get_database(self.db_path)
         self._init_db()
 
     def _get_conn(self) -> sqlite3.Connection:
-        """Helper to get a new SQLite connection."""
-        return sqlite3.connect(str(self.db_path))
+        """Helper to get this thread's shared SQLite connection (Row factory, WAL)."""
+        return self._db.connection()
 
     def _init_db(self):
         """Creates the feedback table if it doesn't exist."""
@@ -94,7 +97,6 @@ class FeedbackManager:
         """
         try:
             with self._get_conn() as conn:
-                conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     "SELECT * FROM feedback WHERE message_id = ? ORDER BY timestamp DESC",
                     (message_id,)
@@ -115,7 +117,6 @@ class FeedbackManager:
         """
         try:
             with self._get_conn() as conn:
-                conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     "SELECT * FROM feedback WHERE user_id = ? ORDER BY timestamp DESC",
                     (user_id,)
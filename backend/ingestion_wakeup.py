@@ -0,0 +1,134 @@
+"""
+Local wakeup channel between the chat API and ingestion workers.
+
+Each running IngestionWorker binds a Unix-domain datagram socket in a shared
+directory (next to sessions.db by default). SessionManager.add_to_ingestion_queue
+sends a one-byte datagram to every socket in that directory, so an idle worker
+starts on a new chat note immediately instead of waiting for its next poll.
+
+Notifications are best-effort: they never block or raise into the caller, and
+the worker still polls on a (backed-off) timer, so a lost datagram only costs
+latency. On platforms without AF_UNIX, notify is a no-op and workers poll.
+"""
+
+import os
+import select
+import socket
+import logging
+from pathlib import Path
+from typing import Optional, Union
+
+logger = logging.getLogger(__name__)
+
+WAKEUP_SUPPORTED = hasattr(socket, "AF_UNIX")
+SOCKET_SUFFIX = ".sock"
+
+
+def default_wakeup_dir(db_path: Union[str, Path]) -> Path:
+    """Wakeup directory shared by the API and workers using the same sessions.db."""
+    return Path(os.getenv("INGESTION_WAKEUP_DIR", str(Path(db_path).parent / "ingestion_wakeup")))
+
+
+def notify_workers(wakeup_dir: Union[str, Path]) -> int:
+    """
+    Wake every worker listening in `wakeup_dir`.
+
+    Args:
+        wakeup_dir: Directory holding the workers' sockets
+
+    Returns:
+        int: Number of workers notified
+    """
+    if not WAKEUP_SUPPORTED:
+        return 0
+    wakeup_dir = Path(wakeup_dir)
+    try:
+        socket_paths = [p for p in wakeup_dir.iterdir() if p.name.endswith(SOCKET_SUFFIX)]
+    except FileNotFoundError:
+        return 0  # No worker has ever started
+    except OSError as e:
+        logger.debug(f"Cannot list wakeup directory {wakeup_dir}: {e}")
+        return 0
+
+    try:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    except OSError as e:
+        # E.g. out of file descriptors: the workers' poll still picks the work up
+        logger.debug(f"Cannot create wakeup socket: {e}")
+        return 0
+
+    notified = 0
+    with sock:
+        sock.setblocking(False)
+        for path in socket_paths:
+            try:
+                sock.sendto(b"1", str(path))
+                notified += 1
+            except BlockingIOError:
+                notified += 1  # Receiver buffer full: a wakeup is already pending
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Stale socket left by a worker that died without cleanup
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            except OSError as e:
+                logger.debug(f"Wakeup to {path} failed: {e}")
+    return notified
+
+
+class WakeupListener:
+    """Worker side of the wakeup channel: a bound datagram socket to wait on."""
+
+    def __init__(self, wakeup_dir: Union[str, Path], name: str):
+        """
+        Args:
+            wakeup_dir: Directory shared with notify_workers()
+            name: Unique listener name (e.g. the worker's pid)
+        """
+        self.path = Path(wakeup_dir) / f"{name}{SOCKET_SUFFIX}"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.path.exists():
+            self.path.unlink()
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.bind(str(self.path))
+        self.sock.setblocking(False)
+
+    def wait(self, timeout: float) -> bool:
+        """
+        Block until notified or `timeout` seconds pass.
+
+        Returns:
+            bool: True if woken by a notification, False on timeout
+        """
+        readable, _, _ = select.select([self.sock], [], [], timeout)
+        if not readable:
+            return False
+        # Coalesce: one wakeup covers every notification received so far
+        while True:
+            try:
+                self.sock.recv(64)
+            except (BlockingIOError, InterruptedError):
+                break
+        return True
+
+    def close(self):
+        """Stop listening and remove the socket file."""
+        try:
+            self.sock.close()
+        finally:
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+
+def create_listener(wakeup_dir: Union[str, Path], name: str) -> Optional[WakeupListener]:
+    """Create a WakeupListener, or None if unsupported/unavailable (worker then polls)."""
+    if not WAKEUP_SUPPORTED:
+        return None
+    try:
+        return WakeupListener(wakeup_dir, name)
+    except OSError as e:
+        logger.warning(f"Wakeup socket unavailable ({e}); falling back to polling")
+        return None
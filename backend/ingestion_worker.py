@@ -7,32 +7,45 @@ table in sessions.db. It pulls pending messages and performs the full File -> Ve
 orchestration asynchronously, decoupling the chat experience from knowledge base updates.
 
 The worker:
-1. Polls ingestion_queue for pending messages
+1. Waits for a wakeup from add_to_ingestion_queue (or a backed-off poll timer),
+   then claims pending messages from ingestion_queue under a lease
 2. Fetches chat turn data using session_manager
 3. Formats as Markdown
-4. Saves to filesystem_server
-5. Indexes in chroma_server
-6. Commits to git_server
-7. Marks queue record as complete
+4. Saves to filesystem_server (one bulk call per project)
+5. Indexes in chroma_server (one request per project)
+6. Commits to git_server (one commit per project batch)
+7. Marks queue record as complete (failures are retried, then dead-lettered)
 
 This keeps chat fast while ensuring Story Bible is eventually consistent.
 """
 
 import os
 import sys
+import json
 import time
+import uuid
+import signal
+import socket
 import logging
+import argparse
+import threading
+import multiprocessing
 import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
 
 # Add backend to path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from session_manager import SessionManager
+from ingestion_wakeup import create_listener, default_wakeup_dir
 from service_utils import get_internal_headers
 
 # Configure logging
+Path("logs").mkdir(exist_ok=True)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s [%(levelname)s] %(name)s: %(message)s',
@@ -50,83 +63,236 @@ CHROMA_SERVER_URL = os.getenv('CHROMA_SERVER_URL', 'http://localhost:6003')
 GIT_SERVER_URL = os.getenv('GIT_SERVER_URL', 'http://localhost:6005')
 
 # Worker configuration
-POLL_INTERVAL = 5  # Check queue every 5 seconds
+POLL_INTERVAL = 5  # Max fallback poll when wakeups are unavailable
+MIN_POLL_INTERVAL = 0.5  # Fallback poll right after activity
+MAX_IDLE_POLL_INTERVAL = 30  # Fallback poll ceiling while wakeups are available
 BATCH_SIZE = 10    # Process up to 10 messages per cycle
-RETRY_LIMIT = 3    # Retry failed ingestions up to 3 times
+RETRY_LIMIT = 5    # Attempts per message before it is dead-lettered
+# Retry backoff: base * 2^(attempt-1) seconds, capped (see SessionManager.record_ingestion_attempt)
+RETRY_BASE_SECONDS = int(os.getenv('INGESTION_RETRY_BASE_SECONDS', '30'))
+RETRY_MAX_SECONDS = int(os.getenv('INGESTION_RETRY_MAX_SECONDS', '900'))
+LEASE_SECONDS = int(os.getenv('INGESTION_LEASE_SECONDS', '300'))  # Claim validity before reclaim
+WORKER_THREADS = int(os.getenv('INGESTION_WORKER_THREADS', '4'))  # Projects ingested in parallel
+WORKER_PROCESSES = int(os.getenv('INGESTION_WORKER_PROCESSES', '1'))  # Independent worker processes
+
+
+class IngestionMetrics:
+    """
+    Thread-safe latency metrics for one worker: queue lag and per-step timings.
+    
+    Each metric keeps count/avg/max over the worker's lifetime and p50/p95 over
+    the most recent samples. A JSON snapshot is written after every batch to
+    METRICS_DIR so the backend admin endpoint can report on running workers.
+    """
+    
+    def __init__(self, worker_id: str, path: Optional[Path] = None, window: int = 500):
+        self.worker_id = worker_id
+        self.path = path
+        self.window = window
+        self.started_at = datetime.utcnow().isoformat() + "Z"
+        self._lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, Any]] = {}
+        self.counters: Dict[str, int] = {"claimed": 0, "completed": 0, "failed": 0, "dead": 0}
+    
+    def observe(self, name: str, seconds: float):
+        """Record one sample (in seconds) for a metric."""
+        with self._lock:
+            metric = self._metrics.setdefault(
+                name, {"count": 0, "total": 0.0, "max": 0.0, "recent": deque(maxlen=self.window)}
+            )
+            metric["count"] += 1
+            metric["total"] += seconds
+            metric["max"] = max(metric["max"], seconds)
+            metric["recent"].append(seconds)
+    
+    def increment(self, counter: str, amount: int = 1):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Current metrics as a JSON-serialisable dict (times in milliseconds)."""
+        with self._lock:
+            metrics = {}
+            for name, metric in self._metrics.items():
+                recent = sorted(metric["recent"])
+                metrics[name] = {
+                    "count": metric["count"],
+                    "avg_ms": round(metric["total"] / metric["count"] * 1000, 1),
+                    "max_ms": round(metric["max"] * 1000, 1),
+                    "p50_ms": round(recent[len(recent) // 2] * 1000, 1),
+                    "p95_ms": round(recent[min(len(recent) - 1, int(len(recent) * 0.95))] * 1000, 1),
+                }
+            return {
+                "worker_id": self.worker_id,
+                "pid": os.getpid(),
+                "started_at": self.started_at,
+                "updated_at": datetime.utcnow().isoformat() + "Z",
+                "counters": dict(self.counters),
+                "metrics": metrics,
+            }
+    
+    def flush(self):
+        """Atomically write the snapshot file (best-effort)."""
+        if not self.path:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(self.snapshot()), encoding="utf-8")
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.debug(f"Could not write metrics to {self.path}: {e}")
+    
+    def remove(self):
+        if self.path:
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+
+def default_metrics_dir(db_path: str) -> Path:
+    """Directory where workers publish metrics snapshots (read by the backend)."""
+    return Path(os.getenv("INGESTION_METRICS_DIR", str(Path(db_path).parent / "ingestion_metrics")))
+
+
+def _parse_db_timestamp(value: str) -> Optional[datetime]:
+    """Parse a SQLite CURRENT_TIMESTAMP value (UTC)."""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        return None
+
 
 class IngestionWorker:
     """Background worker for ingesting chat messages into the knowledge base."""
     
-    def __init__(self, db_path: str = "data/sessions.db"):
-        """Initialize the worker."""
+    def __init__(self, db_path: str = "data/sessions.db", threads: int = WORKER_THREADS):
+        """
+        Initialize the worker.
+        
+        Args:
+            db_path (str): Path to sessions.db
+            threads (int): Projects ingested in parallel within a batch (1 = sequential)
+        """
         self.db_path = db_path
         self.session_manager = SessionManager(db_path)
+        # Unique per process so leases from a crashed worker are never confused with ours
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
         self.logger = logger
-        self.logger.info("✓ IngestionWorker initialized")
+        self.last_batch_size = 0
+        self.wakeup = None  # Bound in run()
+        self.threads = max(1, threads)
+        # One task per project group, so a project's messages are never split across threads
+        self.executor = ThreadPoolExecutor(max_workers=self.threads) if self.threads > 1 else None
+        self.metrics = IngestionMetrics(
+            self.worker_id, default_metrics_dir(db_path) / f"worker_{os.getpid()}.json"
+        )
+        self._stop = threading.Event()
+        self.logger.info(f"✓ IngestionWorker initialized (worker_id={self.worker_id}, threads={self.threads})")
+    
+    def request_stop(self, *_):
+        """Ask the run loop to exit after in-flight work completes (signal-safe)."""
+        self._stop.set()
+        if self.wakeup:
+            # Interrupt an idle wait immediately
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+                    sock.sendto(b"0", str(self.wakeup.path))
+            except OSError:
+                pass
     
     def process_queue(self) -> int:
         """
         Process pending ingestions from the queue.
         
+        Claimed messages are grouped by (project, user) so each group costs one
+        bulk file save, one Chroma request and one git commit.
+        
         Returns:
             int: Number of messages successfully ingested
         """
         try:
-            # Get pending messages
-            pending = self.session_manager.get_pending_ingestions(limit=BATCH_SIZE)
+            # Atomically claim pending messages (and expired leases) for this worker
+            pending = self.session_manager.claim_ingestions(
+                self.worker_id,
+                limit=BATCH_SIZE,
+                lease_seconds=LEASE_SECONDS,
+                max_attempts=RETRY_LIMIT
+            )
             
+            self.last_batch_size = len(pending)
             if not pending:
                 return 0
             
             self.logger.info(f"Processing {len(pending)} pending ingestions...")
+            self.metrics.increment("claimed", len(pending))
+            
+            # Queue lag: how long each message waited before a worker picked it up
+            now = datetime.utcnow()
+            for record in pending:
+                created_at = _parse_db_timestamp(record.get('created_at'))
+                if created_at:
+                    self.metrics.observe("queue_lag", max(0.0, (now - created_at).total_seconds()))
+            
+            # Hydrate every turn in the batch with a single query
+            turns = self.session_manager.get_turns_by_ids(
+                [record['message_id'] for record in pending]
+            )
             
-            success_count = 0
+            # Group by project (and owner, since storage is per user), keeping FIFO order
+            groups: Dict[tuple, List[tuple]] = {}
             for queue_record in pending:
-                if self._ingest_message(queue_record):
-                    success_count += 1
+                turn_data = turns.get(queue_record['message_id'])
+                if turn_data and turn_data['user_id'] != queue_record['user_id']:
+                    turn_data = None  # Ownership mismatch: treat as not found
+                if not turn_data:
+                    error_msg = f"Could not retrieve turn data for message {queue_record['message_id']}"
+                    self.logger.error(error_msg)
+                    # Not transient: dead-letter immediately instead of retrying
+                    self.session_manager.mark_ingestion_complete(
+                        queue_record['id'], 'dead', error_msg, worker_id=self.worker_id
+                    )
+                    self.metrics.increment("dead")
+                    continue
+                key = (queue_record['project_id'], queue_record['user_id'])
+                groups.setdefault(key, []).append((queue_record, turn_data))
+            
+            # Different projects run in parallel; each project's group runs in
+            # FIFO order on one thread. The batch completes before the next claim.
+            if self.executor and len(groups) > 1:
+                futures = [
+                    self.executor.submit(self._ingest_batch, project_id, user_id, items)
+                    for (project_id, user_id), items in groups.items()
+                ]
+                success_count = sum(future.result() for future in futures)
+            else:
+                success_count = sum(
+                    self._ingest_batch(project_id, user_id, items)
+                    for (project_id, user_id), items in groups.items()
+                )
             
             self.logger.info(f"Processed {success_count}/{len(pending)} ingestions successfully")
             return success_count
         
         except Exception as e:
             self.logger.error(f"Error processing queue: {e}", exc_info=True)
+            self.last_batch_size = 0
             return 0
+        finally:
+            self.metrics.flush()
     
-    def _ingest_message(self, queue_record: dict) -> bool:
+    def _format_note(self, record: dict, turn_data: dict) -> dict:
         """
-        Perform the complete ingestion workflow for a single message.
+        Build the Markdown note for one chat turn.
         
-        Steps:
-        1. Fetch turn data
-        2. Format as Markdown
-        3. Save to filesystem
-        4. Index in Chroma
-        5. Commit to Git
-        
-        Args:
-            queue_record (dict): Queue record with message_id, project_id, user_id, id
-            
-        Returns:
-            bool: True if ingestion succeeded, False otherwise
+        The content depends only on the queue record and the turn, so a retry
+        rewrites byte-identical files and git sees no change for notes that
+        were already committed.
         """
-        message_id = queue_record['message_id']
-        project_id = queue_record['project_id']
-        user_id = queue_record['user_id']
-        queue_id = queue_record['id']
-        
-        try:
-            self.logger.info(f"Ingesting message {message_id}...")
-            
-            # Step 1: Fetch turn data
-            turn_data = self.session_manager.get_turn_by_id(message_id, user_id)
-            if not turn_data:
-                error_msg = f"Could not retrieve turn data for message {message_id}"
-                self.logger.error(error_msg)
-                self.session_manager.mark_ingestion_complete(queue_id, 'failed', error_msg)
-                return False
-            
-            # Step 2: Format as Markdown
-            note_content = f"""# Chat Note: {datetime.now().strftime('%Y-%m-%d %H:%M')}
+        message_id = record['message_id']
+        queued_at = _parse_db_timestamp(record.get('created_at')) or datetime.utcnow()
+        content = f"""# Chat Note: {queued_at.strftime('%Y-%m-%d %H:%M')}
 
 ## User Query
 {turn_data['user_query']}
@@ -134,69 +300,145 @@ class IngestionWorker:
 ## George's Response
 {turn_data['ai_response']}
 """
-            note_filename = f"notes/note_{message_id}.md"
+        return {
+            "message_id": message_id,
+            "file_path": f"notes/note_{message_id}.md",
+            "content": content,
+            "user_query": turn_data['user_query']
+        }
+    
+    def _ingest_batch(self, project_id: str, user_id: str, items: List[tuple]) -> int:
+        """
+        Perform the ingestion workflow for all claimed messages of one project.
+        
+        Each step is tracked per message, so a retry only repeats the steps that
+        have not succeeded yet (e.g. a git outage does not re-embed the note).
+        Every step is idempotent on its own: files are overwritten with the same
+        content, Chroma upserts by message_id and git skips empty snapshots.
+        
+        Steps:
+        1. Format each turn as Markdown
+        2. Save notes whose file is not stored yet (one bulk call)
+        3. Upsert notes not indexed yet in Chroma (one request)
+        4. Commit to Git (one commit for notes whose file is stored but not committed)
+        5. Record per-step outcomes; a message is complete once all steps are done
+        
+        Args:
+            project_id (str): Project shared by every item
+            user_id (str): Owner shared by every item
+            items (List[tuple]): (queue_record, turn_data) pairs in FIFO order
             
-            # Step 3: Save to filesystem
-            file_saved = self._save_to_filesystem(project_id, user_id, note_filename, note_content)
+        Returns:
+            int: Number of messages fully ingested
+        """
+        message_ids = [record['message_id'] for record, _ in items]
+        records = {record['message_id']: record for record, _ in items}
+        steps: Dict[str, Dict[str, bool]] = {message_id: {} for message_id in message_ids}
+        
+        def pending(step_column: str) -> List[dict]:
+            return [note for note in notes if records[note["message_id"]].get(step_column) != 'done']
+        
+        try:
+            self.logger.info(f"Ingesting {len(items)} message(s) for project {project_id}...")
             
-            # Step 4: Index in Chroma (even if filesystem failed - graceful degradation)
-            vector_indexed = self._index_to_chroma(project_id, message_id, note_filename, note_content, user_id)
+            # Step 1: Format as Markdown
+            notes = [self._format_note(record, turn_data) for record, turn_data in items]
             
-            # Step 5: Commit to Git (even if earlier steps failed)
-            git_committed = self._commit_to_git(project_id, user_id, message_id, note_filename, turn_data)
+            # Step 2: Save to filesystem (returns the message_ids whose file was written)
+            to_save = pending("file_status")
+            if to_save:
+                files_saved = self._timed("step.save_files", self._save_to_filesystem, project_id, user_id, to_save)
+                for note in to_save:
+                    steps[note["message_id"]]["file"] = note["message_id"] in files_saved
             
-            # Determine overall success
-            overall_success = file_saved or vector_indexed or git_committed
+            # Step 3: Index in Chroma (even if filesystem failed - graceful degradation)
+            to_index = pending("vector_status")
+            if to_index:
+                vector_indexed = self._timed("step.index_chroma", self._index_to_chroma, project_id, user_id, to_index)
+                for note in to_index:
+                    steps[note["message_id"]]["vector"] = vector_indexed
             
-            if overall_success:
-                self.logger.info(
-                    f"✓ Ingestion complete for {message_id}: "
-                    f"file={file_saved}, vector={vector_indexed}, git={git_committed}"
+            # Step 4: Commit to Git (only notes whose file is on disk)
+            to_commit = [
+                note for note in pending("git_status")
+                if records[note["message_id"]].get("file_status") == 'done'
+                or steps[note["message_id"]].get("file")
+            ]
+            if to_commit:
+                git_committed = self._timed("step.git_commit", self._commit_to_git, project_id, user_id, to_commit)
+                for note in to_commit:
+                    steps[note["message_id"]]["git"] = git_committed
+        except Exception as e:
+            self.logger.error(f"Unexpected error ingesting batch {message_ids}: {e}", exc_info=True)
+            # Keep the steps that did succeed so the retry skips them
+            for record, _ in items:
+                self.session_manager.record_ingestion_attempt(
+                    record['id'], steps[record['message_id']], str(e), RETRY_LIMIT,
+                    worker_id=self.worker_id, backoff_base=RETRY_BASE_SECONDS, backoff_max=RETRY_MAX_SECONDS
                 )
-                self.session_manager.mark_ingestion_complete(queue_id, 'complete')
-                return True
-            else:
-                error_msg = "All ingestion steps failed"
-                self.logger.error(f"✗ {error_msg} for message {message_id}")
-                self.session_manager.mark_ingestion_complete(queue_id, 'failed', error_msg)
-                return False
+            self.metrics.increment("failed", len(items))
+            return 0
         
-        except Exception as e:
-            self.logger.error(f"Unexpected error ingesting message {message_id}: {e}", exc_info=True)
-            self.session_manager.mark_ingestion_complete(queue_id, 'failed', str(e))
-            return False
+        # Step 5: Per-message outcome
+        success_count = 0
+        for record, _ in items:
+            message_id = record['message_id']
+            outcome = steps[message_id]
+            failed_steps = [step for step, ok in outcome.items() if not ok]
+            error_msg = f"Steps failed: {', '.join(failed_steps)}" if failed_steps else "Waiting on earlier steps"
+            status = self.session_manager.record_ingestion_attempt(
+                record['id'], outcome, error_msg, RETRY_LIMIT,
+                worker_id=self.worker_id, backoff_base=RETRY_BASE_SECONDS, backoff_max=RETRY_MAX_SECONDS
+            )
+            if status == 'complete':
+                self.logger.info(f"✓ Ingestion complete for {message_id}: attempted={outcome}")
+                success_count += 1
+            else:
+                self.logger.error(f"✗ Ingestion incomplete for {message_id} ({error_msg}): now {status or 'unchanged'}")
+        self.metrics.increment("completed", success_count)
+        self.metrics.increment("failed", len(items) - success_count)
+        return success_count
     
-    def _save_to_filesystem(self, project_id: str, user_id: str, note_filename: str, content: str) -> bool:
+    def _timed(self, metric: str, func, *args):
+        """Run one pipeline step and record its latency."""
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.metrics.observe(metric, time.perf_counter() - start)
+    
+    def _save_to_filesystem(self, project_id: str, user_id: str, notes: List[dict]) -> Set[str]:
         """
-        Save note to filesystem_server.
+        Save all notes to filesystem_server in one /save_files call.
         
         Returns:
-            bool: True if successful
+            Set[str]: message_ids whose note was saved
         """
         try:
             payload = {
                 "project_id": project_id,
-                "file_path": note_filename,
-                "content": content
+                "files": [{"file_path": note["file_path"], "content": note["content"]} for note in notes]
             }
             headers = {'X-User-ID': user_id}
             headers.update(get_internal_headers())
             response = requests.post(
-                f"{FILESYSTEM_SERVER_URL}/save_file",
+                f"{FILESYSTEM_SERVER_URL}/save_files",
                 json=payload,
                 headers=headers,
                 timeout=10
             )
             response.raise_for_status()
-            self.logger.debug(f"✓ Saved to filesystem: {note_filename}")
-            return True
+            saved_paths = {item['file_path'] for item in response.json().get('saved', [])}
+            saved = {note["message_id"] for note in notes if note["file_path"] in saved_paths}
+            self.logger.debug(f"✓ Saved {len(saved)}/{len(notes)} notes to filesystem")
+            return saved
         except Exception as e:
-            self.logger.warning(f"✗ Filesystem save failed for {note_filename}: {e}")
-            return False
+            self.logger.warning(f"✗ Filesystem save failed for {len(notes)} notes in {project_id}: {e}")
+            return set()
     
-    def _index_to_chroma(self, project_id: str, message_id: str, note_filename: str, content: str, user_id: str) -> bool:
+    def _index_to_chroma(self, project_id: str, user_id: str, notes: List[dict]) -> bool:
         """
-        Index note in Chroma vector database.
+        Index all notes in Chroma with one /add_chunks request (one embedding batch).
         
         Returns:
             bool: True if successful
@@ -204,80 +446,120 @@ class IngestionWorker:
         try:
             payload = {
                 "collection_name": f"project_{project_id}",
-                "documents": [content],
-                "metadatas": [{
-                    "source_file": note_filename,
-                    "type": "auto_ingested_chat",
-                    "created_by": user_id
-                }],
-                "ids": [message_id]
+                "chunks": [
+                    {
+                        "id": note["message_id"],
+                        "text": note["content"],
+                        "metadata": {
+                            "source_file": note["file_path"],
+                            "type": "auto_ingested_chat",
+                            "created_by": user_id
+                        }
+                    }
+                    for note in notes
+                ],
+                # Retries re-send notes that may already be indexed
+                "upsert": True
             }
             response = requests.post(
-                f"{CHROMA_SERVER_URL}/add",
+                f"{CHROMA_SERVER_URL}/add_chunks",
                 json=payload,
                 headers=get_internal_headers(),
                 timeout=10
             )
             response.raise_for_status()
-            self.logger.debug(f"✓ Indexed in Chroma: {message_id}")
+            self.logger.debug(f"✓ Indexed {len(notes)} notes in Chroma")
             return True
         except Exception as e:
-            self.logger.warning(f"✗ Chroma indexing failed for {message_id}: {e}")
+            self.logger.warning(f"✗ Chroma indexing failed for {len(notes)} notes in {project_id}: {e}")
             return False
     
-    def _commit_to_git(self, project_id: str, user_id: str, message_id: str, note_filename: str, turn_data: dict) -> bool:
+    def _commit_to_git(self, project_id: str, user_id: str, notes: List[dict]) -> bool:
         """
-        Commit note to git_server.
+        Create a single git snapshot for the whole batch.
         
         Returns:
             bool: True if successful
         """
         try:
+            if len(notes) == 1:
+                message = f"Auto-ingest chat: {notes[0]['file_path']}"
+            else:
+                message = f"Auto-ingest chat: {len(notes)} notes"
+            description = "Auto-ingested from chat session.\n\n" + "\n".join(
+                f"- {note['file_path']} (Message ID: {note['message_id']}): {note['user_query'][:100]}"
+                for note in notes
+            )
             payload = {
-                "project_id": project_id,
                 "user_id": user_id,
-                "message": f"Auto-ingest chat: {note_filename}",
-                "description": f"Auto-ingested from chat session.\n\nPrompt: {turn_data['user_query'][:100]}...\n\nMessage ID: {message_id}"
+                "message": message,
+                "description": description
             }
             response = requests.post(
-                f"{GIT_SERVER_URL}/snapshot",
+                f"{GIT_SERVER_URL}/snapshot/{project_id}",
                 json=payload,
                 headers=get_internal_headers(),
                 timeout=10
             )
             response.raise_for_status()
-            self.logger.debug(f"✓ Committed to Git: {message_id}")
+            self.logger.debug(f"✓ Committed {len(notes)} notes to Git")
             return True
         except Exception as e:
-            self.logger.warning(f"✗ Git commit failed for {message_id}: {e}")
+            self.logger.warning(f"✗ Git commit failed for {len(notes)} notes in {project_id}: {e}")
             return False
     
     def run(self):
         """
-        Main worker loop. Continuously polls and processes the ingestion queue.
+        Main worker loop. Processes the ingestion queue whenever woken by
+        add_to_ingestion_queue, draining full batches back-to-back.
         This should run as a separate process or daemon.
+        
+        Polling remains as a fallback: the idle wait starts at MIN_POLL_INTERVAL
+        after activity and doubles up to MAX_IDLE_POLL_INTERVAL (or POLL_INTERVAL
+        when the wakeup socket is unavailable).
+        
+        SIGTERM/SIGINT stop the loop gracefully: the in-flight batch is drained
+        (every claimed message is completed or released) before exiting.
         """
+        # Bind BEFORE the first claim so no notification can slip between them
+        self.wakeup = create_listener(default_wakeup_dir(self.db_path), f"worker_{os.getpid()}")
+        max_idle = MAX_IDLE_POLL_INTERVAL if self.wakeup else POLL_INTERVAL
+        
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.request_stop)
+            signal.signal(signal.SIGINT, self.request_stop)
+
         self.logger.info("=" * 60)
         self.logger.info("INGESTION WORKER STARTED")
         self.logger.info("=" * 60)
         self.logger.info(f"Filesystem Server: {FILESYSTEM_SERVER_URL}")
         self.logger.info(f"Chroma Server: {CHROMA_SERVER_URL}")
         self.logger.info(f"Git Server: {GIT_SERVER_URL}")
-        self.logger.info(f"Poll Interval: {POLL_INTERVAL}s")
-        self.logger.info(f"Batch Size: {BATCH_SIZE}")
+        self.logger.info(f"Wakeup: {self.wakeup.path if self.wakeup else 'unavailable (polling only)'}")
+        self.logger.info(f"Fallback Poll: {MIN_POLL_INTERVAL}s -> {max_idle}s")
+        self.logger.info(f"Batch Size: {BATCH_SIZE}, Threads: {self.threads}")
+        self.logger.info(f"Lease: {LEASE_SECONDS}s, Retry Limit: {RETRY_LIMIT} "
+                         f"(backoff {RETRY_BASE_SECONDS}s doubling to {RETRY_MAX_SECONDS}s)")
+        self.logger.info(f"Metrics: {self.metrics.path}")
         self.logger.info("=" * 60)
         
         cycle = 0
         last_activity = datetime.now()
+        idle_wait = MIN_POLL_INTERVAL
         
         try:
-            while True:
+            while not self._stop.is_set():
                 cycle += 1
                 processed = self.process_queue()
                 
                 if processed > 0:
                     last_activity = datetime.now()
                 
+                if self.last_batch_size >= BATCH_SIZE:
+                    # Queue likely has more: keep draining without waiting
+                    idle_wait = MIN_POLL_INTERVAL
+                    continue
+                
                 # Log activity every 30 cycles
                 if cycle % 30 == 0:
                     idle_time = (datetime.now() - last_activity).total_seconds()
@@ -287,25 +569,68 @@ class IngestionWorker:
                         f"Waiting for ingestions..."
                     )
                 
-                time.sleep(POLL_INTERVAL)
+                if self.last_batch_size > 0:
+                    idle_wait = MIN_POLL_INTERVAL
+                
+                if self.wakeup and self.wakeup.wait(idle_wait):
+                    idle_wait = MIN_POLL_INTERVAL
+                else:
+                    if not self.wakeup:
+                        self._stop.wait(idle_wait)
+                    idle_wait = min(idle_wait * 2, max_idle)
         
         except KeyboardInterrupt:
-            self.logger.info("\n" + "=" * 60)
-            self.logger.info("INGESTION WORKER SHUTTING DOWN")
-            self.logger.info("=" * 60)
+            pass
         except Exception as e:
             self.logger.critical(f"FATAL ERROR: {e}", exc_info=True)
             sys.exit(1)
+        finally:
+            self.logger.info("=" * 60)
+            self.logger.info("INGESTION WORKER SHUTTING DOWN (draining in-flight work)")
+            self.logger.info("=" * 60)
+            if self.executor:
+                self.executor.shutdown(wait=True)
+            if self.wakeup:
+                self.wakeup.close()
+            self.metrics.remove()
+
+
+def _run_worker(db_path: str, threads: int):
+    """Process entry point (spawn-safe: everything is created in the child)."""
+    IngestionWorker(db_path=db_path, threads=threads).run()
 
 
 def main():
     """Entry point for the ingestion worker."""
-    # Ensure logs directory exists
-    Path("logs").mkdir(exist_ok=True)
+    parser = argparse.ArgumentParser(description="George ingestion worker")
+    parser.add_argument("--db-path", default="data/sessions.db")
+    parser.add_argument("--threads", type=int, default=WORKER_THREADS,
+                        help="Projects ingested in parallel per process")
+    parser.add_argument("--processes", type=int, default=WORKER_PROCESSES,
+                        help="Independent worker processes (each claims its own leases)")
+    args = parser.parse_args()
+    
+    if args.processes <= 1:
+        _run_worker(args.db_path, args.threads)
+        return
+    
+    # Supervisor: run N workers and forward shutdown so each one drains
+    workers = [
+        multiprocessing.Process(target=_run_worker, args=(args.db_path, args.threads), name=f"ingestion-{i}")
+        for i in range(args.processes)
+    ]
+    for process in workers:
+        process.start()
+    
+    def _forward(signum, _frame):
+        for process in workers:
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
     
-    # Create and run worker
-    worker = IngestionWorker(db_path="data/sessions.db")
-    worker.run()
+    signal.signal(signal.SIGTERM, _forward)
+    signal.signal(signal.SIGINT, _forward)
+    for process in workers:
+        process.join()
 
 
 if __name__ == '__main__':
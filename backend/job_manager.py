@@ -1,11 +1,21 @@
+import os
+import time
+import socket
 import sqlite3
 import uuid
 import json
 import logging
+import pickle
+import itertools
+import threading
+import multiprocessing
+from collections import Counter
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 from concurrent.futures import ThreadPoolExecutor
-from typing import Callable, Any, Optional, Dict, List
+from typing import Callable, Any, Optional, Dict, List, Tuple
+
+from db_utils import get_database
 
 # --- Job Status Constants ---
 STATUS_QUEUED = "QUEUED"
@@ -13,36 +23,215 @@ STATUS_PROCESSING = "PROCESSING"
 STATUS_WAITING_FOR_USER = "WAITING_FOR_USER"
 STATUS_COMPLETED = "COMPLETED"
 STATUS_FAILED = "FAILED"
+STATUS_CANCELLED = "CANCELLED"
+
+# --- Priority Classes (lower rank runs first) ---
+PRIORITY_INTERACTIVE = "interactive"   # A user is waiting on the result
+PRIORITY_REPORT = "report"             # Long reports (wiki generation)
+PRIORITY_MAINTENANCE = "maintenance"   # Background upkeep, runs when nothing else waits
+PRIORITY_RANKS = {PRIORITY_INTERACTIVE: 0, PRIORITY_REPORT: 1, PRIORITY_MAINTENANCE: 2}
+# Default class per job_type (unknown types are interactive)
+JOB_TYPE_PRIORITIES = {
+    "wiki_generation": PRIORITY_REPORT,
+}
+
+# --- Scheduling Limits ---
+MAX_JOBS_PER_USER = int(os.environ.get("JOB_MAX_PER_USER", "2"))
+MAX_JOBS_PER_PROJECT = int(os.environ.get("JOB_MAX_PER_PROJECT", "2"))
+# A waiting job is promoted one priority class per interval so it can't starve
+PRIORITY_AGING_SECONDS = int(os.environ.get("JOB_PRIORITY_AGING_SECONDS", "600"))
+# Assumed runtime for a job_type with no completed history (used for ETAs)
+DEFAULT_JOB_DURATION_SECONDS = int(os.environ.get("JOB_DEFAULT_DURATION_SECONDS", "120"))
+
+# --- Execution Modes ---
+# "thread": run inside the API process (I/O-bound work such as LLM calls)
+# "process": run in a freshly spawned child process, so CPU-bound work (NER,
+#            PDF parsing, chunking) never holds the API process's GIL
+EXECUTION_THREAD = "thread"
+EXECUTION_PROCESS = "process"
+# Per job_type overrides, e.g. JOB_EXECUTION_MODES="document_parse=process,entity_extraction=process"
+JOB_TYPE_EXECUTION = {
+    job_type.strip(): mode.strip()
+    for job_type, _, mode in (
+        item.partition("=") for item in os.environ.get("JOB_EXECUTION_MODES", "").split(",") if "=" in item
+    )
+}
+# Grace period between SIGTERM and SIGKILL when cancelling a process job
+CANCEL_GRACE_SECONDS = float(os.environ.get("JOB_CANCEL_GRACE_SECONDS", "5"))
+
+# --- Out-of-Process Job Runners (backend/job_runner.py) ---
+# Job types the API only enqueues; a standalone runner claims and executes them.
+# Set to "" to run every job in the API process (no runner deployed)
+RUNNER_JOB_TYPES = {
+    job_type.strip() for job_type in os.environ.get("JOB_RUNNER_JOB_TYPES", "wiki_generation").split(",")
+    if job_type.strip()
+}
+RUNNER_LEASE_SECONDS = int(os.environ.get("JOB_RUNNER_LEASE_SECONDS", "120"))
+RUNNER_MAX_ATTEMPTS = int(os.environ.get("JOB_RUNNER_MAX_ATTEMPTS", "3"))
+
+# --- In-Process Job Leases ---
+# Jobs the API runs itself are leased to the creating process, which renews
+# the lease while it is alive. A job whose lease ran out (the process was
+# restarted or died) is failed by requeue_orphaned_jobs, freeing its dedupe key.
+JOB_LEASE_SECONDS = int(os.environ.get("JOB_LEASE_SECONDS", "120"))
 
 logger = logging.getLogger(__name__)
 
+
+def _write_job_status(conn: sqlite3.Connection, job_id: str, status: str,
+                      result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+    """Writes a job's status, result, or error (the caller commits)."""
+    if status in [STATUS_COMPLETED, STATUS_FAILED, STATUS_CANCELLED]:
+        completed_time = datetime.utcnow()
+        conn.execute(
+            """UPDATE jobs SET status = ?, result = ?, error = ?, completed_at = ? 
+               WHERE job_id = ?""",
+            (status, json.dumps(result) if result else None, error, completed_time, job_id)
+        )
+    elif status == STATUS_WAITING_FOR_USER and result:
+        # Special case: Update result (preview data) but don't set completed_at
+        conn.execute(
+            "UPDATE jobs SET status = ?, result = ? WHERE job_id = ?",
+            (status, json.dumps(result), job_id)
+        )
+    elif status == STATUS_PROCESSING:
+        conn.execute(
+            "UPDATE jobs SET status = ?, started_at = ? WHERE job_id = ?",
+            (status, datetime.utcnow(), job_id)
+        )
+    else:
+        conn.execute("UPDATE jobs SET status = ? WHERE job_id = ?", (status, job_id))
+    if status in [STATUS_FAILED, STATUS_CANCELLED]:
+        # Only runner jobs can be retried (JobManager.retry_job): nothing resumes an in-process job
+        conn.execute(
+            "DELETE FROM job_checkpoints WHERE job_id IN (SELECT job_id FROM jobs WHERE job_id = ? AND task IS NULL)",
+            (job_id,)
+        )
+
+
+def _run_job_in_process(db_path: str, job_id: str, task_function: Callable[..., Any],
+                        args: tuple, kwargs: dict):
+    """
+    Entry point of a spawned job process.
+    
+    Runs the task and writes COMPLETED/FAILED (with result or error) straight
+    to the jobs DB, so the outcome survives even if the parent is gone.
+    Must stay a module-level function so the spawn context can import it.
+    """
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    # Status only: a JobManager here would rerun startup orphan recovery for every job
+    database = get_database(db_path)
+    try:
+        result = task_function(*args, **kwargs)
+        with database.connection() as conn:
+            _write_job_status(conn, job_id, STATUS_COMPLETED, result=result)
+            conn.commit()
+        logger.info(f"Job {job_id} completed successfully (pid {os.getpid()}).")
+    except Exception as e:
+        logger.error(f"Job {job_id} failed in process {os.getpid()}: {e}", exc_info=True)
+        with database.connection() as conn:
+            _write_job_status(conn, job_id, STATUS_FAILED, error=str(e))
+            conn.commit()
+        raise SystemExit(1)
+
+
+class _QueuedJob:
+    """A submitted task waiting for (or holding) an executor slot."""
+
+    __slots__ = ("job_id", "project_id", "user_id", "job_type", "priority",
+                 "seq", "enqueued_at", "started_at", "run", "mode", "process", "cancelled")
+
+    def __init__(self, job_id: str, project_id: str, user_id: str, job_type: str,
+                 priority: str, seq: int, run: Callable[[], None]):
+        self.job_id = job_id
+        self.project_id = project_id
+        self.user_id = user_id
+        self.job_type = job_type
+        self.priority = priority
+        self.seq = seq
+        self.enqueued_at = datetime.utcnow()
+        self.started_at: Optional[datetime] = None
+        self.run = run
+        self.mode = EXECUTION_THREAD
+        self.process: Optional[multiprocessing.process.BaseProcess] = None
+        self.cancelled = False
+
+
 class JobManager:
     """
     Manages all asynchronous, long-running tasks for the backend.
     This includes creating job records, running tasks in a background
     thread pool, and updating/retrieving job statuses.
+    
+    Scheduling: submitted tasks wait in an in-memory queue and only reach the
+    thread pool when a slot is free. The next job is the one with:
+    1. The best priority class (interactive > report > maintenance), after aging
+    2. Fair share: the user with the fewest running jobs (then the one who
+       started a job least recently)
+    3. FIFO within the same user
+    Jobs whose user or project is at its concurrency cap are skipped until
+    one of their running jobs finishes.
+    
+    Execution: job types listed as EXECUTION_PROCESS in JOB_TYPE_EXECUTION run
+    in a spawned child process (the slot thread only waits on it); all others
+    run on the slot thread itself. Queued jobs and running process jobs can
+    be cancelled.
     """
     
-    def __init__(self, db_path: str = "data/jobs.db", max_workers: int = 3):
+    def __init__(self, db_path: str = "data/jobs.db", max_workers: int = 3,
+                 max_per_user: int = MAX_JOBS_PER_USER,
+                 max_per_project: int = MAX_JOBS_PER_PROJECT,
+                 aging_seconds: int = PRIORITY_AGING_SECONDS,
+                 execution_modes: Optional[Dict[str, str]] = None):
         """
         Initializes the JobManager.
 
         Args:
             db_path (str): Path to the SQLite database file for job tracking.
             max_workers (int): Max number of heavy tasks to run in parallel.
+            max_per_user (int): Max jobs of one user running at once.
+            max_per_project (int): Max jobs of one project running at once.
+            aging_seconds (int): Wait after which a queued job is promoted one priority class (0 disables).
+            execution_modes (Dict[str, str]): job_type -> EXECUTION_THREAD / EXECUTION_PROCESS
+                            (defaults to JOB_TYPE_EXECUTION).
         """
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = get_database(self.db_path)
         
         # This thread pool will run our heavy AI tasks in the background
+        self.max_workers = max_workers
+        self.max_per_user = max_per_user
+        self.max_per_project = max_per_project
+        self.aging_seconds = aging_seconds
+        self.execution_modes = dict(JOB_TYPE_EXECUTION if execution_modes is None else execution_modes)
+        # Spawn (not fork): the child must not inherit the API's threads, locks or sockets
+        self._mp_context = multiprocessing.get_context("spawn")
         self.executor = ThreadPoolExecutor(max_workers=max_workers)
         
+        # Scheduler state (guarded by _lock)
+        self._lock = threading.Lock()
+        self._pending: List[_QueuedJob] = []
+        self._running: Dict[str, _QueuedJob] = {}
+        self._last_started: Dict[str, datetime] = {}
+        self._seq = itertools.count()
+        
+        # Owner of the in-process jobs created here (see JOB_LEASE_SECONDS)
+        self.owner_id = f"api-{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._lease_thread: Optional[threading.Thread] = None
+        
         self._init_db()
-        logger.info(f"JobManager initialized. DB at {self.db_path}. Max workers: {max_workers}")
+        # Jobs of API processes that stopped (e.g. before this restart) would
+        # otherwise stay active forever and block their dedupe key
+        self.requeue_orphaned_jobs()
+        logger.info(
+            f"JobManager initialized. DB at {self.db_path}. Max workers: {max_workers} "
+            f"(per user: {max_per_user}, per project: {max_per_project})"
+        )
 
     def _get_conn(self) -> sqlite3.Connection:
-        """Helper to get a new SQLite connection."""
-        return sqlite3.connect(str(self.db_path))
+        """Helper to get this thread's shared SQLite connection (Row factory, WAL)."""
+        return self._db.connection()
 
     def _init_db(self):
         """Creates the 'jobs' table if it doesn't already exist."""
@@ -61,62 +250,173 @@ class JobManager:
                         error TEXT
                     )
                 """)
+                # Scheduling columns (added after launch: migrate older databases)
+                existing = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+                for column, ddl in (
+                    ("priority", "TEXT"),
+                    ("started_at", "DATETIME"),
+                    # Runner jobs: what to run, and who holds it
+                    ("task", "TEXT"),
+                    ("payload", "TEXT"),
+                    ("claimed_by", "TEXT"),
+                    ("lease_expires_at", "DATETIME"),
+                    ("heartbeat_at", "DATETIME"),
+                    ("attempts", "INTEGER DEFAULT 0"),
+                    # Fine-grained progress reported by the task (JSON)
+                    ("progress", "TEXT"),
+                    # Identity of the work, for coalescing duplicate requests
+                    ("dedupe_key", "TEXT"),
+                ):
+                    if column not in existing:
+                        conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {ddl}")
                 # Index for faster lookup of project history
                 conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_project_user ON jobs (project_id, user_id)")
+                # Index for runners claiming queued jobs
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at)")
+                # At most one active job per dedupe key (enforced across processes)
+                conn.execute(f"""
+                    CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active_dedupe ON jobs (dedupe_key)
+                    WHERE dedupe_key IS NOT NULL AND status IN ('{STATUS_QUEUED}', '{STATUS_PROCESSING}')
+                """)
+                # Per-step outputs of resumable jobs (kept until the job succeeds)
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS job_checkpoints (
+                        job_id TEXT NOT NULL,
+                        step TEXT NOT NULL,
+                        data TEXT NOT NULL,
+                        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (job_id, step)
+                    )
+                """)
                 conn.commit()
         except Exception as e:
             logger.critical(f"Failed to initialize JobManager database: {e}", exc_info=True)
             raise
 
-    def create_job(self, project_id: str, user_id: str, job_type: str) -> str:
+    def create_job(self, project_id: str, user_id: str, job_type: str,
+                   priority: Optional[str] = None, job_id: Optional[str] = None,
+                   task: Optional[str] = None, task_args: Optional[List[Any]] = None,
+                   task_kwargs: Optional[Dict[str, Any]] = None) -> str:
         """
         Creates a new job record in the database.
         This is the "receipt" for the user.
 
+        Args:
+            priority (str): Priority class; defaults to JOB_TYPE_PRIORITIES[job_type]
+                            or PRIORITY_INTERACTIVE.
+            job_id (str): ID of the new job (generated if omitted), e.g. when
+                          the task arguments refer to it.
+            task (str): Runner task "module:function", importable by the runners;
+                        stored in the same INSERT with the JSON-serializable
+                        task_args/task_kwargs. Without it the job is leased to
+                        this process until run_async() runs it.
+
         Returns:
             str: The unique job_id.
         """
-        job_id = str(uuid.uuid4())
+        priority = self._check_priority(job_type, priority)
+        job_id = job_id or str(uuid.uuid4())
         try:
             with self._get_conn() as conn:
-                conn.execute(
-                    "INSERT INTO jobs (job_id, project_id, user_id, job_type, status) VALUES (?, ?, ?, ?, ?)",
-                    (job_id, project_id, user_id, job_type, STATUS_QUEUED)
-                )
+                self._insert_job(conn, job_id, project_id, user_id, job_type, priority, None,
+                                 task, task_args, task_kwargs)
                 conn.commit()
-            logger.info(f"Created new job {job_id} ({job_type}) for user {user_id}.")
+            logger.info(f"Created new job {job_id} ({job_type}, {priority}) for user {user_id}.")
             return job_id
         except Exception as e:
             logger.error(f"Failed to create job: {e}", exc_info=True)
             raise
 
+    def find_or_create_job(self, project_id: str, user_id: str, job_type: str, dedupe_key: str,
+                           priority: Optional[str] = None, job_id: Optional[str] = None,
+                           task: Optional[str] = None, task_args: Optional[List[Any]] = None,
+                           task_kwargs: Optional[Dict[str, Any]] = None) -> Tuple[str, bool]:
+        """
+        Returns the active (QUEUED/PROCESSING) job with this dedupe key, or
+        creates one.
+        
+        A partial unique index makes this atomic: concurrent requests for the
+        same key (from any API process) end up with the same job. The task of a
+        runner job is written in the same INSERT, so the key is never held by a
+        job no runner can execute.
+
+        Args:
+            dedupe_key (str): Identity of the work, e.g. "project:job_type:kb_version"
+            job_id, task, task_args, task_kwargs: As for create_job()
+
+        Returns:
+            Tuple[str, bool]: (job_id, created)
+        """
+        priority = self._check_priority(job_type, priority)
+        job_id = job_id or str(uuid.uuid4())
+        for _ in range(3):
+            try:
+                with self._get_conn() as conn:
+                    self._insert_job(conn, job_id, project_id, user_id, job_type, priority, dedupe_key,
+                                     task, task_args, task_kwargs)
+                    conn.commit()
+                logger.info(f"Created new job {job_id} ({job_type}, {priority}) for user {user_id} [{dedupe_key}].")
+                return job_id, True
+            except sqlite3.IntegrityError:
+                with self._get_conn() as conn:
+                    row = conn.execute(
+                        f"""SELECT job_id FROM jobs WHERE dedupe_key = ?
+                            AND status IN ('{STATUS_QUEUED}', '{STATUS_PROCESSING}')""",
+                        (dedupe_key,)
+                    ).fetchone()
+                if row:
+                    logger.info(f"Coalesced duplicate {job_type} request from {user_id} into job {row['job_id']} [{dedupe_key}].")
+                    return row["job_id"], False
+                # The active job finished between INSERT and SELECT: try again
+        raise RuntimeError(f"Could not create or find a job for {dedupe_key}")
+
+    @staticmethod
+    def _check_priority(job_type: str, priority: Optional[str]) -> str:
+        """The job's priority class (JOB_TYPE_PRIORITIES default); raises ValueError if unknown."""
+        priority = priority or JOB_TYPE_PRIORITIES.get(job_type, PRIORITY_INTERACTIVE)
+        if priority not in PRIORITY_RANKS:
+            raise ValueError(f"Unknown job priority '{priority}' (expected one of {list(PRIORITY_RANKS)})")
+        return priority
+
+    def _insert_job(self, conn: sqlite3.Connection, job_id: str, project_id: str, user_id: str, job_type: str,
+                    priority: str, dedupe_key: Optional[str], task: Optional[str],
+                    task_args: Optional[List[Any]], task_kwargs: Optional[Dict[str, Any]]):
+        """
+        INSERTs a QUEUED job: a runner job with its task and payload, otherwise
+        an in-process job leased to this process.
+        """
+        if task:
+            conn.execute(
+                """INSERT INTO jobs (job_id, project_id, user_id, job_type, status, priority, dedupe_key,
+                                     task, payload, attempts)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 0)""",
+                (job_id, project_id, user_id, job_type, STATUS_QUEUED, priority, dedupe_key,
+                 task, self._task_payload(task, task_args or [], task_kwargs or {}))
+            )
+        else:
+            conn.execute(
+                """INSERT INTO jobs (job_id, project_id, user_id, job_type, status, priority, dedupe_key,
+                                     claimed_by, lease_expires_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, datetime('now', ?))""",
+                (job_id, project_id, user_id, job_type, STATUS_QUEUED, priority, dedupe_key,
+                 self.owner_id, f"+{JOB_LEASE_SECONDS} seconds")
+            )
+            self._start_lease_renewal()
+
     def _update_job_status(self, job_id: str, status: str, result: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
         """Internal function to update a job's status, result, or error."""
         try:
             with self._get_conn() as conn:
-                if status in [STATUS_COMPLETED, STATUS_FAILED]:
-                    completed_time = datetime.utcnow()
-                    conn.execute(
-                        """UPDATE jobs SET status = ?, result = ?, error = ?, completed_at = ? 
-                           WHERE job_id = ?""",
-                        (status, json.dumps(result) if result else None, error, completed_time, job_id)
-                    )
-                elif status == STATUS_WAITING_FOR_USER and result:
-                     # Special case: Update result (preview data) but don't set completed_at
-                     conn.execute(
-                        "UPDATE jobs SET status = ?, result = ? WHERE job_id = ?",
-                        (status, json.dumps(result), job_id)
-                    )
-                else:
-                    conn.execute("UPDATE jobs SET status = ? WHERE job_id = ?", (status, job_id))
+                _write_job_status(conn, job_id, status, result=result, error=error)
                 conn.commit()
         except Exception as e:
             logger.error(f"Failed to update job {job_id} status to {status}: {e}")
 
     def run_async(self, job_id: str, task_function: Callable[..., Any], *args: Any, **kwargs: Any):
         """
-        Submits the actual heavy task to the background thread pool.
-        This function returns immediately.
+        Queues the actual heavy task for the background thread pool.
+        This function returns immediately; the task starts once the scheduler
+        gives it a slot (see class docstring).
         """
         
         def _task_wrapper():
@@ -142,8 +442,584 @@ class JobManager:
                 logger.error(f"Job {job_id} failed: {e}", exc_info=True)
                 self._update_job_status(job_id, STATUS_FAILED, error=str(e))
 
-        # Submit the wrapper to the pool. This returns immediately.
-        self.executor.submit(_task_wrapper)
+        job = self._load_job_row(job_id)
+        if not job:
+            raise ValueError(f"Cannot run unknown job {job_id}")
+        # This process now owns the job (e.g. one resumed after WAITING_FOR_USER)
+        self._take_lease(job_id)
+        queued = _QueuedJob(
+            job_id, job["project_id"], job["user_id"], job["job_type"],
+            job.get("priority") or PRIORITY_INTERACTIVE, next(self._seq), _task_wrapper
+        )
+        if self.execution_modes.get(job["job_type"], EXECUTION_THREAD) == EXECUTION_PROCESS:
+            # Fail fast in the caller: the task must be importable by the spawned child
+            try:
+                pickle.dumps((task_function, args, kwargs))
+            except Exception as e:
+                error = (f"Job type '{job['job_type']}' runs in a process, but its task is not picklable "
+                         f"(use a module-level function and plain arguments): {e}")
+                self._update_job_status(job_id, STATUS_FAILED, error=error)
+                raise ValueError(error)
+            queued.mode = EXECUTION_PROCESS
+            queued.run = lambda: self._run_process_job(queued, task_function, args, kwargs)
+        with self._lock:
+            self._pending.append(queued)
+        self._dispatch()
+
+    def _run_process_job(self, job: _QueuedJob, task_function: Callable[..., Any],
+                         args: tuple, kwargs: dict):
+        """Slot body for process-mode jobs: spawn the child and wait for it."""
+        logger.info(f"Starting background processing for job {job.job_id} in a child process...")
+        self._update_job_status(job.job_id, STATUS_PROCESSING)
+        process = self._mp_context.Process(
+            target=_run_job_in_process,
+            args=(str(self.db_path), job.job_id, task_function, args, kwargs),
+            name=f"job-{job.job_id}",
+            daemon=True,
+        )
+        if job.cancelled:
+            self._update_job_status(job.job_id, STATUS_CANCELLED, error="Cancelled before start")
+            return
+        process.start()
+        with self._lock:
+            job.process = process
+            cancelled = job.cancelled
+        if cancelled:
+            process.terminate()  # cancel_job() ran while the child was starting
+        process.join()
+        
+        # The child records its own outcome; cover crashes and cancellation
+        if job.cancelled:
+            self._update_job_status(job.job_id, STATUS_CANCELLED, error="Cancelled by user")
+            logger.info(f"Job {job.job_id} cancelled (process exit code {process.exitcode}).")
+        elif process.exitcode != 0:
+            row = self._load_job_row(job.job_id)
+            if row and row["status"] == STATUS_PROCESSING:
+                self._update_job_status(
+                    job.job_id, STATUS_FAILED, error=f"Job process exited with code {process.exitcode}"
+                )
+                logger.error(f"Job {job.job_id} process died with exit code {process.exitcode}.")
+
+    def cancel_job(self, job_id: str, user_id: str) -> bool:
+        """
+        Cancels a job that is still queued, or running in a child process.
+        
+        Thread-mode jobs cannot be interrupted once started. Runner jobs are
+        cancelled in the DB; their runner abandons them at the next heartbeat.
+
+        Returns:
+            bool: True if the job was (or is being) cancelled.
+        """
+        job = self._load_job_row(job_id)
+        if not job or job["user_id"] != user_id:
+            return False
+        if job.get("task"):
+            # Runner job: flip the row; a runner notices on its next heartbeat
+            with self._get_conn() as conn:
+                cursor = conn.execute(
+                    f"""UPDATE jobs SET status = ?, error = 'Cancelled by user', completed_at = ?,
+                                       claimed_by = NULL, lease_expires_at = NULL
+                        WHERE job_id = ? AND status IN ('{STATUS_QUEUED}', '{STATUS_PROCESSING}')""",
+                    (STATUS_CANCELLED, datetime.utcnow(), job_id)
+                )
+                conn.commit()
+            if cursor.rowcount:
+                logger.info(f"Cancelled runner job {job_id} (was {job['status']}).")
+            return cursor.rowcount == 1
+        process = None
+        with self._lock:
+            queued = next((j for j in self._pending if j.job_id == job_id), None)
+            if queued:
+                self._pending.remove(queued)
+            else:
+                running = self._running.get(job_id)
+                if not running or running.mode != EXECUTION_PROCESS:
+                    logger.info(f"Job {job_id} cannot be cancelled (not queued and not a process job).")
+                    return False
+                running.cancelled = True
+                process = running.process
+        
+        if queued:
+            self._update_job_status(job_id, STATUS_CANCELLED, error="Cancelled by user")
+            logger.info(f"Cancelled queued job {job_id}.")
+        elif process is not None:
+            process.terminate()
+            process.join(CANCEL_GRACE_SECONDS)
+            if process.is_alive():
+                process.kill()
+            self._update_job_status(job_id, STATUS_CANCELLED, error="Cancelled by user")
+            logger.info(f"Terminated process {process.pid} for job {job_id}.")
+        # Process not started yet: _run_process_job sees the flag and skips it
+        return True
+
+    # --- Scheduler ---
+
+    def _effective_rank(self, job: _QueuedJob, now: datetime) -> int:
+        """Priority rank after aging (one class per aging_seconds waited)."""
+        rank = PRIORITY_RANKS.get(job.priority, 0)
+        if self.aging_seconds > 0:
+            waited = (now - job.enqueued_at).total_seconds()
+            rank -= int(max(waited, 0) // self.aging_seconds)
+        return max(rank, 0)
+
+    def _pick_next(self, pending: List[_QueuedJob], running: List[_QueuedJob],
+                   last_started: Dict[str, datetime], now: datetime) -> Optional[_QueuedJob]:
+        """
+        Choose the next job to start, or None if every waiting job is capped.
+        
+        Pure function of its arguments so ETAs can replay the same policy.
+        """
+        per_user = Counter(job.user_id for job in running)
+        per_project = Counter(job.project_id for job in running)
+        eligible = [
+            job for job in pending
+            if per_user[job.user_id] < self.max_per_user
+            and per_project[job.project_id] < self.max_per_project
+        ]
+        if not eligible:
+            return None
+        return min(eligible, key=lambda job: (
+            self._effective_rank(job, now),
+            per_user[job.user_id],
+            last_started.get(job.user_id, datetime.min),
+            job.seq,
+        ))
+
+    def _dispatch(self):
+        """Start queued jobs while executor slots are free."""
+        with self._lock:
+            while len(self._running) < self.max_workers and self._pending:
+                now = datetime.utcnow()
+                job = self._pick_next(self._pending, list(self._running.values()), self._last_started, now)
+                if job is None:
+                    break
+                try:
+                    self.executor.submit(self._run_slot, job)
+                except RuntimeError:
+                    logger.warning(f"Executor shut down; job {job.job_id} stays queued")
+                    break
+                self._pending.remove(job)
+                job.started_at = now
+                self._running[job.job_id] = job
+                self._last_started[job.user_id] = now
+
+    def _run_slot(self, job: _QueuedJob):
+        """Run one scheduled job, then hand its slot to the next one."""
+        try:
+            job.run()
+        finally:
+            with self._lock:
+                self._running.pop(job.job_id, None)
+            self._dispatch()
+
+    def _average_durations(self) -> Dict[str, float]:
+        """Mean runtime in seconds per job_type over recent completed jobs."""
+        try:
+            with self._get_conn() as conn:
+                rows = conn.execute(
+                    f"""
+                    SELECT job_type, AVG((julianday(completed_at) - julianday(started_at)) * 86400) AS seconds
+                    FROM (
+                        SELECT job_type, started_at, completed_at FROM jobs
+                        WHERE status = '{STATUS_COMPLETED}' AND started_at IS NOT NULL
+                        ORDER BY completed_at DESC LIMIT 200
+                    )
+                    GROUP BY job_type
+                    """
+                ).fetchall()
+            return {row["job_type"]: max(row["seconds"] or 0.0, 0.0) for row in rows}
+        except Exception as e:
+            logger.error(f"Failed to compute job durations: {e}")
+            return {}
+
+    def get_queue_estimates(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Queue position and estimated start time for every waiting job.
+        
+        Replays the scheduling policy forward in time, assuming each job runs
+        for the average duration of its job_type.
+
+        Returns:
+            Dict[str, Dict]: job_id -> {queue_position (1 = next), estimated_start_at (UTC datetime)}
+        """
+        with self._lock:
+            pending = list(self._pending)
+            running = list(self._running.values())
+            last_started = dict(self._last_started)
+        runner_positions = self._runner_queue_positions()
+        if not pending:
+            return runner_positions
+        
+        durations = self._average_durations()
+        
+        def expected_duration(job: _QueuedJob) -> timedelta:
+            return timedelta(seconds=durations.get(job.job_type, DEFAULT_JOB_DURATION_SECONDS))
+        
+        now = datetime.utcnow()
+        # (expected end, job) for every occupied slot; overdue jobs end "now"
+        slots: List[Tuple[datetime, _QueuedJob]] = [
+            (max(job.started_at + expected_duration(job), now), job) for job in running
+        ]
+        estimates: Dict[str, Dict[str, Any]] = {}
+        clock = now
+        while pending:
+            job = None
+            if len(slots) < self.max_workers:
+                job = self._pick_next(pending, [j for _, j in slots], last_started, clock)
+            if job is not None:
+                pending.remove(job)
+                estimates[job.job_id] = {"queue_position": len(estimates) + 1, "estimated_start_at": clock}
+                last_started[job.user_id] = clock
+                slots.append((clock + expected_duration(job), job))
+                continue
+            if not slots:
+                break  # Unreachable with positive caps; guards against a misconfiguration
+            # Advance to the next slot that frees up
+            slots.sort(key=lambda slot: slot[0])
+            clock, _ = slots.pop(0)
+        estimates.update(runner_positions)
+        return estimates
+
+    def _runner_queue_positions(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Queue position of QUEUED runner jobs in claim order.
+        
+        No start estimate: the number of runners is not known to the API.
+        """
+        rank = " ".join(f"WHEN '{name}' THEN {value}" for name, value in PRIORITY_RANKS.items())
+        try:
+            with self._get_conn() as conn:
+                rows = conn.execute(
+                    f"""
+                    SELECT job_id, ROW_NUMBER() OVER (
+                        ORDER BY CASE priority {rank} ELSE 0 END, created_at, rowid
+                    ) AS position
+                    FROM jobs WHERE status = '{STATUS_QUEUED}' AND task IS NOT NULL
+                    """
+                ).fetchall()
+            return {row["job_id"]: {"queue_position": row["position"], "estimated_start_at": None} for row in rows}
+        except Exception as e:
+            logger.error(f"Failed to compute runner queue positions: {e}")
+            return {}
+
+    def _load_job_row(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with self._get_conn() as conn:
+                row = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            return dict(row) if row else None
+        except Exception as e:
+            logger.error(f"Failed to load job {job_id}: {e}")
+            return None
+
+    def _with_queue_estimate(self, job: Dict[str, Any], estimates: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Add queue_position / estimated_start_at (None unless the job is waiting)."""
+        estimate = estimates.get(job["job_id"], {})
+        job["queue_position"] = estimate.get("queue_position")
+        job["estimated_start_at"] = estimate.get("estimated_start_at")
+        return job
+
+    # --- Runner Queue (jobs executed by backend/job_runner.py) ---
+
+    def uses_runner(self, job_type: str) -> bool:
+        """True if this job type is executed by an out-of-process job runner."""
+        return job_type in RUNNER_JOB_TYPES
+
+    @staticmethod
+    def _task_payload(task: str, args: List[Any], kwargs: Dict[str, Any]) -> str:
+        """JSON payload of a runner task; raises ValueError for a malformed task reference."""
+        module, _, function = task.partition(":")
+        if not module or not function:
+            raise ValueError(f"Task must be 'module:function', got '{task}'")
+        return json.dumps({"args": list(args), "kwargs": kwargs})
+
+    def claim_jobs(self, runner_id: str, limit: int = 1, lease_seconds: int = RUNNER_LEASE_SECONDS,
+                   job_types: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Atomically claims queued runner jobs under a time-limited lease.
+        
+        Uses the same policy as the in-process scheduler: priority class first,
+        then the user with the fewest running jobs, then FIFO; users and
+        projects at their concurrency cap are skipped.
+
+        Args:
+            runner_id (str): Unique ID of the claiming runner process
+            limit (int): Maximum number of jobs to claim
+            lease_seconds (int): Lease length; runners must heartbeat before it expires
+            job_types (List[str]): Only claim these job types (None = any)
+
+        Returns:
+            List[Dict]: Claimed job rows, with 'args' and 'kwargs' decoded from the payload
+        """
+        rank = " ".join(f"WHEN '{name}' THEN {value}" for name, value in PRIORITY_RANKS.items())
+        type_filter = ""
+        params: List[Any] = [runner_id, f"+{int(lease_seconds)} seconds", STATUS_PROCESSING, STATUS_QUEUED]
+        if job_types:
+            type_filter = f"AND q.job_type IN ({', '.join('?' for _ in job_types)})"
+            params.extend(job_types)
+        params.extend([self.max_per_user, self.max_per_project, limit])
+        try:
+            with self._get_conn() as conn:
+                cursor = conn.execute(
+                    f"""
+                    WITH running AS (
+                        SELECT user_id, project_id FROM jobs
+                        WHERE status = '{STATUS_PROCESSING}' AND task IS NOT NULL
+                        AND lease_expires_at >= CURRENT_TIMESTAMP
+                    )
+                    UPDATE jobs
+                    SET claimed_by = ?, lease_expires_at = datetime('now', ?),
+                        heartbeat_at = CURRENT_TIMESTAMP, started_at = CURRENT_TIMESTAMP,
+                        status = ?, attempts = attempts + 1
+                    WHERE job_id IN (
+                        SELECT q.job_id FROM jobs q
+                        WHERE q.status = ? AND q.task IS NOT NULL {type_filter}
+                        AND (SELECT COUNT(*) FROM running r WHERE r.user_id = q.user_id) < ?
+                        AND (SELECT COUNT(*) FROM running r WHERE r.project_id = q.project_id) < ?
+                        ORDER BY CASE q.priority {rank} ELSE 0 END,
+                                 (SELECT COUNT(*) FROM running r WHERE r.user_id = q.user_id),
+                                 q.created_at, q.rowid
+                        LIMIT ?
+                    )
+                    RETURNING *
+                    """,
+                    params
+                )
+                rows = [dict(row) for row in cursor.fetchall()]
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Failed to claim jobs for runner {runner_id}: {e}", exc_info=True)
+            return []
+        for row in rows:
+            payload = json.loads(row.get("payload") or "{}")
+            row["args"] = payload.get("args", [])
+            row["kwargs"] = payload.get("kwargs", {})
+        if rows:
+            logger.info(f"Runner {runner_id} claimed {len(rows)} job(s)")
+        return rows
+
+    def heartbeat(self, job_id: str, runner_id: str, lease_seconds: int = RUNNER_LEASE_SECONDS) -> bool:
+        """
+        Extends a runner's lease on a job.
+
+        Returns:
+            bool: False if the runner no longer owns the job (cancelled, or
+                  reclaimed after the lease expired) and should abandon it.
+        """
+        try:
+            with self._get_conn() as conn:
+                cursor = conn.execute(
+                    """UPDATE jobs SET lease_expires_at = datetime('now', ?), heartbeat_at = CURRENT_TIMESTAMP
+                       WHERE job_id = ? AND claimed_by = ? AND status = ?""",
+                    (f"+{int(lease_seconds)} seconds", job_id, runner_id, STATUS_PROCESSING)
+                )
+                conn.commit()
+            return cursor.rowcount == 1
+        except Exception as e:
+            # Transient DB error: keep running, the next heartbeat retries
+            logger.warning(f"Heartbeat for job {job_id} failed: {e}")
+            return True
+
+    def finish_claimed_job(self, job_id: str, runner_id: str, status: str,
+                           result: Optional[Dict[str, Any]] = None, error: Optional[str] = None) -> bool:
+        """
+        Records a runner job's outcome, only while the runner still owns it.
+
+        Returns:
+            bool: True if recorded; False if the job was cancelled or reclaimed meanwhile.
+        """
+        try:
+            with self._get_conn() as conn:
+                cursor = conn.execute(
+                    """UPDATE jobs SET status = ?, result = ?, error = ?, completed_at = ?,
+                                      claimed_by = NULL, lease_expires_at = NULL
+                       WHERE job_id = ? AND claimed_by = ? AND status = ?""",
+                    (status, json.dumps(result) if result else None, error, datetime.utcnow(),
+                     job_id, runner_id, STATUS_PROCESSING)
+                )
+                conn.commit()
+            if cursor.rowcount == 0:
+                logger.warning(f"Job {job_id} outcome discarded: runner {runner_id} no longer owns it")
+                return False
+            return True
+        except Exception as e:
+            logger.error(f"Failed to record outcome of job {job_id}: {e}", exc_info=True)
+            return False
+
+    def requeue_orphaned_jobs(self, max_attempts: int = RUNNER_MAX_ATTEMPTS) -> Tuple[int, int]:
+        """
+        Recovers runner jobs whose runner died (lease expired without heartbeat).
+        
+        Orphans with attempts left go back to QUEUED so another runner resumes
+        them; the rest are marked FAILED. In-process jobs (no task) whose API
+        process is gone (lease expired, or never leased) are marked FAILED:
+        nothing can run them any more, so their dedupe key is freed and their
+        checkpoints are deleted.
+
+        Returns:
+            Tuple[int, int]: (requeued, failed)
+        """
+        try:
+            with self._get_conn() as conn:
+                lost = conn.execute(
+                    f"""
+                    UPDATE jobs
+                    SET status = '{STATUS_FAILED}', error = 'Lost when the API process running it stopped',
+                        completed_at = CURRENT_TIMESTAMP, claimed_by = NULL, lease_expires_at = NULL
+                    WHERE status IN ('{STATUS_QUEUED}', '{STATUS_PROCESSING}') AND task IS NULL
+                    AND (lease_expires_at IS NULL OR lease_expires_at < CURRENT_TIMESTAMP)
+                    RETURNING job_id, status
+                    """
+                ).fetchall()
+                conn.executemany("DELETE FROM job_checkpoints WHERE job_id = ?", [(row["job_id"],) for row in lost])
+                cursor = conn.execute(
+                    f"""
+                    UPDATE jobs
+                    SET status = CASE WHEN attempts >= ? THEN '{STATUS_FAILED}' ELSE '{STATUS_QUEUED}' END,
+                        error = CASE WHEN attempts >= ? THEN 'Job runner lost after ' || attempts || ' attempts'
+                                     ELSE 'Requeued after job runner was lost' END,
+                        completed_at = CASE WHEN attempts >= ? THEN CURRENT_TIMESTAMP ELSE NULL END,
+                        claimed_by = NULL, lease_expires_at = NULL
+                    WHERE status = '{STATUS_PROCESSING}' AND task IS NOT NULL
+                    AND lease_expires_at < CURRENT_TIMESTAMP
+                    RETURNING job_id, status
+                    """,
+                    (max_attempts, max_attempts, max_attempts)
+                )
+                rows = cursor.fetchall() + lost
+                conn.commit()
+        except Exception as e:
+            logger.error(f"Failed to requeue orphaned jobs: {e}", exc_info=True)
+            return 0, 0
+        requeued = sum(1 for row in rows if row["status"] == STATUS_QUEUED)
+        failed = len(rows) - requeued
+        for row in rows:
+            logger.warning(f"Orphaned job {row['job_id']} -> {row['status']}")
+        return requeued, failed
+
+    def _take_lease(self, job_id: str):
+        """Leases an in-process job to this process (see JOB_LEASE_SECONDS)."""
+        with self._get_conn() as conn:
+            conn.execute(
+                "UPDATE jobs SET claimed_by = ?, lease_expires_at = datetime('now', ?) WHERE job_id = ? AND task IS NULL",
+                (self.owner_id, f"+{JOB_LEASE_SECONDS} seconds", job_id)
+            )
+            conn.commit()
+        self._start_lease_renewal()
+
+    def _start_lease_renewal(self):
+        """Starts the daemon thread renewing this process's leases (once)."""
+        with self._lock:
+            if self._lease_thread is not None:
+                return
+            self._lease_thread = threading.Thread(target=self._renew_leases, name="job-leases", daemon=True)
+        self._lease_thread.start()
+
+    def _renew_leases(self):
+        """Renews the leases of this process's active in-process jobs, and fails jobs of lost processes."""
+        while True:
+            time.sleep(JOB_LEASE_SECONDS / 3)
+            try:
+                with self._get_conn() as conn:
+                    conn.execute(
+                        f"""UPDATE jobs SET lease_expires_at = datetime('now', ?)
+                            WHERE claimed_by = ? AND task IS NULL
+                            AND status IN ('{STATUS_QUEUED}', '{STATUS_PROCESSING}')""",
+                        (f"+{JOB_LEASE_SECONDS} seconds", self.owner_id)
+                    )
+                    conn.commit()
+                self.requeue_orphaned_jobs()
+            except Exception as e:
+                # Transient DB error: the next round retries well before the lease ends
+                logger.warning(f"Renewing job leases failed: {e}")
+
+    def retry_job(self, job_id: str, user_id: str) -> bool:
+        """
+        Requeues a FAILED or CANCELLED runner job under the same job id.
+        
+        Its checkpoints are kept, so a resumable task continues from the last
+        completed step instead of starting over. In-process jobs (no stored
+        task) cannot be retried; their checkpoints are deleted when they end.
+
+        Returns:
+            bool: True if the job was requeued.
+        """
+        try:
+            with self._get_conn() as conn:
+                cursor = conn.execute(
+                    f"""UPDATE jobs SET status = '{STATUS_QUEUED}', error = NULL, completed_at = NULL,
+                                       claimed_by = NULL, lease_expires_at = NULL, attempts = 0
+                        WHERE job_id = ? AND user_id = ? AND task IS NOT NULL
+                        AND status IN ('{STATUS_FAILED}', '{STATUS_CANCELLED}')""",
+                    (job_id, user_id)
+                )
+                conn.commit()
+            if cursor.rowcount:
+                logger.info(f"Job {job_id} requeued for retry by user {user_id}.")
+            return cursor.rowcount == 1
+        except sqlite3.IntegrityError:
+            logger.warning(f"Job {job_id} not requeued: an identical job (same dedupe key) is already active.")
+            return False
+        except Exception as e:
+            logger.error(f"Failed to retry job {job_id}: {e}", exc_info=True)
+            return False
+
+    # --- Progress & Checkpoints (resumable jobs) ---
+
+    def update_progress(self, job_id: str, step: str, step_index: int, steps_total: int,
+                        done: Optional[int] = None, total: Optional[int] = None):
+        """
+        Records where a running job is, for JobStatus.
+
+        Args:
+            job_id (str): The job
+            step (str): Name of the current step
+            step_index (int): 1-based position of the step
+            steps_total (int): Number of steps in the job
+            done (int): Items finished within the step (optional)
+            total (int): Items in the step (optional)
+        """
+        progress = {
+            "step": step, "step_index": step_index, "steps_total": steps_total,
+            "done": done, "total": total, "updated_at": datetime.utcnow().isoformat() + "Z",
+        }
+        try:
+            with self._get_conn() as conn:
+                conn.execute("UPDATE jobs SET progress = ? WHERE job_id = ?", (json.dumps(progress), job_id))
+                conn.commit()
+        except Exception as e:
+            # Progress is informational: never fail the job over it
+            logger.warning(f"Failed to record progress for job {job_id}: {e}")
+
+    def save_checkpoint(self, job_id: str, step: str, data: Any):
+        """Durably stores the JSON-serializable output of a completed step."""
+        with self._get_conn() as conn:
+            conn.execute(
+                """INSERT INTO job_checkpoints (job_id, step, data) VALUES (?, ?, ?)
+                   ON CONFLICT (job_id, step) DO UPDATE SET data = excluded.data, created_at = CURRENT_TIMESTAMP""",
+                (job_id, step, json.dumps(data))
+            )
+            conn.commit()
+        logger.debug(f"Checkpointed step '{step}' of job {job_id}")
+
+    def load_checkpoint(self, job_id: str, step: str) -> Optional[Any]:
+        """Returns the stored output of a step, or None if it has not completed."""
+        with self._get_conn() as conn:
+            row = conn.execute(
+                "SELECT data FROM job_checkpoints WHERE job_id = ? AND step = ?", (job_id, step)
+            ).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def clear_checkpoints(self, job_id: str, steps: Optional[List[str]] = None):
+        """Deletes a job's checkpoints (all of them, or only `steps`)."""
+        with self._get_conn() as conn:
+            if steps is None:
+                conn.execute("DELETE FROM job_checkpoints WHERE job_id = ?", (job_id,))
+            else:
+                conn.execute(
+                    f"DELETE FROM job_checkpoints WHERE job_id = ? AND step IN ({', '.join('?' for _ in steps)})",
+                    [job_id, *steps]
+                )
+            conn.commit()
 
     def pause_job_for_user(self, job_id: str, preview_data: Dict[str, Any]):
         """
@@ -161,12 +1037,19 @@ class JobManager:
         logger.info(f"Resuming job {job_id}...")
         self.run_async(job_id, task_function, *args, **kwargs)
 
-    def get_job(self, job_id: str, user_id: str) -> Optional[Dict[str, Any]]:
-        """Retrieves a single job's status and details, scoped to a user."""
+    def get_job(self, job_id: str, user_id: str, any_user: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Retrieves a single job's status and details, scoped to a user.
+        
+        any_user=True drops the scoping (admins following a coalesced job
+        started by another admin).
+        """
         try:
             with self._get_conn() as conn:
-                conn.row_factory = sqlite3.Row
-                cursor = conn.execute("SELECT * FROM jobs WHERE job_id = ? AND user_id = ?", (job_id, user_id))
+                if any_user:
+                    cursor = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,))
+                else:
+                    cursor = conn.execute("SELECT * FROM jobs WHERE job_id = ? AND user_id = ?", (job_id, user_id))
                 row = cursor.fetchone()
                 if row:
                     result_dict = dict(row)
@@ -176,7 +1059,9 @@ class JobManager:
                             result_dict['result'] = json.loads(result_dict['result'])
                         except json.JSONDecodeError:
                             pass 
-                    return result_dict
+                    result_dict['progress'] = json.loads(result_dict['progress']) if result_dict.get('progress') else None
+                    estimates = self.get_queue_estimates() if result_dict['status'] == STATUS_QUEUED else {}
+                    return self._with_queue_estimate(result_dict, estimates)
                 return None
         except Exception as e:
             logger.error(f"Failed to get job {job_id} for user {user_id}: {e}")
@@ -186,7 +1071,6 @@ class JobManager:
         """Lists all jobs (newest first) for a given project, scoped to a user."""
         try:
             with self._get_conn() as conn:
-                conn.row_factory = sqlite3.Row
                 cursor = conn.execute(
                     "SELECT * FROM jobs WHERE project_id = ? AND user_id = ? ORDER BY created_at DESC", 
                     (project_id, user_id)
@@ -199,8 +1083,10 @@ class JobManager:
                             job['result'] = json.loads(job['result'])
                         except: 
                             pass
+                    job['progress'] = json.loads(job['progress']) if job.get('progress') else None
                     jobs.append(job)
-                return jobs
+                estimates = self.get_queue_estimates() if any(j['status'] == STATUS_QUEUED for j in jobs) else {}
+                return [self._with_queue_estimate(job, estimates) for job in jobs]
         except Exception as e:
             logger.error(f"Failed to get jobs for project {project_id} for user {user_id}: {e}")
             return []
\ No newline at end of file
@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+Job Runner: Out-of-Process Executor for Long-Running Jobs
+
+This script runs as a separate process (any number of them, on any host that
+can reach jobs.db and the microservices) and executes the jobs the API only
+enqueues (JOB_RUNNER_JOB_TYPES, created with a task by JobManager.create_job /
+find_or_create_job; wiki generation by default). Keeping them out of the
+gunicorn workers means a deploy or web restart no longer kills in-flight jobs,
+and heavy jobs don't take memory from request handling.
+
+The runner:
+1. On startup, requeues orphaned jobs (PROCESSING, lease expired: their runner
+   died) or fails them once they used up their attempts
+2. Claims QUEUED jobs from jobs.db under a lease (priority, fair share and
+   per-user/project caps as in the in-process scheduler)
+3. Imports the job's task ("module:function") and runs it with its stored arguments
+4. Heartbeats every running job so its lease never expires while it is alive;
+   a failed heartbeat means the job was cancelled or reclaimed, and its
+   outcome is discarded
+5. Writes COMPLETED/FAILED with the result or error back to jobs.db
+
+SIGTERM/SIGINT stop claiming and drain the jobs in flight. If the runner is
+killed instead, its leases expire and the next runner requeues the jobs.
+"""
+
+import os
+import sys
+import time
+import uuid
+import signal
+import socket
+import logging
+import argparse
+import importlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+# Add backend to path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from job_manager import (
+    JobManager, STATUS_COMPLETED, STATUS_FAILED, RUNNER_LEASE_SECONDS, RUNNER_MAX_ATTEMPTS
+)
+
+# Configure logging
+Path("logs").mkdir(exist_ok=True)
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s [%(levelname)s] %(name)s: %(message)s',
+    handlers=[
+        logging.FileHandler('logs/job_runner.log', mode='a'),
+        logging.StreamHandler()
+    ]
+)
+logger = logging.getLogger('JobRunner')
+
+# Runner configuration
+POLL_INTERVAL = float(os.getenv('JOB_RUNNER_POLL_SECONDS', '2'))  # Wait between claims when idle
+RUNNER_CONCURRENCY = int(os.getenv('JOB_RUNNER_CONCURRENCY', '2'))  # Jobs run at once per runner
+HEARTBEAT_INTERVAL = max(RUNNER_LEASE_SECONDS / 4, 1)  # Several heartbeats per lease
+RECOVERY_INTERVAL = 60  # Seconds between orphan sweeps while running
+
+_task_cache: Dict[str, Callable[..., Any]] = {}
+_task_lock = threading.Lock()
+
+
+def resolve_task(task: str) -> Callable[..., Any]:
+    """
+    Import a task reference of the form "module:function" (cached).
+
+    Raises:
+        ValueError: If the reference is malformed or not callable
+    """
+    with _task_lock:
+        func = _task_cache.get(task)
+        if func is None:
+            module_name, _, func_name = task.partition(":")
+            if not module_name or not func_name:
+                raise ValueError(f"Invalid task reference '{task}'")
+            func = getattr(importlib.import_module(module_name), func_name)
+            if not callable(func):
+                raise ValueError(f"Task '{task}' is not callable")
+            _task_cache[task] = func
+        return func
+
+
+class JobRunner:
+    """Claims runner jobs from jobs.db and executes them on a local thread pool."""
+
+    def __init__(self, db_path: str = "data/jobs.db", concurrency: int = RUNNER_CONCURRENCY,
+                 job_types: Optional[List[str]] = None):
+        """
+        Args:
+            db_path: Path to jobs.db (shared with the API)
+            concurrency: Jobs this runner executes at once
+            job_types: Only claim these job types (None = any runner job)
+        """
+        self.db_path = db_path
+        self.concurrency = concurrency
+        self.job_types = job_types
+        self.runner_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.job_manager = JobManager(db_path=db_path, max_workers=1)
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="job")
+        self.logger = logger
+
+        self._active: Dict[str, Dict[str, Any]] = {}  # job_id -> claimed row
+        self._active_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._heartbeat_stop = threading.Event()
+        self._heartbeat_thread: Optional[threading.Thread] = None
+
+    def request_stop(self, *_args):
+        """Stop claiming new jobs; in-flight jobs are drained."""
+        if not self._stop.is_set():
+            self.logger.info("Stop requested: finishing in-flight jobs...")
+        self._stop.set()
+
+    def recover_orphans(self) -> int:
+        """Requeue (or fail) jobs whose runner died. Returns the number recovered."""
+        requeued, failed = self.job_manager.requeue_orphaned_jobs(RUNNER_MAX_ATTEMPTS)
+        if requeued or failed:
+            self.logger.warning(f"Recovered orphaned jobs: {requeued} requeued, {failed} failed")
+        return requeued + failed
+
+    def claim_and_start(self) -> int:
+        """
+        Claim as many jobs as there are free slots and start them.
+
+        Returns:
+            int: Number of jobs started
+        """
+        with self._active_lock:
+            free = self.concurrency - len(self._active)
+        if free <= 0:
+            return 0
+        jobs = self.job_manager.claim_jobs(
+            self.runner_id, limit=free, lease_seconds=RUNNER_LEASE_SECONDS, job_types=self.job_types
+        )
+        for job in jobs:
+            with self._active_lock:
+                self._active[job["job_id"]] = job
+            self.executor.submit(self._execute, job)
+        return len(jobs)
+
+    def _execute(self, job: Dict[str, Any]):
+        """Run one claimed job and record its outcome (fenced on our claim)."""
+        job_id = job["job_id"]
+        self.logger.info(f"Starting job {job_id} ({job['job_type']}, attempt {job['attempts']}): {job['task']}")
+        start = time.perf_counter()
+        try:
+            task = resolve_task(job["task"])
+            result = task(*job["args"], **job["kwargs"])
+            if self.job_manager.finish_claimed_job(job_id, self.runner_id, STATUS_COMPLETED, result=result):
+                self.logger.info(f"✓ Job {job_id} completed in {time.perf_counter() - start:.1f}s")
+        except Exception as e:
+            self.logger.error(f"✗ Job {job_id} failed: {e}", exc_info=True)
+            self.job_manager.finish_claimed_job(job_id, self.runner_id, STATUS_FAILED, error=str(e))
+        finally:
+            with self._active_lock:
+                self._active.pop(job_id, None)
+
+    def _heartbeat_loop(self):
+        """Extend the lease of every running job until the runner shuts down."""
+        while not self._heartbeat_stop.wait(HEARTBEAT_INTERVAL):
+            with self._active_lock:
+                job_ids = list(self._active)
+            for job_id in job_ids:
+                with self._active_lock:
+                    job = self._active.get(job_id)
+                if job is None or job.get("lost"):
+                    continue
+                if not self.job_manager.heartbeat(job_id, self.runner_id, RUNNER_LEASE_SECONDS):
+                    # Threads can't be interrupted: the job runs on, but its
+                    # outcome is discarded by finish_claimed_job()
+                    job["lost"] = True
+                    self.logger.warning(f"Lost job {job_id} (cancelled or reclaimed); its result will be discarded")
+
+    def run(self):
+        """
+        Main runner loop: recover orphans, then claim and run jobs until stopped.
+        """
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.request_stop)
+            signal.signal(signal.SIGINT, self.request_stop)
+
+        self.logger.info("=" * 60)
+        self.logger.info("JOB RUNNER STARTED")
+        self.logger.info("=" * 60)
+        self.logger.info(f"Runner ID: {self.runner_id}")
+        self.logger.info(f"Jobs DB: {self.db_path}")
+        self.logger.info(f"Job Types: {', '.join(self.job_types) if self.job_types else 'all runner jobs'}")
+        self.logger.info(f"Concurrency: {self.concurrency}, Poll: {POLL_INTERVAL}s")
+        self.logger.info(f"Lease: {RUNNER_LEASE_SECONDS}s (heartbeat every {HEARTBEAT_INTERVAL:.0f}s), "
+                         f"Max Attempts: {RUNNER_MAX_ATTEMPTS}")
+        self.logger.info("=" * 60)
+
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name="heartbeat", daemon=True)
+        self._heartbeat_thread.start()
+
+        last_recovery = 0.0
+        try:
+            while not self._stop.is_set():
+                if time.monotonic() - last_recovery >= RECOVERY_INTERVAL:
+                    self.recover_orphans()
+                    last_recovery = time.monotonic()
+
+                started = self.claim_and_start()
+                if started == 0:
+                    self._stop.wait(POLL_INTERVAL)
+        except KeyboardInterrupt:
+            pass
+        except Exception as e:
+            self.logger.critical(f"FATAL ERROR: {e}", exc_info=True)
+            sys.exit(1)
+        finally:
+            self.logger.info("=" * 60)
+            self.logger.info("JOB RUNNER SHUTTING DOWN (draining in-flight jobs)")
+            self.logger.info("=" * 60)
+            self.executor.shutdown(wait=True)
+            self._heartbeat_stop.set()
+
+
+def main():
+    """Entry point for the job runner."""
+    parser = argparse.ArgumentParser(description="George job runner")
+    parser.add_argument("--db-path", default="data/jobs.db")
+    parser.add_argument("--concurrency", type=int, default=RUNNER_CONCURRENCY,
+                        help="Jobs executed at once by this runner")
+    parser.add_argument("--job-types", nargs="*", default=None,
+                        help="Only run these job types (default: all runner jobs)")
+    args = parser.parse_args()
+
+    JobRunner(db_path=args.db_path, concurrency=args.concurrency, job_types=args.job_types).run()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,9 @@
 """Knowledge Extraction Orchestrator - Main workflow controller."""
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, Optional, List, Tuple
+from typing import Callable, Dict, Optional, List, Tuple
+import os
 import sys
 import logging
 import json
@@ -8,6 +11,18 @@ import re
 
 logger = logging.getLogger(__name__)
 
+# Map-reduce relationship extraction tuning (see extract_relationships_windowed)
+RELATIONSHIP_WINDOW_TOKENS = int(os.environ.get("RELATIONSHIP_WINDOW_TOKENS", "6000"))  # Text per LLM call
+RELATIONSHIP_MAX_WORKERS = int(os.environ.get("RELATIONSHIP_MAX_WORKERS", "4"))  # LLM calls in flight
+
+# Token estimate for window sizing (1 token ~ 4 characters without llm_client)
+try:
+    from llm_client import TokenCounter
+    estimate_tokens = TokenCounter.estimate_tokens
+except ImportError:
+    def estimate_tokens(text: str) -> int:
+        return max(1, len(text) // 4) if text else 0
+
 # Import GeorgeAI from backend's llm_integration
 try:
     from llm_integration import GeorgeAI
@@ -202,38 +217,134 @@ class KnowledgeExtractor:
         if not self.ai:
             logger.warning("GeorgeAI not initialized. Cannot extract relationships.")
             return []
+        try:
+            relationships = self._extract_window(text)
+        except Exception as e:
+            logger.error(f"Failed to call AI for relationship extraction: {e}")
+            return []
+        logger.info(f"Extracted {len(relationships)} relationships")
+        return relationships
+
+    def extract_relationships_windowed(self, texts: List[str], window_tokens: Optional[int] = None,
+                                       max_workers: Optional[int] = None,
+                                       on_progress: Optional[Callable[[int, int], None]] = None) -> Dict:
+        """
+        Map-reduce relationship extraction over a whole corpus.
+        
+        Map: consecutive texts are packed into windows of at most window_tokens
+        (a longer text gets a window of its own) and each window is extracted
+        with one LLM call, max_workers calls at a time.
+        Reduce: triples are normalized (trimmed entities, UPPER_SNAKE relationship
+        type), de-duplicated and counted: support is the number of windows a
+        triple was found in.
         
+        Args:
+            texts: Corpus documents (e.g. chunks), in reading order
+            window_tokens: Token budget of a window (default RELATIONSHIP_WINDOW_TOKENS)
+            max_workers: Concurrent LLM calls (default RELATIONSHIP_MAX_WORKERS)
+            on_progress: Called with (windows_done, windows_total) as windows finish
+            
+        Returns:
+            Dict with:
+                relationships: [(entity1, relationship_type, entity2, support)], most supported first
+                windows: [{"indices": [text indices], "relationships": [triples], "error": str or None}]
+                failed_windows: Number of windows whose extraction failed
+        """
+        window_tokens = window_tokens or RELATIONSHIP_WINDOW_TOKENS
+        max_workers = max(1, max_workers or RELATIONSHIP_MAX_WORKERS)
+
+        # 1. SPLIT: pack texts into token-bounded windows
+        windows: List[Dict] = []
+        current: List[int] = []
+        current_tokens = 0
+        for index, text in enumerate(texts):
+            tokens = estimate_tokens(text)
+            if current and current_tokens + tokens > window_tokens:
+                windows.append({"indices": current, "relationships": [], "error": None})
+                current, current_tokens = [], 0
+            current.append(index)
+            current_tokens += tokens
+        if current:
+            windows.append({"indices": current, "relationships": [], "error": None})
+
+        if not windows:
+            return {"relationships": [], "windows": [], "failed_windows": 0}
+        if not self.ai:
+            logger.warning("GeorgeAI not initialized. Cannot extract relationships.")
+            for window in windows:
+                window["error"] = "GeorgeAI not initialized"
+            return {"relationships": [], "windows": windows, "failed_windows": len(windows)}
+
+        # 2. MAP: extract each window, a bounded number at a time
+        logger.info(f"Extracting relationships from {len(texts)} documents in {len(windows)} windows "
+                    f"(<= {window_tokens} tokens, {max_workers} workers)")
+        done = 0
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="relationships") as pool:
+            futures = {
+                pool.submit(self._extract_window, "\n\n".join(texts[i] for i in window["indices"])): window
+                for window in windows
+            }
+            for future in as_completed(futures):
+                window = futures[future]
+                try:
+                    window["relationships"] = [rel for rel in map(self._normalize_relationship, future.result())
+                                               if all(rel)]
+                except Exception as e:
+                    window["error"] = str(e)
+                    logger.warning(f"Relationship extraction failed for window {window['indices'][0]}-"
+                                   f"{window['indices'][-1]}: {e}")
+                done += 1
+                if on_progress:
+                    on_progress(done, len(windows))
+
+        # 3. REDUCE: merge and count support per triple
+        support = Counter(rel for window in windows for rel in set(window["relationships"]))
+        failed = sum(1 for window in windows if window["error"])
+        logger.info(f"Extracted {len(support)} distinct relationships from {len(windows)} windows ({failed} failed)")
+        return {
+            "relationships": [(*rel, count) for rel, count in support.most_common()],
+            "windows": windows,
+            "failed_windows": failed,
+        }
+
+    def _load_relationship_prompt(self) -> str:
+        """Relationship extraction prompt template (read once)."""
+        if getattr(self, "_relationship_prompt", None) is None:
+            prompt_path = Path(__file__).parent.parent / "prompts" / "relationship_extractor.txt"
+            try:
+                with open(prompt_path, 'r') as f:
+                    self._relationship_prompt = f.read()
+            except FileNotFoundError:
+                raise FileNotFoundError(f"Relationship extractor prompt not found at {prompt_path}")
+        return self._relationship_prompt
+
+    def _extract_window(self, text: str) -> List[Tuple[str, str, str]]:
+        """One relationship extraction call. Raises on failure (unlike extract_relationships)."""
         # Build the entities list for the prompt
         entity_names = list(self.entities.keys()) if self.entities else []
         entities_str = ", ".join(entity_names) if entity_names else "NO_ENTITIES_FOUND"
         
-        # Load the relationship extraction prompt
-        prompt_path = Path(__file__).parent.parent / "prompts" / "relationship_extractor.txt"
-        try:
-            with open(prompt_path, 'r') as f:
-                prompt_template = f.read()
-        except FileNotFoundError:
-            logger.error(f"Relationship extractor prompt not found at {prompt_path}")
-            return []
-        
         # Format the prompt
-        prompt = prompt_template.format(
+        prompt = self._load_relationship_prompt().format(
             entities_list=entities_str,
             text=text
         )
         
         # Call AI to extract relationships
-        try:
-            result = self.ai.chat(prompt)
-            response_text = result.get('response', '') if isinstance(result, dict) else str(result)
-        except Exception as e:
-            logger.error(f"Failed to call AI for relationship extraction: {e}")
-            return []
+        result = self.ai.chat(prompt)
+        if isinstance(result, dict) and result.get('success') is False:
+            raise RuntimeError(result.get('error') or "AI call failed")
+        response_text = result.get('response', '') if isinstance(result, dict) else str(result)
         
         # Parse the response to extract relationship triples
-        relationships = self._parse_relationships(response_text, entity_names)
-        logger.info(f"Extracted {len(relationships)} relationships")
-        return relationships
+        return self._parse_relationships(response_text, entity_names)
+
+    @staticmethod
+    def _normalize_relationship(relationship: Tuple[str, str, str]) -> Tuple[str, str, str]:
+        """Canonical form of a triple: trimmed entity names, UPPER_SNAKE relationship type."""
+        entity1, rel_type, entity2 = relationship
+        rel_type = re.sub(r'\W+', '_', rel_type.strip().upper()).strip('_')
+        return (" ".join(entity1.split()), rel_type, " ".join(entity2.split()))
     
     def _parse_relationships(self, response_text: str, valid_entities: List[str]) -> List[Tuple[str, str, str]]:
         """
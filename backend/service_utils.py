@@ -5,11 +5,16 @@ Provides common patterns for inter-service communication and security.
 import os
 import logging
 import time
+import random
+import threading
 import requests
+from collections import deque
+from contextvars import ContextVar
 from functools import wraps
 from flask import request, jsonify
 from datetime import datetime, timedelta
 from enum import Enum
+from typing import Optional, Dict, List
 
 logger = logging.getLogger(__name__)
 
@@ -73,6 +78,131 @@ def get_internal_headers():
     return {}
 
 
+# --- END-TO-END REQUEST DEADLINES ---
+
+# Remaining request budget in milliseconds. A relative budget (rather than an
+# absolute timestamp) keeps deadlines correct across hosts with clock skew:
+# every hop converts it to a local monotonic deadline on arrival.
+DEADLINE_HEADER = "X-Request-Budget-Ms"
+
+# Never spend less than this on an attempt; a retry that cannot get at least
+# this much of the remaining budget is skipped instead of being started.
+MIN_ATTEMPT_SECONDS = 0.25
+
+_request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """
+    Raised when the end-to-end request budget is used up.
+
+    Subclasses requests.exceptions.Timeout so existing
+    `except requests.exceptions.RequestException` handlers keep working.
+    """
+    pass
+
+
+def set_request_deadline(budget_seconds: float):
+    """Start a deadline `budget_seconds` from now for the current request context."""
+    _request_deadline.set(time.monotonic() + max(0.0, budget_seconds))
+
+
+def clear_request_deadline():
+    """Remove the deadline from the current context (e.g. at request teardown)."""
+    _request_deadline.set(None)
+
+
+def get_remaining_budget() -> Optional[float]:
+    """
+    Seconds left before the current deadline.
+
+    Returns:
+        float: Remaining seconds (may be <= 0 once expired)
+        None: If no deadline is active (background jobs, workers, scripts)
+    """
+    deadline = _request_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check_deadline(operation: str = "request"):
+    """
+    Raise DeadlineExceeded if the current deadline has passed.
+    Call this before expensive steps so work stops once nobody is waiting.
+    """
+    remaining = get_remaining_budget()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded(f"Deadline exceeded before {operation}")
+
+
+def get_deadline_headers() -> dict:
+    """
+    Get headers that forward the remaining budget to a downstream service.
+
+    Returns:
+        dict: {DEADLINE_HEADER: "<ms>"} if a deadline is active, empty dict otherwise
+    """
+    remaining = get_remaining_budget()
+    if remaining is None:
+        return {}
+    return {DEADLINE_HEADER: str(max(0, int(remaining * 1000)))}
+
+
+def init_request_deadlines(app, default_budget: Optional[float] = None, exempt_endpoints=()):
+    """
+    Install deadline handling on a Flask app.
+
+    - Reads DEADLINE_HEADER from incoming requests and starts a local deadline.
+    - If no header is present and `default_budget` is set (the gateway), starts
+      a fresh budget of that many seconds.
+    - Rejects requests that arrive with an exhausted budget (504).
+    - Converts DeadlineExceeded raised by handlers into 504 responses.
+    - Requests to `exempt_endpoints` (Flask endpoint names) get no deadline,
+      e.g. uploads that legitimately take longer than an interactive budget.
+
+    Usage:
+        app = Flask(__name__)
+        init_request_deadlines(app)                       # downstream service
+        init_request_deadlines(app, default_budget=45.0)  # gateway
+    """
+    exempt_endpoints = frozenset(exempt_endpoints)
+
+    @app.before_request
+    def _start_request_deadline():
+        if request.endpoint in exempt_endpoints:
+            return None
+        raw_budget = request.headers.get(DEADLINE_HEADER)
+        if raw_budget is not None:
+            try:
+                budget_ms = int(raw_budget)
+            except ValueError:
+                logger.warning(f"Ignoring malformed {DEADLINE_HEADER} header: {raw_budget!r}")
+                budget_ms = None
+            if budget_ms is not None:
+                if budget_ms <= 0:
+                    logger.warning(f"Rejecting {request.path}: request deadline already passed")
+                    return jsonify({"error": "Deadline exceeded"}), 504
+                budget = budget_ms / 1000.0
+                if default_budget is not None:
+                    budget = min(budget, default_budget)
+                set_request_deadline(budget)
+                return None
+        if default_budget is not None:
+            set_request_deadline(default_budget)
+        return None
+
+    @app.teardown_request
+    def _clear_request_deadline(exc=None):
+        # Worker threads are reused between requests; never leak a deadline
+        clear_request_deadline()
+
+    @app.errorhandler(DeadlineExceeded)
+    def _handle_deadline_exceeded(e):
+        logger.warning(f"Deadline exceeded while handling {request.path}: {e}")
+        return jsonify({"error": "Deadline exceeded"}), 504
+
+
 # --- FIREBASE AUTHENTICATION DECORATOR ---
 
 def require_firebase_auth(firebase_auth_module=None):
@@ -142,19 +272,222 @@ class ServiceUnavailable(Exception):
     pass
 
 
+class CircuitBreaker:
+    """
+    Thread-safe circuit breaker over a sliding window of recent calls.
+    
+    The breaker opens when, with at least `minimum_calls` in the window, either
+    the failure rate or the slow-call rate reaches its threshold, or after
+    `consecutive_failure_threshold` failures in a row (if set). After
+    `recovery_timeout` seconds it lets up to `half_open_max_calls` trial calls
+    through (HALF_OPEN); a healthy trial closes it, a failed or slow one reopens it.
+    
+    All state changes happen under one lock, so a breaker can be shared by
+    every request thread of a Flask worker.
+    """
+    
+    def __init__(self, name: str, window_size: int = 20, minimum_calls: int = 5,
+                 failure_rate_threshold: float = 0.5,
+                 slow_call_duration: Optional[float] = None,
+                 slow_call_rate_threshold: float = 0.8,
+                 recovery_timeout: float = 60, half_open_max_calls: int = 1,
+                 history_size: int = 20, consecutive_failure_threshold: Optional[int] = None):
+        """
+        Initialize a circuit breaker.
+        
+        Args:
+            name: Name for logging and status (e.g., "Chroma Server/query")
+            window_size: Number of most recent calls considered (default 20)
+            minimum_calls: Calls needed in the window before rates are evaluated (default 5)
+            failure_rate_threshold: Failure ratio that opens the circuit (default 0.5)
+            slow_call_duration: Seconds after which a successful call counts as slow
+                                (None disables slow-call tracking)
+            slow_call_rate_threshold: Slow-call ratio that opens the circuit (default 0.8)
+            recovery_timeout: Seconds to stay OPEN before trying HALF_OPEN (default 60)
+            half_open_max_calls: Concurrent trial calls allowed while HALF_OPEN (default 1)
+            history_size: Number of state transitions kept for monitoring (default 20)
+            consecutive_failure_threshold: Failures in a row that open the circuit,
+                                           whatever the window (None disables)
+        """
+        self.name = name
+        self.minimum_calls = minimum_calls
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_duration = slow_call_duration
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.consecutive_failure_threshold = consecutive_failure_threshold
+        
+        self._lock = threading.Lock()
+        self._window = deque(maxlen=window_size)  # (failed, slow) per call
+        self._opened_at = None
+        self._half_open_in_flight = 0
+        self._consecutive_failures = 0
+        
+        self.state = CircuitState.CLOSED
+        self.last_failure_time = None
+        self.last_state_change = datetime.now()
+        self.transitions = deque(maxlen=history_size)
+        
+        # Lifetime counters
+        self.total_calls = 0
+        self.total_failures = 0
+        self.total_slow_calls = 0
+        self.rejected_calls = 0
+    
+    def _transition(self, new_state: CircuitState, reason: str):
+        """Change state and record the transition. Caller must hold the lock."""
+        if new_state == self.state:
+            return
+        old_state = self.state
+        self.state = new_state
+        self.last_state_change = datetime.now()
+        self.transitions.append({
+            "from": old_state.value,
+            "to": new_state.value,
+            "reason": reason,
+            "at": self.last_state_change.isoformat()
+        })
+        if new_state == CircuitState.OPEN:
+            self._opened_at = time.monotonic()
+            logger.warning(f"[{self.name}] Circuit breaker OPEN ({reason})")
+        elif new_state == CircuitState.HALF_OPEN:
+            self._half_open_in_flight = 0
+            logger.info(f"[{self.name}] Circuit breaker entering HALF_OPEN state")
+        else:
+            logger.info(f"[{self.name}] Circuit breaker CLOSED ({reason})")
+        # Each state starts judging the service from a clean window
+        self._window.clear()
+        self._consecutive_failures = 0
+    
+    def _rates(self):
+        """Failure and slow-call rates over the window. Caller must hold the lock."""
+        calls = len(self._window)
+        if calls == 0:
+            return 0.0, 0.0
+        failures = sum(1 for failed, _ in self._window if failed)
+        slow = sum(1 for _, is_slow in self._window if is_slow)
+        return failures / calls, slow / calls
+    
+    def _evaluate(self):
+        """Open the circuit if either rate crosses its threshold. Caller must hold the lock."""
+        if len(self._window) < self.minimum_calls:
+            return
+        failure_rate, slow_rate = self._rates()
+        if failure_rate >= self.failure_rate_threshold:
+            self._transition(CircuitState.OPEN, f"failure rate {failure_rate:.0%} over last {len(self._window)} calls")
+        elif self.slow_call_duration is not None and slow_rate >= self.slow_call_rate_threshold:
+            self._transition(CircuitState.OPEN, f"slow-call rate {slow_rate:.0%} over last {len(self._window)} calls")
+    
+    def _is_slow(self, duration: Optional[float]) -> bool:
+        return (self.slow_call_duration is not None and duration is not None
+                and duration >= self.slow_call_duration)
+    
+    def allow_request(self) -> bool:
+        """
+        Decide whether a call may proceed. A True result in HALF_OPEN reserves a
+        trial slot, which the caller must settle with record_success,
+        record_failure or release.
+        """
+        with self._lock:
+            if self.state == CircuitState.OPEN:
+                if time.monotonic() - self._opened_at >= self.recovery_timeout:
+                    self._transition(CircuitState.HALF_OPEN, "recovery timeout elapsed")
+                else:
+                    self.rejected_calls += 1
+                    return False
+            if self.state == CircuitState.HALF_OPEN:
+                if self._half_open_in_flight >= self.half_open_max_calls:
+                    self.rejected_calls += 1
+                    return False
+                self._half_open_in_flight += 1
+            return True
+    
+    def record_success(self, duration: Optional[float] = None):
+        """Record a successful call and its duration in seconds."""
+        with self._lock:
+            slow = self._is_slow(duration)
+            self.total_calls += 1
+            self._consecutive_failures = 0
+            if slow:
+                self.total_slow_calls += 1
+            if self.state == CircuitState.HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+                if slow:
+                    self._transition(CircuitState.OPEN, "trial call was slow")
+                else:
+                    self._transition(CircuitState.CLOSED, "service recovered")
+                return
+            self._window.append((False, slow))
+            self._evaluate()
+    
+    def record_failure(self, duration: Optional[float] = None):
+        """Record a failed call (timeout, connection error, 5xx)."""
+        with self._lock:
+            self.total_calls += 1
+            self.total_failures += 1
+            self.last_failure_time = datetime.now()
+            if self.state == CircuitState.HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+                self._transition(CircuitState.OPEN, "service still failing")
+                return
+            self._window.append((True, self._is_slow(duration)))
+            self._consecutive_failures += 1
+            if (self.consecutive_failure_threshold is not None
+                    and self._consecutive_failures >= self.consecutive_failure_threshold):
+                self._transition(CircuitState.OPEN, f"{self._consecutive_failures} consecutive failures")
+                return
+            self._evaluate()
+    
+    def release(self):
+        """Settle a call that says nothing about service health (4xx, our own deadline)."""
+        with self._lock:
+            if self.state == CircuitState.HALF_OPEN:
+                self._half_open_in_flight = max(0, self._half_open_in_flight - 1)
+    
+    def get_status(self) -> dict:
+        """Consistent snapshot of state, window rates, counters and transition history."""
+        with self._lock:
+            failure_rate, slow_rate = self._rates()
+            return {
+                "name": self.name,
+                "state": self.state.value,
+                "window_calls": len(self._window),
+                "failure_count": sum(1 for failed, _ in self._window if failed),
+                "failure_rate": round(failure_rate, 3),
+                "slow_call_rate": round(slow_rate, 3),
+                "total_calls": self.total_calls,
+                "total_failures": self.total_failures,
+                "total_slow_calls": self.total_slow_calls,
+                "rejected_calls": self.rejected_calls,
+                "last_failure": self.last_failure_time.isoformat() if self.last_failure_time else None,
+                "last_state_change": self.last_state_change.isoformat(),
+                "transitions": list(self.transitions)
+            }
+
+
 class ResilientServiceClient:
     """
     HTTP client with circuit breaker pattern and retry logic for inter-service communication.
     
     Features:
-    - Automatic retry with exponential backoff
-    - Circuit breaker pattern to prevent cascading failures
-    - Timeout protection
+    - Automatic retry with jittered exponential backoff
+    - Per-endpoint-group circuit breakers (sliding-window failure and slow-call rates)
+    - Timeout protection, shrunk to fit the end-to-end request deadline
+    - Deadline propagation to downstream services (X-Request-Budget-Ms)
     - Internal token management
     - Comprehensive logging
     
+    Endpoint groups keep a slow bulk endpoint from opening the breaker for
+    latency-critical ones on the same service. Endpoints not listed in any
+    group share the "default" breaker.
+    
     Usage:
-        client = ResilientServiceClient("http://chroma:6003", max_retries=3)
+        client = ResilientServiceClient(
+            "http://chroma:6003", max_retries=3,
+            endpoint_groups={"interactive": ["/query"], "bulk": ["/export"]},
+            group_settings={"bulk": {"slow_call_duration": 120}}
+        )
         try:
             response = client.post("/query", json={"query": "..."})
         except ServiceUnavailable:
@@ -165,9 +498,18 @@ class ResilientServiceClient:
             logger.error(f"Chroma call failed after retries: {e}")
     """
     
+    DEFAULT_GROUP = "default"
+    
     def __init__(self, base_url: str, service_name: str = "Service", 
                  max_retries: int = 3, timeout: int = 10,
-                 failure_threshold: int = 5, recovery_timeout: int = 60):
+                 failure_threshold: int = 5, recovery_timeout: int = 60,
+                 backoff_base: float = 1.0, max_backoff: float = 8.0,
+                 failure_rate_threshold: float = 0.5,
+                 slow_call_duration: Optional[float] = None,
+                 slow_call_rate_threshold: float = 0.8,
+                 window_size: int = 20, minimum_calls: int = 5,
+                 endpoint_groups: Optional[Dict[str, List[str]]] = None,
+                 group_settings: Optional[Dict[str, dict]] = None):
         """
         Initialize resilient client.
         
@@ -176,8 +518,17 @@ class ResilientServiceClient:
             service_name: Name for logging (e.g., "Chroma Server")
             max_retries: Number of retry attempts (default 3)
             timeout: Request timeout in seconds (default 10)
-            failure_threshold: Failures before circuit opens (default 5)
+            failure_threshold: Consecutive failures that open a breaker (default 5)
             recovery_timeout: Seconds before trying to recover (default 60)
+            backoff_base: Backoff ceiling for the first retry in seconds (default 1.0)
+            max_backoff: Upper bound for any single backoff in seconds (default 8.0)
+            failure_rate_threshold: Failure ratio in the window that opens a breaker (default 0.5)
+            slow_call_duration: Seconds after which a call counts as slow (default 80% of timeout)
+            slow_call_rate_threshold: Slow-call ratio in the window that opens a breaker (default 0.8)
+            window_size: Number of recent calls each breaker considers (default 20)
+            minimum_calls: Calls needed in a breaker window before its rates are evaluated (default 5)
+            endpoint_groups: Group name -> endpoint path prefixes sharing one breaker
+            group_settings: Group name -> CircuitBreaker keyword overrides for that group
         """
         self.base_url = base_url.rstrip('/')
         self.service_name = service_name
@@ -185,62 +536,89 @@ class ResilientServiceClient:
         self.timeout = timeout
         self.failure_threshold = failure_threshold
         self.recovery_timeout = recovery_timeout
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
         
-        # Circuit breaker state
-        self.state = CircuitState.CLOSED
-        self.failure_count = 0
-        self.last_failure_time = None
-        self.last_state_change = datetime.now()
+        if slow_call_duration is None and isinstance(timeout, (int, float)):
+            slow_call_duration = 0.8 * timeout
+        self._breaker_defaults = {
+            "window_size": window_size,
+            "minimum_calls": minimum_calls,
+            "consecutive_failure_threshold": failure_threshold,
+            "failure_rate_threshold": failure_rate_threshold,
+            "slow_call_duration": slow_call_duration,
+            "slow_call_rate_threshold": slow_call_rate_threshold,
+            "recovery_timeout": recovery_timeout,
+        }
+        self.group_settings = group_settings or {}
+        
+        # Longest prefix wins, so "/graph/export" can override "/graph"
+        self._group_prefixes = sorted(
+            ((prefix, group) for group, prefixes in (endpoint_groups or {}).items() for prefix in prefixes),
+            key=lambda item: len(item[0]),
+            reverse=True
+        )
+        
+        # Circuit breakers, one per endpoint group (created on first use)
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._breakers_lock = threading.Lock()
     
     def _get_headers(self) -> dict:
         """Get headers with internal token."""
         headers = get_internal_headers()
         return headers if headers else {}
     
-    def _should_attempt_reset(self) -> bool:
-        """Check if circuit should attempt reset (HALF_OPEN)."""
-        if self.state != CircuitState.OPEN:
-            return False
-        
-        # Try to recover after recovery_timeout
-        if datetime.now() - self.last_state_change >= timedelta(seconds=self.recovery_timeout):
-            logger.info(f"[{self.service_name}] Circuit breaker entering HALF_OPEN state")
-            self.state = CircuitState.HALF_OPEN
-            self.failure_count = 0
-            return True
-        
-        return False
-    
-    def _record_success(self):
-        """Record successful request."""
-        if self.state == CircuitState.HALF_OPEN:
-            logger.info(f"[{self.service_name}] Circuit breaker CLOSED (service recovered)")
-            self.state = CircuitState.CLOSED
-            self.failure_count = 0
-            self.last_state_change = datetime.now()
-        elif self.state == CircuitState.CLOSED:
-            self.failure_count = 0  # Reset on any success
-    
-    def _record_failure(self):
-        """Record failed request and update circuit state."""
-        self.failure_count += 1
-        self.last_failure_time = datetime.now()
+    def _group_for(self, endpoint: str) -> str:
+        """Map an endpoint path to its breaker group."""
+        for prefix, group in self._group_prefixes:
+            if endpoint.startswith(prefix):
+                return group
+        return self.DEFAULT_GROUP
+    
+    def get_breaker(self, endpoint: str) -> CircuitBreaker:
+        """Get (or lazily create) the circuit breaker guarding an endpoint."""
+        group = self._group_for(endpoint)
+        with self._breakers_lock:
+            breaker = self._breakers.get(group)
+            if breaker is None:
+                settings = {**self._breaker_defaults, **self.group_settings.get(group, {})}
+                breaker = CircuitBreaker(f"{self.service_name}/{group}", **settings)
+                self._breakers[group] = breaker
+            return breaker
+    
+    def _backoff_delay(self, attempt: int) -> float:
+        """
+        Full-jitter exponential backoff: uniform(0, min(max_backoff, base * 2^attempt)).
+        Jitter keeps many workers from retrying a recovering service in lockstep.
+        """
+        ceiling = min(self.max_backoff, self.backoff_base * (2 ** attempt))
+        return random.uniform(0, ceiling)
+    
+    @staticmethod
+    def _fit_timeout(timeout, remaining: Optional[float]):
+        """
+        Shrink a requests-style timeout (number or (connect, read) tuple) so it
+        does not outlive the remaining request budget.
         
-        if self.state == CircuitState.HALF_OPEN:
-            # Service still failing, open circuit again
-            logger.warning(f"[{self.service_name}] Circuit breaker OPEN (service still failing)")
-            self.state = CircuitState.OPEN
-            self.last_state_change = datetime.now()
-            self.failure_count = 0  # Reset for next recovery attempt
-        elif self.failure_count >= self.failure_threshold and self.state == CircuitState.CLOSED:
-            logger.warning(f"[{self.service_name}] Circuit breaker OPEN (threshold reached: {self.failure_count}/{self.failure_threshold})")
-            self.state = CircuitState.OPEN
-            self.last_state_change = datetime.now()
+        Returns:
+            (timeout, truncated): The timeout to use and whether the budget limited it
+        """
+        if remaining is None or timeout is None:
+            return timeout, False
+        if isinstance(timeout, tuple):
+            fitted = tuple(min(t, remaining) if t is not None else remaining for t in timeout)
+            truncated = any(t is None or t > remaining for t in timeout)
+            return fitted, truncated
+        return min(timeout, remaining), timeout > remaining
     
     def _make_request(self, method: str, endpoint: str, **kwargs) -> requests.Response:
         """
         Make HTTP request with retry logic.
         
+        If an end-to-end deadline is active (see init_request_deadlines), each
+        attempt's timeout is shrunk to the remaining budget, the budget is
+        forwarded downstream, and retries that cannot finish in time are skipped.
+        
         Args:
             method: HTTP method ('get', 'post', 'put', 'delete')
             endpoint: API endpoint (e.g., '/query')
@@ -251,74 +629,102 @@ class ResilientServiceClient:
         
         Raises:
             ServiceUnavailable: If circuit breaker is open
+            DeadlineExceeded: If the request budget ran out before a response, or
+                              cannot fit the backoff and another attempt
             requests.RequestException: If all retries fail
         """
-        # Check circuit breaker before attempting
-        if self.state == CircuitState.OPEN:
-            if not self._should_attempt_reset():
-                logger.warning(f"[{self.service_name}] Circuit breaker OPEN - rejecting request")
-                raise ServiceUnavailable(f"{self.service_name} circuit breaker is open")
-        
+        breaker = self.get_breaker(endpoint)
         url = f"{self.base_url}{endpoint}"
         
-        # Ensure timeout is set
-        if 'timeout' not in kwargs:
-            kwargs['timeout'] = self.timeout
+        # Ensure timeout is set; it is re-fitted to the remaining budget per attempt
+        configured_timeout = kwargs.pop('timeout', self.timeout)
         
-        # Add internal token headers
-        if 'headers' not in kwargs:
-            kwargs['headers'] = {}
-        kwargs['headers'].update(self._get_headers())
+        # Add internal token headers (to a copy: never modify the caller's dict)
+        kwargs['headers'] = {**(kwargs.get('headers') or {}), **self._get_headers()}
         
         last_exception = None
         
         for attempt in range(self.max_retries):
+            remaining = get_remaining_budget()
+            if remaining is not None and remaining <= 0:
+                logger.warning(f"[{self.service_name}] Deadline exceeded before {method.upper()} {endpoint} (attempt {attempt + 1})")
+                raise DeadlineExceeded(f"{self.service_name} request deadline exceeded")
+            
+            # Check circuit breaker before every attempt (it may open mid-retry)
+            if not breaker.allow_request():
+                logger.warning(f"[{breaker.name}] Circuit breaker OPEN - rejecting request")
+                raise ServiceUnavailable(f"{self.service_name} circuit breaker is open for {endpoint}")
+            
+            attempt_timeout, budget_limited = self._fit_timeout(configured_timeout, remaining)
+            kwargs['headers'].update(get_deadline_headers())
+            started = time.monotonic()
+            
             try:
                 logger.debug(f"[{self.service_name}] {method.upper()} {endpoint} (attempt {attempt + 1}/{self.max_retries})")
                 
-                response = requests.request(method, url, **kwargs)
+                response = requests.request(method, url, timeout=attempt_timeout, **kwargs)
                 
                 # Raise for HTTP errors (4xx, 5xx)
                 response.raise_for_status()
                 
                 # Success
-                self._record_success()
+                breaker.record_success(time.monotonic() - started)
                 logger.debug(f"[{self.service_name}] ✓ {method.upper()} {endpoint} succeeded")
                 return response
                 
             except requests.exceptions.Timeout as e:
+                if budget_limited:
+                    # We cut the attempt short ourselves; that says nothing about service health
+                    breaker.release()
+                    logger.warning(f"[{self.service_name}] Request budget ran out during {method.upper()} {endpoint}")
+                    raise DeadlineExceeded(f"{self.service_name} request deadline exceeded") from e
                 last_exception = e
                 logger.warning(f"[{self.service_name}] Timeout on attempt {attempt + 1}/{self.max_retries}")
-                self._record_failure()
+                breaker.record_failure(time.monotonic() - started)
                 
             except requests.exceptions.ConnectionError as e:
                 last_exception = e
                 logger.warning(f"[{self.service_name}] Connection failed on attempt {attempt + 1}/{self.max_retries}: {e}")
-                self._record_failure()
+                breaker.record_failure(time.monotonic() - started)
                 
             except requests.exceptions.HTTPError as e:
                 # Don't retry on 4xx errors (client errors) except 429 (rate limit)
                 if response.status_code < 500 and response.status_code != 429:
+                    breaker.release()
                     logger.error(f"[{self.service_name}] Client error {response.status_code}: {response.text}")
                     raise
                 
+                # Downstream gave up because our budget expired - retrying cannot help
+                if response.status_code == 504 and get_remaining_budget() is not None:
+                    breaker.release()
+                    raise DeadlineExceeded(f"{self.service_name} reported deadline exceeded") from e
+                
                 last_exception = e
                 logger.warning(f"[{self.service_name}] Server error {response.status_code} on attempt {attempt + 1}/{self.max_retries}")
-                self._record_failure()
+                breaker.record_failure(time.monotonic() - started)
                 
             except requests.exceptions.RequestException as e:
                 last_exception = e
                 logger.warning(f"[{self.service_name}] Request failed on attempt {attempt + 1}/{self.max_retries}: {e}")
-                self._record_failure()
+                breaker.record_failure(time.monotonic() - started)
             
-            # Exponential backoff: 1s, 2s, 4s, etc.
+            # Jittered exponential backoff, bounded by the remaining budget
             if attempt < self.max_retries - 1:
-                backoff_time = 2 ** attempt
-                logger.debug(f"[{self.service_name}] Retrying in {backoff_time}s...")
+                backoff_time = self._backoff_delay(attempt)
+                remaining = get_remaining_budget()
+                if remaining is not None and backoff_time + MIN_ATTEMPT_SECONDS > remaining:
+                    logger.warning(
+                        f"[{self.service_name}] Skipping retry: {remaining:.2f}s left in request budget "
+                        f"is not enough for backoff ({backoff_time:.2f}s) plus another attempt"
+                    )
+                    raise DeadlineExceeded(
+                        f"{self.service_name} request deadline leaves no time to retry {endpoint}"
+                    ) from last_exception
+                logger.debug(f"[{self.service_name}] Retrying in {backoff_time:.2f}s...")
                 time.sleep(backoff_time)
         
         # All retries exhausted
-        logger.error(f"[{self.service_name}] ✗ All {self.max_retries} retry attempts failed: {last_exception}")
+        logger.error(f"[{self.service_name}] ✗ All {attempt + 1} attempts failed: {last_exception}")
         raise last_exception or requests.RequestException(f"Failed to connect to {self.service_name}")
     
     def get(self, endpoint: str, **kwargs) -> requests.Response:
@@ -341,14 +747,27 @@ class ResilientServiceClient:
         """
         Get circuit breaker status for monitoring/debugging.
         
+        The top-level fields summarise the service (worst state across its
+        breakers); "breakers" holds the full per-group snapshot including
+        rates, counters and recent transitions.
+        
         Returns:
             dict: Status information
         """
+        with self._breakers_lock:
+            breakers = list(self._breakers.items())
+        groups = {group: breaker.get_status() for group, breaker in breakers}
+        
+        severity = {CircuitState.CLOSED.value: 0, CircuitState.HALF_OPEN.value: 1, CircuitState.OPEN.value: 2}
+        state = max((g["state"] for g in groups.values()), key=severity.get, default=CircuitState.CLOSED.value)
+        last_failures = [g["last_failure"] for g in groups.values() if g["last_failure"]]
+        last_changes = [g["last_state_change"] for g in groups.values()]
+        
         return {
             "service": self.service_name,
-            "state": self.state.value,
-            "failure_count": self.failure_count,
-            "last_failure": self.last_failure_time.isoformat() if self.last_failure_time else None,
-            "last_state_change": self.last_state_change.isoformat()
+            "state": state,
+            "failure_count": sum(g["failure_count"] for g in groups.values()),
+            "last_failure": max(last_failures) if last_failures else None,
+            "last_state_change": max(last_changes) if last_changes else None,
+            "breakers": groups
         }
-
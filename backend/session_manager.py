@@ -1,37 +1,216 @@
 import sqlite3
 import json
 import logging
+import os
+import threading
+import time
 import uuid
+from collections import OrderedDict, deque
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
+
+from db_utils import get_database
+from ingestion_wakeup import default_wakeup_dir, notify_workers
 
 logger = logging.getLogger(__name__)
 
+# --- Hot History Cache Settings ---
+HISTORY_CACHE_MESSAGES = int(os.environ.get("HISTORY_CACHE_MESSAGES", "20"))
+HISTORY_CACHE_MAX_BYTES = int(os.environ.get("HISTORY_CACHE_MAX_BYTES", str(8 * 1024 * 1024)))
+# Seconds after which a cached conversation is re-checked against its newest
+# row id in SQLite. Each gunicorn worker keeps its own cache, so this bounds how
+# long turns added or cleared by another worker go unseen. 0 never checks (only
+# safe with a single process).
+HISTORY_CACHE_VALIDATE_SECONDS = float(os.environ.get("HISTORY_CACHE_VALIDATE_SECONDS", "2"))
+
+# --- Ingestion Retry Settings ---
+# Pipeline steps tracked per queue record ('done' / 'failed' / NULL = not tried)
+INGESTION_STEPS = {"file": "file_status", "vector": "vector_status", "git": "git_status"}
+# Failed attempts are retried after base * 2^(attempt-1) seconds, capped at max
+INGESTION_RETRY_BASE_SECONDS = int(os.environ.get("INGESTION_RETRY_BASE_SECONDS", "30"))
+INGESTION_RETRY_MAX_SECONDS = int(os.environ.get("INGESTION_RETRY_MAX_SECONDS", "900"))
+
+
+class _HistoryEntry:
+    """Ring buffer of the most recent (role, content) messages for one conversation."""
+
+    __slots__ = ("messages", "size", "last_id", "complete", "validated_at")
+
+    def __init__(self, capacity: int):
+        self.messages = deque(maxlen=capacity)
+        self.size = 0
+        self.last_id = None      # chat_history.id of the newest cached message
+        self.complete = False    # True if the buffer holds the ENTIRE conversation
+        self.validated_at = time.monotonic()  # Last time the buffer was known to match SQLite
+
+
+class HistoryCache:
+    """
+    Bounded, thread-safe cache of recent chat messages per (project_id, user_id).
+
+    - RING BUFFER: Each conversation keeps at most `capacity` messages.
+    - WRITE-THROUGH: add_turn() appends to an already cached conversation.
+    - READ-THROUGH: A miss is filled from SQLite by SessionManager.
+    - LRU BY BYTES: Least recently used conversations are evicted once the
+      total cached content exceeds `max_bytes`.
+    """
+
+    def __init__(self, capacity: int = HISTORY_CACHE_MESSAGES, max_bytes: int = HISTORY_CACHE_MAX_BYTES):
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[tuple, _HistoryEntry]" = OrderedDict()
+        # Bumped on every write/invalidation so a slow miss-fill can't overwrite newer data
+        self._generations: Dict[tuple, int] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _message_size(content: str) -> int:
+        return len(content.encode("utf-8"))
+
+    def generation(self, key: tuple) -> int:
+        """Current write generation for a conversation (pass to fill())."""
+        with self._lock:
+            return self._generations.get(key, 0)
+
+    def get(self, key: tuple, limit: int) -> Optional[Tuple[List[tuple], Optional[int]]]:
+        """
+        Look up a conversation that can answer a request for `limit` messages.
+
+        Returns:
+            (messages, last_id) with messages oldest -> newest, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (limit > len(entry.messages) and not entry.complete):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry.messages), entry.last_id
+
+    def due_for_validation(self, key: tuple, interval: float) -> bool:
+        """
+        True if a cached conversation was last validated over `interval` seconds
+        ago. Restarts its timer, so only one caller per interval validates it.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            now = time.monotonic()
+            if entry is None or now - entry.validated_at < interval:
+                return False
+            entry.validated_at = now
+            return True
+
+    def fill(self, key: tuple, rows: List[tuple], generation: int):
+        """
+        Populate a conversation from SQLite rows (oldest -> newest).
+
+        Args:
+            key: (project_id, user_id)
+            rows: List of (id, role, content) tuples in chronological order
+            generation: Value of generation(key) read BEFORE querying SQLite
+        """
+        with self._lock:
+            if self._generations.get(key, 0) != generation:
+                return  # A write landed while we were reading; next read refills
+            self._drop(key)
+            entry = _HistoryEntry(self.capacity)
+            for row_id, role, content in rows[-self.capacity:]:
+                entry.messages.append((role, content))
+                entry.size += self._message_size(content)
+                entry.last_id = row_id
+            entry.complete = len(rows) < self.capacity
+            self._store(key, entry)
+
+    def append(self, key: tuple, messages: List[tuple], last_id: int):
+        """Write-through: append (role, content) messages to a cached conversation."""
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                return  # Not hot; the next read fills it from SQLite
+            self._total_bytes -= entry.size
+            for role, content in messages:
+                if len(entry.messages) == entry.messages.maxlen:
+                    _, dropped = entry.messages[0]
+                    entry.size -= self._message_size(dropped)
+                    entry.complete = False
+                entry.messages.append((role, content))
+                entry.size += self._message_size(content)
+            entry.last_id = last_id
+            self._store(key, entry)
+
+    def invalidate(self, key: tuple):
+        """Drop a conversation from the cache (e.g. after clear_history)."""
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            self._drop(key)
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for monitoring."""
+        with self._lock:
+            return {
+                "conversations": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _drop(self, key: tuple):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._total_bytes -= entry.size
+
+    def _store(self, key: tuple, entry: _HistoryEntry):
+        """Insert as most recently used, then evict LRU conversations over the byte budget."""
+        self._entries[key] = entry
+        self._total_bytes += entry.size
+        while self._total_bytes > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._total_bytes -= evicted.size
+            self.evictions += 1
+
+
 class SessionManager:
     """
     Manages the short-term conversational memory for George.
     Stores linear chat logs in a lightweight SQLite database.
     """
 
-    def __init__(self, db_path: str = "data/sessions.db"):
+    def __init__(self, db_path: str = "data/sessions.db", history_cache: Optional[HistoryCache] = None,
+                 validate_interval: float = HISTORY_CACHE_VALIDATE_SECONDS):
         """
         Initialize the session manager.
         
         Args:
             db_path (str): Path to the SQLite database file. 
                            Defaults to 'data/sessions.db' in the root.
+            history_cache (HistoryCache): Hot history cache (defaults to a new one
+                           sized by HISTORY_CACHE_MESSAGES / HISTORY_CACHE_MAX_BYTES).
+            validate_interval (float): Re-check a cached conversation against its newest
+                           row id in SQLite at most this often (seconds; 0 = never).
+                           Bounds staleness when several processes write the same database.
         """
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = get_database(self.db_path)
+        self.history_cache = history_cache or HistoryCache()
+        self.validate_interval = validate_interval
+        # Local channel used to wake idle ingestion workers on enqueue
+        self.wakeup_dir = default_wakeup_dir(self.db_path)
         self._init_db()
         logger.info(f"SessionManager initialized. DB at {self.db_path}")
 
     def _get_conn(self) -> sqlite3.Connection:
-        """Helper to get a new SQLite connection with row factory."""
-        conn = sqlite3.connect(str(self.db_path))
-        conn.row_factory = sqlite3.Row  # Access columns by name
-        return conn
+        """Helper to get this thread's shared SQLite connection (Row factory, WAL)."""
+        return self._db.connection()
 
     def _init_db(self):
         """Creates the chat_history, ingestion_queue, and bookmarks tables if they don't exist."""
@@ -42,6 +221,7 @@ class SessionManager:
                     CREATE TABLE IF NOT EXISTS chat_history (
                         id INTEGER PRIMARY KEY AUTOINCREMENT,
                         message_id TEXT,
+                        turn_id TEXT,
                         project_id TEXT NOT NULL,
                         user_id TEXT NOT NULL,
                         role TEXT NOT NULL,
@@ -60,6 +240,13 @@ class SessionManager:
                     CREATE INDEX IF NOT EXISTS idx_message_id 
                     ON chat_history (message_id)
                 """)
+                # Link rows to their turn (added after launch: migrate older databases)
+                self._migrate_turn_ids(conn)
+                # Index for turn lookups (both rows of a turn in one seek)
+                conn.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_turn_id 
+                    ON chat_history (turn_id)
+                """)
                 # Index for bookmarked messages
                 conn.execute("""
                     CREATE INDEX IF NOT EXISTS idx_bookmarked 
@@ -76,9 +263,26 @@ class SessionManager:
                         status TEXT DEFAULT 'pending',
                         created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
                         processed_at DATETIME,
-                        error_message TEXT
+                        error_message TEXT,
+                        claimed_by TEXT,
+                        lease_expires_at DATETIME,
+                        attempts INTEGER DEFAULT 0,
+                        next_attempt_at DATETIME,
+                        file_status TEXT,
+                        vector_status TEXT,
+                        git_status TEXT
                     )
                 """)
+                # Lease, retry and per-step columns (added after launch: migrate older databases)
+                self._ensure_columns(conn, "ingestion_queue", {
+                    "claimed_by": "TEXT",
+                    "lease_expires_at": "DATETIME",
+                    "attempts": "INTEGER DEFAULT 0",
+                    "next_attempt_at": "DATETIME",
+                    "file_status": "TEXT",
+                    "vector_status": "TEXT",
+                    "git_status": "TEXT",
+                })
                 # Index for fast queue processing
                 conn.execute("""
                     CREATE INDEX IF NOT EXISTS idx_queue_pending 
@@ -96,6 +300,44 @@ class SessionManager:
             logger.critical(f"Failed to initialize SessionManager database: {e}", exc_info=True)
             raise
 
+    def _ensure_columns(self, conn: sqlite3.Connection, table: str, columns: Dict[str, str]):
+        """Adds any of `columns` (name -> SQL type) missing from an existing table."""
+        existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for name, column_type in columns.items():
+            if name not in existing:
+                logger.info(f"Migrating {table}: adding {name} column")
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
+    def _migrate_turn_ids(self, conn: sqlite3.Connection):
+        """
+        Adds the turn_id column to databases created before it existed and
+        backfills it: each model row's turn_id is its own message_id, and each
+        user row takes the message_id of the model row that answered it.
+        """
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(chat_history)")}
+        if "turn_id" in columns:
+            return
+
+        logger.info("Migrating chat_history: adding turn_id column")
+        conn.execute("ALTER TABLE chat_history ADD COLUMN turn_id TEXT")
+        conn.execute("""
+            UPDATE chat_history SET turn_id = message_id
+            WHERE role = 'model' AND message_id IS NOT NULL
+        """)
+        conn.execute("""
+            UPDATE chat_history SET turn_id = (
+                SELECT m.message_id FROM chat_history m
+                WHERE m.id = (
+                    SELECT MIN(c.id) FROM chat_history c
+                    WHERE c.id > chat_history.id
+                    AND c.project_id = chat_history.project_id
+                    AND c.user_id = chat_history.user_id
+                    AND c.role = 'model'
+                )
+            )
+            WHERE role = 'user'
+        """)
+
     def add_turn(self, project_id: str, user_id: str, user_message: str, george_response: str) -> str:
         """
         Saves a complete conversation turn (User Query + George Response).
@@ -110,21 +352,28 @@ class SessionManager:
             str: The unique message_id for the AI response (used for feedback tracking)
         """
         try:
-            # Generate a unique ID for the AI response message
+            # Generate a unique ID for the AI response message.
+            # It doubles as the turn_id linking both rows of the turn.
             message_id = f"msg_{uuid.uuid4()}"
             
             with self._get_conn() as conn:
                 # 1. Insert User Message (no message_id for user messages)
                 conn.execute(
-                    "INSERT INTO chat_history (project_id, user_id, role, content) VALUES (?, ?, ?, ?)",
-                    (project_id, user_id, "user", user_message)
+                    "INSERT INTO chat_history (turn_id, project_id, user_id, role, content) VALUES (?, ?, ?, ?, ?)",
+                    (message_id, project_id, user_id, "user", user_message)
                 )
                 # 2. Insert George's Response with message_id
-                conn.execute(
-                    "INSERT INTO chat_history (message_id, project_id, user_id, role, content) VALUES (?, ?, ?, ?, ?)",
-                    (message_id, project_id, user_id, "model", george_response)
+                cursor = conn.execute(
+                    "INSERT INTO chat_history (message_id, turn_id, project_id, user_id, role, content) VALUES (?, ?, ?, ?, ?, ?)",
+                    (message_id, message_id, project_id, user_id, "model", george_response)
                 )
                 conn.commit()
+            # 3. Write-through to the hot history cache
+            self.history_cache.append(
+                (project_id, user_id),
+                [("user", user_message), ("model", george_response)],
+                cursor.lastrowid
+            )
             logger.debug(f"Saved chat turn for user {user_id} in project {project_id} with message_id {message_id}")
             return message_id
         except Exception as e:
@@ -147,34 +396,70 @@ class SessionManager:
                         The list is returned in CHRONOLOGICAL order (oldest -> newest).
         """
         try:
-            with self._get_conn() as conn:
-                # Fetch in reverse chronological order (newest first) to apply the limit
-                cursor = conn.execute("""
-                    SELECT role, content 
-                    FROM chat_history 
-                    WHERE project_id = ? AND user_id = ?
-                    ORDER BY timestamp DESC 
-                    LIMIT ?
-                """, (project_id, user_id, limit))
-                rows = cursor.fetchall()
+            key = (project_id, user_id)
+            messages = self._get_cached_messages(key, limit)
+
+            if messages is None:
+                # Cache miss: read enough rows to fill the ring buffer as well
+                generation = self.history_cache.generation(key)
+                fetch = max(limit, self.history_cache.capacity)
+                with self._get_conn() as conn:
+                    # Fetch in reverse chronological order (newest first) to apply the limit
+                    cursor = conn.execute("""
+                        SELECT id, role, content 
+                        FROM chat_history 
+                        WHERE project_id = ? AND user_id = ?
+                        ORDER BY timestamp DESC, id DESC
+                        LIMIT ?
+                    """, (project_id, user_id, fetch))
+                    rows = [(row["id"], row["role"], row["content"]) for row in cursor.fetchall()]
+
+                # Reverse the list so it is chronological (Oldest -> Newest)
+                rows.reverse()
+                self.history_cache.fill(key, rows, generation)
+                messages = [(role, content) for _, role, content in rows]
 
             # Convert rows to Gemini-compatible format
             # Gemini expects "user" or "model" roles. Our DB stores "user" and "model" (or "assistant").
             history = []
-            for row in rows:
-                role = "user" if row["role"] == "user" else "model"
+            recent = messages[-limit:] if limit > 0 else []
+            for role, content in recent:
                 history.append({
-                    "role": role,
-                    "parts": [{"text": row["content"]}]
+                    "role": "user" if role == "user" else "model",
+                    "parts": [{"text": content}]
                 })
-
-            # Reverse the list so it is chronological (Oldest -> Newest)
-            return history[::-1]
+            return history
 
         except Exception as e:
             logger.error(f"Failed to retrieve chat history: {e}", exc_info=True)
             return []
 
+    def _get_cached_messages(self, key: tuple, limit: int) -> Optional[List[tuple]]:
+        """
+        Serve (role, content) messages from the hot history cache.
+
+        Returns:
+            Chronological list of messages, or None on a miss or stale entry.
+        """
+        cached = self.history_cache.get(key, limit)
+        if cached is None:
+            return None
+        messages, last_id = cached
+
+        if self.validate_interval > 0 and self.history_cache.due_for_validation(key, self.validate_interval):
+            # Index-only probe: has anything been written (or cleared) elsewhere?
+            with self._get_conn() as conn:
+                row = conn.execute("""
+                    SELECT id FROM chat_history
+                    WHERE project_id = ? AND user_id = ?
+                    ORDER BY timestamp DESC, id DESC
+                    LIMIT 1
+                """, key).fetchone()
+            if (row["id"] if row else None) != last_id:
+                self.history_cache.invalidate(key)
+                return None
+        return messages
+
     def format_history_for_prompt(self, history: List[Dict[str, Any]]) -> str:
         """
         Helper to turn the history list into a readable string for the text prompt.
@@ -204,59 +489,68 @@ class SessionManager:
             Optional[Dict]: Dictionary with keys 'project_id', 'user_query', 'ai_response'
                            or None if not found or user lacks permission
         """
+        turn = self.get_turns_by_ids([message_id], user_id=user_id).get(message_id)
+        if not turn:
+            logger.warning(f"Message {message_id} not found for user {user_id}")
+            return None
+        return {
+            "project_id": turn["project_id"],
+            "user_query": turn["user_query"],
+            "ai_response": turn["ai_response"]
+        }
+
+    def get_turns_by_ids(self, message_ids: List[str], user_id: Optional[str] = None) -> Dict[str, Dict]:
+        """
+        Bulk version of get_turn_by_id: hydrates many turns in one indexed query.
+        
+        Args:
+            message_ids (List[str]): Message IDs of AI responses
+            user_id (str): If given, only turns owned by this user are returned.
+                           If None (trusted callers like the ingestion worker),
+                           check the returned 'user_id' against your own records.
+            
+        Returns:
+            Dict[str, Dict]: message_id -> {'project_id', 'user_id', 'user_query', 'ai_response'}.
+                             Missing or inaccessible turns are omitted.
+        """
+        turns: Dict[str, Dict] = {}
+        unique_ids = list(dict.fromkeys(message_ids))
         try:
             with self._get_conn() as conn:
-                # Find the AI response message with this message_id
-                cur = conn.execute(
-                    """
-                    SELECT id, project_id, user_id 
-                    FROM chat_history 
-                    WHERE message_id = ? AND user_id = ? AND role = 'model'
-                    """,
-                    (message_id, user_id)
-                )
-                response_row = cur.fetchone()
-                
-                if not response_row:
-                    logger.warning(f"Message {message_id} not found for user {user_id}")
-                    return None
-                
-                response_id = response_row[0]
-                project_id = response_row[1]
-                
-                # Get the AI response content
-                ai_response_content = response_row[2]
-                
-                # Find the preceding user message (the one right before this response)
-                cur = conn.execute(
-                    """
-                    SELECT content 
-                    FROM chat_history 
-                    WHERE id < ? AND project_id = ? AND user_id = ? AND role = 'user'
-                    ORDER BY id DESC
-                    LIMIT 1
-                    """,
-                    (response_id, project_id, user_id)
-                )
-                user_row = cur.fetchone()
-                user_query_content = user_row[0] if user_row else ""
-                
-                # Fetch the actual response content again (fixing the logic above)
-                cur = conn.execute(
-                    "SELECT content FROM chat_history WHERE message_id = ? AND role = 'model'",
-                    (message_id,)
-                )
-                ai_response_row = cur.fetchone()
-                ai_response_content = ai_response_row[0] if ai_response_row else ""
-                
-                return {
-                    "project_id": project_id,
-                    "user_query": user_query_content,
-                    "ai_response": ai_response_content
-                }
+                # Stay well under SQLite's bound-parameter limit
+                for i in range(0, len(unique_ids), 500):
+                    chunk = unique_ids[i:i + 500]
+                    placeholders = ",".join("?" * len(chunk))
+                    params: List[Any] = list(chunk)
+                    user_filter = ""
+                    if user_id is not None:
+                        user_filter = "AND user_id = ?"
+                        params.append(user_id)
+                    cursor = conn.execute(
+                        f"""
+                        SELECT turn_id, project_id, user_id, role, content
+                        FROM chat_history
+                        WHERE turn_id IN ({placeholders}) {user_filter}
+                        """,
+                        params
+                    )
+                    for row in cursor.fetchall():
+                        turn = turns.setdefault(row["turn_id"], {
+                            "project_id": row["project_id"],
+                            "user_id": row["user_id"],
+                            "user_query": "",
+                            "ai_response": None
+                        })
+                        if row["role"] == "user":
+                            turn["user_query"] = row["content"]
+                        else:
+                            turn["ai_response"] = row["content"]
         except Exception as e:
-            logger.error(f"Failed to retrieve turn by message_id {message_id}: {e}", exc_info=True)
-            return None
+            logger.error(f"Failed to retrieve turns for {len(unique_ids)} message_ids: {e}", exc_info=True)
+            return {}
+
+        # A turn only exists if its model response does
+        return {mid: turn for mid, turn in turns.items() if turn["ai_response"] is not None}
 
     def clear_history(self, project_id: str, user_id: str):
         """Clears chat history for a specific user/project context."""
@@ -266,6 +560,7 @@ class SessionManager:
                 (project_id, user_id)
             )
             conn.commit()
+        self.history_cache.invalidate((project_id, user_id))
         logger.info(f"Cleared history for user {user_id} in project {project_id}")
 
     def add_to_ingestion_queue(self, message_id: str, project_id: str, user_id: str) -> bool:
@@ -292,6 +587,8 @@ class SessionManager:
                 )
                 conn.commit()
             logger.info(f"Added message {message_id} to ingestion queue")
+            # Wake idle workers now instead of waiting for their next poll
+            notify_workers(self.wakeup_dir)
             return True
         except sqlite3.IntegrityError:
             logger.warning(f"Message {message_id} already in ingestion queue (skipping duplicate)")
@@ -300,36 +597,136 @@ class SessionManager:
             logger.error(f"Failed to add message {message_id} to ingestion queue: {e}", exc_info=True)
             return False
 
-    def get_pending_ingestions(self, limit: int = 10) -> List[Dict]:
+    def claim_ingestions(self, worker_id: str, limit: int = 10, lease_seconds: int = 300,
+                         max_attempts: int = 3, exclusive_projects: bool = True) -> List[Dict]:
         """
-        Retrieves pending messages from the ingestion queue for the background worker.
+        Atomically claims queued messages for one worker under a time-limited lease.
+        
+        A single UPDATE ... RETURNING flips rows to 'processing', so concurrent
+        workers can never claim the same message. Rows whose lease expired (the
+        worker crashed or hung) are reclaimed; rows that already used up
+        `max_attempts` are moved to the 'dead' (dead-letter) state instead.
+        Pending rows waiting out a retry backoff (next_attempt_at in the future)
+        are skipped; with exclusive_projects, so are the project's later
+        messages, which wait until the retried one has gone through.
         
         Args:
-            limit (int): Maximum number of messages to retrieve
+            worker_id (str): Unique ID of the claiming worker process
+            limit (int): Maximum number of messages to claim
+            lease_seconds (int): How long the claim is valid before it can be reclaimed
+            max_attempts (int): Attempts allowed before a message is dead-lettered
+            exclusive_projects (bool): Skip projects another worker holds a live lease on, and
+                       messages queued behind one awaiting retry, so each project is
+                       ingested by one worker at a time and in order (FIFO, linear git history)
             
         Returns:
-            List[Dict]: List of pending ingestion records with keys:
-                       message_id, project_id, user_id, id (queue record id)
+            List[Dict]: Claimed records (oldest first) with keys:
+                       id, message_id, project_id, user_id, attempts, created_at,
+                       file_status, vector_status, git_status ('done' for steps
+                       already completed by an earlier attempt)
         """
         try:
             with self._get_conn() as conn:
-                cursor = conn.execute(
+                # 1. Dead-letter expired claims that have no attempts left
+                conn.execute(
                     """
-                    SELECT id, message_id, project_id, user_id
-                    FROM ingestion_queue
-                    WHERE status = 'pending'
-                    ORDER BY created_at ASC
-                    LIMIT ?
+                    UPDATE ingestion_queue
+                    SET status = 'dead', claimed_by = NULL, lease_expires_at = NULL,
+                        processed_at = CURRENT_TIMESTAMP,
+                        error_message = COALESCE(error_message, 'Lease expired on final attempt')
+                    WHERE status = 'processing'
+                    AND lease_expires_at < CURRENT_TIMESTAMP
+                    AND attempts >= ?
                     """,
-                    (limit,)
+                    (max_attempts,)
                 )
-                rows = cursor.fetchall()
-                return [dict(row) for row in rows]
+                # 2. Claim pending rows and expired leases in one statement
+                project_filter = ""
+                params: List[Any] = [worker_id, f"+{int(lease_seconds)} seconds"]
+                if exclusive_projects:
+                    project_filter = """
+                        AND project_id NOT IN (
+                            SELECT project_id FROM ingestion_queue
+                            WHERE status = 'processing'
+                            AND lease_expires_at >= CURRENT_TIMESTAMP
+                            AND claimed_by != ?
+                        )
+                        AND NOT EXISTS (
+                            SELECT 1 FROM ingestion_queue AS earlier
+                            WHERE earlier.project_id = candidate.project_id
+                            AND earlier.status = 'pending'
+                            AND earlier.next_attempt_at > CURRENT_TIMESTAMP
+                            AND (earlier.created_at < candidate.created_at
+                                 OR (earlier.created_at = candidate.created_at AND earlier.id < candidate.id))
+                        )"""
+                    params.append(worker_id)
+                params.append(limit)
+                cursor = conn.execute(
+                    f"""
+                    UPDATE ingestion_queue
+                    SET status = 'processing',
+                        claimed_by = ?,
+                        lease_expires_at = datetime('now', ?),
+                        attempts = attempts + 1
+                    WHERE id IN (
+                        SELECT id FROM ingestion_queue AS candidate
+                        WHERE ((status = 'pending'
+                                AND (next_attempt_at IS NULL OR next_attempt_at <= CURRENT_TIMESTAMP))
+                               OR (status = 'processing' AND lease_expires_at < CURRENT_TIMESTAMP))
+                        {project_filter}
+                        ORDER BY created_at ASC, id ASC
+                        LIMIT ?
+                    )
+                    RETURNING id, message_id, project_id, user_id, attempts, created_at,
+                              file_status, vector_status, git_status
+                    """,
+                    params
+                )
+                rows = [dict(row) for row in cursor.fetchall()]
+                conn.commit()
+            # RETURNING order is unspecified: restore FIFO order
+            rows.sort(key=lambda r: (r["created_at"], r["id"]))
+            if rows:
+                logger.info(f"Worker {worker_id} claimed {len(rows)} ingestion(s)")
+            return rows
         except Exception as e:
-            logger.error(f"Failed to retrieve pending ingestions: {e}", exc_info=True)
+            logger.error(f"Failed to claim ingestions for worker {worker_id}: {e}", exc_info=True)
             return []
 
-    def mark_ingestion_complete(self, queue_id: int, status: str = 'complete', error_msg: str = None) -> bool:
+    def get_ingestion_stats(self) -> Dict[str, Any]:
+        """
+        Queue depth and lag for monitoring.
+        
+        Returns:
+            Dict: {'counts': {status: n}, 'oldest_waiting_seconds': float or None}
+                  where the oldest waiting message is pending or processing.
+        """
+        try:
+            with self._get_conn() as conn:
+                counts = {
+                    row["status"]: row["count"]
+                    for row in conn.execute(
+                        "SELECT status, COUNT(*) AS count FROM ingestion_queue GROUP BY status"
+                    )
+                }
+                row = conn.execute(
+                    """
+                    SELECT (julianday('now') - julianday(MIN(created_at))) * 86400 AS lag
+                    FROM ingestion_queue
+                    WHERE status IN ('pending', 'processing')
+                    """
+                ).fetchone()
+            lag = row["lag"] if row else None
+            return {
+                "counts": counts,
+                "oldest_waiting_seconds": round(lag, 3) if lag is not None else None
+            }
+        except Exception as e:
+            logger.error(f"Failed to read ingestion queue stats: {e}", exc_info=True)
+            return {"counts": {}, "oldest_waiting_seconds": None}
+
+    def mark_ingestion_complete(self, queue_id: int, status: str = 'complete', error_msg: str = None,
+                                worker_id: Optional[str] = None) -> bool:
         """
         Marks an ingestion queue record as processed.
         
@@ -337,27 +734,133 @@ class SessionManager:
             queue_id (int): The ID of the queue record
             status (str): 'complete' or 'failed'
             error_msg (str): Error message if failed
+            worker_id (str): If given, only update while this worker still holds the lease
             
         Returns:
             bool: True if updated successfully
         """
         try:
             with self._get_conn() as conn:
-                conn.execute(
+                cursor = conn.execute(
                     """
                     UPDATE ingestion_queue
-                    SET status = ?, processed_at = CURRENT_TIMESTAMP, error_message = ?
-                    WHERE id = ?
+                    SET status = ?, processed_at = CURRENT_TIMESTAMP, error_message = ?,
+                        claimed_by = NULL, lease_expires_at = NULL
+                    WHERE id = ? AND (? IS NULL OR claimed_by = ?)
                     """,
-                    (status, error_msg, queue_id)
+                    (status, error_msg, queue_id, worker_id, worker_id)
                 )
                 conn.commit()
+            if cursor.rowcount == 0:
+                logger.warning(f"Ingestion queue record {queue_id} not updated (lease lost to another worker?)")
+                return False
             logger.info(f"Marked ingestion queue record {queue_id} as {status}")
             return True
         except Exception as e:
             logger.error(f"Failed to update ingestion queue: {e}", exc_info=True)
             return False
 
+    def fail_ingestion(self, queue_id: int, error_msg: str, max_attempts: int = 3,
+                       worker_id: Optional[str] = None,
+                       backoff_base: int = INGESTION_RETRY_BASE_SECONDS,
+                       backoff_max: int = INGESTION_RETRY_MAX_SECONDS) -> str:
+        """
+        Records a failed attempt: requeues the message after a backoff, or
+        dead-letters it once `max_attempts` have been used.
+        
+        Args:
+            queue_id (int): The ID of the queue record
+            error_msg (str): Why this attempt failed
+            max_attempts (int): Attempts allowed before the message is dead-lettered
+            worker_id (str): If given, only update while this worker still holds the lease
+            backoff_base (int): Delay in seconds before the first retry (doubles per attempt)
+            backoff_max (int): Upper bound on the retry delay in seconds
+            
+        Returns:
+            str: New status ('pending' or 'dead'), or '' if the record was not updated
+        """
+        return self.record_ingestion_attempt(queue_id, {}, error_msg, max_attempts, worker_id,
+                                             backoff_base, backoff_max)
+
+    def record_ingestion_attempt(self, queue_id: int, steps: Dict[str, bool],
+                                 error_msg: Optional[str] = None, max_attempts: int = 3,
+                                 worker_id: Optional[str] = None,
+                                 backoff_base: int = INGESTION_RETRY_BASE_SECONDS,
+                                 backoff_max: int = INGESTION_RETRY_MAX_SECONDS) -> str:
+        """
+        Records the per-step outcome of one ingestion attempt and settles the record.
+        
+        Steps that succeeded are marked 'done' and are never run again for this
+        message; a step that is already 'done' is never downgraded. The record is
+        'complete' once every step in INGESTION_STEPS is done. Otherwise it is
+        requeued with exponential backoff, or dead-lettered after `max_attempts`.
+        
+        Args:
+            queue_id (int): The ID of the queue record
+            steps (Dict[str, bool]): Outcome per step attempted, keyed by
+                       'file' / 'vector' / 'git' (steps not attempted are omitted)
+            error_msg (str): Why the attempt did not complete (stored unless complete)
+            max_attempts (int): Attempts allowed before the message is dead-lettered
+            worker_id (str): If given, only update while this worker still holds the lease
+            backoff_base (int): Delay in seconds before the first retry (doubles per attempt)
+            backoff_max (int): Upper bound on the retry delay in seconds
+            
+        Returns:
+            str: New status ('complete', 'pending' or 'dead'), or '' if the record was not updated
+        """
+        step_updates = []
+        params: List[Any] = []
+        for step, ok in steps.items():
+            column = INGESTION_STEPS[step]
+            step_updates.append(f"{column} = CASE WHEN {column} = 'done' THEN 'done' ELSE ? END")
+            params.append('done' if ok else 'failed')
+        all_done = " AND ".join(f"{column} = 'done'" for column in INGESTION_STEPS.values())
+        
+        try:
+            with self._get_conn() as conn:
+                # 1. Record step outcomes (fenced on the lease)
+                if step_updates:
+                    conn.execute(
+                        f"""
+                        UPDATE ingestion_queue SET {", ".join(step_updates)}
+                        WHERE id = ? AND (? IS NULL OR claimed_by = ?)
+                        """,
+                        params + [queue_id, worker_id, worker_id]
+                    )
+                # 2. Settle: complete, retry later, or dead-letter
+                cursor = conn.execute(
+                    f"""
+                    UPDATE ingestion_queue
+                    SET status = CASE WHEN {all_done} THEN 'complete'
+                                      WHEN attempts >= ? THEN 'dead'
+                                      ELSE 'pending' END,
+                        processed_at = CASE WHEN ({all_done}) OR attempts >= ?
+                                            THEN CURRENT_TIMESTAMP ELSE NULL END,
+                        next_attempt_at = CASE WHEN ({all_done}) OR attempts >= ? THEN NULL
+                                               ELSE datetime('now', '+' || MIN(? * (1 << (MAX(attempts, 1) - 1)), ?) || ' seconds') END,
+                        error_message = CASE WHEN {all_done} THEN NULL ELSE ? END,
+                        claimed_by = NULL, lease_expires_at = NULL
+                    WHERE id = ? AND (? IS NULL OR claimed_by = ?)
+                    RETURNING status, attempts, next_attempt_at
+                    """,
+                    (max_attempts, max_attempts, max_attempts, backoff_base, backoff_max,
+                     error_msg, queue_id, worker_id, worker_id)
+                )
+                rows = cursor.fetchall()
+                conn.commit()
+            row = rows[0] if rows else None
+            if not row:
+                logger.warning(f"Ingestion queue record {queue_id} not updated (lease lost to another worker?)")
+                return ''
+            if row["status"] == 'dead':
+                logger.error(f"Ingestion queue record {queue_id} dead-lettered after {row['attempts']} attempts: {error_msg}")
+            elif row["status"] == 'pending':
+                logger.warning(f"Ingestion queue record {queue_id} failed, retry at {row['next_attempt_at']}: {error_msg}")
+            return row["status"]
+        except Exception as e:
+            logger.error(f"Failed to record ingestion attempt for {queue_id}: {e}", exc_info=True)
+            return ''
+
     def toggle_bookmark(self, message_id: str, user_id: str, is_bookmarked: bool) -> bool:
         """
         Toggles the bookmark status for a chat message.
@@ -424,13 +927,8 @@ class SessionManager:
                         ch_response.id
                     FROM chat_history ch_response
                     LEFT JOIN chat_history ch_user ON 
-                        ch_user.id = (
-                            SELECT MAX(id) FROM chat_history
-                            WHERE id < ch_response.id 
-                            AND project_id = ? 
-                            AND user_id = ? 
-                            AND role = 'user'
-                        )
+                        ch_user.turn_id = ch_response.turn_id
+                        AND ch_user.role = 'user'
                     WHERE ch_response.project_id = ? 
                     AND ch_response.user_id = ? 
                     AND ch_response.role = 'model'
@@ -438,7 +936,7 @@ class SessionManager:
                     ORDER BY ch_response.timestamp DESC
                     LIMIT ?
                     """,
-                    (project_id, user_id, project_id, user_id, limit)
+                    (project_id, user_id, limit)
                 )
                 rows = cursor.fetchall()
                 return [dict(row) for row in rows]
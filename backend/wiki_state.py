@@ -0,0 +1,176 @@
+"""
+Wiki Generation State
+Remembers what the last successful wiki run of each project was built from,
+so the next run only reprocesses what changed.
+
+For every chunk of `project_{id}` the store keeps:
+1. its content hash at the last successful run
+2. the wiki files (entity sheets) whose entity the chunk mentions
+3. the relationship triples extracted from it
+
+A new run diffs the current chunk hashes against the stored ones
+(diff_chunks) and regenerates only the sheets and relationships touched by
+added, changed or removed chunks. The state is replaced in one transaction
+once the run's files are saved, so a failed run leaves the previous state.
+"""
+
+import json
+import re
+import sqlite3
+import hashlib
+import logging
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+from db_utils import get_database
+
+logger = logging.getLogger(__name__)
+
+
+def chunk_hash(text: str) -> str:
+    """Content hash of a chunk."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def diff_chunks(previous: Dict[str, str], current: Dict[str, str]) -> Dict[str, List[str]]:
+    """
+    Compare two {chunk_id: content_hash} maps.
+
+    Returns:
+        Dict with sorted chunk id lists under 'added', 'changed', 'removed'
+        and 'unchanged'
+    """
+    return {
+        "added": sorted(cid for cid in current if cid not in previous),
+        "changed": sorted(cid for cid in current if cid in previous and previous[cid] != current[cid]),
+        "removed": sorted(cid for cid in previous if cid not in current),
+        "unchanged": sorted(cid for cid in current if previous.get(cid) == current[cid]),
+    }
+
+
+def entity_name(filename: str) -> str:
+    """Entity a wiki file is about, e.g. 'Harry_Potter.md' -> 'Harry Potter'."""
+    return re.sub(r'[_\-]+', ' ', Path(filename).stem).strip()
+
+
+def find_mentions(chunks: Dict[str, str], names: Dict[str, str]) -> Dict[str, Set[str]]:
+    """
+    Find which entities each chunk mentions (whole words, case-insensitive).
+
+    Args:
+        chunks: {chunk_id: text}
+        names: {key: entity name}, e.g. {filename: entity_name(filename)}
+
+    Returns:
+        {chunk_id: set of keys mentioned} (chunks mentioning nothing are omitted)
+    """
+    keys_by_name: Dict[str, Set[str]] = {}
+    for key, name in names.items():
+        if name:
+            keys_by_name.setdefault(name.lower(), set()).add(key)
+    if not keys_by_name or not chunks:
+        return {}
+
+    # One alternation for all names, longest first so "Harry Potter" wins over "Harry"
+    alternation = "|".join(re.escape(name) for name in sorted(keys_by_name, key=len, reverse=True))
+    pattern = re.compile(rf"(?<!\w)(?:{alternation})(?!\w)", re.IGNORECASE)
+
+    mentions: Dict[str, Set[str]] = {}
+    for chunk_id, text in chunks.items():
+        found = {match.lower() for match in pattern.findall(text)}
+        if found:
+            mentions[chunk_id] = set().union(*(keys_by_name[name] for name in found))
+    return mentions
+
+
+class WikiStateStore:
+    """Per-project, per-chunk state of the last successful wiki run (SQLite)."""
+
+    def __init__(self, db_path: str = "data/wiki_state.db"):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = get_database(self.db_path)
+        self._init_db()
+
+    def _get_conn(self) -> sqlite3.Connection:
+        """Helper to get this thread's shared SQLite connection (Row factory, WAL)."""
+        return self._db.connection()
+
+    def _init_db(self):
+        """Creates the wiki_chunks table if it doesn't exist."""
+        try:
+            with self._get_conn() as conn:
+                conn.execute("""
+                    CREATE TABLE IF NOT EXISTS wiki_chunks (
+                        project_id TEXT NOT NULL,
+                        chunk_id TEXT NOT NULL,
+                        content_hash TEXT NOT NULL,
+                        files TEXT NOT NULL,          -- JSON list of wiki filenames
+                        relationships TEXT NOT NULL,  -- JSON list of [entity1, type, entity2]
+                        job_id TEXT,
+                        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                        PRIMARY KEY (project_id, chunk_id)
+                    )
+                """)
+                conn.commit()
+        except Exception as e:
+            raise Exception(f"Failed to initialize WikiStateStore database: {e}")
+
+    def load(self, project_id: str) -> Dict[str, Dict]:
+        """
+        State of a project's last successful run.
+
+        Returns:
+            {chunk_id: {"hash": str, "files": [str], "relationships": [[str, str, str]]}}
+            (empty if the project never completed a run)
+        """
+        with self._get_conn() as conn:
+            rows = conn.execute(
+                "SELECT chunk_id, content_hash, files, relationships FROM wiki_chunks WHERE project_id = ?",
+                (project_id,)
+            ).fetchall()
+        return {
+            row["chunk_id"]: {
+                "hash": row["content_hash"],
+                "files": json.loads(row["files"]),
+                "relationships": json.loads(row["relationships"]),
+            }
+            for row in rows
+        }
+
+    def replace(self, project_id: str, chunks: Dict[str, Dict], job_id: Optional[str] = None):
+        """
+        Atomically replace a project's state with that of a completed run.
+
+        Args:
+            chunks: Same shape as load() returns
+            job_id: Job that produced the state (for tracing)
+        """
+        with self._get_conn() as conn:
+            conn.execute("DELETE FROM wiki_chunks WHERE project_id = ?", (project_id,))
+            conn.executemany(
+                """INSERT INTO wiki_chunks (project_id, chunk_id, content_hash, files, relationships, job_id)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                [
+                    (project_id, chunk_id, state["hash"], json.dumps(sorted(state.get("files", []))),
+                     json.dumps([list(rel) for rel in state.get("relationships", [])]), job_id)
+                    for chunk_id, state in chunks.items()
+                ]
+            )
+            conn.commit()
+        logger.info(f"Saved wiki state for project {project_id}: {len(chunks)} chunks (job {job_id}).")
+
+    def clear(self, project_id: str):
+        """Forget a project's state (its next run is a full run)."""
+        with self._get_conn() as conn:
+            conn.execute("DELETE FROM wiki_chunks WHERE project_id = ?", (project_id,))
+            conn.commit()
+
+
+def relationship_support(relationship_lists: Iterable[Iterable[Iterable[str]]]) -> Counter:
+    """
+    Support of each (entity1, type, entity2) triple: the number of lists
+    (e.g. chunks) it appears in.
+    """
+    return Counter(rel for rels in relationship_lists for rel in {tuple(r) for r in rels})
@@ -4,11 +4,11 @@ import sys
 from pathlib import Path
 from flask import Flask, request, jsonify
 from functools import wraps
-from billing_manager import BillingManager
 
-# Add backend to path to import service_utils
+# Add backend to path to import service_utils and db_utils
 sys.path.insert(0, str(Path(__file__).parent.parent / 'backend'))
 
+from billing_manager import BillingManager
 from service_utils import require_internal_token
 
 # Setup Logging
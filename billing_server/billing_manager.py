@@ -5,6 +5,8 @@ from pathlib import Path
 from datetime import datetime
 from typing import Optional, Dict
 
+from db_utils import get_database
+
 logger = logging.getLogger(__name__)
 
 class BillingManager:
@@ -22,14 +24,13 @@ class BillingManager:
         """
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = get_database(self.db_path)
         self._init_db()
         logger.info(f"BillingManager initialized. DB at {self.db_path}")
 
     def _get_conn(self) -> sqlite3.Connection:
-        """Helper to get a new SQLite connection with row factory."""
-        conn = sqlite3.connect(str(self.db_path))
-        conn.row_factory = sqlite3.Row
-        return conn
+        """Helper to get this thread's shared SQLite connection (Row factory, WAL)."""
+        return self._db.connection()
 
     def _init_db(self):
         """Creates the accounts and ledger tables if they don't exist."""
@@ -2,6 +2,9 @@
 from flask import Flask, request, jsonify
 from functools import wraps
 import os
+import json
+import base64
+import binascii
 import logging
 import sys
 from pathlib import Path
@@ -10,7 +13,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent / 'backend'))
 
 from db_manager import ChromaManager, GraphManager
-from service_utils import require_internal_token
+from service_utils import require_internal_token, init_request_deadlines, check_deadline
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -21,6 +24,10 @@ INTERNAL_TOKEN = os.getenv("INTERNAL_SERVICE_TOKEN", None)
 
 app = Flask(__name__)
 
+# Honour the caller's X-Request-Budget-Ms: reject expired requests (504)
+# and let handlers stop via check_deadline() once nobody is waiting.
+init_request_deadlines(app)
+
 # Initialize ChromaDB manager and Graph manager with error handling
 try:
     db_manager = ChromaManager()
@@ -108,17 +115,108 @@ def add_chunks():
     if not collection_name or not chunks:
         return jsonify({'error': 'collection_name and chunks are required'}), 400
     
+    # Embedding is the expensive part; skip it if the caller already gave up
+    check_deadline("embedding chunks")
+    
     try:
         texts = [chunk['text'] for chunk in chunks]
         metadatas = [chunk.get('metadata', {}) for chunk in chunks]
         ids = [chunk.get('id') for chunk in chunks]
         
-        db_manager.add_texts(collection_name, texts, metadatas, ids)
+        db_manager.add_texts(collection_name, texts, metadatas, ids, upsert=bool(data.get('upsert')))
         return jsonify({'message': f"Added {len(chunks)} chunks to '{collection_name}'"}), 200
     except Exception as e:
         logger.error(f"Failed to add chunks: {e}", exc_info=True)
         return jsonify({'error': 'Failed to add chunks to collection'}), 500
 
+@app.route('/collection_version', methods=['POST'])
+def collection_version():
+    """
+    Get the knowledge-base version of a collection.
+    
+    The version increases on every write, so callers can detect changes
+    without reading the collection. A collection that doesn't exist is
+    reported as version 0 with count 0; it is not created.
+    """
+    if db_manager is None or db_manager.client is None:
+        return jsonify({'error': 'Database service unavailable'}), 503
+    
+    data = request.get_json() or {}
+    collection_name = data.get('collection_name')
+    if not collection_name:
+        return jsonify({'error': 'collection_name is required'}), 400
+    
+    try:
+        version = db_manager.get_version(collection_name)
+        return jsonify({'collection_name': collection_name, **version}), 200
+    except Exception as e:
+        logger.error(f"Failed to get version of {collection_name}: {e}", exc_info=True)
+        return jsonify({'error': 'Failed to get collection version'}), 500
+
+# Export page sizes (records per response)
+EXPORT_DEFAULT_LIMIT = int(os.getenv("CHROMA_EXPORT_DEFAULT_LIMIT", "500"))
+EXPORT_MAX_LIMIT = int(os.getenv("CHROMA_EXPORT_MAX_LIMIT", "5000"))
+
+def _encode_cursor(offset: int, version: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"offset": offset, "version": version}).encode()).decode()
+
+def _decode_cursor(cursor: str) -> dict:
+    data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    if not isinstance(data.get("offset"), int) or data["offset"] < 0:
+        raise ValueError("invalid offset")
+    return data
+
+@app.route('/export', methods=['POST'])
+def export():
+    """
+    Cursor-paginated export of a whole collection (ids, documents, metadatas).
+    
+    Body: {"collection_name": "...", "cursor": null, "limit": 500,
+           "where": {...}, "include": ["embeddings"]}
+    
+    Returns one page plus next_cursor (null on the last page). Pass it back
+    unchanged to get the next page; memory stays bounded by the page size on
+    both sides. The cursor remembers the collection version: if the collection
+    was written to since the first page, the page is flagged with changed=true
+    (offsets may have shifted, so the export should be restarted).
+    """
+    if db_manager is None or db_manager.client is None:
+        return jsonify({'error': 'Database service unavailable'}), 503
+    
+    data = request.get_json() or {}
+    collection_name = data.get('collection_name')
+    if not collection_name:
+        return jsonify({'error': 'collection_name is required'}), 400
+    
+    try:
+        limit = min(max(int(data.get('limit') or EXPORT_DEFAULT_LIMIT), 1), EXPORT_MAX_LIMIT)
+        cursor = _decode_cursor(data['cursor']) if data.get('cursor') else None
+    except (ValueError, TypeError, json.JSONDecodeError, binascii.Error):
+        return jsonify({'error': 'Invalid cursor or limit'}), 400
+    include = data.get('include') or []
+    where = data.get('where')
+    
+    check_deadline("exporting collection")
+    
+    try:
+        version = db_manager.get_version(collection_name)["version"]
+        offset = cursor["offset"] if cursor else 0
+        page = db_manager.get_page(collection_name, offset=offset, limit=limit, where=where,
+                                   include_embeddings='embeddings' in include)
+        # A full page may be followed by more records; a short page is the last
+        next_cursor = _encode_cursor(offset + limit, cursor["version"] if cursor else version) \
+            if len(page["ids"]) == limit else None
+        return jsonify({
+            **page,
+            'collection_name': collection_name,
+            'next_cursor': next_cursor,
+            'version': version,
+            'changed': bool(cursor) and cursor.get("version") != version
+        }), 200
+    except Exception as e:
+        logger.error(f"Failed to export collection {collection_name}: {e}", exc_info=True)
+        return jsonify({'error': 'Failed to export collection'}), 500
+
 @app.route('/query', methods=['POST'])
 def query():
     if db_manager is None or db_manager.client is None:
@@ -133,6 +231,8 @@ def query():
     if not collection_name or not query_texts:
         return jsonify({'error': 'collection_name and query_texts are required'}), 400
         
+    check_deadline("querying collection")
+    
     try:
         results = db_manager.query(collection_name, query_texts, n_results, where)
         return jsonify(results), 200
@@ -19,6 +19,51 @@ except (ImportError, Exception) as e:
 
 logger = logging.getLogger(__name__)
 
+
+class CollectionVersions:
+    """
+    Monotonic per-collection change counter (the knowledge-base version).
+    
+    Bumped on every write to a collection, so callers can tell whether a
+    collection changed without reading it (e.g. to deduplicate wiki jobs).
+    Stored in SQLite next to the Chroma data so it survives restarts and is
+    shared by all server processes.
+    """
+    def __init__(self, db_path: Union[str, Path]):
+        from db_utils import get_database
+        self._db = get_database(db_path)
+        with self._db.connection() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS collection_versions (
+                    collection_name TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL DEFAULT 0,
+                    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+
+    def bump(self, collection_name: str) -> int:
+        """Record a change to the collection. Returns the new version."""
+        with self._db.connection() as conn:
+            row = conn.execute(
+                """
+                INSERT INTO collection_versions (collection_name, version) VALUES (?, 1)
+                ON CONFLICT (collection_name) DO UPDATE
+                SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+                RETURNING version
+                """,
+                (collection_name,)
+            ).fetchone()
+        return row["version"]
+
+    def get(self, collection_name: str) -> int:
+        """Current version of the collection (0 if never written)."""
+        with self._db.connection() as conn:
+            row = conn.execute(
+                "SELECT version FROM collection_versions WHERE collection_name = ?", (collection_name,)
+            ).fetchone()
+        return row["version"] if row else 0
+
+
 class ChromaManager:
     """Manages multiple ChromaDB collections."""
     def __init__(self, persist_directory: Union[str, Path] = None):
@@ -43,6 +88,8 @@ class ChromaManager:
         except Exception as e:
             logger.error(f"Failed to initialize ChromaDB: {e}", exc_info=True)
             self.client = None
+        
+        self.versions = CollectionVersions(persist_directory / "collection_versions.db")
 
     def get_or_create_collection(self, name: str) -> Optional[Any]:
         if not self.client:
@@ -53,7 +100,18 @@ class ChromaManager:
             logger.error(f"Failed to get or create collection {name}: {e}", exc_info=True)
             return None
 
-    def add_texts(self, collection_name: str, texts: List[str], metadatas: Optional[List[Dict[str, Any]]] = None, ids: Optional[List[str]] = None) -> None:
+    def get_collection(self, name: str) -> Optional[Any]:
+        """The collection, or None if it does not exist (never creates it)."""
+        if not self.client:
+            return None
+        try:
+            return self.client.get_collection(name=name)
+        except Exception as e:
+            # Chroma raises ValueError / NotFoundError (by version) for a missing collection
+            logger.debug(f"Collection {name} not found: {e}")
+            return None
+
+    def add_texts(self, collection_name: str, texts: List[str], metadatas: Optional[List[Dict[str, Any]]] = None, ids: Optional[List[str]] = None, upsert: bool = False) -> None:
         collection = self.get_or_create_collection(collection_name)
         if not collection:
             raise ValueError(f"Could not get or create collection: {collection_name}")
@@ -68,12 +126,51 @@ class ChromaManager:
             metadatas = [{} for _ in texts]
             
         try:
-            collection.add(documents=texts, metadatas=metadatas, ids=ids)
-            logger.debug(f"Added {len(texts)} texts to collection '{collection_name}'")
+            # upsert makes retries with deterministic ids idempotent (overwrite, not duplicate)
+            write = collection.upsert if upsert else collection.add
+            write(documents=texts, metadatas=metadatas, ids=ids)
+            self.versions.bump(collection_name)
+            logger.debug(f"{'Upserted' if upsert else 'Added'} {len(texts)} texts to collection '{collection_name}'")
         except Exception as e:
             logger.error(f"Failed to add texts to collection {collection_name}: {e}", exc_info=True)
             raise
 
+    def get_version(self, collection_name: str) -> Dict[str, Any]:
+        """Knowledge-base version and size of a collection (count 0 if it doesn't exist)."""
+        collection = self.get_collection(collection_name)
+        return {"version": self.versions.get(collection_name), "count": collection.count() if collection else 0}
+
+    def get_page(self, collection_name: str, offset: int = 0, limit: int = 500,
+                 where: Optional[Dict[str, Any]] = None, include_embeddings: bool = False) -> Dict[str, Any]:
+        """
+        One page of a collection's records, in storage order.
+        
+        Returns:
+            Dict with ids, documents, metadatas (and embeddings as plain lists
+            if requested); empty if the collection doesn't exist
+        """
+        collection = self.get_collection(collection_name)
+        if not collection:
+            page = {"ids": [], "documents": [], "metadatas": []}
+            return {**page, "embeddings": []} if include_embeddings else page
+        
+        include = ["documents", "metadatas"] + (["embeddings"] if include_embeddings else [])
+        try:
+            result = collection.get(where=where or None, limit=limit, offset=offset, include=include)
+        except Exception as e:
+            logger.error(f"Failed to read page of collection {collection_name}: {e}", exc_info=True)
+            raise
+        
+        page = {
+            "ids": result.get("ids") or [],
+            "documents": result.get("documents") or [],
+            "metadatas": result.get("metadatas") or [],
+        }
+        if include_embeddings:
+            embeddings = result.get("embeddings")
+            page["embeddings"] = [list(map(float, vector)) for vector in embeddings] if embeddings is not None else []
+        return page
+
     def query(self, collection_name: str, query_texts: List[str], n_results: int = 5, where: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         collection = self.get_or_create_collection(collection_name)
         if not collection:
@@ -7,14 +7,22 @@ import logging
 import subprocess
 import tempfile
 import sys
+import time
+import shutil
+from contextlib import contextmanager
 from pathlib import Path
 
+try:
+    import fcntl
+except ImportError:  # Windows: atomic saves of one project are not serialized across processes
+    fcntl = None
+
 # Add backend to path to import service_utils
 sys.path.insert(0, str(Path(__file__).parent.parent / 'backend'))
 
 # --- UPDATED IMPORTS ---
 from services import DocumentParser, TextChunker, WebSanitizer, DocumentParserError
-from service_utils import require_internal_token, INTERNAL_TOKEN
+from service_utils import require_internal_token, INTERNAL_TOKEN, init_request_deadlines, check_deadline, get_deadline_headers
 import requests 
 import dataclasses 
 import uuid
@@ -26,6 +34,10 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+# Honour the caller's X-Request-Budget-Ms: reject expired requests (504)
+# and let handlers stop via check_deadline() once nobody is waiting.
+init_request_deadlines(app)
+
 # Configuration
 UPLOAD_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'uploads')
 PROJECTS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'projects')
@@ -345,6 +357,9 @@ def upload_file(project_id):
             logger.warning(f"[{g.user_id}:{project_id}] File size {file_size} exceeds limit, removed")
             return jsonify({"error": f"File size exceeds maximum allowed ({MAX_FILE_SIZE} bytes)"}), 413
 
+        # Parsing, chunking and indexing are the slow part; the upload itself is kept
+        check_deadline("parsing and indexing upload")
+
         try:
             # 1. Parse File
             parsed_data = parser.parse(upload_path)
@@ -401,6 +416,7 @@ def upload_file(project_id):
             response = requests.post(
                 f"{CHROMA_SERVER_URL}/add_chunks",
                 json=payload,
+                headers=get_deadline_headers(),
                 timeout=60
             )
             response.raise_for_status() # Raise an error if chroma-core fails
@@ -561,7 +577,25 @@ def confirm_url_import():
         app.logger.error(f"[{g.user_id}:{job_id}] Failed to confirm import: {e}", exc_info=True)
         return jsonify({'error': 'Failed to confirm import'}), 500
 
-# --- File Save Endpoint ---
+# --- File Save Endpoints ---
+
+def _write_file(full_path, content):
+    """
+    Write a file by replacing it (temp file + rename), never in place.
+    
+    Readers never see a half-written file, and a hard link to the previous
+    version (kept by an atomic save for rollback) is left untouched.
+    """
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(full_path), prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, full_path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
 
 @app.route('/save_file', methods=['POST'])
 @require_internal_token
@@ -600,11 +634,10 @@ def save_file():
             logger.warning(f"[{g.user_id}:{project_id}] Path traversal attempt detected: {full_path}")
             return jsonify({'error': 'Invalid file path'}), 400
         
-        os.makedirs(os.path.dirname(full_path), exist_ok=True)
-        
-        # Write the file
-        with open(full_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        # Write the file under the atomic-save lock: a write landing between an
+        # atomic save's copy and its swap would otherwise be silently dropped
+        with _project_save_lock(project_id):
+            _write_file(full_path, content)
         
         app.logger.info(f"[{g.user_id}:{project_id}] Saved file: {file_path} ({content_size} bytes)")
         return jsonify({'message': 'File saved successfully', 'path': full_path, 'size': content_size}), 200
@@ -613,6 +646,303 @@ def save_file():
         app.logger.error(f"[{g.user_id}:{project_id}] Failed to save file: {e}", exc_info=True)
         return jsonify({'error': 'Failed to save file'}), 500
 
+# --- Atomic Bulk Saves ---
+# An atomic /save_files builds the new version of a project directory (e.g.
+# "wiki") in a staging area next to the projects - hard links to the current
+# files plus the new ones - and swaps it in with two renames. The previous
+# version is kept, so the whole save is undone with one call
+# (DELETE /save_files/<project_id>/<save_id>) instead of one DELETE per file.
+# Kept versions are pruned after SAVE_FILES_BACKUP_TTL_SECONDS.
+STAGING_FOLDER = os.path.join(app.config['PROJECTS_FOLDER'], '.staging')  # Same filesystem: renames are atomic
+SAVE_FILES_BACKUP_TTL_SECONDS = int(os.getenv("SAVE_FILES_BACKUP_TTL_SECONDS", "3600"))
+
+def _staging_path(project_id):
+    """Per-project staging area (outside the project tree, so snapshots never see it)."""
+    return os.path.join(STAGING_FOLDER, g.user_id, project_id)
+
+@contextmanager
+def _project_save_lock(project_id):
+    """Serialize atomic saves, rollbacks and single-file saves of a project across server processes."""
+    staging = _staging_path(project_id)
+    os.makedirs(staging, exist_ok=True)
+    with open(os.path.join(staging, '.lock'), 'w') as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield staging
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _link_or_copy(src, dst):
+    """copytree helper: hard link unchanged files (cheap), copy if linking fails."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+def _load_save_manifests(staging):
+    path = os.path.join(staging, 'saves.json')
+    if not os.path.exists(path):
+        return {'saves': {}, 'latest': {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _store_save_manifests(staging, manifests):
+    tmp_path = os.path.join(staging, 'saves.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifests, f)
+    os.replace(tmp_path, os.path.join(staging, 'saves.json'))
+
+def _prune_saves(staging, manifests):
+    """Drop previous versions older than the rollback window."""
+    now = time.time()
+    for save_id, save in list(manifests['saves'].items()):
+        if now - save['created_at'] > SAVE_FILES_BACKUP_TTL_SECONDS:
+            shutil.rmtree(os.path.join(staging, f"{save_id}.previous"), ignore_errors=True)
+            del manifests['saves'][save_id]
+            if manifests['latest'].get(save['directory']) == save_id:
+                del manifests['latest'][save['directory']]
+
+def _atomic_save(project_id, directory, files, deletes=()):
+    """
+    Write files into a staged copy of `directory` and swap it into place.
+    
+    The swap is two renames (live -> previous, staged -> live), so for that
+    instant `directory` does not exist: a concurrent read of a file in it can
+    get a 404 and should be retried. Writes are never lost: /save_file takes
+    the same project lock.
+    
+    Args:
+        directory: Project-relative directory the files live in (e.g. "wiki")
+        files: List of (file_path, content) with file_path under `directory`
+        deletes: Paths under `directory` to remove in the same swap
+    
+    Returns:
+        (save_id, deleted): save_id to roll the save back, and the paths removed
+    """
+    project_path = get_project_path(project_id)
+    target = os.path.join(project_path, directory)
+    save_id = uuid.uuid4().hex
+    
+    with _project_save_lock(project_id) as staging:
+        manifests = _load_save_manifests(staging)
+        _prune_saves(staging, manifests)
+        
+        # 1. STAGE: current directory (hard links) + the new files
+        staged = os.path.join(staging, f"{save_id}.staging")
+        previous = os.path.join(staging, f"{save_id}.previous")
+        try:
+            if os.path.isdir(target):
+                shutil.copytree(target, staged, symlinks=True, copy_function=_link_or_copy)
+            else:
+                os.makedirs(staged)
+            deleted = []
+            for file_path in deletes:
+                # Unlinking the staged hard link leaves the live file untouched
+                staged_file = os.path.join(staged, os.path.relpath(file_path, directory))
+                if os.path.isfile(staged_file):
+                    os.remove(staged_file)
+                    deleted.append(file_path)
+            for file_path, content in files:
+                _write_file(os.path.join(staged, os.path.relpath(file_path, directory)), content)
+        except Exception:
+            shutil.rmtree(staged, ignore_errors=True)
+            raise
+        
+        # 2. SWAP: live -> previous, staged -> live
+        had_previous = os.path.isdir(target)
+        if had_previous:
+            os.rename(target, previous)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            os.rename(staged, target)
+        except Exception:
+            if had_previous:
+                os.rename(previous, target)
+            shutil.rmtree(staged, ignore_errors=True)
+            raise
+        
+        # 3. RECORD: enough to undo this save in one step
+        manifests['saves'][save_id] = {'directory': directory, 'had_previous': had_previous, 'created_at': time.time()}
+        manifests['latest'][directory] = save_id
+        _store_save_manifests(staging, manifests)
+    return save_id, deleted
+
+def _read_save_files_request():
+    """
+    Parse a /save_files body: JSON, or multipart/form-data with project_id,
+    atomic and directory form fields, one part per file (its filename is
+    the project-relative path) and a delete field per path to remove.
+    
+    Returns:
+        (project_id, [(file_path, content)], [path to delete], options) or raises ValueError
+    """
+    if request.mimetype == 'multipart/form-data':
+        files = [(part.filename, part.read().decode('utf-8')) for part in request.files.getlist('files')]
+        return request.form.get('project_id'), files, request.form.getlist('delete'), request.form
+    
+    data = request.get_json(silent=True)
+    if not data:
+        raise ValueError('Request body must be valid JSON or multipart/form-data')
+    items = data.get('files')
+    if not isinstance(items, list):
+        raise ValueError('files must be a list')
+    files = [(item.get('file_path'), item.get('content', '')) if isinstance(item, dict) else (None, '')
+             for item in items]
+    deletes = data.get('delete') or []
+    if not isinstance(deletes, list):
+        raise ValueError('delete must be a list')
+    return data.get('project_id'), files, deletes, data
+
+@app.route('/save_files', methods=['POST'])
+@require_internal_token
+def save_files():
+    """
+    Save several files to a project in one call.
+    Used by the ingestion worker to write a whole batch of notes at once, and
+    by wiki generation to save all entity sheets atomically.
+    Uses X-User-ID header for user-isolated storage.
+    Protected by internal service token.
+    
+    Body (JSON): {"project_id": "...", "files": [{"file_path": "...", "content": "..."}, ...],
+                  "atomic": false, "directory": "wiki", "delete": ["wiki/old.md"]}
+    or multipart/form-data with the same fields and one "files" part per file.
+    
+    Default: returns 200 with per-file results; a bad file does not fail the others:
+        {"saved": [{"file_path", "size"}], "failed": [{"file_path", "error"}]}
+    
+    atomic=true: all files (which must be under one directory) are saved or
+    none is (400 with "failed" if any file is invalid). They are swapped in
+    together and the response carries a save_id for DELETE /save_files/<project_id>/<save_id>.
+    Paths listed in "delete" are removed in the same swap (and restored by the
+    rollback); files may then be empty.
+    """
+    try:
+        project_id, files, deletes, options = _read_save_files_request()
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({'error': str(e)}), 400
+    
+    atomic = str(options.get('atomic', '')).lower() in ('1', 'true', 'yes')
+    if deletes and not atomic:
+        return jsonify({'error': 'delete is only supported with atomic=true'}), 400
+    if not project_id or not (files or deletes):
+        return jsonify({'error': 'project_id and a non-empty files list are required'}), 400
+    
+    try:
+        project_path = get_project_path(project_id)
+    except Exception as e:
+        app.logger.error(f"[{g.user_id}:{project_id}] Failed to resolve project path: {e}", exc_info=True)
+        return jsonify({'error': 'Failed to save files'}), 500
+    
+    directory = options.get('directory')
+    if atomic and not directory:
+        # Default to the files' common top-level directory
+        top_levels = {Path(file_path).parts[0] for file_path in [path for path, _ in files] + list(deletes)
+                      if isinstance(file_path, str) and len(Path(file_path).parts) > 1}
+        directory = top_levels.pop() if len(top_levels) == 1 else None
+    if atomic and (not directory or not validate_project_path(os.path.join(project_path, directory), project_id)
+                   or os.path.realpath(os.path.join(project_path, directory)) == os.path.realpath(project_path)):
+        return jsonify({'error': 'Atomic saves need all files under one project subdirectory'}), 400
+    
+    valid, failed = [], []
+    for file_path, content in files:
+        if not file_path:
+            failed.append({'file_path': file_path, 'error': 'file_path is required'})
+            continue
+        
+        content_size = len(content.encode('utf-8'))
+        if content_size > MAX_CONTENT_SIZE:
+            failed.append({'file_path': file_path, 'error': f'Content size ({content_size} bytes) exceeds maximum allowed ({MAX_CONTENT_SIZE} bytes)'})
+            continue
+        
+        full_path = os.path.join(project_path, file_path)
+        # Validate path to prevent traversal attacks
+        if not validate_project_path(full_path, project_id):
+            logger.warning(f"[{g.user_id}:{project_id}] Path traversal attempt detected: {full_path}")
+            failed.append({'file_path': file_path, 'error': 'Invalid file path'})
+            continue
+        if atomic and not os.path.realpath(full_path).startswith(os.path.realpath(os.path.join(project_path, directory)) + os.sep):
+            failed.append({'file_path': file_path, 'error': f'File is outside the saved directory {directory}'})
+            continue
+        valid.append((file_path, content, content_size))
+    
+    directory_path = os.path.realpath(os.path.join(project_path, directory)) if atomic else None
+    for file_path in deletes:
+        full_path = os.path.join(project_path, file_path) if isinstance(file_path, str) and file_path else None
+        if (not full_path or not validate_project_path(full_path, project_id)
+                or not os.path.realpath(full_path).startswith(directory_path + os.sep)):
+            failed.append({'file_path': file_path, 'error': f'Deleted file must be under the saved directory {directory}'})
+    
+    if atomic:
+        if failed:
+            return jsonify({'error': 'Invalid files; nothing was saved', 'saved': [], 'failed': failed}), 400
+        try:
+            save_id, deleted = _atomic_save(project_id, directory, [(file_path, content) for file_path, content, _ in valid],
+                                            deletes)
+        except Exception as e:
+            app.logger.error(f"[{g.user_id}:{project_id}] Atomic save of {len(valid)} files failed: {e}", exc_info=True)
+            return jsonify({'error': 'Failed to save files'}), 500
+        app.logger.info(f"[{g.user_id}:{project_id}] Atomically saved {len(valid)} files to {directory} "
+                        f"and removed {len(deleted)} (save {save_id})")
+        return jsonify({
+            'save_id': save_id,
+            'directory': directory,
+            'saved': [{'file_path': file_path, 'size': size} for file_path, _, size in valid],
+            'deleted': deleted,
+            'failed': []
+        }), 200
+    
+    saved = []
+    for file_path, content, content_size in valid:
+        try:
+            _write_file(os.path.join(project_path, file_path), content)
+            saved.append({'file_path': file_path, 'size': content_size})
+        except Exception as e:
+            app.logger.error(f"[{g.user_id}:{project_id}] Failed to save file {file_path}: {e}", exc_info=True)
+            failed.append({'file_path': file_path, 'error': 'Failed to save file'})
+    
+    app.logger.info(f"[{g.user_id}:{project_id}] Saved {len(saved)}/{len(files)} files")
+    return jsonify({'saved': saved, 'failed': failed}), 200
+
+@app.route('/save_files/<project_id>/<save_id>', methods=['DELETE'])
+@require_internal_token
+def rollback_save_files(project_id, save_id):
+    """
+    Undo an atomic /save_files: swap the directory's previous version back.
+    
+    Only the latest save of a directory can be undone (409 otherwise), so a
+    rollback never discards a later save. 404 once the rollback window passed.
+    """
+    try:
+        project_path = get_project_path(project_id)
+        with _project_save_lock(project_id) as staging:
+            manifests = _load_save_manifests(staging)
+            save = manifests['saves'].get(save_id)
+            if not save:
+                return jsonify({'error': 'Save not found (unknown, rolled back or expired)'}), 404
+            if manifests['latest'].get(save['directory']) != save_id:
+                return jsonify({'error': 'A later save of this directory exists; roll that back first'}), 409
+            
+            target = os.path.join(project_path, save['directory'])
+            discarded = os.path.join(staging, f"{save_id}.discarded")
+            if os.path.isdir(target):
+                os.rename(target, discarded)
+            if save['had_previous']:
+                os.rename(os.path.join(staging, f"{save_id}.previous"), target)
+            shutil.rmtree(discarded, ignore_errors=True)
+            
+            del manifests['saves'][save_id]
+            del manifests['latest'][save['directory']]
+            _store_save_manifests(staging, manifests)
+        
+        app.logger.info(f"[{g.user_id}:{project_id}] Rolled back save {save_id} of {save['directory']}")
+        return jsonify({'message': 'Save rolled back', 'save_id': save_id, 'directory': save['directory']}), 200
+    except Exception as e:
+        app.logger.error(f"[{g.user_id}:{project_id}] Failed to roll back save {save_id}: {e}", exc_info=True)
+        return jsonify({'error': 'Failed to roll back save'}), 500
+
 # --- Internal Endpoints ---
 
 # NOTE: Project ownership is now queried from auth_server database instead of scanning filesystem.
@@ -6,8 +6,14 @@ import tempfile
 import shutil
 from datetime import datetime
 
+from deadlines import init_request_deadlines, check_deadline
+
 app = Flask(__name__)
 
+# Honour the caller's X-Request-Budget-Ms: reject expired requests (504)
+# and let handlers stop via check_deadline() once nobody is waiting.
+init_request_deadlines(app)
+
 # Configuration
 PROJECTS_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'projects')
 TEMP_CHECKOUTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'temp_checkouts')
@@ -31,12 +37,24 @@ def snapshot(project_id):
         except git.exc.InvalidGitRepositoryError:
             repo = git.Repo.init(project_path)
         
+    # Staging walks the whole project tree; don't start it for a caller that gave up
+    check_deadline("staging snapshot")
+    
     # For simplicity, we'll just commit all changes.
     # In a real application, you would handle specific files.
     repo.git.add(A=True)
     
+    # Callers may describe the change (e.g. a batch of ingested notes)
+    data = request.get_json(silent=True) or {}
+    message = data.get('message') or f"Snapshot for project {project_id}"
+    if data.get('description'):
+        message = f"{message}\n\n{data['description']}"
+    
     try:
-        commit = repo.index.commit(f"Snapshot for project {project_id}")
+        # Nothing staged (e.g. a retried snapshot): don't create an empty commit
+        if repo.head.is_valid() and not repo.index.diff("HEAD"):
+            return jsonify({'message': 'No changes to snapshot', 'commit_hash': repo.head.commit.hexsha}), 200
+        commit = repo.index.commit(message)
         return jsonify({'message': 'Snapshot created successfully', 'commit_hash': commit.hexsha}), 200
     except Exception as e:
         app.logger.error(f"Failed to create snapshot: {e}", exc_info=True)
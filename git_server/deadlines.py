@@ -0,0 +1,69 @@
+"""
+Request deadlines for the git server.
+
+A local copy of the deadline handling in backend/service_utils.py: the git
+server image is built from ./git_server alone, so it cannot import the
+backend's helpers (or their `requests` dependency).
+"""
+import time
+import logging
+from contextvars import ContextVar
+from typing import Optional
+from flask import request, jsonify
+
+logger = logging.getLogger(__name__)
+
+# Remaining request budget in milliseconds, forwarded by the backend
+DEADLINE_HEADER = "X-Request-Budget-Ms"
+
+_request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the end-to-end request budget is used up."""
+    pass
+
+
+def check_deadline(operation: str = "request"):
+    """
+    Raise DeadlineExceeded if the current deadline has passed.
+    Call this before expensive steps so work stops once nobody is waiting.
+    """
+    deadline = _request_deadline.get()
+    if deadline is not None and time.monotonic() >= deadline:
+        raise DeadlineExceeded(f"Deadline exceeded before {operation}")
+
+
+def init_request_deadlines(app):
+    """
+    Install deadline handling on a Flask app.
+
+    - Reads DEADLINE_HEADER from incoming requests and starts a local deadline.
+    - Rejects requests that arrive with an exhausted budget (504).
+    - Converts DeadlineExceeded raised by handlers into 504 responses.
+    """
+    @app.before_request
+    def _start_request_deadline():
+        raw_budget = request.headers.get(DEADLINE_HEADER)
+        if raw_budget is None:
+            return None
+        try:
+            budget_ms = int(raw_budget)
+        except ValueError:
+            logger.warning(f"Ignoring malformed {DEADLINE_HEADER} header: {raw_budget!r}")
+            return None
+        if budget_ms <= 0:
+            logger.warning(f"Rejecting {request.path}: request deadline already passed")
+            return jsonify({"error": "Deadline exceeded"}), 504
+        _request_deadline.set(time.monotonic() + budget_ms / 1000.0)
+        return None
+
+    @app.teardown_request
+    def _clear_request_deadline(exc=None):
+        # Worker threads are reused between requests; never leak a deadline
+        _request_deadline.set(None)
+
+    @app.errorhandler(DeadlineExceeded)
+    def _handle_deadline_exceeded(e):
+        logger.warning(f"Deadline exceeded while handling {request.path}: {e}")
+        return jsonify({"error": "Deadline exceeded"}), 504
@@ -0,0 +1,113 @@
+"""
+Benchmark: AKG entity pipeline (Pass 2 -> Pass 3 -> save) at different worker counts.
+
+Runs KnowledgeExtractor.generate_knowledge_base on a synthetic manuscript with
+simulated models (fixed latency per call, no network) so that only the
+orchestration is measured:
+  - scout:      one Pass 1 call listing every entity
+  - researcher: Pass 2, --pass2-latency seconds per call
+  - analyst:    Pass 3, --pass3-latency seconds per call (batched calls answer
+                one sheet per entity, so small dossiers share calls)
+
+Usage:
+    python scripts/benchmark_akg_workers.py [--entities 40] [--workers 1 4 8]
+                                            [--pass2-latency 0.2] [--pass3-latency 0.5]
+                                            [--analyst-rpm 0] [--no-batch]
+"""
+
+import argparse
+import json
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'src' / 'george' / 'ui' / 'src' / 'george'))
+
+from knowledge_extraction import orchestrator
+from knowledge_extraction.orchestrator import KnowledgeExtractor, RateLimitedModel
+
+
+class SimulatedModel:
+    """Stands in for a GeorgeAI model: sleeps, then answers."""
+
+    def __init__(self, latency: float, response: str):
+        self.latency = latency
+        self.response = response
+
+    def chat(self, prompt, **kwargs):
+        time.sleep(self.latency)
+        return {'success': True, 'response': self.response}
+
+
+class SimulatedAnalyst(SimulatedModel):
+    """Pass 3 stand-in that also answers batched prompts, and counts calls."""
+
+    def __init__(self, latency: float):
+        super().__init__(latency, "sheet")
+        self.calls = 0
+
+    def chat(self, prompt, **kwargs):
+        self.calls += 1
+        batch = re.search(r"The entities are: (\[.*?\])", prompt)
+        if not batch:
+            return super().chat(prompt, **kwargs)
+        time.sleep(self.latency)
+        sheets = [f"=== SHEET: {name} ===\nsheet\n=== END SHEET ===" for name in json.loads(batch.group(1))]
+        return {'success': True, 'response': "\n".join(sheets)}
+
+
+def build_manuscript(names) -> str:
+    filler = "The wind moved over the plains and nothing else happened that day. " * 20
+    return "".join(f"{filler}{name} arrived. {filler}{name} left again. " for name in names)
+
+
+def run(entities: int, workers: int, pass2_latency: float, pass3_latency: float, analyst_rpm: int,
+        batch: bool) -> tuple:
+    names = [f"Character{i}" for i in range(entities)]
+    scout_response = json.dumps({"characters": names})
+    with tempfile.TemporaryDirectory() as tmp:
+        (Path(tmp) / "manuscript.txt").write_text(build_manuscript(names), encoding="utf-8")
+        extractor = KnowledgeExtractor(None, tmp)
+        extractor.kb_templates = {key: f"{key} sheet template" for key in extractor.kb_templates}
+        extractor.ai_scout = RateLimitedModel(SimulatedModel(0.0, scout_response), 0)
+        extractor.ai_researcher = RateLimitedModel(SimulatedModel(pass2_latency, "dossier"), 0)
+        analyst = SimulatedAnalyst(pass3_latency)
+        extractor.ai_analyst = RateLimitedModel(analyst, analyst_rpm)
+        if not batch:
+            extractor.pass3_batch_max_entities = 1
+
+        start = time.perf_counter()
+        result = extractor.generate_knowledge_base("manuscript.txt", max_workers=workers)
+        elapsed = time.perf_counter() - start
+        assert result['files_created'] == entities, result
+        return elapsed, analyst.calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--entities", type=int, default=40)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--pass2-latency", type=float, default=0.2, help="Seconds per Pass 2 call")
+    parser.add_argument("--pass3-latency", type=float, default=0.5, help="Seconds per Pass 3 call")
+    parser.add_argument("--analyst-rpm", type=int, default=0, help="Pass 3 requests per minute (0 = unlimited)")
+    parser.add_argument("--no-batch", action="store_true", help="One Pass 3 call per entity")
+    args = parser.parse_args()
+
+    # Real models are replaced after construction; don't create cloud clients
+    orchestrator.create_george_ai = lambda **kwargs: None
+
+    print(f"{args.entities} entities, Pass 2 {args.pass2_latency}s, Pass 3 {args.pass3_latency}s per call")
+    print(f"{'workers':>8} {'time (s)':>10} {'entities/s':>11} {'speedup':>9} {'pass 3 calls':>13}")
+    baseline = None
+    for workers in args.workers:
+        elapsed, calls = run(args.entities, workers, args.pass2_latency, args.pass3_latency, args.analyst_rpm,
+                             batch=not args.no_batch)
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>10.2f} {args.entities / elapsed:>11.2f} {baseline / elapsed:>8.2f}x {calls:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: connect-per-call SQLite access vs the shared db_utils layer.
+
+Runs the same SessionManager / JobManager workload twice against temporary
+databases:
+  - legacy: a new sqlite3 connection (default PRAGMAs) on every call
+  - shared: per-thread reused connections with WAL, synchronous=NORMAL,
+            busy_timeout, mmap and a statement cache (backend/db_utils.py)
+
+Usage:
+    python scripts/benchmark_sqlite_access.py [--ops 2000] [--threads 1 4 8]
+"""
+
+import argparse
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root / 'backend'))
+
+from db_utils import close_all_databases
+from session_manager import SessionManager
+from job_manager import JobManager
+
+
+class LegacySessionManager(SessionManager):
+    def _get_conn(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path))
+        conn.row_factory = sqlite3.Row
+        return conn
+
+
+class LegacyJobManager(JobManager):
+    def _get_conn(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path))
+        conn.row_factory = sqlite3.Row
+        return conn
+
+
+def run_workload(sessions, jobs, ops: int, threads: int) -> float:
+    """Mixed chat workload: each op writes a turn, reads history and polls a job."""
+    def worker(worker_id: int):
+        project_id = f"project-{worker_id}"
+        job_id = jobs.create_job(project_id, "bench-user", "benchmark")
+        for i in range(ops // threads):
+            sessions.add_turn(project_id, "bench-user", f"question {i}", f"answer {i}")
+            sessions.get_recent_history(project_id, "bench-user", limit=6)
+            jobs.get_job(job_id, "bench-user")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(worker, range(threads)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--ops", type=int, default=2000, help="Operations per run")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 8])
+    args = parser.parse_args()
+
+    print(f"{'threads':>8} {'legacy (s)':>12} {'shared (s)':>12} {'speedup':>9}")
+    for threads in args.threads:
+        results = {}
+        for label, session_cls, job_cls in (
+            ("legacy", LegacySessionManager, LegacyJobManager),
+            ("shared", SessionManager, JobManager),
+        ):
+            with tempfile.TemporaryDirectory() as tmp:
+                sessions = session_cls(db_path=str(Path(tmp) / "sessions.db"))
+                jobs = job_cls(db_path=str(Path(tmp) / "jobs.db"))
+                results[label] = run_workload(sessions, jobs, args.ops, threads)
+                jobs.executor.shutdown(wait=True)
+                close_all_databases()
+        speedup = results["legacy"] / results["shared"]
+        print(f"{threads:>8} {results['legacy']:>12.3f} {results['shared']:>12.3f} {speedup:>8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
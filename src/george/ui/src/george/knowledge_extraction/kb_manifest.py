@@ -0,0 +1,105 @@
+"""
+Per-project manifest of generated knowledge base sheets.
+
+For every entity sheet the AKG saved, the manifest records what it was built
+from: a hash of the entity's Pass 2 input (its type, normalized name and the
+manuscript text or excerpts it was given) and the version of the sheet
+template. A re-run skips entities whose inputs are unchanged and whose sheet is
+still on disk; since the manifest is written after every saved sheet, an
+interrupted run resumes where it stopped.
+
+The manifest also keeps the last Pass 1 entity list with the hash of the
+manuscript it was scouted from, so a re-run on the same manuscript works on
+the same entities instead of a new (nondeterministic) scout.
+"""
+import os
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILENAME = ".akg_manifest.json"
+
+
+def content_hash(*parts: str) -> str:
+    """SHA-256 of the given strings."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class KBManifest:
+    """JSON manifest in a project's knowledge_base directory (thread-safe)."""
+
+    def __init__(self, knowledge_base_path: Path):
+        self.knowledge_base_path = Path(knowledge_base_path)
+        self.path = self.knowledge_base_path / MANIFEST_FILENAME
+        self._lock = threading.Lock()
+        data = self._load()
+        self.entries: Dict[str, Dict[str, Any]] = data.get("entities", {})
+        self.pass_1: Dict[str, Any] = data.get("pass_1", {})
+
+    def _load(self) -> Dict[str, Any]:
+        """Reads the manifest; a missing or unreadable one is treated as empty."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable KB manifest {self.path}: {e}")
+            return {}
+
+    def pass_1_entities(self, manuscript_hash: str) -> Optional[List[Dict[str, Any]]]:
+        """The Pass 1 entity list scouted from this manuscript, or None."""
+        with self._lock:
+            if self.pass_1.get("manuscript_hash") != manuscript_hash:
+                return None
+            return json.loads(json.dumps(self.pass_1.get("entities", [])))
+
+    def record_pass_1(self, manuscript_hash: str, entities: List[Dict[str, Any]]):
+        """Records the Pass 1 entity list of a manuscript and writes the manifest."""
+        with self._lock:
+            self.pass_1 = {
+                "manuscript_hash": manuscript_hash,
+                "entities": json.loads(json.dumps(entities)),
+                "completed_at": datetime.now().isoformat(),
+            }
+            self._write()
+
+    def is_current(self, filename: str, input_hash: str, template_version: str) -> bool:
+        """True if the sheet exists and was built from the same input and template."""
+        with self._lock:
+            entry = self.entries.get(filename)
+        return (
+            entry is not None
+            and entry.get("input_hash") == input_hash
+            and entry.get("template_version") == template_version
+            and (self.knowledge_base_path / filename).exists()
+        )
+
+    def record(self, filename: str, entity_name: str, entity_type: str, input_hash: str, template_version: str):
+        """Records a saved sheet and writes the manifest (atomically)."""
+        with self._lock:
+            self.entries[filename] = {
+                "name": entity_name,
+                "type": entity_type,
+                "input_hash": input_hash,
+                "template_version": template_version,
+                "completed_at": datetime.now().isoformat(),
+            }
+            self._write()
+
+    def _write(self):
+        """Writes the manifest atomically (caller holds the lock)."""
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"entities": self.entries, "pass_1": self.pass_1}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,127 @@
+"""
+Local mention index over a manuscript.
+
+Pass 2 of the AKG used to send the whole manuscript to the model once per
+entity. The index finds where an entity (or one of its aliases) is
+mentioned, so Pass 2 can send only those passages plus some surrounding
+context.
+"""
+import re
+import bisect
+from typing import Dict, Iterable, List, Tuple
+
+# Titles dropped when deriving a character's short names ("Captain Eva" -> "Eva")
+TITLES = {
+    "captain", "capt", "commander", "general", "admiral", "colonel", "major", "lieutenant", "sergeant",
+    "doctor", "dr", "professor", "prof", "mr", "mrs", "ms", "miss", "sir", "dame", "lord", "lady",
+    "king", "queen", "prince", "princess", "emperor", "empress", "father", "mother", "brother", "sister",
+}
+ARTICLES = {"the", "a", "an"}
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize_name(name: str) -> str:
+    """
+    Comparison key of an entity name: case-folded words, without a leading
+    article or punctuation ("The  Citadel." -> "citadel").
+    """
+    words = [word.casefold() for word in _WORD.findall(name)]
+    if len(words) > 1 and words[0] in ARTICLES:
+        words = words[1:]
+    return " ".join(words)
+
+
+def entity_aliases(name: str, entity_type: str = "") -> List[str]:
+    """
+    Names an entity is likely to be mentioned by, besides its full name.
+
+    Conservative on purpose: a leading article is dropped ("The Citadel" ->
+    "Citadel"), and characters also match without their title and by their
+    first name ("Captain Eva Rostova" -> "Eva Rostova", "Eva").
+    """
+    aliases = [name]
+    words = name.split()
+    if len(words) > 1 and words[0].lower() in ARTICLES:
+        aliases.append(" ".join(words[1:]))
+    if entity_type == "Character":
+        while len(words) > 1 and words[0].lower().rstrip(".") in TITLES:
+            words = words[1:]
+        aliases.append(" ".join(words))
+        if len(words) > 1:
+            aliases.append(words[0])
+    return list(dict.fromkeys(alias for alias in aliases if alias))
+
+
+class MentionIndex:
+    """Word-position index of a text, for finding names without rescanning it."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        self._words: List[str] = []
+        self._positions: Dict[str, List[int]] = {}
+        for i, match in enumerate(_WORD.finditer(text)):
+            word = match.group().lower()
+            self._starts.append(match.start())
+            self._ends.append(match.end())
+            self._words.append(word)
+            self._positions.setdefault(word, []).append(i)
+
+    def find(self, names: Iterable[str]) -> List[Tuple[int, int]]:
+        """
+        Character spans of every whole-word, case-insensitive mention of any name.
+
+        Returns:
+            Sorted list of (start, end) spans; a mention of a short alias inside a
+            longer one ("Eva" in "Eva Rostova") is not counted separately
+        """
+        spans = set()
+        for name in names:
+            tokens = [word.lower() for word in _WORD.findall(name)]
+            if not tokens:
+                continue
+            for i in self._positions.get(tokens[0], ()):
+                if self._words[i:i + len(tokens)] == tokens:
+                    spans.add((self._starts[i], self._ends[i + len(tokens) - 1]))
+        mentions: List[Tuple[int, int]] = []
+        for start, end in sorted(spans, key=lambda span: (span[0], -span[1])):
+            if mentions and end <= mentions[-1][1]:
+                continue
+            mentions.append((start, end))
+        return mentions
+
+    def windows(self, spans: List[Tuple[int, int]], context_chars: int) -> List[Tuple[int, int]]:
+        """
+        Expand mention spans by context_chars on each side (snapped to word
+        boundaries) and merge overlapping windows.
+        """
+        windows: List[Tuple[int, int]] = []
+        for start, end in spans:
+            start, end = self._snap(max(0, start - context_chars), min(len(self.text), end + context_chars))
+            if windows and start <= windows[-1][1]:
+                windows[-1] = (windows[-1][0], max(windows[-1][1], end))
+            else:
+                windows.append((start, end))
+        return windows
+
+    def excerpts(self, windows: List[Tuple[int, int]]) -> str:
+        """
+        The text of the windows, labelled and in manuscript order. Labels carry
+        no offsets, so an edit elsewhere in the text leaves them unchanged.
+        """
+        return "\n\n".join(
+            f"[Excerpt {n}]\n{self.text[start:end].strip()}"
+            for n, (start, end) in enumerate(windows, 1)
+        )
+
+    def _snap(self, start: int, end: int) -> Tuple[int, int]:
+        """Move a window's edges outwards so no word is cut in half."""
+        i = bisect.bisect_right(self._ends, start)
+        if i < len(self._starts) and self._starts[i] < start:
+            start = self._starts[i]
+        j = bisect.bisect_left(self._starts, end) - 1
+        if j >= 0 and self._ends[j] > end:
+            end = self._ends[j]
+        return start, end
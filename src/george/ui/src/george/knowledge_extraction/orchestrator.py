@@ -1,9 +1,14 @@
 import os
 import sys
+import re
 import json
+import time
 import logging
+import threading
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Callable, Optional
 
 # Add parent to path if needed
 current_dir = Path(__file__).parent
@@ -15,9 +20,99 @@ if str(george_dir) not in sys.path:
 from llm_integration import create_george_ai, GeorgeAI
 from parsers.parsers import read_manuscript_file
 from knowledge_extraction.query_analyzer import QueryAnalyzer # We'll reuse this for its KB file loading
+from knowledge_extraction.mention_index import MentionIndex, entity_aliases, normalize_name
+from knowledge_extraction.kb_manifest import KBManifest, content_hash
 
 logger = logging.getLogger(__name__)
 
+# --- Pass 1 scouting settings ---
+# Estimated tokens per scouted segment (~4 characters per token)
+SCOUT_SEGMENT_TOKENS = int(os.getenv("AKG_SCOUT_SEGMENT_TOKENS", "30000"))
+# Segments scouted at once
+SCOUT_MAX_WORKERS = int(os.getenv("AKG_SCOUT_MAX_WORKERS", "4"))
+# Process only the N most-mentioned entities in Passes 2/3 (0 = all)
+AKG_MAX_ENTITIES = int(os.getenv("AKG_MAX_ENTITIES", "0"))
+
+# Pass 1 answer keys -> entity types
+SCOUT_CATEGORIES = {
+    "characters": "Character",
+    "locations": "Location",
+    "events": "Event",
+    "unique_elements": "Unique Element",
+}
+
+# --- Pass 2 retrieval settings ---
+# Characters of context sent on each side of a mention
+PASS2_CONTEXT_CHARS = int(os.getenv("AKG_PASS2_CONTEXT_CHARS", "800"))
+# Entities mentioned this many times or fewer get the full text (indirect
+# references are all the model has to go on)
+PASS2_FULL_TEXT_MAX_MENTIONS = int(os.getenv("AKG_PASS2_FULL_TEXT_MAX_MENTIONS", "1"))
+# Send the full text anyway once the windows cover this share of it
+PASS2_FULL_TEXT_COVERAGE = float(os.getenv("AKG_PASS2_FULL_TEXT_COVERAGE", "0.8"))
+
+# --- Pass 3 batching settings ---
+# Dossiers up to this many estimated tokens are batched with others of their type
+PASS3_SMALL_DOSSIER_TOKENS = int(os.getenv("AKG_PASS3_SMALL_DOSSIER_TOKENS", "1000"))
+# Dossier tokens per batched Pass 3 call
+PASS3_BATCH_TOKENS = int(os.getenv("AKG_PASS3_BATCH_TOKENS", "8000"))
+# Entities per batched Pass 3 call (each gets a full sheet in the answer)
+PASS3_BATCH_MAX_ENTITIES = int(os.getenv("AKG_PASS3_BATCH_MAX_ENTITIES", "8"))
+
+# Delimiters of each entity's sheet in a batched Pass 3 answer
+_SHEET_PATTERN = re.compile(r"^=== SHEET: (.+?) ===[ \t]*\n(.*?)^=== END SHEET ===", re.MULTILINE | re.DOTALL)
+
+# --- Entity pipeline concurrency ---
+# Entities processed at once (Pass 2 -> Pass 3 -> save)
+AKG_MAX_WORKERS = int(os.getenv("AKG_MAX_WORKERS", "4"))
+# Requests per minute allowed per model (0 = unlimited)
+SCOUT_RPM = int(os.getenv("AKG_SCOUT_RPM", "1000"))
+RESEARCHER_RPM = int(os.getenv("AKG_RESEARCHER_RPM", "1000"))
+ANALYST_RPM = int(os.getenv("AKG_ANALYST_RPM", "150"))
+
+
+class RateLimitedModel:
+    """
+    Wraps a GeorgeAI model so that all threads sharing it stay under a
+    requests-per-minute limit (sliding window). Other attributes pass through.
+    """
+
+    def __init__(self, model: GeorgeAI, requests_per_minute: int):
+        self.model = model
+        self.requests_per_minute = requests_per_minute
+        self._sent = deque()
+        self._lock = threading.Lock()
+
+    def chat(self, *args, **kwargs) -> Dict[str, Any]:
+        self._wait_for_slot()
+        return self.model.chat(*args, **kwargs)
+
+    def _wait_for_slot(self):
+        """Blocks until a request may be sent without exceeding the limit."""
+        if self.requests_per_minute <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._sent and now - self._sent[0] >= 60:
+                    self._sent.popleft()
+                if len(self._sent) < self.requests_per_minute:
+                    self._sent.append(now)
+                    return
+                wait = 60 - (now - self._sent[0])
+            time.sleep(wait)
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+
+class EntityPipelineError(Exception):
+    """An entity failed in the Pass 2 -> Pass 3 -> save pipeline."""
+
+    def __init__(self, stage: str, message: str):
+        super().__init__(message)
+        self.stage = stage
+
+
 class KnowledgeExtractor:
     """
     Orchestrates the new Three-Pass Automatic Knowledgebase Generator (AKG)
@@ -37,13 +132,17 @@ class KnowledgeExtractor:
         self.knowledge_base_path.mkdir(parents=True, exist_ok=True)
         
         # This analyzer is used for the CHAT, not KB generation
-        self.query_analyzer = QueryAnalyzer(ai_router_instance, project_path=str(project_path))
+        self.query_analyzer = QueryAnalyzer(ai_router_instance, knowledge_base_path=str(self.knowledge_base_path))
 
         # --- Initialize the Three-Pass AI models ---
         try:
-            self.ai_scout = create_george_ai(model="gemini-2.0-flash", use_cloud=True)
-            self.ai_researcher = create_george_ai(model="gemini-2.5-flash", use_cloud=True)
-            self.ai_analyst = create_george_ai(model="gemini-2.5-pro-latest", use_cloud=True)
+            # Rate-limited wrappers: entity workers share one limit per model
+            self.ai_scout = RateLimitedModel(
+                create_george_ai(model="gemini-2.0-flash", use_cloud=True), SCOUT_RPM)
+            self.ai_researcher = RateLimitedModel(
+                create_george_ai(model="gemini-2.5-flash", use_cloud=True), RESEARCHER_RPM)
+            self.ai_analyst = RateLimitedModel(
+                create_george_ai(model="gemini-2.5-pro-latest", use_cloud=True), ANALYST_RPM)
             logger.info("Three-Pass AKG AI models initialized successfully.")
         except Exception as e:
             logger.critical(f"Failed to initialize all AI models: {e}", exc_info=True)
@@ -51,6 +150,31 @@ class KnowledgeExtractor:
             
         # --- Load KB Sheet Templates ---
         self.kb_templates = self._load_kb_templates()
+        self.template_versions = {key: content_hash(text)[:12] for key, text in self.kb_templates.items()}
+
+        # --- Pass 2 retrieval (mention windows instead of the full manuscript) ---
+        self.pass2_context_chars = PASS2_CONTEXT_CHARS
+        self.pass2_full_text_max_mentions = PASS2_FULL_TEXT_MAX_MENTIONS
+        self.pass2_full_text_coverage = PASS2_FULL_TEXT_COVERAGE
+        self._mention_index = None
+        self._pass_2_stats: List[Dict[str, Any]] = []
+        self._stats_lock = threading.Lock()
+
+        self.max_workers = AKG_MAX_WORKERS
+        self.scout_segment_tokens = SCOUT_SEGMENT_TOKENS
+        self.scout_max_workers = SCOUT_MAX_WORKERS
+        self.max_entities = AKG_MAX_ENTITIES
+        self._pass_1_report: Dict[str, Any] = {}
+        
+        # --- Pass 3 batching (several small dossiers of one type per call) ---
+        self.pass3_small_dossier_tokens = PASS3_SMALL_DOSSIER_TOKENS
+        self.pass3_batch_tokens = PASS3_BATCH_TOKENS
+        self.pass3_batch_max_entities = PASS3_BATCH_MAX_ENTITIES
+        self._pass_3_stats: Counter = Counter()
+        
+        # --- Manifest of saved sheets (skip unchanged entities, resume after a crash) ---
+        self._manifest: Optional[KBManifest] = None
+        self._force = False
 
     def _load_kb_templates(self) -> Dict[str, str]:
         """Loads the story bible templates from the backend/prompts directory."""
@@ -85,10 +209,31 @@ class KnowledgeExtractor:
         logger.info(f"Reading manuscript: {manuscript_filename}")
         return read_manuscript_file(str(manuscript_path))
 
-    def generate_knowledge_base(self, manuscript_filename: str) -> Dict[str, Any]:
+    def generate_knowledge_base(self, manuscript_filename: str, max_workers: Optional[int] = None,
+                                on_progress: Optional[Callable[[int, int], None]] = None,
+                                max_entities: Optional[int] = None, force: bool = False) -> Dict[str, Any]:
         """
         Executes the new Three-Pass AKG workflow.
+        
+        Entities go through Pass 2 -> Pass 3 -> save on a pool of max_workers
+        threads (default AKG_MAX_WORKERS); each model's requests-per-minute
+        limit is shared by all workers. Small dossiers of the same type are
+        synthesized together in one Pass 3 call (see _queue_for_pass_3).
+        Entities whose Pass 2 input and sheet template are unchanged since
+        their sheet was saved (per the project's KBManifest) are skipped, so an
+        interrupted run resumes from where it stopped. A failed entity is recorded in
+        'failed_entities' and does not stop the run. Entities are processed
+        most-mentioned first; with max_entities (default AKG_MAX_ENTITIES)
+        only that many are processed.
+        
+        Args:
+            manuscript_filename: Manuscript file in the project directory
+            max_workers: Entities processed at once (1 = sequential)
+            on_progress: Called with (entities_done, entities_total) as entities finish
+            max_entities: Process only the N most-mentioned entities (0 = all)
+            force: Regenerate every entity, ignoring the manifest
         """
+        max_workers = max(1, max_workers or self.max_workers)
         logger.info(f"--- STARTING: Three-Pass AKG for project {self.project_path.name} ---")
         try:
             full_text = self._read_manuscript(manuscript_filename)
@@ -97,61 +242,294 @@ class KnowledgeExtractor:
 
         # --- PASS 1: ENTITY IDENTIFICATION (The "Scout") ---
         logger.info("AKG Pass 1: Identifying all entities...")
-        entities = self._pass_1_scout(full_text)
+        # Index the manuscript once: Pass 1 counts mentions with it, and Pass 2
+        # sends each entity only its mentions
+        self._mention_index = MentionIndex(full_text)
+        self._manifest = KBManifest(self.knowledge_base_path)
+        self._force = force
+        # An unchanged manuscript reuses the last entity list, so re-runs hash
+        # (and skip) the same entities
+        manuscript_hash = content_hash(full_text, str(self.scout_segment_tokens))
+        entities = None if force else self._manifest.pass_1_entities(manuscript_hash)
+        if entities is not None:
+            logger.info(f"AKG Pass 1: Manuscript unchanged; reusing {len(entities)} entities from the last run.")
+            self._pass_1_report = {"cached": True, "entities": len(entities)}
+        else:
+            entities = self._pass_1_scout(full_text)
+            if entities and not self._pass_1_report.get("failed_segments"):
+                self._manifest.record_pass_1(manuscript_hash, entities)
         if not entities:
             logger.error("AKG Pass 1 failed: No entities were identified.")
             return {'success': False, 'error': 'Pass 1 failed: No entities identified.'}
         
         logger.info(f"AKG Pass 1 complete: Found {len(entities)} entities.")
         
-        # --- SEQUENTIAL PROCESSING (Pass 2 & 3) ---
-        files_created = 0
-        for i, entity in enumerate(entities):
-            entity_name = entity.get('name')
-            entity_type = entity.get('type')
-            
-            if not entity_name or not entity_type:
+        # Pass 1 orders entities by mention count; keep the top ones if limited
+        entities_found = len(entities)
+        max_entities = self.max_entities if max_entities is None else max_entities
+        if max_entities and len(entities) > max_entities:
+            logger.info(f"AKG: Limiting Passes 2/3 to the {max_entities} most-mentioned of {len(entities)} entities.")
+            entities = entities[:max_entities]
+        
+        self._pass_2_stats = []
+        self._pass_3_stats = Counter()
+        
+        # --- PARALLEL PROCESSING (Pass 2 & 3) ---
+        valid_entities = []
+        for entity in entities:
+            if not entity.get('name') or not entity.get('type'):
                 logger.warning(f"Skipping invalid entity: {entity}")
                 continue
-
-            logger.info(f"--- Processing Entity {i+1}/{len(entities)}: '{entity_name}' ({entity_type}) ---")
-            
-            try:
-                # --- PASS 2: RAW DATA COLLECTION (The "Researcher") ---
-                logger.info(f"AKG Pass 2: Collecting raw data for '{entity_name}'...")
-                raw_data_dossier = self._pass_2_researcher(full_text, entity_name)
-                if not raw_data_dossier:
-                    logger.warning(f"AKG Pass 2 failed: No raw data found for '{entity_name}'.")
+            valid_entities.append(entity)
+        
+        logger.info(f"AKG Pass 2/3: Processing {len(valid_entities)} entities with {max_workers} workers...")
+        files_created = 0
+        entities_skipped = 0
+        failed_entities = []
+        done = 0
+        
+        def finish(entity: Dict[str, Any], error: Optional[Exception], skipped: bool = False):
+            nonlocal files_created, entities_skipped, done
+            if skipped:
+                entities_skipped += 1
+            elif error is None:
+                files_created += 1
+            else:
+                logger.error(f"Failed to process entity '{entity['name']}': {error}")
+                failed_entities.append({
+                    'name': entity['name'],
+                    'type': entity['type'],
+                    'stage': getattr(error, 'stage', 'unknown'),
+                    'error': str(error)
+                })
+            done += 1
+            logger.info(f"AKG progress: {done}/{len(valid_entities)} entities processed "
+                        f"({files_created} saved, {entities_skipped} unchanged, {len(failed_entities)} failed)")
+            if on_progress:
+                on_progress(done, len(valid_entities))
+        
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="akg") as pool:
+            # Pass 2 for every entity; Pass 3 calls are submitted as dossiers come in
+            pass_2 = {pool.submit(self._research_entity, full_text, entity): entity for entity in valid_entities}
+            pass_3 = []
+            pending: Dict[str, List] = {}
+            for future in as_completed(pass_2):
+                try:
+                    dossier = future.result()
+                except Exception as e:
+                    finish(pass_2[future], e)
                     continue
-                
-                # --- PASS 3: PROFILE SYNTHESIS (The "Analyst") ---
-                logger.info(f"AKG Pass 3: Synthesizing profile for '{entity_name}'...")
-                profile_content = self._pass_3_analyst(raw_data_dossier, entity_name, entity_type)
-                if not profile_content:
-                    logger.error(f"AKG Pass 3 failed: Could not synthesize profile for '{entity_name}'.")
+                if dossier is None:
+                    finish(pass_2[future], None, skipped=True)
                     continue
-                    
-                # --- SAVE THE FILE ---
-                self._save_kb_file(entity_name, entity_type, profile_content)
-                files_created += 1
-
-            except Exception as e:
-                logger.error(f"Failed to process entity '{entity_name}': {e}", exc_info=True)
-                # Continue to the next entity
+                for group in self._queue_for_pass_3(pending, pass_2[future], dossier):
+                    pass_3.append(pool.submit(self._run_pass_3, group))
+            for group in pending.values():
+                if group:
+                    pass_3.append(pool.submit(self._run_pass_3, group))
         
+            for future in as_completed(pass_3):
+                for entity, error in future.result():
+                    finish(entity, error)
+
         logger.info(f"--- FINISHED: Three-Pass AKG ---")
-        logger.info(f"Successfully created {files_created} of {len(entities)} possible knowledge base files.")
+        logger.info(f"Successfully created {files_created} of {len(entities)} possible knowledge base files "
+                    f"({entities_skipped} unchanged and skipped).")
+        pass_2_report = self._pass_2_report(len(full_text))
+        logger.info(f"AKG Pass 2 report: {json.dumps(pass_2_report)}")
+        pass_3_report = dict(self._pass_3_stats, entities=len(valid_entities) - entities_skipped - sum(
+            1 for failure in failed_entities if failure['stage'] == 'pass_2'))
+        logger.info(f"AKG Pass 3 report: {json.dumps(pass_3_report)}")
         
         return {
             'success': True,
-            'entities_found': len(entities),
-            'files_created': files_created
+            'entities_found': entities_found,
+            'files_created': files_created,
+            'entities_skipped': entities_skipped,
+            'failed_entities': failed_entities,
+            'pass_1_report': self._pass_1_report,
+            'pass_2_report': pass_2_report,
+            'pass_3_report': pass_3_report
         }
 
-    def _pass_1_scout(self, full_text: str) -> List[Dict[str, str]]:
-        """Pass 1: Use Gemini 2.0 Flash to scan the text and identify entities."""
+    def _research_entity(self, full_text: str, entity: Dict[str, Any]) -> Optional[str]:
+        """
+        Runs Pass 2 for one entity (on a worker thread).
+        
+        The hash of the Pass 2 input (entity type, normalized name and the
+        manuscript text or excerpts sent) is kept in entity['input_hash'] for
+        the manifest. The prompt wording and alias list are left out, so only
+        a change in what the model reads about the entity regenerates its sheet.
+        
+        Returns:
+            The dossier, or None if the entity's sheet is up to date (skipped)
+        
+        Raises:
+            EntityPipelineError: If no raw data was found
+        """
+        entity_name = entity['name']
+        entity_type = entity['type']
+        request = self._pass_2_request(
+            full_text, entity_name, entity_aliases(entity_name, entity_type) + entity.get('aliases', [])
+        )
+        entity['input_hash'] = content_hash(entity_type, normalize_name(entity_name), request['source_text'])
+        filename = self._kb_filename(entity_name, entity_type)
+        if not self._force and self._manifest and self._manifest.is_current(
+                filename, entity['input_hash'], self.template_versions.get(entity_type, "")):
+            logger.info(f"AKG: '{entity_name}' is unchanged since {filename} was generated; skipping.")
+            return None
+        
+        logger.info(f"AKG Pass 2: Collecting raw data for '{entity_name}' ({entity_type})...")
+        raw_data_dossier = self._pass_2_researcher(full_text, entity_name, request=request)
+        if not raw_data_dossier:
+            raise EntityPipelineError("pass_2", f"No raw data found for '{entity_name}'")
+        return raw_data_dossier
+
+    def _queue_for_pass_3(self, pending: Dict[str, List], entity: Dict[str, Any], dossier: str) -> List[List]:
+        """
+        Groups dossiers into Pass 3 calls.
+        
+        A dossier above pass3_small_dossier_tokens gets a call of its own. Small
+        ones wait in pending[type] until adding one more would exceed
+        pass3_batch_tokens or pass3_batch_max_entities; the waiting batch is
+        then released. Whatever is still pending at the end is flushed by the
+        caller.
+        
+        Returns:
+            Groups of (entity, dossier) ready for _run_pass_3
+        """
+        tokens = len(dossier) // 4
+        if tokens > self.pass3_small_dossier_tokens:
+            return [[(entity, dossier)]]
+        
+        ready = []
+        batch = pending.setdefault(entity['type'], [])
+        batch_tokens = sum(len(d) // 4 for _, d in batch)
+        if batch and (batch_tokens + tokens > self.pass3_batch_tokens
+                      or len(batch) >= self.pass3_batch_max_entities):
+            ready.append(batch)
+            batch = pending[entity['type']] = []
+        batch.append((entity, dossier))
+        return ready
+
+    def _run_pass_3(self, group: List) -> List:
+        """
+        Runs Pass 3 -> save for a group of (entity, dossier) (on a worker thread).
+        A group of several small dossiers of one type is synthesized in one call;
+        an entity missing from that answer gets a dedicated call.
+        
+        Returns:
+            [(entity, None on success or the EntityPipelineError)]
+        """
+        sheets = {}
+        if len(group) > 1:
+            try:
+                sheets = self._pass_3_analyst_batch(group)
+            except Exception as e:
+                # Treated as an empty answer: every entity gets a dedicated call
+                logger.error(f"AKG Pass 3 batch of {len(group)} '{group[0][0]['type']}' dossiers failed: {e}",
+                             exc_info=True)
+        outcomes = []
+        for entity, dossier in group:
+            entity_name = entity['name']
+            entity_type = entity['type']
+            try:
+                profile_content = sheets.get(entity_name)
+                if not profile_content:
+                    if len(group) > 1:
+                        logger.warning(f"AKG Pass 3: '{entity_name}' missing from its batch; synthesizing it alone.")
+                        with self._stats_lock:
+                            self._pass_3_stats["fallback_calls"] += 1
+                    logger.info(f"AKG Pass 3: Synthesizing profile for '{entity_name}'...")
+                    profile_content = self._pass_3_analyst(dossier, entity_name, entity_type)
+                if not profile_content:
+                    raise EntityPipelineError("pass_3", f"Could not synthesize profile for '{entity_name}'")
+        
+                # --- SAVE THE FILE ---
+                if not self._save_kb_file(entity_name, entity_type, profile_content):
+                    raise EntityPipelineError("save", f"Could not save the knowledge base file for '{entity_name}'")
+                if self._manifest and entity.get('input_hash'):
+                    self._manifest.record(self._kb_filename(entity_name, entity_type), entity_name, entity_type,
+                                          entity['input_hash'], self.template_versions.get(entity_type, ""))
+                outcomes.append((entity, None))
+            except Exception as e:
+                outcomes.append((entity, e))
+        return outcomes
+
+    def _pass_1_scout(self, full_text: str) -> List[Dict[str, Any]]:
+        """
+        Pass 1: Use Gemini 2.0 Flash to scan the text and identify entities.
+        
+        The text is split into segments of about scout_segment_tokens tokens,
+        which are scouted in parallel (scout_max_workers) and merged: names are
+        normalized and short forms folded into full names, and each entity gets
+        its mention count in the full text.
+        
+        Returns:
+            [{"name", "type", "aliases", "mentions"}], most-mentioned first
+        """
+        segments = self._split_segments(full_text, self.scout_segment_tokens * 4)
+        logger.info(f"AKG Pass 1: Scouting {len(segments)} segment(s) with {self.scout_max_workers} workers...")
+        
+        results: List[Dict[str, List[str]]] = []
+        failed_segments = []
+        with ThreadPoolExecutor(max_workers=max(1, self.scout_max_workers), thread_name_prefix="akg-scout") as pool:
+            futures = {
+                pool.submit(self._scout_segment, segment, i, len(segments)): i
+                for i, segment in enumerate(segments, 1)
+            }
+            for future in as_completed(futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    logger.error(f"AKG Pass 1 (Scout) failed for segment {futures[future]}/{len(segments)}: {e}")
+                    failed_segments.append(futures[future])
+        
+        entities = self._merge_scout_results(results, full_text)
+        self._pass_1_report = {
+            "segments": len(segments),
+            "failed_segments": sorted(failed_segments),
+            "names_found": sum(len(names) for result in results for names in result.values()),
+            "entities": len(entities),
+        }
+        logger.info(f"AKG Pass 1 report: {json.dumps(self._pass_1_report)}")
+        return entities
+
+    @staticmethod
+    def _split_segments(text: str, max_chars: int) -> List[str]:
+        """Split text into segments of at most max_chars, at paragraph (else word) boundaries."""
+        segments: List[str] = []
+        current = ""
+        for paragraph in text.split("\n\n"):
+            while len(paragraph) > max_chars:
+                cut = paragraph.rfind(" ", 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                if current:
+                    segments.append(current)
+                    current = ""
+                segments.append(paragraph[:cut])
+                paragraph = paragraph[cut:].lstrip()
+            if current and len(current) + 2 + len(paragraph) > max_chars:
+                segments.append(current)
+                current = ""
+            current = f"{current}\n\n{paragraph}" if current else paragraph
+        if current.strip():
+            segments.append(current)
+        return segments
+
+    def _scout_segment(self, segment: str, number: int, total: int) -> Dict[str, List[str]]:
+        """
+        Scout one segment of the manuscript.
+        
+        Returns:
+            {"characters": [...], "locations": [...], "events": [...], "unique_elements": [...]}
+        
+        Raises:
+            Exception: If the AI call fails or its answer is not a JSON object
+        """
+        part = f" (part {number} of {total})" if total > 1 else ""
         prompt = f"""
-        You are a literary analyst. Read the following manuscript and identify a comprehensive list of all named entities.
+        You are a literary analyst. Read the following manuscript{part} and identify a comprehensive list of all named entities.
         Group them into four categories:
         1.  "Character" (all named characters, even minor ones)
         2.  "Location" (planets, cities, buildings, starships, regions)
@@ -167,40 +545,104 @@ class KnowledgeExtractor:
           "events": ["The Siege of V'tar", "The First Light Incident"],
           "unique_elements": ["Stasis Field", "The K'ryll", "Voidsong Amulet"]
         }}
-
+        
         --- MANUSCRIPT TEXT START ---
-        {full_text}
+        {segment}
         --- MANUSCRIPT TEXT END ---
         """
         
-        try:
-            result = self.ai_scout.chat(prompt, temperature=0.1, timeout=180) # Give it 3 minutes
-            if not result['success']:
-                raise Exception(f"Pass 1 AI call failed: {result.get('error')}")
-            
-            # Parse the JSON response
-            response_text = result['response'].strip().replace("```json", "").replace("```", "")
-            data = json.loads(response_text)
-            
-            # Re-format into the list of dicts we need
-            entities = []
-            for name in data.get("characters", []):
-                entities.append({"name": name, "type": "Character"})
-            for name in data.get("locations", []):
-                entities.append({"name": name, "type": "Location"})
-            for name in data.get("events", []):
-                entities.append({"name": name, "type": "Event"})
-            for name in data.get("unique_elements", []):
-                entities.append({"name": name, "type": "Unique Element"})
-                
-            return entities
-        except Exception as e:
-            logger.error(f"AKG Pass 1 (Scout) failed: {e}", exc_info=True)
-            return []
+        result = self.ai_scout.chat(prompt, temperature=0.1, timeout=180) # Give it 3 minutes
+        if not result['success']:
+            raise Exception(f"Pass 1 AI call failed: {result.get('error')}")
+        
+        # Parse the JSON response
+        response_text = result['response'].strip().replace("```json", "").replace("```", "")
+        data = json.loads(response_text)
+        if not isinstance(data, dict):
+            raise ValueError("Pass 1 response is not a JSON object")
+        return {
+            key: [name.strip() for name in data.get(key) or [] if isinstance(name, str) and name.strip()]
+            for key in SCOUT_CATEGORIES
+        }
 
-    def _pass_2_researcher(self, full_text: str, entity_name: str) -> str:
-        """Pass 2: Use Gemini 2.5 Flash to gather all raw data for a single entity."""
-        prompt = f"""
+    def _merge_scout_results(self, results: List[Dict[str, List[str]]], full_text: str) -> List[Dict[str, Any]]:
+        """
+        Merge per-segment scout results into one entity list.
+        
+        1. Names with the same normalized form are one entity; its type is the
+           one given most often, its name the most frequent spelling
+        2. A name equal to the short form of exactly one longer entity of the
+           same type ("Eva" -> "Captain Eva Rostova") is folded into it as an alias
+        3. Mentions of the name and its aliases are counted in the full text
+        """
+        spellings: Dict[str, Counter] = {}
+        types: Dict[str, Counter] = {}
+        for result in results:
+            for key, entity_type in SCOUT_CATEGORIES.items():
+                for name in result.get(key, []):
+                    norm = normalize_name(name)
+                    if not norm:
+                        continue
+                    spellings.setdefault(norm, Counter())[name] += 1
+                    types.setdefault(norm, Counter())[entity_type] += 1
+        
+        entities: Dict[str, Dict[str, Any]] = {}
+        for norm, names in spellings.items():
+            entities[norm] = {
+                "name": names.most_common(1)[0][0],
+                "type": types[norm].most_common(1)[0][0],
+                "aliases": sorted(names),
+            }
+        
+        # Fold short forms into the single full name they abbreviate
+        short_forms: Dict[tuple, set] = {}
+        for norm, entity in entities.items():
+            for alias in entity_aliases(entity["name"], entity["type"]):
+                alias_norm = normalize_name(alias)
+                if alias_norm != norm:
+                    short_forms.setdefault((entity["type"], alias_norm), set()).add(norm)
+        # (longest first, so "Eva Rostova" is folded before "Eva" is matched)
+        for norm in sorted(entities, key=len, reverse=True):
+            entity = entities[norm]
+            targets = [target for target in short_forms.get((entity["type"], norm), ()) if target in entities]
+            if len(targets) == 1:
+                target = entities[targets[0]]
+                target["aliases"] = sorted(set(target["aliases"]) | set(entity["aliases"]))
+                del entities[norm]
+        
+        index = self._mention_index
+        if index is None or index.text is not full_text:
+            index = self._mention_index = MentionIndex(full_text)
+        for entity in entities.values():
+            entity["mentions"] = len(index.find(entity_aliases(entity["name"], entity["type"]) + entity["aliases"]))
+        return sorted(entities.values(), key=lambda entity: (-entity["mentions"], entity["name"]))
+
+    def _pass_2_request(self, full_text: str, entity_name: str, aliases: List[str] = None) -> Dict[str, Any]:
+        """
+        Builds the Pass 2 prompt for an entity.
+        
+        Only the passages mentioning the entity (or an alias), with
+        pass2_context_chars of context around each, are sent. Entities with at
+        most pass2_full_text_max_mentions mentions, or whose passages cover most
+        of the text anyway, get the full manuscript.
+        
+        Returns:
+            {"prompt", "source_text", "mode" ("windows" or "full_text"), "mentions", "windows", "chars_sent"}
+        """
+        index = self._mention_index
+        if index is None or index.text is not full_text:
+            index = self._mention_index = MentionIndex(full_text)
+        
+        names = list(dict.fromkeys([entity_name] + list(aliases or [])))
+        mentions = index.find(names)
+        windows = index.windows(mentions, self.pass2_context_chars)
+        covered = sum(end - start for start, end in windows)
+        use_full_text = (len(mentions) <= self.pass2_full_text_max_mentions
+                         or covered >= self.pass2_full_text_coverage * len(full_text))
+        
+        if use_full_text:
+            source_text = full_text
+            prompt = f"""
         You are a meticulous researcher. Scan the entire manuscript provided below.
         Your only task is to find and extract *every* passage, sentence, or fact that mentions or describes the entity: "{entity_name}".
         
@@ -213,16 +655,96 @@ class KnowledgeExtractor:
 
         Raw Data Dossier for "{entity_name}":
         """
+        else:
+            source_text = index.excerpts(windows)
+            prompt = f"""
+        You are a meticulous researcher. Below are all the excerpts of a manuscript that mention the entity: "{entity_name}"
+        (also referred to as: {", ".join(names)}), in manuscript order.
+        Your only task is to find and extract *every* passage, sentence, or fact that mentions or describes "{entity_name}".
+        
+        Compile all this information into a single, comprehensive, unformatted dossier.
+        Include direct quotes and any inferred facts. Be thorough.
+
+        --- MANUSCRIPT EXCERPTS START ---
+        {source_text}
+        --- MANUSCRIPT EXCERPTS END ---
+
+        Raw Data Dossier for "{entity_name}":
+        """
+        return {
+            "prompt": prompt,
+            "source_text": source_text,
+            "mode": "full_text" if use_full_text else "windows",
+            "mentions": len(mentions),
+            "windows": len(windows),
+            "chars_sent": len(source_text),
+        }
+
+    def _pass_2_researcher(self, full_text: str, entity_name: str, aliases: List[str] = None,
+                           request: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Pass 2: Use Gemini 2.5 Flash to gather all raw data for a single entity.
+        
+        Args:
+            request: A prebuilt _pass_2_request() (built here if not given)
+        """
+        if request is None:
+            request = self._pass_2_request(full_text, entity_name, aliases)
         
         try:
-            result = self.ai_researcher.chat(prompt, temperature=0.0, timeout=180) # Give it 3 minutes
+            result = self.ai_researcher.chat(request['prompt'], temperature=0.0, timeout=180) # Give it 3 minutes
             if not result['success']:
                 raise Exception(f"Pass 2 AI call failed: {result.get('error')}")
             
-            return result['response'].strip()
+            dossier = result['response'].strip()
         except Exception as e:
             logger.error(f"AKG Pass 2 (Researcher) failed for '{entity_name}': {e}", exc_info=True)
-            return ""
+            dossier = ""
+        
+        self._record_pass_2(entity_name, request['mode'], request['mentions'], request['windows'],
+                            request['chars_sent'], len(dossier))
+        return dossier
+
+    def _record_pass_2(self, entity_name: str, mode: str, mentions: int, windows: int,
+                       chars_sent: int, dossier_chars: int):
+        """Keeps per-entity Pass 2 cost/quality figures for the run report."""
+        with self._stats_lock:
+            self._pass_2_stats.append({
+                "entity": entity_name, "mode": mode, "mentions": mentions, "windows": windows,
+                "chars_sent": chars_sent, "dossier_chars": dossier_chars,
+            })
+        logger.info(f"AKG Pass 2 '{entity_name}': {mode}, {mentions} mentions in {windows} windows, "
+                    f"{chars_sent} chars sent, {dossier_chars} chars of dossier")
+
+    def _pass_2_report(self, full_text_chars: int) -> Dict[str, Any]:
+        """
+        Pass 2 cost/quality trade-off of the run: text sent vs. sending the full
+        manuscript per entity, and dossier sizes per retrieval mode (a much
+        thinner dossier from windows than from full text hints the context is
+        too narrow).
+        """
+        with self._stats_lock:
+            stats = list(self._pass_2_stats)
+        chars_sent = sum(s["chars_sent"] for s in stats)
+        full_equivalent = full_text_chars * len(stats)
+        report = {
+            "entities": len(stats),
+            "context_chars": self.pass2_context_chars,
+            "chars_sent": chars_sent,
+            "chars_full_text_equivalent": full_equivalent,
+            "estimated_tokens_sent": chars_sent // 4,
+            "estimated_tokens_saved": (full_equivalent - chars_sent) // 4,
+            "savings_ratio": round(1 - chars_sent / full_equivalent, 3) if full_equivalent else 0.0,
+            "empty_dossiers": sum(1 for s in stats if not s["dossier_chars"]),
+        }
+        for mode in ("windows", "full_text"):
+            in_mode = [s for s in stats if s["mode"] == mode]
+            report[mode] = {
+                "entities": len(in_mode),
+                "avg_mentions": round(sum(s["mentions"] for s in in_mode) / len(in_mode), 1) if in_mode else 0,
+                "avg_dossier_chars": sum(s["dossier_chars"] for s in in_mode) // len(in_mode) if in_mode else 0,
+            }
+        return report
 
     def _pass_3_analyst(self, raw_data_dossier: str, entity_name: str, entity_type: str) -> str:
         """Pass 3: Use Gemini 2.5 Pro to synthesize the raw data into a structured sheet."""
@@ -254,34 +776,107 @@ class KnowledgeExtractor:
         Filled Sheet for "{entity_name}":
         """
         
+        with self._stats_lock:
+            self._pass_3_stats["calls"] += 1
+            self._pass_3_stats["dedicated_calls"] += 1
         try:
             result = self.ai_analyst.chat(prompt, temperature=0.2, timeout=180) # Give it 3 minutes
             if not result['success']:
                 raise Exception(f"Pass 3 AI call failed: {result.get('error')}")
-            
+        
             return result['response'].strip()
         except Exception as e:
             logger.error(f"AKG Pass 3 (Analyst) failed for '{entity_name}': {e}", exc_info=True)
             return ""
 
-    def _save_kb_file(self, entity_name: str, entity_type: str, content: str):
-        """Saves the generated profile content to a .md file."""
+    def _pass_3_analyst_batch(self, group: List) -> Dict[str, str]:
+        """
+        Pass 3 for several small dossiers of one entity type in a single call.
+        
+        The template and instructions are sent once; the answer holds one
+        delimited sheet per entity and is split back into per-entity sheets.
         
+        Returns:
+            {entity name: sheet} for the entities found in the answer ({} on failure)
+        """
+        entity_type = group[0][0]['type']
+        names = [entity['name'] for entity, _ in group]
+        template = self.kb_templates.get(entity_type)
+        if not template or template.startswith("ERROR:"):
+            logger.error(f"Cannot synthesize profiles: No valid template found for type '{entity_type}'.")
+            return {}
+        
+        dossiers = "\n\n".join(
+            f"--- RAW DATA DOSSIER: {entity['name']} ---\n{dossier}\n--- END RAW DATA DOSSIER ---"
+            for entity, dossier in group
+        )
+        prompt = f"""
+        You are a highly skilled analytical author's assistant. Your job is to fill out structured knowledge base sheets.
+        
+        You will be given a template for the sheet and one "raw data dossier" per entity containing all known facts about that entity.
+        Your task is to meticulously populate *every* field in the template, separately for each entity, using *only* the information from that entity's dossier.
+        Do not make up any information, and do not mix facts between entities.
+        If information for a field is not present in the dossier, leave that field blank.
+        
+        The entities are: {json.dumps(names)}
+        
+        --- TEMPLATE ---
+        {template}
+        --- END TEMPLATE ---
+        
+        {dossiers}
+        
+        Respond with one filled sheet per entity, in this exact format and nothing else:
+        === SHEET: <entity name exactly as listed above> ===
+        <filled sheet>
+        === END SHEET ===
+        """
+        
+        with self._stats_lock:
+            self._pass_3_stats["calls"] += 1
+            self._pass_3_stats["batch_calls"] += 1
+            self._pass_3_stats["batched_entities"] += len(group)
+        try:
+            result = self.ai_analyst.chat(prompt, temperature=0.2, timeout=180) # Give it 3 minutes
+            if not result['success']:
+                raise Exception(f"Pass 3 AI call failed: {result.get('error')}")
+        except Exception as e:
+            logger.error(f"AKG Pass 3 (Analyst) batch failed for {names}: {e}", exc_info=True)
+            return {}
+        
+        by_key = {normalize_name(name): name for name in names}
+        sheets = {}
+        for match in _SHEET_PATTERN.finditer(result.get('response') or ''):
+            name = by_key.get(normalize_name(match.group(1)))
+            if name and match.group(2).strip():
+                sheets[name] = match.group(2).strip()
+        logger.info(f"AKG Pass 3: Synthesized {len(sheets)}/{len(names)} '{entity_type}' profiles in one call.")
+        return sheets
+
+    @staticmethod
+    def _kb_filename(entity_name: str, entity_type: str) -> str:
+        """Knowledge base filename of an entity, e.g. 'character_captain_eva.md'."""
         # Sanitize entity name for filename
         safe_filename = "".join(c for c in entity_name.replace(" ", "_") if c.isalnum() or c == '_').lower()
         
         # Determine prefix from type
         prefix = entity_type.lower().replace(" ", "_")
         
-        filename = f"{prefix}_{safe_filename}.md"
+        return f"{prefix}_{safe_filename}.md"
+
+    def _save_kb_file(self, entity_name: str, entity_type: str, content: str) -> bool:
+        """Saves the generated profile content to a .md file. Returns True on success."""
+        filename = self._kb_filename(entity_name, entity_type)
         filepath = self.knowledge_base_path / filename
         
         try:
             with open(filepath, 'w', encoding='utf-8') as f:
                 f.write(content)
             logger.info(f"Successfully saved knowledge base file: {filename}")
+            return True
         except Exception as e:
             logger.error(f"Failed to save knowledge base file {filename}: {e}", exc_info=True)
+            return False
 
     # --- Query Analyzer Methods ---
     # These methods are for the CHAT, not the AKG generation
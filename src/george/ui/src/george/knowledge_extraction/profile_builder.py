@@ -3,8 +3,10 @@ Profile Builder - Creates detailed markdown profiles for each entity
 """
 import os
 import sys
+import json
+from collections import Counter
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
 # Add parent to path if needed
 current_dir = Path(__file__).parent
@@ -15,6 +17,11 @@ if str(george_dir) not in sys.path:
 from llm_integration import GeorgeAI
 from knowledge_extraction.entity_extractor import Entity
 
+# Text is analyzed in slices of SLICE_SIZE characters; each slice also includes
+# the next SLICE_OVERLAP characters so a name cut at the boundary is still seen
+SLICE_SIZE = 3000
+SLICE_OVERLAP = 200
+
 class ProfileBuilder:
     """Builds detailed profiles for entities using AI analysis."""
     
@@ -30,7 +37,156 @@ class ProfileBuilder:
         self.kb_path = Path(knowledge_base_path)
         self.kb_path.mkdir(parents=True, exist_ok=True)
     
-    def build_character_profile(self, character_name: str, full_text: str, entity: Entity) -> str:
+    @staticmethod
+    def slice_text(full_text: str) -> List[Tuple[int, str]]:
+        """
+        Split the text into overlapping slices.
+        
+        Returns:
+            List of (start position, slice text); slice i owns positions
+            [start, start + SLICE_SIZE) and extends SLICE_OVERLAP characters past them
+        """
+        return [(i, full_text[i:i + SLICE_SIZE + SLICE_OVERLAP]) for i in range(0, len(full_text), SLICE_SIZE)]
+    
+    @staticmethod
+    def _names_in_slice(names: List[str], slice_text: str) -> List[str]:
+        """Names with a mention starting in the slice's own part (not just its overlap)."""
+        present = []
+        for name in names:
+            position = slice_text.find(name)
+            if 0 <= position < SLICE_SIZE:
+                present.append(name)
+        return present
+    
+    def collect_facts(self, full_text: str, entities: List[Entity]) -> Dict[Tuple[str, str], List[Dict]]:
+        """
+        Walk the slices once and gather facts about every entity in a single
+        call per slice, instead of re-reading the text once per entity.
+        
+        Each slice that mentions at least one entity gets one structured call
+        asking for the facts about all of them; the answer is routed into a
+        per-entity accumulator. Entities are keyed by (name, entity_type), so a
+        character and a location with the same name keep separate facts.
+        
+        Args:
+            full_text: Complete manuscript text
+            entities: Characters and locations to gather facts for
+        
+        Returns:
+            Dictionary of (entity name, entity type) -> [{'chunk': slice index, 'details': facts}]
+        """
+        facts: Dict[Tuple[str, str], List[Dict]] = {(entity.name, entity.entity_type): [] for entity in entities}
+        names = list(dict.fromkeys(name for name, _ in facts))
+        slices = self.slice_text(full_text)
+        
+        for i, (_, chunk) in enumerate(slices):
+            present_names = set(self._names_in_slice(names, chunk))
+            present = [key for key in facts if key[0] in present_names]
+            if not present:
+                continue
+            
+            print(f"  Analyzing chunk {i+1}/{len(slices)} ({len(present)} entities)...")
+            
+            listed = "\n".join(f"- {self._fact_label(key)}" for key in present)
+            prompt = f"""Analyze this text excerpt for information about each of these entities:
+{listed}
+
+---TEXT---
+{chunk}
+---END TEXT---
+
+For each character, list only the facts present in this excerpt:
+1. Physical descriptions (appearance, clothing, etc.)
+2. Personality traits shown through actions or dialogue
+3. Relationships with other characters
+4. Key actions or events
+5. Notable dialogue
+
+For each location, list only what's explicitly described:
+1. Physical description (size, appearance, atmosphere)
+2. Purpose/function of this location
+3. Events that happen here
+4. Characters associated with this location
+
+Be BRIEF and FACTUAL. Only list what's explicitly shown.
+
+Respond ONLY with a JSON object mapping each entity exactly as listed above (name and type) to its facts (a string).
+Use an empty string for an entity the excerpt says nothing about."""
+
+            response = self.ai.generate_response(prompt, temperature=0.2)
+            for key, details in self._parse_facts(response, present).items():
+                facts[key].append({'chunk': i, 'details': details})
+        
+        return facts
+    
+    @staticmethod
+    def _fact_label(key: Tuple[str, str]) -> str:
+        """How an entity is listed in a slice prompt, e.g. 'Eva (character)'."""
+        return f"{key[0]} ({key[1]})"
+    
+    @classmethod
+    def _parse_facts(cls, response: Optional[str], keys: List[Tuple[str, str]]) -> Dict[Tuple[str, str], str]:
+        """
+        Split a structured slice answer into {(entity name, entity type): facts}
+        for the listed entities. Answers keyed by the bare name are accepted when
+        only one listed entity has that name.
+        """
+        if not response:
+            return {}
+        text = response.strip().replace("```json", "").replace("```", "")
+        try:
+            data = json.loads(text[text.find("{"):text.rfind("}") + 1])
+        except ValueError:
+            print(f"  [WARN] Could not parse facts for {', '.join(cls._fact_label(key) for key in keys)}")
+            return {}
+        if not isinstance(data, dict):
+            return {}
+        
+        by_label = {cls._fact_label(key).lower(): key for key in keys}
+        name_counts = Counter(name.lower() for name, _ in keys)
+        by_label.update({name.lower(): (name, kind) for name, kind in keys if name_counts[name.lower()] == 1})
+        facts = {}
+        for label, details in data.items():
+            key = by_label.get(str(label).strip().lower())
+            if isinstance(details, list):
+                details = "\n".join(f"- {item}" for item in details)
+            if key and isinstance(details, str) and details.strip():
+                facts[key] = details.strip()
+        return facts
+    
+    def build_profiles(self, full_text: str, characters: List[Entity], locations: List[Entity],
+                       terms: List[Entity] = ()) -> List[str]:
+        """
+        Build every profile with one pass over the slices (see collect_facts).
+        
+        A profile that fails to build is reported and skipped; the others are
+        still built.
+        
+        Returns:
+            Paths to the created markdown files
+        """
+        print(f"[BUILD] Gathering facts for {len(characters)} characters and {len(locations)} locations...")
+        facts = self.collect_facts(full_text, list(characters) + list(locations))
+        
+        builders = (
+            [(entity, self.build_character_profile) for entity in characters]
+            + [(entity, self.build_location_profile) for entity in locations]
+        )
+        paths = []
+        for entity, build in builders:
+            try:
+                paths.append(build(entity.name, full_text, entity, facts=facts[(entity.name, entity.entity_type)]))
+            except Exception as exc:  # noqa: BLE001 - downstream models can raise varied errors
+                print(f"  [WARN] Error building profile for {entity.name}: {exc}")
+        for entity in terms:
+            try:
+                paths.append(self.build_term_profile(entity.name, full_text, entity))
+            except Exception as exc:  # noqa: BLE001 - downstream models can raise varied errors
+                print(f"  [WARN] Error building profile for {entity.name}: {exc}")
+        return paths
+    
+    def build_character_profile(self, character_name: str, full_text: str, entity: Entity,
+                                facts: Optional[List[Dict]] = None) -> str:
         """
         Build a detailed character profile by analyzing the full manuscript.
         
@@ -38,15 +194,15 @@ class ProfileBuilder:
             character_name: Name of the character
             full_text: Complete manuscript text
             entity: Entity object with initial extraction data
-            
+            facts: Facts already gathered by collect_facts (skips the per-slice analysis)
+        
         Returns:
             Path to the created markdown file
         """
         print(f"[BUILD] Building profile for character: {character_name}")
         
-        # Chunk the text (process in 3000 char chunks to find all mentions)
-        chunk_size = 3000
-        chunks = [full_text[i:i+chunk_size] for i in range(0, len(full_text), chunk_size)]
+        # Slice the text (3000 char slices, overlapping so no mention is cut)
+        chunks = [chunk for _, chunk in self.slice_text(full_text)] if facts is None else []
         
         character_data = {
             'name': character_name,
@@ -57,10 +213,12 @@ class ProfileBuilder:
             'actions': [],
             'dialogue_samples': []
         }
+        if facts is not None:
+            character_data['appearances'] = list(facts)
         
         # Process each chunk
         for i, chunk in enumerate(chunks):
-            if character_name not in chunk:
+            if not self._names_in_slice([character_name], chunk):
                 continue  # Skip chunks where character doesn't appear
             
             print(f"  Analyzing chunk {i+1}/{len(chunks)}...")
@@ -131,18 +289,18 @@ Be concise but complete."""
         print(f"[OK] Profile saved: {profile_path}")
         return str(profile_path)
     
-    def build_location_profile(self, location_name: str, full_text: str, entity: Entity) -> str:
-        """Build a detailed location profile."""
+    def build_location_profile(self, location_name: str, full_text: str, entity: Entity,
+                               facts: Optional[List[Dict]] = None) -> str:
+        """Build a detailed location profile (from collect_facts output if given)."""
         print(f"📍 Building profile for location: {location_name}")
         
-        # Similar chunking approach
-        chunk_size = 3000
-        chunks = [full_text[i:i+chunk_size] for i in range(0, len(full_text), chunk_size)]
+        # Similar slicing approach
+        chunks = [chunk for _, chunk in self.slice_text(full_text)] if facts is None else []
         
-        location_details = []
+        location_details = [fact['details'] for fact in facts or []]
         
         for i, chunk in enumerate(chunks):
-            if location_name not in chunk:
+            if not self._names_in_slice([location_name], chunk):
                 continue
             
             print(f"  Analyzing chunk {i+1}/{len(chunks)}...")
@@ -0,0 +1,172 @@
+"""
+Tests for batched Pass 3 in the AKG: grouping small dossiers, splitting a
+batched answer into per-entity sheets and the per-entity fallback
+(src/george/ui/src/george/knowledge_extraction/orchestrator.py).
+"""
+import sys
+import threading
+from collections import Counter
+from pathlib import Path
+
+import pytest
+
+# The AKG modules import each other as knowledge_extraction.*
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src' / 'george' / 'ui' / 'src' / 'george'))
+
+orchestrator = pytest.importorskip("knowledge_extraction.orchestrator")
+KnowledgeExtractor = orchestrator.KnowledgeExtractor
+
+
+class FakeAnalyst:
+    """Answers Pass 3 prompts from a queue (a dict result, or an exception to raise)."""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.prompts = []
+
+    def chat(self, prompt, temperature=None, timeout=None):
+        self.prompts.append(prompt)
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+def _ok(response):
+    return {"success": True, "response": response}
+
+
+def _sheet(name, body):
+    return f"=== SHEET: {name} ===\n{body}\n=== END SHEET ==="
+
+
+def _entity(name, entity_type="Character"):
+    return {"name": name, "type": entity_type}
+
+
+@pytest.fixture
+def extractor(tmp_path):
+    # Pass 3 needs only its settings, templates and the analyst; skip __init__,
+    # which connects to the AI models
+    extractor = KnowledgeExtractor.__new__(KnowledgeExtractor)
+    extractor.knowledge_base_path = tmp_path
+    extractor.kb_templates = {"Character": "Name:\nRole:", "Location": "Name:\nClimate:"}
+    extractor.template_versions = {}
+    extractor.pass3_small_dossier_tokens = 100
+    extractor.pass3_batch_tokens = 250
+    extractor.pass3_batch_max_entities = 3
+    extractor._pass_3_stats = Counter()
+    extractor._stats_lock = threading.Lock()
+    extractor._manifest = None
+    extractor.ai_analyst = FakeAnalyst()
+    return extractor
+
+
+def test_batch_answer_is_split_per_entity(extractor):
+    extractor.ai_analyst = FakeAnalyst(_ok(
+        "Here are the sheets.\n\n"
+        + _sheet("eva ", "Name: Eva\nRole: Captain\n\n=== notes ===") + "\n\n"
+        + "=== SHEET: Zed ===  \nName: Zed\n=== END SHEET ===\n"
+        + _sheet("Stranger", "Name: ?") + "\n"
+        + _sheet("Kessel", "   ")
+    ))
+    group = [(_entity("Eva"), "Eva facts"), (_entity("Zed"), "Zed facts"), (_entity("Kessel"), "Kessel facts")]
+
+    sheets = extractor._pass_3_analyst_batch(group)
+    # Names are matched normalized; unlisted and empty sheets are dropped
+    assert sheets == {"Eva": "Name: Eva\nRole: Captain\n\n=== notes ===", "Zed": "Name: Zed"}
+    [prompt] = extractor.ai_analyst.prompts
+    assert prompt.count("Name:\nRole:") == 1
+    assert '["Eva", "Zed", "Kessel"]' in prompt and "--- RAW DATA DOSSIER: Zed ---\nZed facts" in prompt
+    assert extractor._pass_3_stats == Counter(calls=1, batch_calls=1, batched_entities=3)
+
+
+def test_unterminated_sheet_is_not_used(extractor):
+    extractor.ai_analyst = FakeAnalyst(_ok(_sheet("Eva", "Name: Eva") + "\n=== SHEET: Zed ===\nName: Zed"))
+
+    assert extractor._pass_3_analyst_batch([(_entity("Eva"), "a"), (_entity("Zed"), "b")]) == {"Eva": "Name: Eva"}
+
+
+@pytest.mark.parametrize("answer", [{"success": False, "error": "quota"}, _ok(None), RuntimeError("timeout")])
+def test_failed_batch_call_yields_no_sheets(extractor, answer):
+    extractor.ai_analyst = FakeAnalyst(answer)
+
+    assert extractor._pass_3_analyst_batch([(_entity("Eva"), "a"), (_entity("Zed"), "b")]) == {}
+
+
+def test_batch_without_template_makes_no_call(extractor):
+    group = [(_entity("Battle", "Event"), "a"), (_entity("Siege", "Event"), "b")]
+
+    assert extractor._pass_3_analyst_batch(group) == {}
+    assert extractor.ai_analyst.prompts == []
+
+
+def test_entity_missing_from_the_batch_gets_its_own_call(extractor):
+    extractor.ai_analyst = FakeAnalyst(_ok(_sheet("Eva", "Name: Eva")), _ok("Name: Zed"))
+    group = [(_entity("Eva"), "Eva facts"), (_entity("Zed"), "Zed facts")]
+
+    outcomes = extractor._run_pass_3(group)
+    assert [(entity["name"], error) for entity, error in outcomes] == [("Eva", None), ("Zed", None)]
+    assert 'The entity is: "Zed"' in extractor.ai_analyst.prompts[1]
+    assert (extractor.knowledge_base_path / "character_eva.md").read_text() == "Name: Eva"
+    assert (extractor.knowledge_base_path / "character_zed.md").read_text() == "Name: Zed"
+    assert extractor._pass_3_stats["fallback_calls"] == 1
+    assert extractor._pass_3_stats["dedicated_calls"] == 1
+
+
+def test_failed_batch_falls_back_for_every_entity(extractor):
+    extractor.ai_analyst = FakeAnalyst(RuntimeError("timeout"), _ok("Name: Eva"), {"success": False, "error": "quota"})
+    group = [(_entity("Eva"), "Eva facts"), (_entity("Zed"), "Zed facts")]
+
+    outcomes = extractor._run_pass_3(group)
+    assert outcomes[0] == (group[0][0], None)
+    assert outcomes[1][0] is group[1][0]
+    assert outcomes[1][1].stage == "pass_3"
+    assert extractor._pass_3_stats["fallback_calls"] == 2
+
+
+def test_single_dossier_gets_a_dedicated_call(extractor):
+    extractor.ai_analyst = FakeAnalyst(_ok("Name: Eva"))
+
+    assert extractor._run_pass_3([(_entity("Eva"), "Eva facts")]) == [(_entity("Eva"), None)]
+    assert extractor._pass_3_stats == Counter(calls=1, dedicated_calls=1)
+
+
+def test_large_dossier_is_not_batched(extractor):
+    pending = {}
+    large = "x" * 404  # 101 tokens
+
+    assert extractor._queue_for_pass_3(pending, _entity("Eva"), large) == [[(_entity("Eva"), large)]]
+    assert pending == {}
+
+
+def test_batch_is_released_at_the_token_limit(extractor):
+    pending = {}
+    dossier = "x" * 400  # 100 tokens: still small
+
+    assert extractor._queue_for_pass_3(pending, _entity("A"), dossier) == []
+    assert extractor._queue_for_pass_3(pending, _entity("B"), dossier) == []
+    # 300 tokens would exceed the 250-token batch
+    [released] = extractor._queue_for_pass_3(pending, _entity("C"), dossier)
+    assert [entity["name"] for entity, _ in released] == ["A", "B"]
+    assert [entity["name"] for entity, _ in pending["Character"]] == ["C"]
+
+
+def test_batch_is_released_at_the_entity_limit(extractor):
+    pending = {}
+    for name in "ABC":
+        assert extractor._queue_for_pass_3(pending, _entity(name), "short") == []
+
+    [released] = extractor._queue_for_pass_3(pending, _entity("D"), "short")
+    assert [entity["name"] for entity, _ in released] == ["A", "B", "C"]
+    assert [entity["name"] for entity, _ in pending["Character"]] == ["D"]
+
+
+def test_batches_hold_one_entity_type(extractor):
+    pending = {}
+    extractor._queue_for_pass_3(pending, _entity("Eva"), "short")
+    extractor._queue_for_pass_3(pending, _entity("Citadel", "Location"), "short")
+
+    assert {entity_type: [e["name"] for e, _ in batch] for entity_type, batch in pending.items()} == {
+        "Character": ["Eva"], "Location": ["Citadel"]
+    }
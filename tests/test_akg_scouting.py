@@ -0,0 +1,101 @@
+"""
+Tests for chunked Pass 1 scouting in the AKG: segment splitting and merging
+the per-segment results (src/george/ui/src/george/knowledge_extraction/orchestrator.py).
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+# The AKG modules import each other as knowledge_extraction.*
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src' / 'george' / 'ui' / 'src' / 'george'))
+
+orchestrator = pytest.importorskip("knowledge_extraction.orchestrator")
+KnowledgeExtractor = orchestrator.KnowledgeExtractor
+
+TEXT = (
+    "Captain Eva Rostova boarded the Citadel.\n\n"
+    "Eva met Zed at the citadel gates. Zed saluted Eva Rostova.\n\n"
+    "The Battle of Kessel was lost."
+)
+
+
+@pytest.fixture
+def extractor():
+    # Merging needs no AI models; skip __init__, which connects to them
+    extractor = KnowledgeExtractor.__new__(KnowledgeExtractor)
+    extractor._mention_index = None
+    return extractor
+
+
+def test_short_text_is_one_segment():
+    assert KnowledgeExtractor._split_segments(TEXT, 10_000) == [TEXT]
+
+
+def test_segments_break_at_paragraphs_and_fit_the_limit():
+    paragraphs = [f"Paragraph {i} " + "word " * 10 for i in range(6)]
+    text = "\n\n".join(p.strip() for p in paragraphs)
+
+    segments = KnowledgeExtractor._split_segments(text, 140)
+    assert len(segments) > 1
+    assert all(len(segment) <= 140 for segment in segments)
+    assert "\n\n".join(segments) == text
+
+
+def test_long_paragraph_breaks_at_words():
+    text = " ".join(f"w{i}" for i in range(100))
+
+    segments = KnowledgeExtractor._split_segments(text, 50)
+    assert all(len(segment) <= 50 for segment in segments)
+    assert " ".join(segments).split() == text.split()
+
+
+def test_word_longer_than_limit_is_cut():
+    segments = KnowledgeExtractor._split_segments("x" * 25, 10)
+
+    assert segments == ["x" * 10, "x" * 10, "x" * 5]
+
+
+def test_merge_dedupes_by_normalized_name_and_majority_type(extractor):
+    results = [
+        {"characters": ["Zed"], "locations": ["The Citadel"]},
+        {"characters": ["zed"], "locations": ["Citadel"], "unique_elements": ["Zed"]},
+        {"events": ["Battle of Kessel"]},
+    ]
+
+    entities = {entity["name"]: entity for entity in extractor._merge_scout_results(results, TEXT)}
+    assert entities["Zed"]["type"] == "Character"
+    assert entities["Zed"]["aliases"] == ["Zed", "zed"]
+    assert entities["Zed"]["mentions"] == 2
+    assert entities["Battle of Kessel"]["type"] == "Event"
+    # "The Citadel" and "Citadel" normalize differently but the article alias folds them
+    assert entities["The Citadel"]["type"] == "Location"
+    assert "Citadel" in entities["The Citadel"]["aliases"]
+    assert "Citadel" not in entities
+
+
+def test_merge_folds_short_forms_into_the_full_name(extractor):
+    results = [
+        {"characters": ["Captain Eva Rostova"]},
+        {"characters": ["Eva", "Eva Rostova"]},
+    ]
+
+    [eva] = extractor._merge_scout_results(results, TEXT)
+    assert eva["name"] == "Captain Eva Rostova"
+    assert eva["aliases"] == ["Captain Eva Rostova", "Eva", "Eva Rostova"]
+    # Every mention counted once: the full name, "Eva" and "Eva Rostova"
+    assert eva["mentions"] == 3
+
+
+def test_ambiguous_short_form_is_kept_separate(extractor):
+    results = [{"characters": ["Eva Rostova", "Eva Smith", "Eva"]}]
+
+    names = sorted(entity["name"] for entity in extractor._merge_scout_results(results, TEXT))
+    assert names == ["Eva", "Eva Rostova", "Eva Smith"]
+
+
+def test_merge_orders_by_mentions(extractor):
+    results = [{"characters": ["Zed", "Captain Eva Rostova"], "events": ["Battle of Kessel"]}]
+
+    entities = extractor._merge_scout_results(results, TEXT)
+    assert [entity["name"] for entity in entities] == ["Captain Eva Rostova", "Zed", "Battle of Kessel"]
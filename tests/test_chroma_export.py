@@ -0,0 +1,186 @@
+"""
+Tests for the cursor-paginated /export endpoint of the Chroma server
+(chroma_server/app.py).
+"""
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("networkx")
+
+SERVER_DIR = Path(__file__).parent.parent / 'chroma_server'
+
+
+def _load_server():
+    """Import chroma_server/app.py under its own name (every service has an app.py)."""
+    sys.path.insert(0, str(SERVER_DIR))
+    spec = importlib.util.spec_from_file_location("chroma_server_app", SERVER_DIR / "app.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+server = _load_server()
+db_manager = sys.modules["db_manager"]
+
+
+class InMemoryCollections:
+    """Just the ChromaManager surface /export uses, over a list of records."""
+
+    client = object()
+
+    def __init__(self, count):
+        self.records = [{"id": f"id{i}", "document": f"doc {i}", "metadata": {"n": i, "even": i % 2 == 0}}
+                        for i in range(count)]
+        self.version = 1
+
+    def get_version(self, collection_name):
+        return {"version": self.version, "count": len(self.records)}
+
+    def get_page(self, collection_name, offset=0, limit=500, where=None, include_embeddings=False):
+        records = [r for r in self.records if not where or all(r["metadata"].get(k) == v for k, v in where.items())]
+        records = records[offset:offset + limit]
+        page = {
+            "ids": [r["id"] for r in records],
+            "documents": [r["document"] for r in records],
+            "metadatas": [r["metadata"] for r in records],
+        }
+        if include_embeddings:
+            page["embeddings"] = [[float(r["metadata"]["n"])] for r in records]
+        return page
+
+
+@pytest.fixture
+def collections(monkeypatch):
+    collections = InMemoryCollections(count=7)
+    monkeypatch.setattr(server, "db_manager", collections)
+    return collections
+
+
+@pytest.fixture
+def client(collections):
+    return server.app.test_client()
+
+
+def _export(client, **body):
+    return client.post("/export", json={"collection_name": "project_p1", **body})
+
+
+def _export_all(client, **body):
+    ids, cursor, pages = [], None, 0
+    while True:
+        response = _export(client, cursor=cursor, **body)
+        assert response.status_code == 200
+        ids.extend(response.json["ids"])
+        pages += 1
+        cursor = response.json["next_cursor"]
+        if cursor is None:
+            return ids, pages
+
+
+def test_cursor_walks_every_record_once(client):
+    ids, pages = _export_all(client, limit=3)
+
+    assert ids == [f"id{i}" for i in range(7)]
+    assert pages == 3
+
+
+def test_exact_multiple_ends_with_empty_page(client, collections):
+    collections.records = collections.records[:6]
+
+    ids, pages = _export_all(client, limit=3)
+    assert len(ids) == 6
+    assert pages == 3
+
+
+def test_where_filter_and_embeddings(client):
+    response = _export(client, limit=10, where={"even": True}, include=["embeddings"])
+
+    assert response.json["ids"] == ["id0", "id2", "id4", "id6"]
+    assert response.json["embeddings"] == [[0.0], [2.0], [4.0], [6.0]]
+    assert response.json["next_cursor"] is None
+
+
+def test_write_during_export_is_flagged(client, collections):
+    first = _export(client, limit=3)
+    assert first.json["changed"] is False
+
+    collections.version += 1
+    second = _export(client, limit=3, cursor=first.json["next_cursor"])
+    assert second.json["changed"] is True
+    assert second.json["version"] == collections.version
+
+
+def test_limit_is_clamped(client, monkeypatch):
+    monkeypatch.setattr(server, "EXPORT_MAX_LIMIT", 4)
+
+    assert len(_export(client, limit=100).json["ids"]) == 4
+    assert len(_export(client, limit=-5).json["ids"]) == 1
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", "e30=", "eyJvZmZzZXQiOiAtMX0="])
+def test_bad_cursor_is_rejected(client, cursor):
+    assert _export(client, cursor=cursor).status_code == 400
+
+
+def test_collection_name_is_required(client):
+    assert client.post("/export", json={}).status_code == 400
+
+
+class FakeChromaClient:
+    """The chromadb client calls ChromaManager makes, over a dict of collection counts."""
+
+    def __init__(self, **counts):
+        self.collections = {name: FakeCollection(count) for name, count in counts.items()}
+
+    def get_collection(self, name):
+        if name not in self.collections:
+            raise ValueError(f"Collection {name} does not exist.")
+        return self.collections[name]
+
+    def get_or_create_collection(self, name, metadata=None):
+        return self.collections.setdefault(name, FakeCollection(0))
+
+
+class FakeCollection:
+    def __init__(self, count):
+        self._count = count
+
+    def count(self):
+        return self._count
+
+    def get(self, where=None, limit=None, offset=None, include=None):
+        return {"ids": [f"id{i}" for i in range(offset, min(offset + limit, self._count))]}
+
+
+@pytest.fixture
+def chroma(tmp_path, monkeypatch):
+    manager = db_manager.ChromaManager.__new__(db_manager.ChromaManager)
+    manager.client = FakeChromaClient(project_p1=3)
+    manager.versions = db_manager.CollectionVersions(tmp_path / "collection_versions.db")
+    manager.versions.bump("project_p1")
+    monkeypatch.setattr(server, "db_manager", manager)
+    return manager
+
+
+def test_version_of_missing_collection_does_not_create_it(chroma):
+    client = server.app.test_client()
+
+    response = client.post("/collection_version", json={"collection_name": "project_nope"})
+    assert response.status_code == 200
+    assert (response.json["version"], response.json["count"]) == (0, 0)
+    assert "project_nope" not in chroma.client.collections
+
+    existing = client.post("/collection_version", json={"collection_name": "project_p1"}).json
+    assert (existing["version"], existing["count"]) == (1, 3)
+
+
+def test_export_of_missing_collection_is_empty(chroma):
+    response = server.app.test_client().post("/export", json={"collection_name": "project_nope"})
+
+    assert response.status_code == 200
+    assert (response.json["ids"], response.json["next_cursor"]) == ([], None)
+    assert "project_nope" not in chroma.client.collections
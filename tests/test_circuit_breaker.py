@@ -0,0 +1,206 @@
+"""
+Tests for the sliding-window CircuitBreaker and the per-group breakers of
+ResilientServiceClient (backend/service_utils.py).
+"""
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("requests")
+
+# Backend modules import each other by bare name
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend'))
+
+import service_utils
+from service_utils import CircuitBreaker, CircuitState, ResilientServiceClient
+
+
+class FakeTime:
+    """Stands in for the time module inside service_utils."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeTime()
+    monkeypatch.setattr(service_utils, "time", clock)
+    return clock
+
+
+def _open(breaker):
+    while breaker.state != CircuitState.OPEN:
+        breaker.record_failure()
+
+
+def test_rates_are_judged_over_the_window_only(clock):
+    breaker = CircuitBreaker("svc", window_size=4, minimum_calls=4, failure_rate_threshold=0.5)
+    for failed in (False, True, False, False, False, False, True):
+        breaker.record_failure() if failed else breaker.record_success()
+        assert breaker.state == CircuitState.CLOSED
+
+    # 3 of 8 calls failed overall, but 2 of the last 4
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_rates_wait_for_minimum_calls(clock):
+    breaker = CircuitBreaker("svc", window_size=10, minimum_calls=4)
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_slow_calls_open_the_circuit(clock):
+    breaker = CircuitBreaker("svc", window_size=5, minimum_calls=5,
+                             slow_call_duration=2.0, slow_call_rate_threshold=0.8)
+    for duration in (3.0, 0.1, 3.0, 3.0):
+        breaker.record_success(duration)
+    assert breaker.state == CircuitState.CLOSED
+
+    breaker.record_success(2.0)
+    assert breaker.state == CircuitState.OPEN
+    assert breaker.get_status()["total_slow_calls"] == 4
+
+
+def test_open_half_open_closed(clock):
+    breaker = CircuitBreaker("svc", window_size=4, minimum_calls=2, recovery_timeout=30)
+    _open(breaker)
+
+    clock.now += 29
+    assert not breaker.allow_request()
+    assert breaker.get_status()["rejected_calls"] == 1
+
+    clock.now += 1
+    assert breaker.allow_request()
+    assert breaker.state == CircuitState.HALF_OPEN
+    # Only one trial call at a time
+    assert not breaker.allow_request()
+
+    breaker.record_success(0.1)
+    assert breaker.state == CircuitState.CLOSED
+    assert breaker.get_status()["window_calls"] == 0
+    assert [(t["from"], t["to"]) for t in breaker.get_status()["transitions"]] == [
+        ("closed", "open"), ("open", "half_open"), ("half_open", "closed")
+    ]
+
+
+def test_failed_trial_reopens_and_restarts_the_timer(clock):
+    breaker = CircuitBreaker("svc", window_size=4, minimum_calls=2, recovery_timeout=30)
+    _open(breaker)
+    clock.now += 30
+    assert breaker.allow_request()
+
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+    clock.now += 29
+    assert not breaker.allow_request()
+    clock.now += 1
+    assert breaker.allow_request()
+
+
+def test_slow_trial_reopens(clock):
+    breaker = CircuitBreaker("svc", window_size=4, minimum_calls=2, recovery_timeout=30, slow_call_duration=1.0)
+    _open(breaker)
+    clock.now += 30
+    assert breaker.allow_request()
+
+    breaker.record_success(5.0)
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_release_frees_the_trial_slot(clock):
+    breaker = CircuitBreaker("svc", window_size=4, minimum_calls=2, recovery_timeout=30)
+    _open(breaker)
+    clock.now += 30
+    assert breaker.allow_request()
+
+    breaker.release()
+    assert breaker.state == CircuitState.HALF_OPEN
+    assert breaker.allow_request()
+
+
+def test_consecutive_failures_open_before_the_window_fills(clock):
+    breaker = CircuitBreaker("svc", window_size=20, minimum_calls=20, consecutive_failure_threshold=3)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == CircuitState.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+
+
+def test_client_failure_threshold_counts_consecutive_failures(clock):
+    client = ResilientServiceClient("http://svc", service_name="Svc", failure_threshold=3, minimum_calls=10,
+                                    endpoint_groups={"bulk": ["/export"]},
+                                    group_settings={"bulk": {"consecutive_failure_threshold": None}})
+    breaker = client.get_breaker("/query")
+    assert breaker.consecutive_failure_threshold == 3
+    assert breaker.minimum_calls == 10
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.state == CircuitState.OPEN
+
+    # Groups have their own breaker and settings
+    bulk = client.get_breaker("/export/page")
+    assert bulk is not breaker and bulk.name == "Svc/bulk"
+    assert bulk.consecutive_failure_threshold is None
+    assert bulk.state == CircuitState.CLOSED
+
+
+def test_concurrent_records_are_all_counted():
+    breaker = CircuitBreaker("svc", window_size=50, minimum_calls=10_000)
+    barrier = threading.Barrier(8)
+
+    def record(index):
+        barrier.wait()
+        for _ in range(500):
+            breaker.record_failure() if index % 2 else breaker.record_success()
+
+    threads = [threading.Thread(target=record, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    status = breaker.get_status()
+    assert (status["total_calls"], status["total_failures"]) == (4000, 2000)
+    assert status["window_calls"] == 50
+    assert breaker.state == CircuitState.CLOSED
+
+
+def test_concurrent_half_open_admits_only_max_calls(clock):
+    breaker = CircuitBreaker("svc", window_size=4, minimum_calls=2, recovery_timeout=30, half_open_max_calls=2)
+    _open(breaker)
+    clock.now += 30
+    barrier = threading.Barrier(16)
+    admitted = []
+
+    def trial():
+        barrier.wait()
+        admitted.append(breaker.allow_request())
+
+    threads = [threading.Thread(target=trial) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert admitted.count(True) == 2
+    assert breaker.get_status()["rejected_calls"] == 14
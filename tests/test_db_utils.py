@@ -0,0 +1,76 @@
+"""
+Tests for the shared SQLite access layer (backend/db_utils.py).
+"""
+import sys
+import threading
+from pathlib import Path
+
+# Backend modules import each other by bare name
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend'))
+
+from db_utils import add_query_listener, get_database, remove_query_listener
+
+
+def test_same_file_shares_one_database(tmp_path):
+    db = get_database(tmp_path / "shared.db")
+
+    assert get_database(str(tmp_path / "shared.db")) is db
+    assert get_database(tmp_path / "other.db") is not db
+
+
+def test_connection_is_reused_per_thread(tmp_path):
+    db = get_database(tmp_path / "threads.db")
+    main = db.connection()
+    assert db.connection() is main
+
+    other = []
+    thread = threading.Thread(target=lambda: other.append(db.connection()))
+    thread.start()
+    thread.join()
+    assert other[0] is not main
+
+
+def test_connection_is_tuned_for_concurrent_access(tmp_path):
+    conn = get_database(tmp_path / "pragmas.db").connection()
+
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] > 0
+    assert conn.execute("SELECT 1 AS one").fetchone()["one"] == 1
+
+
+def test_transaction_context_keeps_connection_open(tmp_path):
+    db = get_database(tmp_path / "tx.db")
+    with db.connection() as conn:
+        conn.execute("CREATE TABLE items (name TEXT)")
+        conn.execute("INSERT INTO items VALUES ('a')")
+
+    try:
+        with db.connection() as conn:
+            conn.execute("INSERT INTO items VALUES ('b')")
+            raise RuntimeError("roll back")
+    except RuntimeError:
+        pass
+    assert [row["name"] for row in db.connection().execute("SELECT name FROM items")] == ["a"]
+
+
+def test_query_listener_sees_statements(tmp_path):
+    conn = get_database(tmp_path / "listen.db").connection()
+    seen = []
+    listener = lambda path, sql, duration: seen.append((path, sql))
+    add_query_listener(listener)
+    try:
+        conn.execute("SELECT 42")
+    finally:
+        remove_query_listener(listener)
+    conn.execute("SELECT 43")
+
+    assert seen == [(str(tmp_path / "listen.db"), "SELECT 42")]
+
+
+def test_close_all_reopens_on_next_use(tmp_path):
+    db = get_database(tmp_path / "close.db")
+    first = db.connection()
+    db.close_all()
+
+    assert db.connection() is not first
+    assert db.connection().execute("SELECT 1").fetchone()[0] == 1
@@ -0,0 +1,156 @@
+"""
+Tests for the bulk /save_files endpoint of the filesystem server: atomic swap,
+deletes and single-call rollback (filesystem_server/app.py).
+"""
+import importlib.util
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("chardet")
+pytest.importorskip("requests")
+
+SERVER_DIR = Path(__file__).parent.parent / 'filesystem_server'
+TOKEN = "test-internal-token"
+HEADERS = {"X-INTERNAL-TOKEN": TOKEN, "X-User-ID": "user"}
+
+
+def _load_server():
+    """Import filesystem_server/app.py under its own name (every service has an app.py)."""
+    sys.path.insert(0, str(SERVER_DIR))
+    spec = importlib.util.spec_from_file_location("filesystem_server_app", SERVER_DIR / "app.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+try:
+    server = _load_server()
+except SyntaxError as e:
+    pytest.skip(f"filesystem_server does not import: {e}", allow_module_level=True)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setitem(server.app.config, "PROJECTS_FOLDER", str(tmp_path))
+    monkeypatch.setattr(server, "STAGING_FOLDER", str(tmp_path / ".staging"))
+    monkeypatch.setattr(server, "INTERNAL_TOKEN_ENV", TOKEN)
+    monkeypatch.setattr(sys.modules["service_utils"], "INTERNAL_TOKEN", TOKEN)
+    return server.app.test_client()
+
+
+def _wiki(tmp_path):
+    return tmp_path / "user" / "p1" / "wiki"
+
+
+def _save(client, files, **options):
+    body = {"project_id": "p1", "files": [{"file_path": path, "content": content} for path, content in files]}
+    body.update(options)
+    return client.post("/save_files", json=body, headers=HEADERS)
+
+
+def _contents(directory):
+    return {path.name: path.read_text() for path in sorted(directory.iterdir())}
+
+
+def test_requires_internal_token(client):
+    response = client.post("/save_files", json={"project_id": "p1", "files": []}, headers={"X-User-ID": "user"})
+
+    assert response.status_code == 403
+
+
+def test_plain_save_reports_each_file(client, tmp_path):
+    response = _save(client, [("notes/a.md", "A"), ("../escape.md", "X"), ("", "Y")])
+
+    assert response.status_code == 200
+    assert response.json["saved"] == [{"file_path": "notes/a.md", "size": 1}]
+    assert len(response.json["failed"]) == 2
+    assert (tmp_path / "user" / "p1" / "notes" / "a.md").read_text() == "A"
+
+
+def test_atomic_save_swaps_directory_and_deletes(client, tmp_path):
+    first = _save(client, [("wiki/a.md", "A1"), ("wiki/b.md", "B1")], atomic=True)
+    assert first.status_code == 200
+    assert first.json["directory"] == "wiki"
+    assert _contents(_wiki(tmp_path)) == {"a.md": "A1", "b.md": "B1"}
+
+    second = _save(client, [("wiki/a.md", "A2"), ("wiki/c.md", "C2")], atomic=True,
+                   delete=["wiki/b.md", "wiki/missing.md"])
+    assert second.status_code == 200
+    assert second.json["deleted"] == ["wiki/b.md"]
+    assert _contents(_wiki(tmp_path)) == {"a.md": "A2", "c.md": "C2"}
+    assert not list((tmp_path / ".staging" / "user" / "p1").glob("*.staging"))
+
+
+def test_rollback_restores_previous_version_in_one_call(client, tmp_path):
+    _save(client, [("wiki/a.md", "A1"), ("wiki/b.md", "B1")], atomic=True)
+    second = _save(client, [("wiki/a.md", "A2")], atomic=True, delete=["wiki/b.md"])
+
+    response = client.delete(f"/save_files/p1/{second.json['save_id']}", headers=HEADERS)
+    assert response.status_code == 200
+    assert _contents(_wiki(tmp_path)) == {"a.md": "A1", "b.md": "B1"}
+
+    response = client.delete(f"/save_files/p1/{second.json['save_id']}", headers=HEADERS)
+    assert response.status_code == 404
+
+
+def test_rolling_back_first_save_removes_directory(client, tmp_path):
+    first = _save(client, [("wiki/a.md", "A1")], atomic=True)
+
+    assert client.delete(f"/save_files/p1/{first.json['save_id']}", headers=HEADERS).status_code == 200
+    assert not _wiki(tmp_path).exists()
+
+
+def test_only_latest_save_can_be_rolled_back(client, tmp_path):
+    first = _save(client, [("wiki/a.md", "A1")], atomic=True)
+    _save(client, [("wiki/a.md", "A2")], atomic=True)
+
+    response = client.delete(f"/save_files/p1/{first.json['save_id']}", headers=HEADERS)
+    assert response.status_code == 409
+    assert _contents(_wiki(tmp_path)) == {"a.md": "A2"}
+
+
+def test_invalid_atomic_save_writes_nothing(client, tmp_path):
+    _save(client, [("wiki/a.md", "A1")], atomic=True)
+
+    response = _save(client, [("wiki/a.md", "A2"), ("notes/b.md", "B")], atomic=True, directory="wiki")
+    assert response.status_code == 400
+    assert response.json["saved"] == []
+    assert _contents(_wiki(tmp_path)) == {"a.md": "A1"}
+
+    response = _save(client, [], atomic=True, directory="wiki", delete=["notes/b.md"])
+    assert response.status_code == 400
+
+
+def test_delete_requires_atomic(client, tmp_path):
+    _save(client, [("wiki/a.md", "A1")], atomic=True)
+
+    response = _save(client, [("wiki/b.md", "B")], delete=["wiki/a.md"])
+    assert response.status_code == 400
+    assert _contents(_wiki(tmp_path)) == {"a.md": "A1"}
+
+
+def test_atomic_save_needs_one_subdirectory(client, tmp_path):
+    response = _save(client, [("wiki/a.md", "A"), ("notes/b.md", "B")], atomic=True)
+
+    assert response.status_code == 400
+    assert not (tmp_path / "user").exists()
+
+
+def test_single_file_save_waits_for_atomic_save(client, tmp_path):
+    with server.app.test_request_context(headers=HEADERS):
+        server.g.user_id = "user"
+        with server._project_save_lock("p1"):
+            writer = threading.Thread(target=lambda: client.post(
+                "/save_file", json={"project_id": "p1", "file_path": "wiki/late.md", "content": "L"},
+                headers=HEADERS))
+            writer.start()
+            writer.join(0.3)
+            assert writer.is_alive()
+            assert not (_wiki(tmp_path) / "late.md").exists()
+    writer.join()
+
+    assert (_wiki(tmp_path) / "late.md").read_text() == "L"
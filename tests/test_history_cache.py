@@ -0,0 +1,132 @@
+"""
+Tests for the hot history cache (backend/session_manager.py).
+"""
+import sys
+import time
+from pathlib import Path
+
+# Backend modules import each other by bare name
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend'))
+
+from session_manager import HistoryCache, SessionManager
+
+KEY = ("project", "user")
+
+
+def _rows(count, start=1):
+    """(id, role, content) rows in chronological order."""
+    return [(i, "user" if i % 2 else "model", f"message {i}") for i in range(start, start + count)]
+
+
+def test_ring_buffer_keeps_newest_messages():
+    cache = HistoryCache(capacity=4)
+    cache.fill(KEY, _rows(3), cache.generation(KEY))
+    cache.append(KEY, [("user", "message 4"), ("model", "message 5")], 5)
+
+    messages, last_id = cache.get(KEY, 4)
+    assert [content for _, content in messages] == ["message 2", "message 3", "message 4", "message 5"]
+    assert last_id == 5
+
+
+def test_complete_conversation_answers_any_limit():
+    cache = HistoryCache(capacity=4)
+    cache.fill(KEY, _rows(2), cache.generation(KEY))
+
+    messages, _ = cache.get(KEY, 10)
+    assert len(messages) == 2
+
+
+def test_truncated_conversation_misses_larger_limit():
+    cache = HistoryCache(capacity=4)
+    cache.fill(KEY, _rows(6), cache.generation(KEY))
+
+    assert cache.get(KEY, 4) is not None
+    assert cache.get(KEY, 5) is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_overflowing_append_marks_buffer_incomplete():
+    cache = HistoryCache(capacity=2)
+    cache.fill(KEY, _rows(1), cache.generation(KEY))
+    cache.append(KEY, [("model", "message 2"), ("user", "message 3")], 3)
+
+    assert cache.get(KEY, 2) is not None
+    assert cache.get(KEY, 3) is None
+
+
+def test_append_to_cold_conversation_is_ignored():
+    cache = HistoryCache(capacity=4)
+    cache.append(KEY, [("user", "hello")], 1)
+
+    assert cache.get(KEY, 1) is None
+    assert cache.stats()["conversations"] == 0
+
+
+def test_stale_fill_is_discarded():
+    cache = HistoryCache(capacity=4)
+    generation = cache.generation(KEY)
+    cache.invalidate(KEY)  # A write landed while the rows were being read
+    cache.fill(KEY, _rows(2), generation)
+
+    assert cache.get(KEY, 1) is None
+
+
+def test_least_recently_used_conversation_is_evicted_by_bytes():
+    # Each fill below holds two 9-byte messages
+    cache = HistoryCache(capacity=4, max_bytes=40)
+    for project in ("a", "b"):
+        key = (project, "user")
+        cache.fill(key, _rows(2), cache.generation(key))
+    cache.get(("a", "user"), 1)  # "a" becomes most recently used
+    cache.fill(("c", "user"), _rows(2), cache.generation(("c", "user")))
+
+    assert cache.get(("b", "user"), 1) is None
+    assert cache.get(("a", "user"), 1) is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= 40
+
+
+def test_session_manager_serves_history_from_cache(tmp_path):
+    manager = SessionManager(db_path=str(tmp_path / "sessions.db"), history_cache=HistoryCache(capacity=4))
+    manager.add_turn("project", "user", "first question", "first answer")
+    assert [m["parts"][0]["text"] for m in manager.get_recent_history("project", "user")] == [
+        "first question", "first answer"
+    ]
+
+    manager.add_turn("project", "user", "second question", "second answer")
+    history = manager.get_recent_history("project", "user", limit=3)
+    assert [m["parts"][0]["text"] for m in history] == ["first answer", "second question", "second answer"]
+    assert [m["role"] for m in history] == ["model", "user", "model"]
+    assert manager.history_cache.stats()["hits"] >= 1
+
+    manager.clear_history("project", "user")
+    assert manager.get_recent_history("project", "user") == []
+
+
+def test_validation_picks_up_writes_from_another_process(tmp_path):
+    db_path = str(tmp_path / "sessions.db")
+    reader = SessionManager(db_path=db_path, history_cache=HistoryCache(capacity=4), validate_interval=0.01)
+    writer = SessionManager(db_path=db_path, history_cache=HistoryCache(capacity=4))
+    writer.add_turn("project", "user", "question", "answer")
+    assert len(reader.get_recent_history("project", "user")) == 2
+
+    writer.add_turn("project", "user", "another question", "another answer")
+    time.sleep(0.02)
+    assert len(reader.get_recent_history("project", "user")) == 4
+
+
+def test_validation_picks_up_clear_from_another_process(tmp_path):
+    db_path = str(tmp_path / "sessions.db")
+    reader = SessionManager(db_path=db_path, history_cache=HistoryCache(capacity=4), validate_interval=0.01)
+    writer = SessionManager(db_path=db_path, history_cache=HistoryCache(capacity=4))
+    writer.add_turn("project", "user", "question", "answer")
+    assert len(reader.get_recent_history("project", "user")) == 2
+
+    writer.clear_history("project", "user")
+    time.sleep(0.02)
+    assert reader.get_recent_history("project", "user") == []
+
+
+def test_validation_is_on_by_default(tmp_path):
+    # Every gunicorn worker has its own cache; never trust it indefinitely
+    assert SessionManager(db_path=str(tmp_path / "sessions.db")).validate_interval > 0
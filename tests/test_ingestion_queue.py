@@ -0,0 +1,142 @@
+"""
+Tests for lease-based claiming in the ingestion queue (backend/session_manager.py).
+"""
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+# Backend modules import each other by bare name
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend'))
+
+import ingestion_wakeup
+from session_manager import SessionManager
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return SessionManager(db_path=str(tmp_path / "sessions.db"))
+
+
+def _expire_leases(manager):
+    """Simulate crashed workers: every live lease runs out."""
+    with sqlite3.connect(manager.db_path) as conn:
+        conn.execute(
+            "UPDATE ingestion_queue SET lease_expires_at = datetime('now', '-1 seconds') WHERE status = 'processing'"
+        )
+
+
+def _status(manager, message_id):
+    with sqlite3.connect(manager.db_path) as conn:
+        return conn.execute("SELECT status FROM ingestion_queue WHERE message_id = ?", (message_id,)).fetchone()[0]
+
+
+def test_claim_is_exclusive_and_fifo(manager):
+    for message_id, project_id in (("m1", "a"), ("m2", "b"), ("m3", "a")):
+        manager.add_to_ingestion_queue(message_id, project_id, "user")
+
+    claimed = manager.claim_ingestions("worker-1", limit=10)
+    assert [record["message_id"] for record in claimed] == ["m1", "m2", "m3"]
+    assert all(record["attempts"] == 1 for record in claimed)
+    assert manager.claim_ingestions("worker-2", limit=10) == []
+
+
+def test_duplicate_message_is_not_queued_twice(manager):
+    assert manager.add_to_ingestion_queue("m1", "a", "user")
+    assert not manager.add_to_ingestion_queue("m1", "a", "user")
+
+
+def test_failed_wakeup_does_not_fail_the_enqueue(manager, monkeypatch):
+    listener = ingestion_wakeup.create_listener(manager.wakeup_dir, "worker")
+    if listener is None:
+        pytest.skip("wakeup sockets unsupported here")
+
+    def no_descriptors(*args, **kwargs):
+        raise OSError(24, "Too many open files")
+
+    try:
+        monkeypatch.setattr(ingestion_wakeup.socket, "socket", no_descriptors)
+        assert manager.add_to_ingestion_queue("m1", "a", "user")
+    finally:
+        monkeypatch.undo()
+        listener.close()
+    assert _status(manager, "m1") == "pending"
+
+
+def test_live_lease_keeps_project_exclusive(manager):
+    manager.add_to_ingestion_queue("m1", "a", "user")
+    manager.claim_ingestions("worker-1", limit=1)
+    manager.add_to_ingestion_queue("m2", "a", "user")
+    manager.add_to_ingestion_queue("m3", "b", "user")
+
+    claimed = manager.claim_ingestions("worker-2", limit=10)
+    assert [record["message_id"] for record in claimed] == ["m3"]
+
+
+def test_expired_lease_is_reclaimed(manager):
+    manager.add_to_ingestion_queue("m1", "a", "user")
+    manager.claim_ingestions("worker-1", limit=1, max_attempts=3)
+    _expire_leases(manager)
+
+    claimed = manager.claim_ingestions("worker-2", limit=1, max_attempts=3)
+    assert [record["message_id"] for record in claimed] == ["m1"]
+    assert claimed[0]["attempts"] == 2
+    # The crashed worker's late result is fenced off
+    assert not manager.mark_ingestion_complete(claimed[0]["id"], worker_id="worker-1")
+    assert manager.mark_ingestion_complete(claimed[0]["id"], worker_id="worker-2")
+    assert _status(manager, "m1") == "complete"
+
+
+def test_expired_lease_on_final_attempt_is_dead_lettered(manager):
+    manager.add_to_ingestion_queue("m1", "a", "user")
+    manager.claim_ingestions("worker-1", limit=1, max_attempts=1)
+    _expire_leases(manager)
+
+    assert manager.claim_ingestions("worker-2", limit=1, max_attempts=1) == []
+    assert _status(manager, "m1") == "dead"
+
+
+def test_failed_attempt_waits_out_backoff_then_dead_letters(manager):
+    manager.add_to_ingestion_queue("m1", "a", "user")
+    record = manager.claim_ingestions("worker-1", limit=1, max_attempts=2)[0]
+
+    assert manager.fail_ingestion(record["id"], "boom", max_attempts=2, worker_id="worker-1") == "pending"
+    assert manager.claim_ingestions("worker-1", limit=1, max_attempts=2) == []
+
+    with sqlite3.connect(manager.db_path) as conn:
+        conn.execute("UPDATE ingestion_queue SET next_attempt_at = datetime('now', '-1 seconds')")
+    record = manager.claim_ingestions("worker-1", limit=1, max_attempts=2)[0]
+    assert manager.fail_ingestion(record["id"], "boom", max_attempts=2, worker_id="worker-1") == "dead"
+    assert manager.get_ingestion_stats()["counts"] == {"dead": 1}
+
+
+
+def test_project_waits_behind_message_awaiting_retry(manager):
+    for message_id, project_id in (("m1", "a"), ("m2", "a"), ("m3", "b")):
+        manager.add_to_ingestion_queue(message_id, project_id, "user")
+    record = manager.claim_ingestions("worker-1", limit=1)[0]
+    manager.fail_ingestion(record["id"], "boom", worker_id="worker-1")
+
+    claimed = manager.claim_ingestions("worker-1", limit=10)
+    assert [record["message_id"] for record in claimed] == ["m3"]
+
+    with sqlite3.connect(manager.db_path) as conn:
+        conn.execute("UPDATE ingestion_queue SET next_attempt_at = datetime('now', '-1 seconds')")
+    claimed = manager.claim_ingestions("worker-1", limit=10)
+    assert [record["message_id"] for record in claimed] == ["m1", "m2"]
+
+
+def test_step_outcomes_survive_retries(manager):
+    manager.add_to_ingestion_queue("m1", "a", "user")
+    record = manager.claim_ingestions("worker-1", limit=1)[0]
+    status = manager.record_ingestion_attempt(
+        record["id"], {"file": True, "vector": True, "git": False}, "git down", worker_id="worker-1"
+    )
+    assert status == "pending"
+
+    with sqlite3.connect(manager.db_path) as conn:
+        conn.execute("UPDATE ingestion_queue SET next_attempt_at = datetime('now', '-1 seconds')")
+    record = manager.claim_ingestions("worker-1", limit=1)[0]
+    assert (record["file_status"], record["vector_status"], record["git_status"]) == ("done", "done", "failed")
+    assert manager.record_ingestion_attempt(record["id"], {"git": True}, worker_id="worker-1") == "complete"
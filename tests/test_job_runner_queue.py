@@ -0,0 +1,203 @@
+"""
+Tests for the out-of-process runner queue: claim_jobs, heartbeat and orphan
+requeue (backend/job_manager.py).
+"""
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+# Backend modules import each other by bare name
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend'))
+
+import job_manager as job_manager_module
+from job_manager import (
+    JobManager, PRIORITY_MAINTENANCE, STATUS_COMPLETED, STATUS_FAILED, STATUS_PROCESSING, STATUS_QUEUED
+)
+
+TASK = "wiki_tasks:generate"
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = JobManager(db_path=str(tmp_path / "jobs.db"), max_workers=1, max_per_user=1, max_per_project=2)
+    yield manager
+    manager.executor.shutdown(wait=False)
+
+
+def _runner_job(manager, user_id="alice", project_id="p1", job_type="wiki_generation", **kwargs):
+    return manager.create_job(project_id, user_id, job_type, task=TASK,
+                              task_args=[project_id], task_kwargs={"force": True}, **kwargs)
+
+
+def _expire_leases(manager):
+    """Simulate crashed runners: every live lease runs out."""
+    with sqlite3.connect(manager.db_path) as conn:
+        conn.execute("UPDATE jobs SET lease_expires_at = datetime('now', '-1 seconds') WHERE claimed_by IS NOT NULL")
+
+
+def _status(manager, job_id):
+    return manager.get_job(job_id, "", any_user=True)["status"]
+
+
+def test_claim_decodes_task_payload(manager):
+    job_id = _runner_job(manager)
+
+    [job] = manager.claim_jobs("runner-1")
+    assert (job["job_id"], job["task"], job["args"], job["kwargs"]) == (job_id, TASK, ["p1"], {"force": True})
+    assert job["status"] == STATUS_PROCESSING and job["attempts"] == 1
+    assert manager.claim_jobs("runner-2") == []
+
+
+def test_claim_follows_priority_then_fifo(manager):
+    background = _runner_job(manager, user_id="alice", project_id="p1", priority=PRIORITY_MAINTENANCE)
+    first = _runner_job(manager, user_id="bob", project_id="p2")
+    second = _runner_job(manager, user_id="carol", project_id="p3")
+
+    claimed = [job["job_id"] for runner in ("runner-1", "runner-2", "runner-3")
+               for job in manager.claim_jobs(runner)]
+    assert claimed == [first, second, background]
+
+
+def test_claim_skips_capped_user(manager):
+    _runner_job(manager, user_id="alice")
+    manager.claim_jobs("runner-1")
+    _runner_job(manager, user_id="alice")
+    other = _runner_job(manager, user_id="bob")
+
+    assert [job["job_id"] for job in manager.claim_jobs("runner-2", limit=5)] == [other]
+
+
+def test_claim_skips_capped_project(manager):
+    _runner_job(manager, user_id="alice")
+    _runner_job(manager, user_id="bob")
+    manager.claim_jobs("runner-1", limit=2)
+    _runner_job(manager, user_id="carol")
+
+    assert manager.claim_jobs("runner-2") == []
+
+
+def test_claim_filters_job_types(manager):
+    _runner_job(manager, job_type="wiki_generation")
+    parse = _runner_job(manager, job_type="document_parse")
+
+    assert [job["job_id"] for job in manager.claim_jobs("runner-1", job_types=["document_parse"])] == [parse]
+
+
+def test_heartbeat_and_finish_are_fenced_on_the_lease(manager):
+    job_id = _runner_job(manager)
+    manager.claim_jobs("runner-1")
+    assert manager.heartbeat(job_id, "runner-1")
+    assert not manager.heartbeat(job_id, "runner-2")
+
+    _expire_leases(manager)
+    assert manager.requeue_orphaned_jobs() == (1, 0)
+    manager.claim_jobs("runner-2")
+    assert not manager.heartbeat(job_id, "runner-1")
+    assert not manager.finish_claimed_job(job_id, "runner-1", STATUS_COMPLETED, result={"ok": 1})
+    assert manager.finish_claimed_job(job_id, "runner-2", STATUS_COMPLETED, result={"ok": 2})
+    assert _status(manager, job_id) == STATUS_COMPLETED
+
+
+def test_orphan_is_failed_after_max_attempts(manager):
+    job_id = _runner_job(manager)
+    for attempt in range(2):
+        assert manager.claim_jobs(f"runner-{attempt}")
+        _expire_leases(manager)
+        manager.requeue_orphaned_jobs(max_attempts=2)
+
+    assert _status(manager, job_id) == STATUS_FAILED
+    assert manager.claim_jobs("runner-3") == []
+
+
+def test_live_lease_is_not_requeued(manager):
+    job_id = _runner_job(manager)
+    manager.claim_jobs("runner-1")
+
+    assert manager.requeue_orphaned_jobs() == (0, 0)
+    assert _status(manager, job_id) == STATUS_PROCESSING
+
+
+def test_duplicate_job_is_coalesced_until_it_finishes(manager):
+    job_id, created = manager.find_or_create_job("p1", "alice", "wiki_generation", "p1:wiki:v1", task=TASK)
+    assert created
+    assert manager.find_or_create_job("p1", "bob", "wiki_generation", "p1:wiki:v1", task=TASK) == (job_id, False)
+
+    manager.claim_jobs("runner-1")
+    manager.finish_claimed_job(job_id, "runner-1", STATUS_COMPLETED)
+    new_id, created = manager.find_or_create_job("p1", "bob", "wiki_generation", "p1:wiki:v1", task=TASK)
+    assert created and new_id != job_id
+
+
+def test_in_process_job_of_lost_process_is_failed(manager):
+    job_id, _ = manager.find_or_create_job("p1", "alice", "wiki_generation", "p1:wiki:v1")
+    assert manager.requeue_orphaned_jobs() == (0, 0)
+
+    _expire_leases(manager)
+    assert manager.requeue_orphaned_jobs() == (0, 1)
+    assert _status(manager, job_id) == STATUS_FAILED
+    # The dedupe key is free again
+    assert manager.find_or_create_job("p1", "alice", "wiki_generation", "p1:wiki:v1")[1]
+
+
+def _succeed():
+    return {"files": 2}
+
+
+def _fail():
+    raise RuntimeError("boom")
+
+
+def test_job_process_records_status_without_recovery(manager, monkeypatch):
+    # Another API process's job whose lease ran out must be left to the API processes
+    lost_id = manager.create_job("p2", "bob", "wiki_generation")
+    _expire_leases(manager)
+    done_id = manager.create_job("p1", "alice", "wiki_generation")
+    failed_id = manager.create_job("p1", "alice", "wiki_generation")
+    monkeypatch.setattr(JobManager, "__init__", lambda *args, **kwargs: pytest.fail("JobManager built in child"))
+
+    job_manager_module._run_job_in_process(str(manager.db_path), done_id, _succeed, (), {})
+    with pytest.raises(SystemExit):
+        job_manager_module._run_job_in_process(str(manager.db_path), failed_id, _fail, (), {})
+
+    assert _status(manager, done_id) == STATUS_COMPLETED
+    assert manager.get_job(done_id, "alice")["result"] == {"files": 2}
+    assert manager.get_job(failed_id, "alice")["error"] == "boom"
+    assert _status(manager, lost_id) == STATUS_QUEUED
+
+
+def test_wiki_generation_runs_on_runners_by_default(manager):
+    assert manager.uses_runner("wiki_generation")
+    assert not manager.uses_runner("entity_extraction")
+
+
+def _checkpoint_count(manager, job_id):
+    with sqlite3.connect(manager.db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM job_checkpoints WHERE job_id = ?", (job_id,)).fetchone()[0]
+
+
+def test_failed_runner_job_keeps_checkpoints_and_can_be_retried(manager):
+    job_id = _runner_job(manager)
+    manager.claim_jobs("runner-1")
+    manager.save_checkpoint(job_id, "fetch_documents", {"chunks": {}})
+    manager.finish_claimed_job(job_id, "runner-1", STATUS_FAILED, error="save failed")
+
+    assert manager.retry_job(job_id, "alice")
+    assert _status(manager, job_id) == STATUS_QUEUED
+    assert manager.load_checkpoint(job_id, "fetch_documents") == {"chunks": {}}
+
+
+def test_ended_in_process_job_drops_its_checkpoints(manager):
+    failed_id = manager.create_job("p1", "alice", "wiki_generation")
+    manager.save_checkpoint(failed_id, "fetch_documents", {"chunks": {}})
+    manager._update_job_status(failed_id, STATUS_FAILED, error="boom")
+
+    assert _checkpoint_count(manager, failed_id) == 0
+    assert not manager.retry_job(failed_id, "alice")
+
+    lost_id = manager.create_job("p1", "alice", "wiki_generation")
+    manager.save_checkpoint(lost_id, "fetch_documents", {"chunks": {}})
+    _expire_leases(manager)
+    manager.requeue_orphaned_jobs()
+    assert _checkpoint_count(manager, lost_id) == 0
@@ -0,0 +1,117 @@
+"""
+Tests for JobManager scheduling (priority classes, aging, fair share and caps)
+and for the progress and checkpoints of resumable jobs (backend/job_manager.py).
+"""
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+
+# Backend modules import each other by bare name
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend'))
+
+from job_manager import (
+    JobManager, _QueuedJob, PRIORITY_INTERACTIVE, PRIORITY_MAINTENANCE, PRIORITY_REPORT
+)
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = JobManager(db_path=str(tmp_path / "jobs.db"), max_workers=2,
+                         max_per_user=2, max_per_project=2, aging_seconds=600)
+    yield manager
+    manager.executor.shutdown(wait=False)
+
+
+def _job(seq, user_id="alice", project_id="p1", priority=PRIORITY_INTERACTIVE, waited=0):
+    job = _QueuedJob(f"job-{seq}", project_id, user_id, "test", priority, seq, run=lambda: None)
+    job.enqueued_at = NOW - timedelta(seconds=waited)
+    return job
+
+
+def test_better_priority_class_runs_first(manager):
+    pending = [_job(0, priority=PRIORITY_MAINTENANCE), _job(1, priority=PRIORITY_REPORT),
+               _job(2, priority=PRIORITY_INTERACTIVE)]
+
+    assert manager._pick_next(pending, [], {}, NOW).job_id == "job-2"
+
+
+def test_fifo_within_same_user_and_class(manager):
+    pending = [_job(3), _job(1), _job(2)]
+
+    assert manager._pick_next(pending, [], {}, NOW).job_id == "job-1"
+
+
+def test_waiting_job_is_promoted_one_class_per_interval(manager):
+    report = _job(0, priority=PRIORITY_REPORT, waited=599)
+    interactive = _job(1, priority=PRIORITY_INTERACTIVE)
+    assert manager._pick_next([report, interactive], [], {}, NOW) is interactive
+
+    report.enqueued_at = NOW - timedelta(seconds=600)
+    assert manager._effective_rank(report, NOW) == 0
+    # Tied on rank: the older job wins
+    assert manager._pick_next([report, interactive], [], {}, NOW) is report
+
+
+def test_aging_can_be_disabled(tmp_path):
+    manager = JobManager(db_path=str(tmp_path / "jobs.db"), max_workers=1, aging_seconds=0)
+    try:
+        job = _job(0, priority=PRIORITY_MAINTENANCE, waited=86400)
+        assert manager._effective_rank(job, NOW) == 2
+    finally:
+        manager.executor.shutdown(wait=False)
+
+
+def test_user_with_fewer_running_jobs_goes_first(manager):
+    running = [_job(0, user_id="alice", project_id="p9")]
+    pending = [_job(1, user_id="alice"), _job(2, user_id="bob")]
+
+    assert manager._pick_next(pending, running, {}, NOW).user_id == "bob"
+
+
+def test_user_who_started_least_recently_goes_first(manager):
+    pending = [_job(1, user_id="alice"), _job(2, user_id="bob")]
+    last_started = {"alice": NOW - timedelta(seconds=5), "bob": NOW - timedelta(seconds=60)}
+
+    assert manager._pick_next(pending, [], last_started, NOW).user_id == "bob"
+
+
+def test_capped_user_and_project_are_skipped(manager):
+    running = [_job(0, user_id="alice", project_id="p1"), _job(1, user_id="alice", project_id="p2")]
+    assert manager._pick_next([_job(2, user_id="alice", project_id="p3")], running, {}, NOW) is None
+
+    running = [_job(0, user_id="carol", project_id="p1"), _job(1, user_id="dave", project_id="p1")]
+    pending = [_job(2, user_id="bob", project_id="p1"), _job(3, user_id="bob", project_id="p2")]
+    assert manager._pick_next(pending, running, {}, NOW).job_id == "job-3"
+
+
+def test_checkpoints_survive_a_restart(manager, tmp_path):
+    job_id = manager.create_job("p1", "alice", "wiki_generation")
+    manager.save_checkpoint(job_id, "fetch", {"chunks": 3})
+    manager.save_checkpoint(job_id, "entities", ["Eva"])
+    manager.save_checkpoint(job_id, "fetch", {"chunks": 4})
+
+    restarted = JobManager(db_path=str(tmp_path / "jobs.db"), max_workers=1)
+    try:
+        assert restarted.load_checkpoint(job_id, "fetch") == {"chunks": 4}
+        assert restarted.load_checkpoint(job_id, "missing") is None
+
+        restarted.clear_checkpoints(job_id, ["fetch"])
+        assert restarted.load_checkpoint(job_id, "fetch") is None
+        assert restarted.load_checkpoint(job_id, "entities") == ["Eva"]
+        restarted.clear_checkpoints(job_id)
+        assert restarted.load_checkpoint(job_id, "entities") is None
+    finally:
+        restarted.executor.shutdown(wait=False)
+
+
+def test_progress_is_reported_with_the_job(manager):
+    job_id = manager.create_job("p1", "alice", "wiki_generation")
+    manager.update_progress(job_id, "entities", 2, 5, done=3, total=10)
+
+    progress = manager.get_job(job_id, "alice")["progress"]
+    assert (progress["step"], progress["step_index"], progress["steps_total"]) == ("entities", 2, 5)
+    assert (progress["done"], progress["total"]) == (3, 10)
@@ -0,0 +1,178 @@
+"""
+Tests for incremental AKG runs: the KBManifest of generated sheets and how
+generate_knowledge_base uses it to skip unchanged entities, resume a partial
+run and reuse the Pass 1 entity list
+(src/george/ui/src/george/knowledge_extraction/kb_manifest.py, orchestrator.py).
+"""
+import json
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+# The AKG modules import each other as knowledge_extraction.*
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src' / 'george' / 'ui' / 'src' / 'george'))
+
+kb_manifest = pytest.importorskip("knowledge_extraction.kb_manifest")
+orchestrator = pytest.importorskip("knowledge_extraction.orchestrator")
+KBManifest = kb_manifest.KBManifest
+
+MANUSCRIPT = (
+    "Eva walked into the Citadel at dawn. Zed followed Eva inside.\n\n"
+    "The Citadel was cold, and Eva said nothing."
+)
+TEMPLATES = {key: f"{key} sheet" for key in ("Character", "Location", "Event", "Unique Element")}
+SCOUTED = {"characters": ["Eva", "Zed"], "locations": ["Citadel"], "events": [], "unique_elements": []}
+
+
+class FakeModel:
+    """Stands in for one GeorgeAI model; answers by prompt and records the entities asked about."""
+
+    def __init__(self, role):
+        self.role = role
+        self.calls = []
+        self.failing = set()
+
+    def chat(self, prompt, temperature=None, timeout=None):
+        if self.role == "scout":
+            self.calls.append("scout")
+            return {"success": True, "response": json.dumps(SCOUTED)}
+        if self.role == "researcher":
+            name = re.search(r'the entity: "([^"]+)"', prompt).group(1)
+            self.calls.append(name)
+            return {"success": True, "response": f"Facts about {name}."}
+        batch = re.search(r"The entities are: (\[.*?\])", prompt)
+        names = json.loads(batch.group(1)) if batch else [re.search(r'The entity is: "([^"]+)"', prompt).group(1)]
+        self.calls.extend(names)
+        if not batch:
+            if names[0] in self.failing:
+                return {"success": False, "error": "quota exceeded"}
+            return {"success": True, "response": f"# {names[0]}"}
+        return {"success": True, "response": "\n".join(
+            f"=== SHEET: {name} ===\n# {name}\n=== END SHEET ===" for name in names if name not in self.failing
+        )}
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    (tmp_path / "book.txt").write_text(MANUSCRIPT, encoding="utf-8")
+    monkeypatch.setattr(orchestrator, "read_manuscript_file", lambda path: Path(path).read_text(encoding="utf-8"))
+    return tmp_path
+
+
+def _extractor(project, monkeypatch, templates=TEMPLATES):
+    """A KnowledgeExtractor on fake models (a fresh one per run, as the job creates)."""
+    roles = {"gemini-2.0-flash": "scout", "gemini-2.5-flash": "researcher", "gemini-2.5-pro-latest": "analyst"}
+    monkeypatch.setattr(orchestrator, "create_george_ai", lambda model, use_cloud: FakeModel(roles[model]))
+    monkeypatch.setattr(orchestrator.KnowledgeExtractor, "_load_kb_templates", lambda self: dict(templates))
+    extractor = orchestrator.KnowledgeExtractor(FakeModel("router"), str(project))
+    return extractor, extractor.ai_scout.model, extractor.ai_researcher.model, extractor.ai_analyst.model
+
+
+def test_manifest_tracks_input_template_and_sheet(tmp_path):
+    manifest = KBManifest(tmp_path)
+    (tmp_path / "character_eva.md").write_text("# Eva")
+    manifest.record("character_eva.md", "Eva", "Character", "hash-1", "v1")
+
+    reloaded = KBManifest(tmp_path)
+    assert reloaded.is_current("character_eva.md", "hash-1", "v1")
+    assert not reloaded.is_current("character_eva.md", "hash-2", "v1")
+    assert not reloaded.is_current("character_eva.md", "hash-1", "v2")
+    assert not reloaded.is_current("character_zed.md", "hash-1", "v1")
+
+    (tmp_path / "character_eva.md").unlink()
+    assert not reloaded.is_current("character_eva.md", "hash-1", "v1")
+
+
+def test_pass_1_list_is_kept_per_manuscript(tmp_path):
+    manifest = KBManifest(tmp_path)
+    assert manifest.pass_1_entities("m1") is None
+
+    manifest.record_pass_1("m1", [{"name": "Eva", "type": "Character"}])
+    cached = KBManifest(tmp_path).pass_1_entities("m1")
+    assert cached == [{"name": "Eva", "type": "Character"}]
+    assert KBManifest(tmp_path).pass_1_entities("m2") is None
+
+    # Callers get a copy they can annotate
+    cached[0]["input_hash"] = "x"
+    assert "input_hash" not in manifest.pass_1_entities("m1")[0]
+
+
+def test_unreadable_manifest_is_treated_as_empty(tmp_path):
+    (tmp_path / kb_manifest.MANIFEST_FILENAME).write_text("{not json")
+
+    manifest = KBManifest(tmp_path)
+    assert manifest.entries == {} and manifest.pass_1_entities("m1") is None
+    manifest.record("character_eva.md", "Eva", "Character", "hash-1", "v1")
+    assert json.loads((tmp_path / kb_manifest.MANIFEST_FILENAME).read_text())["entities"]
+
+
+def test_second_run_skips_every_unchanged_entity(project, monkeypatch):
+    extractor, scout, researcher, analyst = _extractor(project, monkeypatch)
+    first = extractor.generate_knowledge_base("book.txt")
+    assert first["files_created"] == 3 and first["entities_skipped"] == 0
+    assert sorted(researcher.calls) == ["Citadel", "Eva", "Zed"]
+    assert sorted(analyst.calls) == ["Citadel", "Eva", "Zed"]
+
+    extractor, scout, researcher, analyst = _extractor(project, monkeypatch)
+    second = extractor.generate_knowledge_base("book.txt")
+    assert second["success"] and second["files_created"] == 0 and second["entities_skipped"] == 3
+    # No Pass 1, 2 or 3 model calls at all
+    assert scout.calls == [] and researcher.calls == [] and analyst.calls == []
+    assert second["pass_1_report"] == {"cached": True, "entities": 3}
+    assert second["pass_3_report"]["entities"] == 0
+
+
+def test_partial_run_resumes_with_the_missing_entities(project, monkeypatch):
+    extractor, _, _, analyst = _extractor(project, monkeypatch)
+    analyst.failing.add("Zed")
+    first = extractor.generate_knowledge_base("book.txt")
+    assert first["files_created"] == 2
+    assert [(f["name"], f["stage"]) for f in first["failed_entities"]] == [("Zed", "pass_3")]
+
+    extractor, scout, researcher, analyst = _extractor(project, monkeypatch)
+    second = extractor.generate_knowledge_base("book.txt")
+    assert second["files_created"] == 1 and second["entities_skipped"] == 2
+    assert scout.calls == [] and researcher.calls == ["Zed"] and analyst.calls == ["Zed"]
+    assert (project / "knowledge_base" / "character_zed.md").read_text() == "# Zed"
+
+
+def test_deleted_sheet_is_regenerated(project, monkeypatch):
+    _extractor(project, monkeypatch)[0].generate_knowledge_base("book.txt")
+    (project / "knowledge_base" / "location_citadel.md").unlink()
+
+    extractor, _, researcher, analyst = _extractor(project, monkeypatch)
+    result = extractor.generate_knowledge_base("book.txt")
+    assert result["files_created"] == 1
+    assert researcher.calls == ["Citadel"] and analyst.calls == ["Citadel"]
+
+
+def test_template_change_regenerates_only_that_type(project, monkeypatch):
+    _extractor(project, monkeypatch)[0].generate_knowledge_base("book.txt")
+
+    extractor, _, researcher, analyst = _extractor(
+        project, monkeypatch, dict(TEMPLATES, Character="Character sheet, with a new field"))
+    result = extractor.generate_knowledge_base("book.txt")
+    assert result["files_created"] == 2 and result["entities_skipped"] == 1
+    assert sorted(researcher.calls) == ["Eva", "Zed"] and sorted(analyst.calls) == ["Eva", "Zed"]
+
+
+def test_changed_manuscript_is_scouted_again(project, monkeypatch):
+    _extractor(project, monkeypatch)[0].generate_knowledge_base("book.txt")
+    (project / "book.txt").write_text(MANUSCRIPT + "\n\nZed left the Citadel.", encoding="utf-8")
+
+    extractor, scout, _, _ = _extractor(project, monkeypatch)
+    result = extractor.generate_knowledge_base("book.txt")
+    assert scout.calls == ["scout"]
+    assert "cached" not in result["pass_1_report"]
+
+
+def test_force_ignores_the_manifest(project, monkeypatch):
+    _extractor(project, monkeypatch)[0].generate_knowledge_base("book.txt")
+
+    extractor, scout, researcher, analyst = _extractor(project, monkeypatch)
+    result = extractor.generate_knowledge_base("book.txt", force=True)
+    assert result["files_created"] == 3 and result["entities_skipped"] == 0
+    assert scout.calls == ["scout"]
+    assert sorted(researcher.calls) == ["Citadel", "Eva", "Zed"]
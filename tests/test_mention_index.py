@@ -0,0 +1,85 @@
+"""
+Tests for the AKG mention index used by Pass 2 retrieval
+(src/george/ui/src/george/knowledge_extraction/mention_index.py).
+"""
+import importlib.util
+from pathlib import Path
+
+MODULE_PATH = (Path(__file__).parent.parent / 'src' / 'george' / 'ui' / 'src' / 'george'
+               / 'knowledge_extraction' / 'mention_index.py')
+
+# Loaded on its own: the package __init__ pulls in the whole AKG orchestrator
+_spec = importlib.util.spec_from_file_location("akg_mention_index", MODULE_PATH)
+mention_index = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(mention_index)
+
+MentionIndex = mention_index.MentionIndex
+entity_aliases = mention_index.entity_aliases
+normalize_name = mention_index.normalize_name
+
+TEXT = (
+    "Captain Eva Rostova boarded the Citadel. Eva checked the evacuation logs.\n\n"
+    "Later, EVA ROSTOVA met Zed at the citadel gates; Zed's ship was late."
+)
+
+
+def _spans_text(index, spans):
+    return [index.text[start:end] for start, end in spans]
+
+
+def test_normalize_name():
+    assert normalize_name("The  Citadel.") == "citadel"
+    assert normalize_name("The") == "the"
+    assert normalize_name("Captain Eva-Rostova") == "captain eva rostova"
+
+
+def test_entity_aliases():
+    assert entity_aliases("Captain Eva Rostova", "Character") == ["Captain Eva Rostova", "Eva Rostova", "Eva"]
+    assert entity_aliases("The Citadel", "Location") == ["The Citadel", "Citadel"]
+    assert entity_aliases("Zed", "Character") == ["Zed"]
+
+
+def test_find_is_whole_word_and_case_insensitive():
+    index = MentionIndex(TEXT)
+
+    # "evacuation" is not a mention of "Eva"
+    assert _spans_text(index, index.find(["Eva"])) == ["Eva", "Eva", "EVA"]
+    assert _spans_text(index, index.find(["Citadel"])) == ["Citadel", "citadel"]
+    assert _spans_text(index, index.find(["Zed"])) == ["Zed", "Zed"]
+    assert index.find(["Nobody"]) == []
+    assert index.find(["", "..."]) == []
+
+
+def test_find_counts_nested_alias_once():
+    index = MentionIndex(TEXT)
+
+    spans = index.find(entity_aliases("Captain Eva Rostova", "Character"))
+    assert _spans_text(index, spans) == ["Captain Eva Rostova", "Eva", "EVA ROSTOVA"]
+    assert spans == sorted(spans)
+
+
+def test_windows_snap_to_words_and_merge():
+    index = MentionIndex("alpha beta gamma delta epsilon zeta eta theta")
+    beta, delta = index.find(["beta"])[0], index.find(["delta"])[0]
+
+    # 3 characters on each side would cut "alpha" and "gamma" in half
+    assert _spans_text(index, index.windows([beta], 3)) == ["alpha beta gamma"]
+    # Overlapping windows are merged into one
+    assert _spans_text(index, index.windows([beta, delta], 3)) == ["alpha beta gamma delta epsilon"]
+    assert index.windows([], 3) == []
+
+
+def test_windows_are_clamped_to_text():
+    index = MentionIndex("Zed waits.")
+
+    assert index.windows(index.find(["Zed"]), 1000) == [(0, len("Zed waits."))]
+
+
+def test_excerpts_are_labelled_in_order_without_offsets():
+    index = MentionIndex(TEXT)
+    windows = index.windows(index.find(["Zed"]), 10)
+
+    excerpts = index.excerpts(windows)
+    assert excerpts.startswith("[Excerpt 1]\n")
+    assert "Zed" in excerpts
+    assert str(windows[0][0]) not in excerpts.split("\n")[0]
@@ -0,0 +1,100 @@
+"""
+Tests for single-pass fact gathering in the AKG profile builder: splitting a
+slice answer into per-entity facts and finding names at slice boundaries
+(src/george/ui/src/george/knowledge_extraction/profile_builder.py).
+"""
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+# The AKG modules import each other as knowledge_extraction.*
+sys.path.insert(0, str(Path(__file__).parent.parent / 'src' / 'george' / 'ui' / 'src' / 'george'))
+
+profile_builder = pytest.importorskip("knowledge_extraction.profile_builder")
+from knowledge_extraction.entity_extractor import Entity
+
+ProfileBuilder = profile_builder.ProfileBuilder
+SLICE_SIZE = profile_builder.SLICE_SIZE
+
+EVA = ("Eva", "character")
+CITADEL = ("Citadel", "location")
+KESSEL_PERSON = ("Kessel", "character")
+KESSEL_PLACE = ("Kessel", "location")
+
+
+class ScriptedAI:
+    """Answers every slice prompt with the next scripted response."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.prompts = []
+
+    def generate_response(self, prompt, temperature=None):
+        self.prompts.append(prompt)
+        return self.responses.pop(0)
+
+
+def test_facts_are_matched_by_label():
+    response = json.dumps({"Eva (character)": "Tall.", "citadel (LOCATION)": "Grey walls."})
+
+    assert ProfileBuilder._parse_facts(response, [EVA, CITADEL]) == {EVA: "Tall.", CITADEL: "Grey walls."}
+
+
+def test_bare_name_is_accepted_when_unambiguous():
+    response = '```json\n{"Eva": "Tall.", "Citadel": ""}\n```'
+
+    assert ProfileBuilder._parse_facts(response, [EVA, CITADEL]) == {EVA: "Tall."}
+
+
+def test_same_name_of_different_types_needs_the_type():
+    keys = [KESSEL_PERSON, KESSEL_PLACE]
+
+    assert ProfileBuilder._parse_facts(json.dumps({"Kessel": "Ambiguous."}), keys) == {}
+    response = json.dumps({"Kessel (character)": "A pilot.", "Kessel (location)": "A moon."})
+    assert ProfileBuilder._parse_facts(response, keys) == {KESSEL_PERSON: "A pilot.", KESSEL_PLACE: "A moon."}
+
+
+def test_list_values_become_bullets():
+    response = json.dumps({"Eva (character)": ["Tall", "Quiet"], "Citadel (location)": []})
+
+    assert ProfileBuilder._parse_facts(response, [EVA, CITADEL]) == {EVA: "- Tall\n- Quiet"}
+
+
+@pytest.mark.parametrize("response", [None, "", "no json here", '["Eva"]', '{"Zed (character)": "Unlisted."}'])
+def test_unusable_answers_yield_no_facts(response):
+    assert ProfileBuilder._parse_facts(response, [EVA]) == {}
+
+
+def test_name_counts_only_in_the_slice_that_owns_its_start():
+    at_end = "x" * (SLICE_SIZE - 2) + "Eva" + "y" * 100
+    assert ProfileBuilder._names_in_slice(["Eva"], at_end) == ["Eva"]
+
+    in_overlap = "x" * SLICE_SIZE + "Eva" + "y" * 100
+    assert ProfileBuilder._names_in_slice(["Eva"], in_overlap) == []
+
+
+def test_name_across_a_boundary_is_seen_exactly_once():
+    for start in (SLICE_SIZE - 2, SLICE_SIZE):
+        text = "x" * start + "Eva" + "y" * SLICE_SIZE
+        slices = ProfileBuilder.slice_text(text)
+
+        owners = [i for i, (_, chunk) in enumerate(slices) if ProfileBuilder._names_in_slice(["Eva"], chunk)]
+        assert owners == [start // SLICE_SIZE]
+
+
+def test_collect_facts_keeps_same_name_entities_apart(tmp_path):
+    ai = ScriptedAI(json.dumps({"Kessel (character)": "A pilot.", "Kessel (location)": "A moon."}))
+    builder = ProfileBuilder(ai, str(tmp_path))
+    entities = [Entity("Kessel", "character", 0), Entity("Kessel", "location", 0), Entity("Zed", "character", 0)]
+
+    facts = builder.collect_facts("Kessel flew to Kessel.", entities)
+    assert facts == {
+        KESSEL_PERSON: [{"chunk": 0, "details": "A pilot."}],
+        KESSEL_PLACE: [{"chunk": 0, "details": "A moon."}],
+        ("Zed", "character"): [],
+    }
+    # One call for the slice, listing only the entities it mentions
+    [prompt] = ai.prompts
+    assert "- Kessel (character)\n- Kessel (location)\n" in prompt and "Zed" not in prompt
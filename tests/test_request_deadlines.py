@@ -0,0 +1,205 @@
+"""
+Tests for end-to-end request deadlines: reading X-Request-Budget-Ms,
+forwarding the remaining budget, and budget-aware retries in
+ResilientServiceClient (backend/service_utils.py).
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+flask = pytest.importorskip("flask")
+requests = pytest.importorskip("requests")
+
+# Backend modules import each other by bare name
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend'))
+
+import service_utils
+from service_utils import (
+    DEADLINE_HEADER, DeadlineExceeded, ResilientServiceClient, clear_request_deadline,
+    get_deadline_headers, get_remaining_budget, init_request_deadlines, set_request_deadline
+)
+
+
+class FakeTime:
+    """Stands in for the time module inside service_utils."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class FakeResponse:
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+        self.text = ""
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code}", response=self)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeTime()
+    monkeypatch.setattr(service_utils, "time", clock)
+    yield clock
+    clear_request_deadline()
+
+
+class FakeService:
+    """Replaces requests.request; each call takes 1s and fails to connect unless an outcome is queued."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.calls = []
+        self.outcomes = []
+
+    def request(self, method, url, timeout=None, headers=None, **kwargs):
+        self.calls.append({"timeout": timeout, "headers": dict(headers)})
+        self.clock.now += 1
+        outcome = self.outcomes.pop(0) if self.outcomes else requests.exceptions.ConnectionError("refused")
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+@pytest.fixture
+def service(monkeypatch, clock):
+    service = FakeService(clock)
+    monkeypatch.setattr(service_utils.requests, "request", service.request)
+    return service
+
+
+def _app(**options):
+    app = flask.Flask(__name__)
+    init_request_deadlines(app, **options)
+
+    @app.route("/budget")
+    def budget():
+        return flask.jsonify({"remaining": get_remaining_budget()})
+
+    @app.route("/upload")
+    def upload():
+        return flask.jsonify({"remaining": get_remaining_budget()})
+
+    @app.route("/expired")
+    def expired():
+        raise DeadlineExceeded("too late")
+
+    return app.test_client()
+
+
+def test_header_sets_the_deadline(clock):
+    client = _app()
+
+    assert client.get("/budget", headers={DEADLINE_HEADER: "1500"}).get_json()["remaining"] == 1.5
+    # No header and no default: no deadline
+    assert client.get("/budget").get_json()["remaining"] is None
+    # The deadline does not leak into the next request on the same thread
+    assert get_remaining_budget() is None
+
+
+def test_gateway_default_budget_caps_the_header(clock):
+    client = _app(default_budget=45.0)
+
+    assert client.get("/budget").get_json()["remaining"] == 45.0
+    assert client.get("/budget", headers={DEADLINE_HEADER: "600000"}).get_json()["remaining"] == 45.0
+    assert client.get("/budget", headers={DEADLINE_HEADER: "not-a-number"}).get_json()["remaining"] == 45.0
+
+
+def test_exempt_endpoints_get_no_deadline(clock):
+    client = _app(default_budget=45.0, exempt_endpoints={"upload"})
+
+    assert client.get("/upload").get_json()["remaining"] is None
+    assert client.get("/budget").get_json()["remaining"] == 45.0
+
+
+def test_exhausted_budget_is_rejected_with_504(clock):
+    client = _app()
+
+    assert client.get("/budget", headers={DEADLINE_HEADER: "0"}).status_code == 504
+    assert client.get("/expired").status_code == 504
+
+
+def test_deadline_headers_forward_the_remaining_budget(clock):
+    assert get_deadline_headers() == {}
+
+    set_request_deadline(2.0)
+    clock.now += 0.75
+    assert get_deadline_headers() == {DEADLINE_HEADER: "1250"}
+    clock.now += 5
+    assert get_deadline_headers() == {DEADLINE_HEADER: "0"}
+
+
+def test_attempts_forward_budget_and_fit_timeout(service):
+    client = ResilientServiceClient("http://svc", max_retries=3, timeout=10)
+    service.outcomes.append(FakeResponse(200))
+    set_request_deadline(4.0)
+
+    client.get("/query", headers={"X-User-ID": "alice"})
+    [call] = service.calls
+    assert call["timeout"] == 4.0
+    assert call["headers"][DEADLINE_HEADER] == "4000"
+    assert call["headers"]["X-User-ID"] == "alice"
+
+
+def test_each_retry_forwards_what_is_left(service, monkeypatch):
+    client = ResilientServiceClient("http://svc", max_retries=2, timeout=10)
+    monkeypatch.setattr(client, "_backoff_delay", lambda attempt: 0.5)
+    service.outcomes.extend([requests.exceptions.ConnectionError("refused"), FakeResponse(200)])
+    set_request_deadline(10.0)
+
+    client.get("/query")
+    # 1s for the first attempt, 0.5s backoff
+    assert [call["headers"][DEADLINE_HEADER] for call in service.calls] == ["10000", "8500"]
+    assert [call["timeout"] for call in service.calls] == [10, 8.5]
+
+
+def test_retry_that_cannot_fit_raises_before_sleeping(service, clock, monkeypatch):
+    client = ResilientServiceClient("http://svc", max_retries=3, timeout=10)
+    monkeypatch.setattr(client, "_backoff_delay", lambda attempt: 2.0)
+    set_request_deadline(3.0)
+
+    with pytest.raises(DeadlineExceeded) as raised:
+        client.get("/query")
+    assert isinstance(raised.value.__cause__, requests.exceptions.ConnectionError)
+    assert len(service.calls) == 1
+    assert clock.sleeps == []
+
+
+def test_expired_budget_raises_without_calling(service):
+    client = ResilientServiceClient("http://svc", max_retries=3)
+    set_request_deadline(0)
+
+    with pytest.raises(DeadlineExceeded):
+        client.get("/query")
+    assert service.calls == []
+
+
+def test_timeout_cut_by_the_budget_is_not_a_service_failure(service):
+    client = ResilientServiceClient("http://svc", max_retries=3, timeout=10)
+    service.outcomes.append(requests.exceptions.ReadTimeout("slow"))
+    set_request_deadline(2.0)
+
+    with pytest.raises(DeadlineExceeded):
+        client.get("/query")
+    assert client.get_breaker("/query").get_status()["total_failures"] == 0
+
+
+def test_without_deadline_all_retries_run(service, clock, monkeypatch):
+    client = ResilientServiceClient("http://svc", max_retries=3, timeout=10)
+    monkeypatch.setattr(client, "_backoff_delay", lambda attempt: 2.0)
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client.get("/query")
+    assert len(service.calls) == 3
+    assert clock.sleeps == [2.0, 2.0]
+    assert DEADLINE_HEADER not in service.calls[0]["headers"]
@@ -0,0 +1,82 @@
+"""
+Tests for incremental wiki generation state (backend/wiki_state.py).
+"""
+import sys
+from pathlib import Path
+
+# Backend modules import each other by bare name
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend'))
+
+from wiki_state import (
+    WikiStateStore, chunk_hash, diff_chunks, entity_name, find_mentions, relationship_support
+)
+
+
+def test_diff_chunks_classifies_every_chunk():
+    previous = {"c1": "h1", "c2": "h2", "c3": "h3"}
+    current = {"c1": "h1", "c2": "h2-edited", "c4": "h4"}
+
+    assert diff_chunks(previous, current) == {
+        "added": ["c4"],
+        "changed": ["c2"],
+        "removed": ["c3"],
+        "unchanged": ["c1"],
+    }
+
+
+def test_diff_chunks_against_empty_state_is_all_added():
+    diff = diff_chunks({}, {"b": "h", "a": "h"})
+
+    assert diff["added"] == ["a", "b"]
+    assert diff["changed"] == diff["removed"] == diff["unchanged"] == []
+
+
+def test_chunk_hash_is_content_based():
+    assert chunk_hash("same text") == chunk_hash("same text")
+    assert chunk_hash("same text") != chunk_hash("same text.")
+
+
+def test_entity_name_from_filename():
+    assert entity_name("Harry_Potter.md") == "Harry Potter"
+    assert entity_name("the-burrow.md") == "the burrow"
+
+
+def test_find_mentions_prefers_longest_whole_word_name():
+    chunks = {
+        "c1": "Harry Potter waved.",
+        "c2": "harry laughed at Harrison.",
+        "c3": "Nobody here.",
+    }
+    names = {"Harry_Potter.md": "Harry Potter", "Harry.md": "Harry"}
+
+    assert find_mentions(chunks, names) == {"c1": {"Harry_Potter.md"}, "c2": {"Harry.md"}}
+    assert find_mentions(chunks, {}) == {}
+
+
+def test_store_replaces_state_atomically(tmp_path):
+    store = WikiStateStore(db_path=str(tmp_path / "wiki_state.db"))
+    assert store.load("p1") == {}
+
+    store.replace("p1", {
+        "c1": {"hash": "h1", "files": ["b.md", "a.md"], "relationships": [("A", "knows", "B")]},
+        "c2": {"hash": "h2", "files": [], "relationships": []},
+    }, job_id="job-1")
+    store.replace("p2", {"c9": {"hash": "h9"}})
+    assert store.load("p1")["c1"] == {"hash": "h1", "files": ["a.md", "b.md"], "relationships": [["A", "knows", "B"]]}
+
+    store.replace("p1", {"c2": {"hash": "h2b", "files": ["a.md"], "relationships": []}})
+    assert store.load("p1") == {"c2": {"hash": "h2b", "files": ["a.md"], "relationships": []}}
+    assert list(store.load("p2")) == ["c9"]
+
+    store.clear("p1")
+    assert store.load("p1") == {}
+
+
+def test_relationship_support_counts_lists_not_repeats():
+    support = relationship_support([
+        [("A", "knows", "B"), ["A", "knows", "B"], ("A", "fears", "C")],
+        [("A", "knows", "B")],
+        [],
+    ])
+
+    assert support == {("A", "knows", "B"): 2, ("A", "fears", "C"): 1}
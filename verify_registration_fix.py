@@ -151,6 +151,7 @@ def main():
     print("🔍 Testing Python imports...")
     try:
         sys.path.insert(0, str(auth_server_dir))
+        sys.path.insert(0, str(auth_server_dir.parent / 'backend'))  # db_utils
         from pending_billing_queue import PendingBillingQueue
         print("✓ PendingBillingQueue can be imported")
         